@@ -1,26 +1,67 @@
 /**
  * WebSocket server for Python-Node.js bridge communication.
  * Security: binds to 127.0.0.1 only; optional BRIDGE_TOKEN auth.
+ *
+ * Protocol v2 (negotiated by a `hello` frame from the client):
+ * - sends carry an `id` and are answered with `{type: 'ack', id, ok, error?, retry?}`
+ * - `{type: 'batch', items: [...]}` carries several sends in one frame
+ * - frames are msgpack (binary) when both sides support it, so media is raw bytes
+ * - sends run concurrently across chats and in order within a chat
+ * - a repeated id (a client retry) is acked again without sending twice
+ * Clients that never say hello get protocol v1: one JSON send per frame, answered with `sent`.
  */
 
 import { WebSocketServer, WebSocket } from 'ws';
-import { WhatsAppClient, InboundMessage } from './whatsapp.js';
+import { encode, decode } from '@msgpack/msgpack';
+import { WhatsAppClient, OutboundMedia } from './whatsapp.js';
+
+const PROTOCOL_VERSION = 2;
+const MAX_BATCH = 50;
+const REMEMBERED_IDS = 2000;
 
 interface SendCommand {
   type: 'send';
+  id?: string;
   to: string;
   text: string;
+  media?: OutboundMedia[];
+}
+
+interface BatchCommand {
+  type: 'batch';
+  items: SendCommand[];
+}
+
+interface HelloCommand {
+  type: 'hello';
+  version: number;
+  encodings?: string[];
 }
 
+type Command = SendCommand | BatchCommand | HelloCommand;
+
 interface BridgeMessage {
-  type: 'message' | 'status' | 'qr' | 'error';
+  type: 'message' | 'status' | 'qr' | 'error' | 'ack' | 'hello' | 'sent';
   [key: string]: unknown;
 }
 
+interface Ack {
+  ok: boolean;
+  error?: string;
+  retry?: boolean;
+}
+
+interface ClientState {
+  version: number;
+  binary: boolean;
+}
+
 export class BridgeServer {
   private wss: WebSocketServer | null = null;
   private wa: WhatsAppClient | null = null;
-  private clients: Set<WebSocket> = new Set();
+  private clients: Map<WebSocket, ClientState> = new Map();
+  private chatTails: Map<string, Promise<unknown>> = new Map();
+  private results: Map<string, Promise<Ack>> = new Map();
 
   constructor(private port: number, private authDir: string, private token?: string) {}
 
@@ -68,17 +109,18 @@ export class BridgeServer {
   }
 
   private setupClient(ws: WebSocket): void {
-    this.clients.add(ws);
+    const state: ClientState = { version: 1, binary: false };
+    this.clients.set(ws, state);
 
-    ws.on('message', async (data) => {
+    ws.on('message', (data, isBinary) => {
+      let cmd: Command;
       try {
-        const cmd = JSON.parse(data.toString()) as SendCommand;
-        await this.handleCommand(cmd);
-        ws.send(JSON.stringify({ type: 'sent', to: cmd.to }));
+        cmd = (isBinary ? decode(data as Uint8Array) : JSON.parse(data.toString())) as Command;
       } catch (error) {
-        console.error('Error handling command:', error);
-        ws.send(JSON.stringify({ type: 'error', error: String(error) }));
+        this.reply(ws, { type: 'error', error: `Invalid frame: ${String(error)}` });
+        return;
       }
+      this.handleCommand(ws, state, cmd);
     });
 
     ws.on('close', () => {
@@ -92,24 +134,107 @@ export class BridgeServer {
     });
   }
 
-  private async handleCommand(cmd: SendCommand): Promise<void> {
-    if (cmd.type === 'send' && this.wa) {
-      await this.wa.sendMessage(cmd.to, cmd.text);
+  private handleCommand(ws: WebSocket, state: ClientState, cmd: Command): void {
+    if (cmd.type === 'hello') {
+      state.version = Math.min(cmd.version || 1, PROTOCOL_VERSION);
+      const binary = state.version >= 2 && (cmd.encodings || []).includes('msgpack');
+      // The hello reply is always JSON; later frames use the agreed encoding
+      this.reply(ws, {
+        type: 'hello',
+        version: state.version,
+        encoding: binary ? 'msgpack' : 'json',
+        maxBatch: MAX_BATCH,
+      });
+      state.binary = binary;
+      return;
+    }
+
+    if (cmd.type === 'batch') {
+      for (const item of (cmd.items || []).slice(0, MAX_BATCH)) {
+        this.acked(ws, item);
+      }
+      return;
+    }
+
+    if (cmd.type === 'send') {
+      if (state.version >= 2 && cmd.id) {
+        this.acked(ws, cmd);
+        return;
+      }
+      // Protocol v1: reply once the send finishes
+      this.deliver(cmd).then((ack) => {
+        this.reply(ws, ack.ok ? { type: 'sent', to: cmd.to } : { type: 'error', error: ack.error });
+      });
     }
   }
 
-  private broadcast(msg: BridgeMessage): void {
-    const data = JSON.stringify(msg);
-    for (const client of this.clients) {
-      if (client.readyState === WebSocket.OPEN) {
-        client.send(data);
+  /** Deliver a v2 send (once per id) and ack it. */
+  private acked(ws: WebSocket, cmd: SendCommand): void {
+    const id = String(cmd.id);
+    let result = this.results.get(id);
+    if (!result) {
+      result = this.deliver(cmd);
+      this.results.set(id, result);
+      // Failed sends may be retried under the same id
+      result.then((ack) => { if (!ack.ok) this.results.delete(id); });
+      if (this.results.size > REMEMBERED_IDS) {
+        this.results.delete(this.results.keys().next().value as string);
       }
     }
+    result.then((ack) => this.reply(ws, { type: 'ack', id, ...ack }));
+  }
+
+  /** Send after the previous message to the same chat, so one chat's messages keep their order. */
+  private deliver(cmd: SendCommand): Promise<Ack> {
+    const previous = this.chatTails.get(cmd.to) || Promise.resolve();
+    const result: Promise<Ack> = previous.then(async () => {
+      if (!this.wa) return { ok: false, error: 'Bridge stopping', retry: true };
+      try {
+        await this.wa.sendMessage(cmd.to, cmd.text, cmd.media || []);
+        return { ok: true };
+      } catch (error) {
+        console.error('Error sending message:', error);
+        const message = String(error);
+        return { ok: false, error: message, retry: message.includes('Not connected') };
+      }
+    });
+    this.chatTails.set(cmd.to, result);
+    result.then(() => {
+      if (this.chatTails.get(cmd.to) === result) this.chatTails.delete(cmd.to);
+    });
+    return result;
+  }
+
+  private reply(ws: WebSocket, msg: BridgeMessage): void {
+    if (ws.readyState !== WebSocket.OPEN) return;
+    const state = this.clients.get(ws);
+    ws.send(this.encodeFor(state, msg));
+  }
+
+  private encodeFor(state: ClientState | undefined, msg: BridgeMessage): Buffer | string {
+    if (state?.binary) {
+      return Buffer.from(encode(msg));
+    }
+    // JSON clients get media bytes as base64
+    const media = msg.media as { data?: Uint8Array } | undefined;
+    if (media?.data instanceof Uint8Array) {
+      msg = { ...msg, media: { ...media, data: Buffer.from(media.data).toString('base64') } };
+    }
+    return JSON.stringify(msg);
+  }
+
+  private broadcast(msg: BridgeMessage): void {
+    for (const [client, state] of this.clients) {
+      if (client.readyState !== WebSocket.OPEN) continue;
+      // v1 clients never receive media bytes
+      const out = state.version >= 2 ? msg : { ...msg, media: undefined };
+      client.send(this.encodeFor(state, out));
+    }
   }
 
   async stop(): Promise<void> {
     // Close all client connections
-    for (const client of this.clients) {
+    for (const client of this.clients.keys()) {
       client.close();
     }
     this.clients.clear();
@@ -9,6 +9,7 @@ import makeWASocket, {
   useMultiFileAuthState,
   fetchLatestBaileysVersion,
   makeCacheableSignalKeyStore,
+  downloadMediaMessage,
 } from '@whiskeysockets/baileys';
 
 import { Boom } from '@hapi/boom';
@@ -16,6 +17,21 @@ import qrcode from 'qrcode-terminal';
 import pino from 'pino';
 
 const VERSION = '0.1.0';
+// Media larger than this is announced but not passed through
+const MAX_MEDIA_BYTES = parseInt(process.env.BRIDGE_MAX_MEDIA_MB || '20', 10) * 1024 * 1024;
+
+export interface InboundMedia {
+  kind: 'image' | 'video' | 'audio' | 'document';
+  mime: string;
+  name?: string;
+  data: Uint8Array;
+}
+
+export interface OutboundMedia {
+  name: string;
+  mime: string;
+  data: Uint8Array | string; // Raw bytes (msgpack frames) or base64 (JSON frames)
+}
 
 export interface InboundMessage {
   id: string;
@@ -24,6 +40,7 @@ export interface InboundMessage {
   content: string;
   timestamp: number;
   isGroup: boolean;
+  media?: InboundMedia;
 }
 
 export interface WhatsAppClientOptions {
@@ -128,6 +145,7 @@ export class WhatsAppClient {
           content,
           timestamp: msg.messageTimestamp as number,
           isGroup,
+          media: await this.extractMedia(msg),
         });
       }
     });
@@ -147,19 +165,17 @@ export class WhatsAppClient {
       return message.extendedTextMessage.text;
     }
 
-    // Image with caption
-    if (message.imageMessage?.caption) {
-      return `[Image] ${message.imageMessage.caption}`;
+    // Image, video or document, with or without a caption (the file itself is passed as media)
+    if (message.imageMessage) {
+      return `[Image] ${message.imageMessage.caption || ''}`.trim();
     }
 
-    // Video with caption
-    if (message.videoMessage?.caption) {
-      return `[Video] ${message.videoMessage.caption}`;
+    if (message.videoMessage) {
+      return `[Video] ${message.videoMessage.caption || ''}`.trim();
     }
 
-    // Document with caption
-    if (message.documentMessage?.caption) {
-      return `[Document] ${message.documentMessage.caption}`;
+    if (message.documentMessage) {
+      return `[Document] ${message.documentMessage.caption || ''}`.trim();
     }
 
     // Voice/Audio message
@@ -170,12 +186,52 @@ export class WhatsAppClient {
     return null;
   }
 
-  async sendMessage(to: string, text: string): Promise<void> {
+  private async extractMedia(msg: any): Promise<InboundMedia | undefined> {
+    const message = msg.message || {};
+    const kinds: [InboundMedia['kind'], any][] = [
+      ['image', message.imageMessage],
+      ['video', message.videoMessage],
+      ['audio', message.audioMessage],
+      ['document', message.documentMessage],
+    ];
+    const found = kinds.find(([, part]) => part);
+    if (!found) return undefined;
+    const [kind, part] = found;
+    if (Number(part.fileLength || 0) > MAX_MEDIA_BYTES) return undefined;
+    try {
+      const data = (await downloadMediaMessage(msg, 'buffer', {})) as Buffer;
+      return { kind, mime: part.mimetype || 'application/octet-stream', name: part.fileName || undefined, data };
+    } catch (error) {
+      console.error(`Failed to download ${kind}:`, error);
+      return undefined;
+    }
+  }
+
+  async sendMessage(to: string, text: string, media: OutboundMedia[] = []): Promise<void> {
     if (!this.sock) {
       throw new Error('Not connected');
     }
 
-    await this.sock.sendMessage(to, { text });
+    // The text rides along as the first attachment's caption when there is one
+    let caption: string | undefined = text || undefined;
+    for (const item of media) {
+      const data = typeof item.data === 'string' ? Buffer.from(item.data, 'base64') : Buffer.from(item.data);
+      const mimetype = item.mime || 'application/octet-stream';
+      if (mimetype.startsWith('image/')) {
+        await this.sock.sendMessage(to, { image: data, mimetype, caption });
+      } else if (mimetype.startsWith('video/')) {
+        await this.sock.sendMessage(to, { video: data, mimetype, caption });
+      } else if (mimetype.startsWith('audio/')) {
+        await this.sock.sendMessage(to, { audio: data, mimetype, ptt: mimetype.includes('ogg') });
+        continue; // Audio has no caption
+      } else {
+        await this.sock.sendMessage(to, { document: data, mimetype, fileName: item.name, caption });
+      }
+      caption = undefined;
+    }
+    if (caption) {
+      await this.sock.sendMessage(to, { text: caption });
+    }
   }
 
   async disconnect(): Promise<void> {
@@ -0,0 +1,223 @@
+"""Background memory consolidation."""
+
+import asyncio
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import json_repair
+from loguru import logger
+
+from nanobot.agent.memory import MemoryStore, parse_sections, relevant_sections
+from nanobot.agent.usage import UsageLedger
+from nanobot.providers.base import LLMProvider
+from nanobot.session.manager import Session, SessionManager
+from nanobot.utils.files import FILES
+
+MAX_BATCH_SESSIONS = 4  # Sessions folded into one consolidation call
+MAX_BATCH_CHARS = 60_000  # Conversation text per call; a single session may exceed it
+MEMORY_PROMPT_CHARS = 8000  # Existing memory shown to the model, picked by relevance to the conversations
+
+
+@dataclass
+class _Job:
+    key: str
+    messages: list[dict[str, Any]] | None = None  # Set for /new archives; otherwise read from the session
+    end: int = 0  # Absolute index the session is consolidated up to once the job succeeds
+    session: Session | None = None  # The session read; a different one by the end means /new replaced it
+
+
+def _format_messages(messages: list[dict[str, Any]]) -> str:
+    lines = []
+    for m in messages:
+        if not m.get("content"):
+            continue
+        tools = f" [tools: {', '.join(m['tools_used'])}]" if m.get("tools_used") else ""
+        lines.append(f"[{m.get('timestamp', '?')[:16]}] {m['role'].upper()}{tools}: {m['content']}")
+    return "\n".join(lines)
+
+
+class MemoryConsolidator:
+    """
+    Single worker that folds old session messages into MEMORY.md + HISTORY.md.
+
+    Requests are queued per session and coalesce: asking again while a
+    session is already pending is a no-op, and a session is never
+    consolidated by two calls at once. Pending sessions are batched into
+    one LLM call (one history entry each, one shared list of memory
+    operations), which may use a cheaper model than the main agent. The
+    model sees only the memory sections related to the conversations and
+    answers with add/update/delete operations on single facts, which are
+    applied to MEMORY.md as it is when the call returns.
+    """
+
+    def __init__(
+        self,
+        provider: LLMProvider,
+        workspace: Path,
+        sessions: SessionManager,
+        usage: UsageLedger,
+        model: str,
+        memory_window: int = 50,
+    ):
+        self.provider = provider
+        self.sessions = sessions
+        self.usage = usage
+        self.model = model
+        self.memory_window = memory_window
+        self.memory = MemoryStore(workspace)
+        self._queue: list[_Job] = []
+        self._wake = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._task: asyncio.Task | None = None
+
+    def request(self, key: str) -> None:
+        """Consolidate a session's old messages soon (coalesces with a pending request)."""
+        if not any(j.key == key and j.messages is None for j in self._queue):
+            self._enqueue(_Job(key))
+
+    def archive(self, key: str, messages: list[dict[str, Any]]) -> None:
+        """Consolidate messages detached from a session (e.g. by /new)."""
+        if messages:
+            self._enqueue(_Job(key, messages))
+
+    def _enqueue(self, job: _Job) -> None:
+        self._queue.append(job)
+        self._idle.clear()
+        self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def drain(self) -> None:
+        """Wait until every queued request has been processed."""
+        await self._idle.wait()
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while self._queue:
+                batch = self._take_batch()
+                try:
+                    await self._consolidate(batch)
+                except Exception as e:
+                    logger.error(f"Memory consolidation failed: {e}")
+            if not self._queue:
+                self._idle.set()
+
+    def _take_batch(self) -> list[_Job]:
+        """Pop up to MAX_BATCH_SESSIONS jobs for distinct sessions."""
+        batch: list[_Job] = []
+        for job in list(self._queue):
+            if len(batch) >= MAX_BATCH_SESSIONS:
+                break
+            if any(b.key == job.key for b in batch):
+                continue
+            self._queue.remove(job)
+            batch.append(job)
+        return batch
+
+    async def _consolidate(self, batch: list[_Job]) -> None:
+        keep_count = self.memory_window // 2
+        blocks: list[tuple[_Job, str]] = []
+        chars = 0
+        for job in batch:
+            if job.messages is None:
+                session = job.session = await self.sessions.get_or_create_async(job.key)
+                job.end = session.total_messages - keep_count
+                # May reach past the loaded tail, so page older messages in off the loop
+                messages = await asyncio.to_thread(
+                    self.sessions.read_messages, session, session.last_consolidated, job.end,
+                )
+            else:
+                messages = job.messages
+            text = _format_messages(messages)
+            if not text:
+                continue
+            if blocks and chars + len(text) > MAX_BATCH_CHARS:
+                self._queue.insert(0, job)  # Next call
+                continue
+            blocks.append((job, text))
+            chars += len(text)
+        if not blocks:
+            return
+
+        logger.info(f"Memory consolidation started: {len(blocks)} session(s), {chars} chars")
+        current_memory = await FILES.run(self.memory.read_long_term)
+        conversations = "\n\n".join(f"### Session {job.key}\n{text}" for job, text in blocks)
+        sections = parse_sections(current_memory)
+        shown = relevant_sections(sections, conversations, MEMORY_PROMPT_CHARS)
+        outline = ", ".join(s.title for s in sections if s.title) or "(none)"
+        memory_text = "\n\n".join(s.render() for s in shown) or "(empty)"
+        prompt = f"""You are a memory consolidation agent. Process these conversations and return a JSON object with exactly two keys:
+
+1. "history_entries": An object mapping each session name below to a paragraph (2-5 sentences) summarizing its key events/decisions/topics. Start each with a timestamp like [YYYY-MM-DD HH:MM]. Include enough detail to be useful when found by grep search later.
+
+2. "memory_ops": A list of changes to long-term memory, each one of:
+   {{"op": "add", "section": "<section title>", "fact": "<one short fact>"}}
+   {{"op": "update", "section": "<section title>", "old": "<existing fact, verbatim>", "fact": "<replacement>"}}
+   {{"op": "delete", "section": "<section title>", "fact": "<existing fact, verbatim>"}}
+   Record new facts: user location, preferences, personal info, habits, project context, technical decisions, tools/services used. Prefer an existing section; a new title creates a section. Return [] if nothing changed.
+
+## Memory Sections
+{outline}
+
+## Relevant Long-term Memory
+{memory_text}
+
+## Conversations to Process
+{conversations}
+
+Respond with ONLY valid JSON, no markdown fences."""
+
+        response = await self.provider.chat(
+            messages=[
+                {"role": "system", "content": "You are a memory consolidation agent. Respond only with valid JSON."},
+                {"role": "user", "content": prompt},
+            ],
+            model=self.model,
+        )
+        charge_to = blocks[0][0].key if len(blocks) == 1 else "consolidation"
+        await self.usage.record_async(charge_to, self.model, "consolidation", response.usage)
+        text = (response.content or "").strip()
+        if not text:
+            logger.warning("Memory consolidation: LLM returned empty response, skipping")
+            return
+        if text.startswith("```"):
+            text = text.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
+        result = json_repair.loads(text)
+        if not isinstance(result, dict):
+            logger.warning(f"Memory consolidation: unexpected response type, skipping. Response: {text[:200]}")
+            return
+
+        entries = result.get("history_entries")
+        if not isinstance(entries, dict):
+            entries = {blocks[0][0].key: result.get("history_entry")} if len(blocks) == 1 else {}
+        for job, _ in blocks:
+            if entry := entries.get(job.key):
+                await FILES.run(self.memory.append_history, str(entry))
+        ops = result.get("memory_ops")
+        if isinstance(ops, list):
+            if changed := await FILES.run(self.memory.apply_ops, ops):
+                logger.info(f"Memory consolidation: applied {changed} memory change(s)")
+        elif update := result.get("memory_update"):
+            # Models that ignore the ops format still send the whole file
+            replaced = update == current_memory or await FILES.run(self.memory.replace_long_term, current_memory, update)
+            if not replaced:
+                logger.warning("Memory consolidation: MEMORY.md changed during consolidation, keeping it")
+
+        for job, _ in blocks:
+            if job.messages is None:
+                session = await self.sessions.get_or_create_async(job.key)
+                if session is not job.session or session.total_messages < job.end:
+                    # Cleared (or reloaded) during the call: job.end indexes the old conversation
+                    logger.info(f"Memory consolidation: {job.key} was reset meanwhile, not advancing it")
+                    continue
+                session.last_consolidated = max(session.last_consolidated, job.end)
+                logger.info(f"Memory consolidation done: {job.key}, last_consolidated={session.last_consolidated}")
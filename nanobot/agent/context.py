@@ -1,11 +1,11 @@
 """Context builder for assembling agent prompts."""
 
-import base64
-import mimetypes
+import asyncio
 import platform
 from pathlib import Path
 from typing import Any
 
+from nanobot.agent.images import ImagePreparer, max_edge_for_model
 from nanobot.agent.memory import MemoryStore
 from nanobot.agent.skills import SkillsLoader
 
@@ -20,17 +20,20 @@ class ContextBuilder:
     
     BOOTSTRAP_FILES = ["AGENTS.md", "SOUL.md", "USER.md", "TOOLS.md", "IDENTITY.md"]
     
-    def __init__(self, workspace: Path):
+    def __init__(self, workspace: Path, model: str | None = None):
         self.workspace = workspace
         self.memory = MemoryStore(workspace)
         self.skills = SkillsLoader(workspace)
+        self.images = ImagePreparer()
+        self.image_max_edge = max_edge_for_model(model)
     
-    def build_system_prompt(self, skill_names: list[str] | None = None) -> str:
+    def build_system_prompt(self, skill_names: list[str] | None = None, query: str | None = None) -> str:
         """
         Build the system prompt from bootstrap files, memory, and skills.
         
         Args:
             skill_names: Optional list of skills to include.
+            query: The message being answered; picks the memory sections to include.
         
         Returns:
             Complete system prompt.
@@ -46,7 +49,7 @@ class ContextBuilder:
             parts.append(bootstrap)
         
         # Memory context
-        memory = self.memory.get_memory_context()
+        memory = self.memory.get_memory_context(query)
         if memory:
             parts.append(f"# Memory\n\n{memory}")
         
@@ -106,7 +109,7 @@ Only use the 'message' tool when you need to send a message to a specific chat c
 For normal conversation, just respond with text - do not call the message tool.
 
 Always be helpful, accurate, and concise. Before calling tools, briefly tell the user what you're about to do (one short sentence in the user's language).
-When remembering something important, write to {workspace_path}/memory/MEMORY.md
+When remembering something important, write to {workspace_path}/memory/MEMORY.md as a `- fact` line under a `## Section` heading
 To recall past events, grep {workspace_path}/memory/HISTORY.md"""
     
     def _load_bootstrap_files(self) -> str:
@@ -147,7 +150,7 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
         messages = []
 
         # System prompt
-        system_prompt = self.build_system_prompt(skill_names)
+        system_prompt = self.build_system_prompt(skill_names, current_message)
         if channel and chat_id:
             system_prompt += f"\n\n## Current Session\nChannel: {channel}\nChat ID: {chat_id}"
         messages.append({"role": "system", "content": system_prompt})
@@ -161,6 +164,14 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
 
         return messages
 
+    async def prepare_media(self, media: list[str] | None) -> None:
+        """Resize and encode images off the event loop so build_messages hits the cache."""
+        if not media:
+            return
+        await asyncio.gather(*(
+            asyncio.to_thread(self.images.data_url, path, self.image_max_edge) for path in media
+        ))
+
     def _build_user_content(self, text: str, media: list[str] | None) -> str | list[dict[str, Any]]:
         """Build user message content with optional base64-encoded images."""
         if not media:
@@ -168,12 +179,9 @@ To recall past events, grep {workspace_path}/memory/HISTORY.md"""
         
         images = []
         for path in media:
-            p = Path(path)
-            mime, _ = mimetypes.guess_type(path)
-            if not p.is_file() or not mime or not mime.startswith("image/"):
-                continue
-            b64 = base64.b64encode(p.read_bytes()).decode()
-            images.append({"type": "image_url", "image_url": {"url": f"data:{mime};base64,{b64}"}})
+            url = self.images.data_url(path, self.image_max_edge)
+            if url:
+                images.append({"type": "image_url", "image_url": {"url": url}})
         
         if not images:
             return text
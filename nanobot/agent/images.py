@@ -0,0 +1,123 @@
+"""Image preparation for vision requests: downscale, recompress, encode, cache."""
+
+import base64
+import io
+import mimetypes
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from loguru import logger
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    Image = None
+    ImageOps = None
+
+# Longest edge (px) each model family actually uses; larger images are downscaled
+# by the provider anyway, so sending them only costs upload time and tokens.
+MODEL_MAX_EDGE = {
+    "claude": 1568,
+    "anthropic": 1568,
+    "gpt": 2048,
+    "openai": 2048,
+    "o1": 2048,
+    "o3": 2048,
+    "o4": 2048,
+    "gemini": 3072,
+}
+DEFAULT_MAX_EDGE = 1568
+JPEG_QUALITY = 85
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024  # Encoded data URLs held in memory
+
+
+def max_edge_for_model(model: str | None) -> int:
+    """Return the max image edge for a model name such as "anthropic/claude-opus-4-5"."""
+    name = (model or "").lower()
+    for key, edge in MODEL_MAX_EDGE.items():
+        if key in name:
+            return edge
+    return DEFAULT_MAX_EDGE
+
+
+class ImagePreparer:
+    """
+    Turns local image files into data URLs sized for the target model.
+
+    Results are cached by (path, mtime, size, max_edge), so rebuilding a
+    conversation that references the same photo costs a dict lookup rather
+    than another decode/resize/base64 pass. The cache is LRU, bounded by
+    entry count and by total encoded bytes. If Pillow is missing, images
+    are encoded as-is (still cached) and a warning is logged once.
+    """
+
+    def __init__(self, max_entries: int = 64, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._cache: OrderedDict[tuple, str] = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()  # data_url() runs in worker threads
+        self._warned_no_pil = False
+
+    def data_url(self, path: str | Path, max_edge: int = DEFAULT_MAX_EDGE) -> str | None:
+        """Return a data URL for an image file, or None if it is not an image."""
+        p = Path(path)
+        mime, _ = mimetypes.guess_type(str(p))
+        if not mime or not mime.startswith("image/"):
+            return None
+        try:
+            st = p.stat()
+        except OSError:
+            return None
+        key = (str(p), st.st_mtime_ns, st.st_size, max_edge)
+        with self._lock:
+            if (url := self._cache.get(key)) is not None:
+                self._cache.move_to_end(key)
+                return url
+
+        data = p.read_bytes()
+        if PIL_AVAILABLE:
+            try:
+                data, mime = self._shrink(data, mime, max_edge)
+            except Exception as e:
+                logger.warning(f"Image preprocessing failed for {p}, sending original: {e}")
+        elif not self._warned_no_pil:
+            self._warned_no_pil = True
+            logger.warning("Pillow is not installed; images are sent at full resolution")
+        url = f"data:{mime};base64,{base64.b64encode(data).decode()}"
+
+        if len(url) > self.max_bytes:
+            return url  # Too big to cache without evicting everything else
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = url
+                self._cache_bytes += len(url)
+            while len(self._cache) > self.max_entries or self._cache_bytes > self.max_bytes:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= len(evicted)
+        return url
+
+    @staticmethod
+    def _shrink(data: bytes, mime: str, max_edge: int) -> tuple[bytes, str]:
+        """Downscale to max_edge and recompress; keep small originals that don't shrink."""
+        with Image.open(io.BytesIO(data)) as img:
+            if getattr(img, "is_animated", False):
+                return data, mime
+            img = ImageOps.exif_transpose(img)
+            resized = max(img.size) > max_edge
+            if resized:
+                img.thumbnail((max_edge, max_edge), Image.LANCZOS)
+            out = io.BytesIO()
+            if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+                img.save(out, format="PNG", optimize=True)
+                new_mime = "image/png"
+            else:
+                img.convert("RGB").save(out, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+                new_mime = "image/jpeg"
+        encoded = out.getvalue()
+        if not resized and len(encoded) >= len(data):
+            return data, mime
+        return encoded, new_mime
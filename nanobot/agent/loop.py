@@ -3,10 +3,10 @@
 import asyncio
 from contextlib import AsyncExitStack
 import json
-import json_repair
 from pathlib import Path
 import re
 from typing import Any, Awaitable, Callable
+import uuid
 
 from loguru import logger
 
@@ -21,9 +21,13 @@ from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
 from nanobot.agent.tools.message import MessageTool
 from nanobot.agent.tools.spawn import SpawnTool
 from nanobot.agent.tools.cron import CronTool
-from nanobot.agent.memory import MemoryStore
+from nanobot.agent.consolidation import MemoryConsolidator
+from nanobot.agent.progress import ProgressThrottle
 from nanobot.agent.subagent import SubagentManager
-from nanobot.session.manager import Session, SessionManager
+from nanobot.agent.usage import UsageLedger, origin_for_session
+from nanobot.session.manager import SessionManager
+from nanobot.utils import html_extract
+from nanobot.utils.files import FILES
 
 
 class AgentLoop:
@@ -54,6 +58,9 @@ class AgentLoop:
         restrict_to_workspace: bool = False,
         session_manager: SessionManager | None = None,
         mcp_servers: dict | None = None,
+        session_token_budget: int = 0,
+        consolidation_model: str | None = None,
+        progress_interval: float = 3.0,
     ):
         from nanobot.config.schema import ExecToolConfig
         from nanobot.cron.service import CronService
@@ -69,9 +76,17 @@ class AgentLoop:
         self.exec_config = exec_config or ExecToolConfig()
         self.cron_service = cron_service
         self.restrict_to_workspace = restrict_to_workspace
+        self.progress_interval = progress_interval
 
-        self.context = ContextBuilder(workspace)
+        self.context = ContextBuilder(workspace, model=self.model)
         self.sessions = session_manager or SessionManager(workspace)
+        # History is built from the loaded tail, so it must cover the memory window
+        self.sessions.tail_messages = max(self.sessions.tail_messages, memory_window)
+        self.usage = UsageLedger(workspace, session_budget=session_token_budget)
+        self.consolidator = MemoryConsolidator(
+            provider, workspace, self.sessions, self.usage,
+            model=consolidation_model or self.model, memory_window=memory_window,
+        )
         self.tools = ToolRegistry()
         self.subagents = SubagentManager(
             provider=provider,
@@ -83,6 +98,7 @@ class AgentLoop:
             brave_api_key=brave_api_key,
             exec_config=self.exec_config,
             restrict_to_workspace=restrict_to_workspace,
+            usage=self.usage,
         )
         
         self._running = False
@@ -121,7 +137,7 @@ class AgentLoop:
         
         # Cron tool (for scheduling)
         if self.cron_service:
-            self.tools.register(CronTool(self.cron_service))
+            self.tools.register(CronTool(self.cron_service, allowed_dir=allowed_dir))
     
     async def _connect_mcp(self) -> None:
         """Connect to configured MCP servers (one-time, lazy)."""
@@ -168,6 +184,8 @@ class AgentLoop:
         self,
         initial_messages: list[dict],
         on_progress: Callable[[str], Awaitable[None]] | None = None,
+        session_key: str = "cli:direct",
+        origin: str = "user",
     ) -> tuple[str | None, list[str]]:
         """
         Run the agent iteration loop.
@@ -175,6 +193,8 @@ class AgentLoop:
         Args:
             initial_messages: Starting messages for the LLM conversation.
             on_progress: Optional callback to push intermediate content to the user.
+            session_key: Session the token usage is charged to.
+            origin: Usage origin tag (user, heartbeat, cron, system).
 
         Returns:
             Tuple of (final_content, list_of_tools_used).
@@ -187,6 +207,11 @@ class AgentLoop:
         while iteration < self.max_iterations:
             iteration += 1
 
+            if self.usage.over_budget(session_key):
+                logger.warning(f"Session {session_key} exhausted its token budget, stopping after {iteration - 1} iterations")
+                final_content = "I've stopped here because this conversation has used up its daily token budget."
+                break
+
             response = await self.provider.chat(
                 messages=messages,
                 tools=self.tools.get_definitions(),
@@ -194,6 +219,7 @@ class AgentLoop:
                 temperature=self.temperature,
                 max_tokens=self.max_tokens,
             )
+            await self.usage.record_async(session_key, self.model, origin, response.usage)
 
             if response.has_tool_calls:
                 if on_progress:
@@ -268,6 +294,8 @@ class AgentLoop:
     def stop(self) -> None:
         """Stop the agent loop."""
         self._running = False
+        self.consolidator.stop()
+        html_extract.shutdown()
         logger.info("Agent loop stopping")
     
     async def _process_message(
@@ -295,34 +323,35 @@ class AgentLoop:
         logger.info(f"Processing message from {msg.channel}:{msg.sender_id}: {preview}")
         
         key = session_key or msg.session_key
-        session = self.sessions.get_or_create(key)
+        session = await self.sessions.get_or_create_async(key)
         
         # Handle slash commands
         cmd = msg.content.strip().lower()
         if cmd == "/new":
-            # Capture messages before clearing (avoid race condition with background task)
-            messages_to_archive = session.messages.copy()
+            # Capture messages before clearing (avoid race condition with background task);
+            # ones already consolidated are in HISTORY.md, so only the rest is archived
+            messages_to_archive = await asyncio.to_thread(
+                self.sessions.read_messages, session, session.last_consolidated,
+            )
             session.clear()
-            self.sessions.save(session)
+            await self.sessions.save_async(session)
             self.sessions.invalidate(session.key)
-
-            async def _consolidate_and_cleanup():
-                temp_session = Session(key=session.key)
-                temp_session.messages = messages_to_archive
-                await self._consolidate_memory(temp_session, archive_all=True)
-
-            asyncio.create_task(_consolidate_and_cleanup())
+            self.consolidator.archive(session.key, messages_to_archive)
             return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
                                   content="New session started. Memory consolidation in progress.")
         if cmd == "/help":
             return OutboundMessage(channel=msg.channel, chat_id=msg.chat_id,
                                   content="🐈 nanobot commands:\n/new — Start a new conversation\n/help — Show available commands")
         
-        if len(session.messages) > self.memory_window:
-            asyncio.create_task(self._consolidate_memory(session))
+        # Consolidate in chunks once the unconsolidated part outgrows the window
+        if session.total_messages - session.last_consolidated > self.memory_window:
+            self.consolidator.request(key)
 
         self._set_tool_context(msg.channel, msg.chat_id)
-        initial_messages = self.context.build_messages(
+        await self.context.prepare_media(msg.media)
+        # Reads bootstrap files, memory and skills from disk
+        initial_messages = await FILES.run(
+            self.context.build_messages,
             history=session.get_history(max_messages=self.memory_window),
             current_message=msg.content,
             media=msg.media if msg.media else None,
@@ -330,15 +359,26 @@ class AgentLoop:
             chat_id=msg.chat_id,
         )
 
-        async def _bus_progress(content: str) -> None:
+        # Progress goes out as one status message per turn, which channels may edit in place
+        progress_id = uuid.uuid4().hex[:12]
+
+        async def _bus_progress(status: str, latest: str) -> None:
             await self.bus.publish_outbound(OutboundMessage(
-                channel=msg.channel, chat_id=msg.chat_id, content=content,
-                metadata=msg.metadata or {},
+                channel=msg.channel, chat_id=msg.chat_id, content=status,
+                metadata={
+                    **(msg.metadata or {}),
+                    "_progress": True, "_progress_id": progress_id, "_progress_latest": latest,
+                },
             ))
 
-        final_content, tools_used = await self._run_agent_loop(
-            initial_messages, on_progress=on_progress or _bus_progress,
-        )
+        throttle = ProgressThrottle(_bus_progress, self.progress_interval)
+        try:
+            final_content, tools_used = await self._run_agent_loop(
+                initial_messages, on_progress=on_progress or throttle.update,
+                session_key=key, origin=origin_for_session(key),
+            )
+        finally:
+            throttle.close()
 
         if final_content is None:
             final_content = "I've completed processing but have no response to give."
@@ -349,13 +389,14 @@ class AgentLoop:
         session.add_message("user", msg.content)
         session.add_message("assistant", final_content,
                             tools_used=tools_used if tools_used else None)
-        self.sessions.save(session)
+        await self.sessions.save_async(session)
         
         return OutboundMessage(
             channel=msg.channel,
             chat_id=msg.chat_id,
             content=final_content,
-            metadata=msg.metadata or {},  # Pass through for channel-specific needs (e.g. Slack thread_ts)
+            # Pass through for channel-specific needs (e.g. Slack thread_ts); the id ends the turn's status message
+            metadata={**(msg.metadata or {}), "_progress_id": progress_id},
         )
     
     async def _process_system_message(self, msg: InboundMessage) -> OutboundMessage | None:
@@ -378,22 +419,25 @@ class AgentLoop:
             origin_chat_id = msg.chat_id
         
         session_key = f"{origin_channel}:{origin_chat_id}"
-        session = self.sessions.get_or_create(session_key)
+        session = await self.sessions.get_or_create_async(session_key)
         self._set_tool_context(origin_channel, origin_chat_id)
-        initial_messages = self.context.build_messages(
+        initial_messages = await FILES.run(
+            self.context.build_messages,
             history=session.get_history(max_messages=self.memory_window),
             current_message=msg.content,
             channel=origin_channel,
             chat_id=origin_chat_id,
         )
-        final_content, _ = await self._run_agent_loop(initial_messages)
+        final_content, _ = await self._run_agent_loop(
+            initial_messages, session_key=session_key, origin="system",
+        )
 
         if final_content is None:
             final_content = "Background task completed."
         
         session.add_message("user", f"[System: {msg.sender_id}] {msg.content}")
         session.add_message("assistant", final_content)
-        self.sessions.save(session)
+        await self.sessions.save_async(session)
         
         return OutboundMessage(
             channel=origin_channel,
@@ -401,91 +445,6 @@ class AgentLoop:
             content=final_content
         )
     
-    async def _consolidate_memory(self, session, archive_all: bool = False) -> None:
-        """Consolidate old messages into MEMORY.md + HISTORY.md.
-
-        Args:
-            archive_all: If True, clear all messages and reset session (for /new command).
-                       If False, only write to files without modifying session.
-        """
-        memory = MemoryStore(self.workspace)
-
-        if archive_all:
-            old_messages = session.messages
-            keep_count = 0
-            logger.info(f"Memory consolidation (archive_all): {len(session.messages)} total messages archived")
-        else:
-            keep_count = self.memory_window // 2
-            if len(session.messages) <= keep_count:
-                logger.debug(f"Session {session.key}: No consolidation needed (messages={len(session.messages)}, keep={keep_count})")
-                return
-
-            messages_to_process = len(session.messages) - session.last_consolidated
-            if messages_to_process <= 0:
-                logger.debug(f"Session {session.key}: No new messages to consolidate (last_consolidated={session.last_consolidated}, total={len(session.messages)})")
-                return
-
-            old_messages = session.messages[session.last_consolidated:-keep_count]
-            if not old_messages:
-                return
-            logger.info(f"Memory consolidation started: {len(session.messages)} total, {len(old_messages)} new to consolidate, {keep_count} keep")
-
-        lines = []
-        for m in old_messages:
-            if not m.get("content"):
-                continue
-            tools = f" [tools: {', '.join(m['tools_used'])}]" if m.get("tools_used") else ""
-            lines.append(f"[{m.get('timestamp', '?')[:16]}] {m['role'].upper()}{tools}: {m['content']}")
-        conversation = "\n".join(lines)
-        current_memory = memory.read_long_term()
-
-        prompt = f"""You are a memory consolidation agent. Process this conversation and return a JSON object with exactly two keys:
-
-1. "history_entry": A paragraph (2-5 sentences) summarizing the key events/decisions/topics. Start with a timestamp like [YYYY-MM-DD HH:MM]. Include enough detail to be useful when found by grep search later.
-
-2. "memory_update": The updated long-term memory content. Add any new facts: user location, preferences, personal info, habits, project context, technical decisions, tools/services used. If nothing new, return the existing content unchanged.
-
-## Current Long-term Memory
-{current_memory or "(empty)"}
-
-## Conversation to Process
-{conversation}
-
-Respond with ONLY valid JSON, no markdown fences."""
-
-        try:
-            response = await self.provider.chat(
-                messages=[
-                    {"role": "system", "content": "You are a memory consolidation agent. Respond only with valid JSON."},
-                    {"role": "user", "content": prompt},
-                ],
-                model=self.model,
-            )
-            text = (response.content or "").strip()
-            if not text:
-                logger.warning("Memory consolidation: LLM returned empty response, skipping")
-                return
-            if text.startswith("```"):
-                text = text.split("\n", 1)[-1].rsplit("```", 1)[0].strip()
-            result = json_repair.loads(text)
-            if not isinstance(result, dict):
-                logger.warning(f"Memory consolidation: unexpected response type, skipping. Response: {text[:200]}")
-                return
-
-            if entry := result.get("history_entry"):
-                memory.append_history(entry)
-            if update := result.get("memory_update"):
-                if update != current_memory:
-                    memory.write_long_term(update)
-
-            if archive_all:
-                session.last_consolidated = 0
-            else:
-                session.last_consolidated = len(session.messages) - keep_count
-            logger.info(f"Memory consolidation done: {len(session.messages)} messages, last_consolidated={session.last_consolidated}")
-        except Exception as e:
-            logger.error(f"Memory consolidation failed: {e}")
-
     async def process_direct(
         self,
         content: str,
@@ -1,30 +1,233 @@
 """Memory system for persistent agent memory."""
 
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Any
 
+from nanobot.utils.files import atomic_write_text
 from nanobot.utils.helpers import ensure_dir
 
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, writes stay atomic via replace
+    fcntl = None
+
+MEMORY_CONTEXT_CHARS = 4000  # Above this, only the sections relevant to the message go into the prompt
+DEFAULT_SECTION = "General"
+
+_WORD_RE = re.compile(r"[^\W\d_]{3,}|\d{2,}")
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]+")
+
+
+@dataclass
+class MemorySection:
+    """A `## Title` block of MEMORY.md; facts are its `- ` bullet lines."""
+    title: str
+    lines: list[str] = field(default_factory=list)
+
+    @property
+    def facts(self) -> list[str]:
+        return [_bullet(line) for line in self.lines if _bullet(line) is not None]
+
+    def render(self) -> str:
+        body = "\n".join(self.lines).strip("\n")
+        if not self.title:
+            return body
+        return f"## {self.title}\n{body}" if body else f"## {self.title}"
+
+
+def _bullet(line: str) -> str | None:
+    stripped = line.strip()
+    if stripped[:2] in ("- ", "* "):
+        return stripped[2:].strip()
+    return None
+
+
+def _norm(text: str) -> str:
+    return " ".join(text.lower().removeprefix("- ").split())
+
+
+def keywords(text: str) -> set[str]:
+    """Lower-cased words for relevance matching; CJK runs become characters and bigrams."""
+    text = text.lower()
+    words = set(_WORD_RE.findall(_CJK_RE.sub(" ", text)))
+    for run in _CJK_RE.findall(text):
+        words.update(run)
+        words.update(run[i:i + 2] for i in range(len(run) - 1))
+    return words
+
+
+def parse_sections(text: str) -> list[MemorySection]:
+    """Split MEMORY.md on `## ` headings; text before the first one is an untitled section."""
+    sections = [MemorySection("")]
+    for line in text.splitlines():
+        if line.startswith("## "):
+            sections.append(MemorySection(line[3:].strip()))
+        else:
+            sections[-1].lines.append(line)
+    if not sections[0].render():
+        sections.pop(0)
+    return sections
+
+
+def render_sections(sections: list[MemorySection]) -> str:
+    return "\n\n".join(s.render() for s in sections if s.title or s.render()).strip() + "\n"
+
+
+def relevant_sections(sections: list[MemorySection], query: str, max_chars: int) -> list[MemorySection]:
+    """
+    The sections that best match query and fit in max_chars, in file order.
+
+    Sections are ranked by keyword overlap (title matches count double);
+    ties keep file order, so general facts near the top win over later ones.
+    """
+    words = keywords(query)
+
+    def score(s: MemorySection) -> int:
+        return 2 * len(words & keywords(s.title)) + len(words & keywords("\n".join(s.lines)))
+
+    ranked = sorted(range(len(sections)), key=lambda i: -score(sections[i]))
+    picked, used = set(), 0
+    for i in ranked:
+        size = len(sections[i].render()) + 2
+        if used + size > max_chars:
+            continue
+        picked.add(i)
+        used += size
+    return [s for i, s in enumerate(sections) if i in picked]
+
+
+def apply_memory_ops(sections: list[MemorySection], ops: list[dict[str, Any]]) -> int:
+    """
+    Apply add/update/delete operations in place; returns how many changed anything.
+
+    Each op is {"op": "add"|"update"|"delete", "section": str, "fact": str},
+    and updates also carry "old", the fact they replace. Facts and section
+    titles match case- and whitespace-insensitively. An update whose old
+    fact is gone becomes an add; a delete of a missing fact is a no-op.
+    A section left without any lines is removed.
+    """
+    changed = 0
+    for op in ops:
+        if not isinstance(op, dict):
+            continue
+        kind = str(op.get("op", "")).lower()
+        title = str(op.get("section") or DEFAULT_SECTION).strip().removeprefix("## ").strip()
+        fact = str(op.get("fact") or "").strip().removeprefix("- ").strip()
+        target = _norm(str(op.get("old") or "")) if kind == "update" else _norm(fact)
+        section = next((s for s in sections if _norm(s.title) == _norm(title)), None)
+        if kind in ("update", "delete") and section is not None and target:
+            index = next(
+                (i for i, line in enumerate(section.lines) if _bullet(line) is not None and _norm(_bullet(line)) == target),
+                None,
+            )
+            if index is not None:
+                if kind == "delete":
+                    del section.lines[index]
+                    if not any(line.strip() for line in section.lines):
+                        sections.remove(section)
+                else:
+                    section.lines[index] = f"- {fact}"
+                changed += 1
+                continue
+        if kind not in ("add", "update") or not fact:
+            continue
+        if section is None:
+            section = MemorySection(title)
+            sections.append(section)
+        if any(_norm(f) == _norm(fact) for f in section.facts):
+            continue
+        while section.lines and not section.lines[-1].strip():
+            section.lines.pop()
+        section.lines.append(f"- {fact}")
+        changed += 1
+    return changed
+
 
 class MemoryStore:
-    """Two-layer memory: MEMORY.md (long-term facts) + HISTORY.md (grep-searchable log)."""
+    """
+    Two-layer memory: MEMORY.md (long-term facts) + HISTORY.md (grep-searchable log).
+
+    MEMORY.md is plain markdown organised as `## Section` headings with one
+    `- fact` bullet per line, so consolidation can add, update or delete
+    single facts instead of rewriting the file, and the prompt can carry
+    just the sections relevant to the current message.
+    """
 
     def __init__(self, workspace: Path):
         self.memory_dir = ensure_dir(workspace / "memory")
         self.memory_file = self.memory_dir / "MEMORY.md"
         self.history_file = self.memory_dir / "HISTORY.md"
+        self._lock_file = self.memory_dir / ".lock"
+
+    @contextmanager
+    def _locked(self):
+        """Serialize writers across nanobot processes sharing the workspace."""
+        with open(self._lock_file, "a") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
 
     def read_long_term(self) -> str:
         if self.memory_file.exists():
             return self.memory_file.read_text(encoding="utf-8")
         return ""
 
+    def _replace(self, content: str) -> None:
+        atomic_write_text(self.memory_file, content)
+
     def write_long_term(self, content: str) -> None:
-        self.memory_file.write_text(content, encoding="utf-8")
+        with self._locked():
+            self._replace(content)
+
+    def replace_long_term(self, expected: str, content: str) -> bool:
+        """Write MEMORY.md only if it still holds `expected`; False if someone else changed it."""
+        with self._locked():
+            if self.read_long_term() != expected:
+                return False
+            self._replace(content)
+            return True
+
+    def sections(self) -> list[MemorySection]:
+        return parse_sections(self.read_long_term())
+
+    def apply_ops(self, ops: list[dict[str, Any]]) -> int:
+        """Apply fact operations (see apply_memory_ops) to the current MEMORY.md."""
+        with self._locked():
+            sections = self.sections()
+            changed = apply_memory_ops(sections, ops)
+            if changed:
+                self._replace(render_sections(sections))
+            return changed
 
     def append_history(self, entry: str) -> None:
-        with open(self.history_file, "a", encoding="utf-8") as f:
+        with self._locked(), open(self.history_file, "a", encoding="utf-8") as f:
             f.write(entry.rstrip() + "\n\n")
 
-    def get_memory_context(self) -> str:
+    def get_memory_context(self, query: str | None = None, max_chars: int = MEMORY_CONTEXT_CHARS) -> str:
+        """
+        Long-term memory for the system prompt.
+
+        Small memories are included whole. Larger ones are cut down to the
+        sections relevant to query, followed by the titles of the rest so
+        the agent knows to read MEMORY.md for them.
+        """
         long_term = self.read_long_term()
-        return f"## Long-term Memory\n{long_term}" if long_term else ""
+        if not long_term:
+            return ""
+        if len(long_term) <= max_chars or query is None:
+            return f"## Long-term Memory\n{long_term}"
+        sections = parse_sections(long_term)
+        picked = relevant_sections(sections, query, max_chars)
+        parts = [s.render() for s in picked]
+        shown = {id(s) for s in picked}
+        omitted = [s.title for s in sections if id(s) not in shown and s.title]
+        if omitted:
+            parts.append(f"(Not shown, see MEMORY.md: {', '.join(omitted)})")
+        return "## Long-term Memory\n" + "\n\n".join(parts)
@@ -0,0 +1,65 @@
+"""Coalesce a turn's progress updates into one throttled status message."""
+
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from nanobot.metrics import METRICS
+
+_UPDATES = METRICS.counter(
+    "nanobot_progress_updates_total", "Agent progress updates by outcome (published or coalesced)", ("result",),
+)
+
+
+class ProgressThrottle:
+    """
+    Collects a turn's progress lines into one status text and publishes it at most
+    once per `interval` seconds.
+
+    An update inside the interval is not sent on its own: it is folded into the
+    status text, which a single trailing publish sends when the interval ends.
+    Channels that can edit messages show each publish as an edit of one status
+    message; the rest receive at most one message per interval.
+    """
+
+    MAX_LINES = 8  # Status shows the latest lines only
+
+    def __init__(self, publish: Callable[[str, str], Awaitable[None]], interval: float):
+        self._publish = publish  # (status text, lines new since the last publish)
+        self.interval = interval
+        self._lines: list[str] = []
+        self._published = 0
+        self._last = float("-inf")
+        self._trailing: asyncio.Task | None = None
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self._lines[-self.MAX_LINES:])
+
+    async def update(self, content: str) -> None:
+        self._lines.append(content)
+        wait = self._last + self.interval - time.monotonic()
+        if wait <= 0 and self._trailing is None:
+            await self._flush()
+        elif self._trailing is None:
+            self._trailing = asyncio.create_task(self._flush_after(wait))
+        else:
+            _UPDATES.inc(result="coalesced")
+
+    async def _flush_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._trailing = None
+        await self._flush()
+
+    async def _flush(self) -> None:
+        self._last = time.monotonic()
+        _UPDATES.inc(result="published")
+        latest = "\n".join(self._lines[self._published:])
+        self._published = len(self._lines)
+        await self._publish(self.text, latest)
+
+    def close(self) -> None:
+        """End the turn; a pending update is dropped, since the reply follows."""
+        if self._trailing:
+            self._trailing.cancel()
+            self._trailing = None
@@ -12,6 +12,7 @@ from nanobot.bus.events import InboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.providers.base import LLMProvider
 from nanobot.agent.tools.registry import ToolRegistry
+from nanobot.agent.usage import UsageLedger
 from nanobot.agent.tools.filesystem import ReadFileTool, WriteFileTool, EditFileTool, ListDirTool
 from nanobot.agent.tools.shell import ExecTool
 from nanobot.agent.tools.web import WebSearchTool, WebFetchTool
@@ -37,6 +38,7 @@ class SubagentManager:
         brave_api_key: str | None = None,
         exec_config: "ExecToolConfig | None" = None,
         restrict_to_workspace: bool = False,
+        usage: UsageLedger | None = None,
     ):
         from nanobot.config.schema import ExecToolConfig
         self.provider = provider
@@ -48,6 +50,7 @@ class SubagentManager:
         self.brave_api_key = brave_api_key
         self.exec_config = exec_config or ExecToolConfig()
         self.restrict_to_workspace = restrict_to_workspace
+        self.usage = usage
         self._running_tasks: dict[str, asyncio.Task[None]] = {}
     
     async def spawn(
@@ -127,8 +130,13 @@ class SubagentManager:
             iteration = 0
             final_result: str | None = None
             
+            session_key = f"{origin['channel']}:{origin['chat_id']}"
             while iteration < max_iterations:
                 iteration += 1
+
+                if self.usage and self.usage.over_budget(session_key):
+                    final_result = "Stopped early: the session's daily token budget is exhausted."
+                    break
                 
                 response = await self.provider.chat(
                     messages=messages,
@@ -137,6 +145,8 @@ class SubagentManager:
                     temperature=self.temperature,
                     max_tokens=self.max_tokens,
                 )
+                if self.usage:
+                    await self.usage.record_async(session_key, self.model, "subagent", response.usage)
                 
                 if response.has_tool_calls:
                     # Add assistant message with tool calls
@@ -1,17 +1,20 @@
 """Cron tool for scheduling reminders and tasks."""
 
+from pathlib import Path
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
+from nanobot.agent.tools.filesystem import _resolve_path
 from nanobot.cron.service import CronService
-from nanobot.cron.types import CronSchedule
+from nanobot.cron.types import CronPrecheck, CronSchedule
 
 
 class CronTool(Tool):
     """Tool to schedule reminders and recurring tasks."""
     
-    def __init__(self, cron_service: CronService):
+    def __init__(self, cron_service: CronService, allowed_dir: Path | None = None):
         self._cron = cron_service
+        self._allowed_dir = allowed_dir  # precheck_file must lie inside it, like the file tools' paths
         self._channel = ""
         self._chat_id = ""
     
@@ -58,6 +61,14 @@ class CronTool(Tool):
                     "type": "string",
                     "description": "ISO datetime for one-time execution (e.g. '2026-02-12T10:30:00')"
                 },
+                "precheck_url": {
+                    "type": "string",
+                    "description": "Only run when this URL's content changes (optional, for recurring checks)"
+                },
+                "precheck_file": {
+                    "type": "string",
+                    "description": "Only run when this file's content changes (optional, for recurring checks)"
+                },
                 "job_id": {
                     "type": "string",
                     "description": "Job ID (for remove)"
@@ -74,11 +85,13 @@ class CronTool(Tool):
         cron_expr: str | None = None,
         tz: str | None = None,
         at: str | None = None,
+        precheck_url: str | None = None,
+        precheck_file: str | None = None,
         job_id: str | None = None,
         **kwargs: Any
     ) -> str:
         if action == "add":
-            return self._add_job(message, every_seconds, cron_expr, tz, at)
+            return self._add_job(message, every_seconds, cron_expr, tz, at, precheck_url, precheck_file)
         elif action == "list":
             return self._list_jobs()
         elif action == "remove":
@@ -92,6 +105,8 @@ class CronTool(Tool):
         cron_expr: str | None,
         tz: str | None,
         at: str | None,
+        precheck_url: str | None = None,
+        precheck_file: str | None = None,
     ) -> str:
         if not message:
             return "Error: message is required for add"
@@ -120,6 +135,18 @@ class CronTool(Tool):
             delete_after = True
         else:
             return "Error: either every_seconds, cron_expr, or at is required"
+        if precheck_url and precheck_file:
+            return "Error: use only one of precheck_url, precheck_file"
+        precheck = None
+        if precheck_url:
+            precheck = CronPrecheck(kind="http", target=precheck_url)
+        elif precheck_file:
+            # Check the workspace restriction before the path is ever watched
+            try:
+                target = _resolve_path(precheck_file, self._allowed_dir)
+            except PermissionError as e:
+                return f"Error: {e}"
+            precheck = CronPrecheck(kind="file", target=str(target))
         
         job = self._cron.add_job(
             name=message[:30],
@@ -129,6 +156,7 @@ class CronTool(Tool):
             channel=self._channel,
             to=self._chat_id,
             delete_after_run=delete_after,
+            precheck=precheck,
         )
         return f"Created job '{job.name}' (id: {job.id})"
     
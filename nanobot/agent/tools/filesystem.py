@@ -4,6 +4,7 @@ from pathlib import Path
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
+from nanobot.utils.files import FILES
 
 
 def _resolve_path(path: str, allowed_dir: Path | None = None) -> Path:
@@ -14,6 +15,10 @@ def _resolve_path(path: str, allowed_dir: Path | None = None) -> Path:
     return resolved
 
 
+def _list_dir(dir_path: Path) -> list[str]:
+    return [f"{'📁 ' if item.is_dir() else '📄 '}{item.name}" for item in sorted(dir_path.iterdir())]
+
+
 class ReadFileTool(Tool):
     """Tool to read file contents."""
     
@@ -49,7 +54,7 @@ class ReadFileTool(Tool):
             if not file_path.is_file():
                 return f"Error: Not a file: {path}"
             
-            content = file_path.read_text(encoding="utf-8")
+            content = await FILES.read_text(file_path)
             return content
         except PermissionError as e:
             return f"Error: {e}"
@@ -91,8 +96,8 @@ class WriteFileTool(Tool):
     async def execute(self, path: str, content: str, **kwargs: Any) -> str:
         try:
             file_path = _resolve_path(path, self._allowed_dir)
-            file_path.parent.mkdir(parents=True, exist_ok=True)
-            file_path.write_text(content, encoding="utf-8")
+            await FILES.run(file_path.parent.mkdir, parents=True, exist_ok=True)
+            await FILES.write_text(file_path, content)
             return f"Successfully wrote {len(content)} bytes to {path}"
         except PermissionError as e:
             return f"Error: {e}"
@@ -141,7 +146,7 @@ class EditFileTool(Tool):
             if not file_path.exists():
                 return f"Error: File not found: {path}"
             
-            content = file_path.read_text(encoding="utf-8")
+            content = await FILES.read_text(file_path)
             
             if old_text not in content:
                 return f"Error: old_text not found in file. Make sure it matches exactly."
@@ -152,7 +157,7 @@ class EditFileTool(Tool):
                 return f"Warning: old_text appears {count} times. Please provide more context to make it unique."
             
             new_content = content.replace(old_text, new_text, 1)
-            file_path.write_text(new_content, encoding="utf-8")
+            await FILES.write_text(file_path, new_content)
             
             return f"Successfully edited {path}"
         except PermissionError as e:
@@ -196,10 +201,7 @@ class ListDirTool(Tool):
             if not dir_path.is_dir():
                 return f"Error: Not a directory: {path}"
             
-            items = []
-            for item in sorted(dir_path.iterdir()):
-                prefix = "📁 " if item.is_dir() else "📄 "
-                items.append(f"{prefix}{item.name}")
+            items = await FILES.run(_list_dir, dir_path)
             
             if not items:
                 return f"Directory {path} is empty"
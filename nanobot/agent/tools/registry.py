@@ -1,8 +1,13 @@
 """Tool registry for dynamic tool management."""
 
+import time
 from typing import Any
 
 from nanobot.agent.tools.base import Tool
+from nanobot.metrics import METRICS
+
+_TOOL_LATENCY = METRICS.histogram("nanobot_tool_duration_seconds", "Tool execution latency", ("tool",))
+_TOOL_ERRORS = METRICS.counter("nanobot_tool_errors_total", "Tool executions that raised", ("tool",))
 
 
 class ToolRegistry:
@@ -53,13 +58,17 @@ class ToolRegistry:
         if not tool:
             return f"Error: Tool '{name}' not found"
 
+        start = time.perf_counter()
         try:
             errors = tool.validate_params(params)
             if errors:
                 return f"Error: Invalid parameters for tool '{name}': " + "; ".join(errors)
             return await tool.execute(**params)
         except Exception as e:
+            _TOOL_ERRORS.inc(tool=name)
             return f"Error executing {name}: {str(e)}"
+        finally:
+            _TOOL_LATENCY.observe(time.perf_counter() - start, tool=name)
     
     @property
     def tool_names(self) -> list[str]:
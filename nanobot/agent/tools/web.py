@@ -1,33 +1,38 @@
 """Web tools: web_search and web_fetch."""
 
-import html
 import json
 import os
-import re
+import time
 from typing import Any
 from urllib.parse import urlparse
 
 import httpx
+from loguru import logger
 
 from nanobot.agent.tools.base import Tool
+from nanobot.metrics import METRICS
+from nanobot.utils import html_extract
 
 # Shared constants
 USER_AGENT = "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_7_2) AppleWebKit/537.36"
 MAX_REDIRECTS = 5  # Limit redirects to prevent DoS attacks
+MAX_FETCH_BYTES = 2 * 1024 * 1024  # Body bytes read per page; the rest is never downloaded
 
+_TEXT_TYPES = ("text/", "application/json", "application/xml", "application/xhtml+xml", "application/javascript")
 
-def _strip_tags(text: str) -> str:
-    """Remove HTML tags and decode entities."""
-    text = re.sub(r'<script[\s\S]*?</script>', '', text, flags=re.I)
-    text = re.sub(r'<style[\s\S]*?</style>', '', text, flags=re.I)
-    text = re.sub(r'<[^>]+>', '', text)
-    return html.unescape(text).strip()
+_FETCH_BYTES = METRICS.counter("nanobot_web_fetch_bytes_total", "Response body bytes read by web_fetch")
+_EXTRACT_LATENCY = METRICS.histogram(
+    "nanobot_web_extract_duration_seconds", "HTML extraction time per fetched page (in the worker)",
+)
 
 
-def _normalize(text: str) -> str:
-    """Normalize whitespace."""
-    text = re.sub(r'[ \t]+', ' ', text)
-    return re.sub(r'\n{3,}', '\n\n', text).strip()
+def _is_text(ctype: str) -> bool:
+    """Whether a content type is worth reading; unknown types are sniffed instead."""
+    return ctype.startswith(_TEXT_TYPES) or ctype.endswith(("+json", "+xml"))
+
+
+def _looks_like_html(head: bytes) -> bool:
+    return head.lstrip()[:256].lower().startswith((b"<!doctype", b"<html"))
 
 
 def _validate_url(url: str) -> tuple[bool, str]:
@@ -91,7 +96,13 @@ class WebSearchTool(Tool):
 
 
 class WebFetchTool(Tool):
-    """Fetch and extract content from a URL using Readability."""
+    """
+    Fetch and extract content from a URL using Readability.
+
+    The body is streamed and cut off at max_bytes, binary responses are
+    rejected from their headers or first bytes, and HTML extraction runs
+    in a worker process so a large page never blocks the event loop.
+    """
     
     name = "web_fetch"
     description = "Fetch URL and extract readable content (HTML → markdown/text)."
@@ -105,12 +116,11 @@ class WebFetchTool(Tool):
         "required": ["url"]
     }
     
-    def __init__(self, max_chars: int = 50000):
+    def __init__(self, max_chars: int = 50000, max_bytes: int = MAX_FETCH_BYTES):
         self.max_chars = max_chars
+        self.max_bytes = max_bytes
     
     async def execute(self, url: str, extractMode: str = "markdown", maxChars: int | None = None, **kwargs: Any) -> str:
-        from readability import Document
-
         max_chars = maxChars or self.max_chars
 
         # Validate URL before fetching
@@ -119,45 +129,55 @@ class WebFetchTool(Tool):
             return json.dumps({"error": f"URL validation failed: {error_msg}", "url": url})
 
         try:
+            start = time.perf_counter()
             async with httpx.AsyncClient(
                 follow_redirects=True,
                 max_redirects=MAX_REDIRECTS,
                 timeout=30.0
             ) as client:
-                r = await client.get(url, headers={"User-Agent": USER_AGENT})
-                r.raise_for_status()
-            
-            ctype = r.headers.get("content-type", "")
-            
-            # JSON
-            if "application/json" in ctype:
-                text, extractor = json.dumps(r.json(), indent=2), "json"
-            # HTML
-            elif "text/html" in ctype or r.text[:256].lower().startswith(("<!doctype", "<html")):
-                doc = Document(r.text)
-                content = self._to_markdown(doc.summary()) if extractMode == "markdown" else _strip_tags(doc.summary())
-                text = f"# {doc.title()}\n\n{content}" if doc.title() else content
-                extractor = "readability"
+                async with client.stream("GET", url, headers={"User-Agent": USER_AGENT}) as r:
+                    r.raise_for_status()
+                    ctype = r.headers.get("content-type", "").lower()
+                    if ctype and not _is_text(ctype):
+                        return json.dumps({"error": f"Unsupported content type: {ctype}", "url": url})
+                    body = bytearray()
+                    bytes_truncated = False
+                    async for chunk in r.aiter_bytes():
+                        if not body and not ctype and b"\x00" in chunk[:1024]:
+                            return json.dumps({"error": "Binary content", "url": url})
+                        body += chunk
+                        if len(body) > self.max_bytes:
+                            del body[self.max_bytes:]
+                            bytes_truncated = True
+                            break
+                    raw = body.decode(r.encoding or "utf-8", errors="replace")
+            fetch_ms = (time.perf_counter() - start) * 1000
+            _FETCH_BYTES.inc(len(body))
+
+            extract_ms = 0.0
+            if "json" in ctype:
+                try:
+                    text, extractor = json.dumps(json.loads(raw), indent=2), "json"
+                except ValueError:  # Cut off by max_bytes
+                    text, extractor = raw, "raw"
+            elif "html" in ctype or _looks_like_html(bytes(body[:1024])):
+                result = await html_extract.extract_async(raw, extractMode)
+                text, extractor = result["text"], "readability"
+                extract_ms = result["seconds"] * 1000
+                _EXTRACT_LATENCY.observe(result["seconds"])
             else:
-                text, extractor = r.text, "raw"
+                text, extractor = raw, "raw"
+            logger.debug(
+                f"web_fetch {url}: {len(body)} bytes, fetch {fetch_ms:.0f}ms, extract {extract_ms:.0f}ms ({extractor})"
+            )
             
-            truncated = len(text) > max_chars
-            if truncated:
+            truncated = bytes_truncated or len(text) > max_chars
+            if len(text) > max_chars:
                 text = text[:max_chars]
             
             return json.dumps({"url": url, "finalUrl": str(r.url), "status": r.status_code,
-                              "extractor": extractor, "truncated": truncated, "length": len(text), "text": text})
+                              "extractor": extractor, "truncated": truncated, "length": len(text),
+                              "bytes": len(body), "fetchMs": round(fetch_ms), "extractMs": round(extract_ms),
+                              "text": text})
         except Exception as e:
             return json.dumps({"error": str(e), "url": url})
-    
-    def _to_markdown(self, html: str) -> str:
-        """Convert HTML to markdown."""
-        # Convert links, headings, lists before stripping tags
-        text = re.sub(r'<a\s+[^>]*href=["\']([^"\']+)["\'][^>]*>([\s\S]*?)</a>',
-                      lambda m: f'[{_strip_tags(m[2])}]({m[1]})', html, flags=re.I)
-        text = re.sub(r'<h([1-6])[^>]*>([\s\S]*?)</h\1>',
-                      lambda m: f'\n{"#" * int(m[1])} {_strip_tags(m[2])}\n', text, flags=re.I)
-        text = re.sub(r'<li[^>]*>([\s\S]*?)</li>', lambda m: f'\n- {_strip_tags(m[1])}', text, flags=re.I)
-        text = re.sub(r'</(p|div|section|article)>', '\n\n', text, flags=re.I)
-        text = re.sub(r'<(br|hr)\s*/?>', '\n', text, flags=re.I)
-        return _normalize(_strip_tags(text))
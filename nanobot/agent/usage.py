@@ -0,0 +1,229 @@
+"""Token usage ledger: per-call accounting, rollups and session budgets."""
+
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from loguru import logger
+
+from nanobot.utils.helpers import ensure_dir
+
+# Origins a call can be attributed to
+ORIGINS = ("user", "subagent", "consolidation", "heartbeat", "cron", "system")
+
+# Compact the ledger into rollups once it grows past this size
+COMPACT_THRESHOLD_BYTES = 4 * 1024 * 1024
+
+
+def origin_for_session(session_key: str) -> str:
+    """Infer the usage origin from a session key ("cron:<id>", "heartbeat", ...)."""
+    if session_key == "heartbeat":
+        return "heartbeat"
+    if session_key.startswith("cron:"):
+        return "cron"
+    return "user"
+
+
+def _day(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+@dataclass
+class UsageTotals:
+    """Aggregated usage for one rollup group."""
+    calls: int = 0
+    prompt: int = 0
+    completion: int = 0
+    cached: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.prompt + self.completion
+
+    def add(self, calls: int, prompt: int, completion: int, cached: int) -> None:
+        self.calls += calls
+        self.prompt += prompt
+        self.completion += completion
+        self.cached += cached
+
+
+class UsageLedger:
+    """
+    Append-only token usage ledger.
+
+    Every LLM call becomes one compact JSON line in usage/ledger.jsonl:
+    {"t": ts, "s": session, "m": model, "o": origin, "p": prompt, "c": completion, "k": cached}.
+    Once the ledger passes COMPACT_THRESHOLD_BYTES and still starts with a
+    previous day's line, those days are folded into usage/rollups.json
+    (keyed day/session/model/origin) and the ledger is rewritten with only
+    today's lines. After a compaction the ledger must grow by another
+    COMPACT_THRESHOLD_BYTES before the next one is considered, so a busy
+    day never triggers a rewrite per call.
+    """
+
+    def __init__(self, workspace: Path, session_budget: int = 0):
+        self.usage_dir = ensure_dir(workspace / "usage")
+        self.ledger_file = self.usage_dir / "ledger.jsonl"
+        self.rollup_file = self.usage_dir / "rollups.json"
+        self.session_budget = session_budget  # Tokens per session per UTC day, 0 = unlimited
+        self._today: str | None = None
+        self._session_today: dict[str, int] = {}
+        self._compact_at = COMPACT_THRESHOLD_BYTES  # Ledger size that triggers the next compaction check
+        self._lock = threading.Lock()  # record() may run in worker threads
+
+    async def record_async(
+        self,
+        session_key: str,
+        model: str,
+        origin: str,
+        usage: dict[str, int],
+    ) -> None:
+        """record() in a worker thread, so ledger I/O never blocks the event loop."""
+        if usage:
+            await asyncio.to_thread(self.record, session_key, model, origin, usage)
+
+    def record(
+        self,
+        session_key: str,
+        model: str,
+        origin: str,
+        usage: dict[str, int],
+    ) -> None:
+        """Append one LLM call to the ledger."""
+        if not usage:
+            return
+        with self._lock:
+            self._record(session_key, model, origin, usage)
+
+    def _record(self, session_key: str, model: str, origin: str, usage: dict[str, int]) -> None:
+        now = time.time()
+        self._ensure_today(now)  # Rebuild totals before appending so this call isn't counted twice
+        prompt = int(usage.get("prompt_tokens") or 0)
+        completion = int(usage.get("completion_tokens") or 0)
+        entry = {
+            "t": round(now, 3), "s": session_key, "m": model, "o": origin,
+            "p": prompt, "c": completion, "k": int(usage.get("cached_tokens") or 0),
+        }
+        try:
+            with open(self.ledger_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, separators=(",", ":"), ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"Usage ledger write failed: {e}")
+            return
+
+        self._session_today[session_key] = self._session_today.get(session_key, 0) + prompt + completion
+
+        size = self.ledger_file.stat().st_size
+        if size > self._compact_at:
+            if self._has_old_lines(now):
+                self.compact()
+                size = self.ledger_file.stat().st_size
+            self._compact_at = size + COMPACT_THRESHOLD_BYTES
+
+    def _has_old_lines(self, now: float) -> bool:
+        """True if the ledger's first (oldest) line is from a previous UTC day."""
+        first = next(self._iter_ledger(), None)
+        return first is not None and _day(first["t"]) < _day(now)
+
+    def session_tokens_today(self, session_key: str) -> int:
+        """Tokens the session has used since UTC midnight."""
+        self._ensure_today(time.time())
+        return self._session_today.get(session_key, 0)
+
+    def over_budget(self, session_key: str) -> bool:
+        """True if the session has exhausted its daily token budget."""
+        return self.session_budget > 0 and self.session_tokens_today(session_key) >= self.session_budget
+
+    def _ensure_today(self, now: float) -> None:
+        """Reset (and lazily rebuild from the ledger) per-session totals at day change."""
+        today = _day(now)
+        if today == self._today:
+            return
+        self._today = today
+        self._session_today = {}
+        for e in self._iter_ledger():
+            if _day(e["t"]) == today:
+                self._session_today[e["s"]] = self._session_today.get(e["s"], 0) + e["p"] + e["c"]
+
+    def _iter_ledger(self) -> Iterator[dict[str, Any]]:
+        if not self.ledger_file.exists():
+            return
+        with open(self.ledger_file, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def _load_rollups(self) -> dict[str, list[int]]:
+        if not self.rollup_file.exists():
+            return {}
+        try:
+            return json.loads(self.rollup_file.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Failed to load usage rollups: {e}")
+            return {}
+
+    def compact(self) -> None:
+        """Fold ledger entries from previous days into rollups.json."""
+        today = _day(time.time())
+        rollups = self._load_rollups()
+        keep: list[dict[str, Any]] = []
+        for e in self._iter_ledger():
+            day = _day(e["t"])
+            if day == today:
+                keep.append(e)
+                continue
+            key = "|".join((day, e["s"], e["m"], e["o"]))
+            row = rollups.setdefault(key, [0, 0, 0, 0])
+            row[0] += 1
+            row[1] += e["p"]
+            row[2] += e["c"]
+            row[3] += e.get("k", 0)
+
+        tmp = self.rollup_file.with_suffix(".tmp")
+        tmp.write_text(json.dumps(rollups, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(self.rollup_file)
+        tmp = self.ledger_file.with_suffix(".tmp")
+        tmp.write_text(
+            "".join(json.dumps(e, separators=(",", ":"), ensure_ascii=False) + "\n" for e in keep),
+            encoding="utf-8",
+        )
+        tmp.replace(self.ledger_file)
+
+    def report(self, group_by: str = "session", days: int | None = None) -> dict[str, UsageTotals]:
+        """
+        Aggregate usage from rollups and the live ledger.
+
+        Args:
+            group_by: One of "session", "model", "origin", "day".
+            days: Only include the last N days (None = everything).
+
+        Returns:
+            Mapping of group value to totals.
+        """
+        fields = ("day", "session", "model", "origin")
+        if group_by not in fields:
+            raise ValueError(f"group_by must be one of {fields}")
+        idx = fields.index(group_by)
+        cutoff = _day(time.time() - (days - 1) * 86400) if days else ""
+
+        out: dict[str, UsageTotals] = {}
+        for key, (calls, prompt, completion, cached) in self._load_rollups().items():
+            day, _, rest = key.partition("|")
+            parts = [day, *rest.rsplit("|", 2)]  # Session keys may contain "|"
+            if len(parts) != 4 or day < cutoff:
+                continue
+            out.setdefault(parts[idx], UsageTotals()).add(calls, prompt, completion, cached)
+        for e in self._iter_ledger():
+            day = _day(e["t"])
+            if day < cutoff:
+                continue
+            value = (day, e["s"], e["m"], e["o"])[idx]
+            out.setdefault(value, UsageTotals()).add(1, e["p"], e["c"], e.get("k", 0))
+        return out
@@ -6,6 +6,9 @@ from typing import Callable, Awaitable
 from loguru import logger
 
 from nanobot.bus.events import InboundMessage, OutboundMessage
+from nanobot.metrics import METRICS
+
+_BUS_DEPTH = METRICS.gauge("nanobot_bus_queue_depth", "Pending messages on the bus", ("queue",))
 
 
 class MessageBus:
@@ -21,6 +24,8 @@ class MessageBus:
         self.outbound: asyncio.Queue[OutboundMessage] = asyncio.Queue()
         self._outbound_subscribers: dict[str, list[Callable[[OutboundMessage], Awaitable[None]]]] = {}
         self._running = False
+        _BUS_DEPTH.set_function(self.inbound.qsize, queue="inbound")
+        _BUS_DEPTH.set_function(self.outbound.qsize, queue="outbound")
     
     async def publish_inbound(self, msg: InboundMessage) -> None:
         """Publish a message from a channel to the agent."""
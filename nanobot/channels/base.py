@@ -1,6 +1,8 @@
 """Base channel interface for chat platforms."""
 
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import replace
 from typing import Any
 
 from loguru import logger
@@ -8,6 +10,8 @@ from loguru import logger
 from nanobot.bus.events import InboundMessage, OutboundMessage
 from nanobot.bus.queue import MessageBus
 
+STATUS_MESSAGES_MAX = 256  # Open status messages remembered per channel, oldest forgotten first
+
 
 class BaseChannel(ABC):
     """
@@ -30,6 +34,7 @@ class BaseChannel(ABC):
         self.config = config
         self.bus = bus
         self._running = False
+        self._status_messages: OrderedDict[str, Any] = OrderedDict()  # progress id -> platform message handle
     
     @abstractmethod
     async def start(self) -> None:
@@ -58,6 +63,31 @@ class BaseChannel(ABC):
         """
         pass
     
+    async def send_progress(self, msg: OutboundMessage) -> None:
+        """
+        Show an agent progress update (metadata "_progress").
+
+        Updates of one turn share metadata "_progress_id"; each carries the
+        turn's whole status text, and "_progress_latest" holds the lines added
+        since the previous update. Channels that can edit messages override this
+        to keep a single status message per turn up to date; by default the new
+        lines are sent as a message of their own.
+        """
+        await self.send(replace(msg, content=msg.metadata.get("_progress_latest") or msg.content))
+
+    def _status_message(self, msg: OutboundMessage) -> Any | None:
+        """The status message already posted for this turn, if any."""
+        return self._status_messages.get(msg.metadata.get("_progress_id", ""))
+
+    def _remember_status(self, msg: OutboundMessage, handle: Any) -> None:
+        self._status_messages[msg.metadata.get("_progress_id", "")] = handle
+        while len(self._status_messages) > STATUS_MESSAGES_MAX:
+            self._status_messages.popitem(last=False)
+
+    def _end_status(self, msg: OutboundMessage) -> None:
+        """Forget the turn's status message once its reply is sent."""
+        self._status_messages.pop(msg.metadata.get("_progress_id", ""), None)
+
     def is_allowed(self, sender_id: str) -> bool:
         """
         Check if a sender is allowed to use this bot.
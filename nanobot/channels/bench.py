@@ -0,0 +1,230 @@
+"""Micro-benchmark comparing the shared markdown renderers with the per-channel regex converters they replaced."""
+
+import re
+import time
+from typing import Any, Callable
+
+from nanobot.channels.markdown import (
+    DiscordRenderer,
+    FeishuCardRenderer,
+    SlackRenderer,
+    TelegramRenderer,
+    _inline,
+    parse,
+)
+
+_SECTION = """## Step {i}
+
+Run `make build` and check **every** result. Some _emphasis_, a [link](https://example.com/{i}) and ~~old~~ text.
+
+- first item with `code`
+- second item with **bold text**
+
+| name | status | time |
+|------|--------|------|
+| build-{i} | ok | 12s |
+| test-{i} | failed | 3s |
+
+```python
+def step_{i}(x):
+    return x < {i} and x > 0
+```
+"""
+
+
+def sample_reply(sections: int) -> str:
+    """A synthetic agent reply: headings, inline styles, lists, a table and a code block per section."""
+    return "\n".join(_SECTION.format(i=i) for i in range(sections))
+
+
+# The converters below are the regex pipelines the channels used before the shared parser, kept for comparison.
+
+def legacy_telegram(text: str) -> list[str]:
+    chunks: list[str] = []
+    content = text
+    while content:
+        if len(content) <= 4000:
+            chunks.append(content)
+            break
+        cut = content[:4000]
+        pos = cut.rfind("\n")
+        if pos == -1:
+            pos = cut.rfind(" ")
+        if pos == -1:
+            pos = 4000
+        chunks.append(content[:pos])
+        content = content[pos:].lstrip()
+    return [_legacy_telegram_html(chunk) for chunk in chunks]
+
+
+def _legacy_telegram_html(text: str) -> str:
+    code_blocks: list[str] = []
+
+    def save_code_block(m: re.Match) -> str:
+        code_blocks.append(m.group(1))
+        return f"\x00CB{len(code_blocks) - 1}\x00"
+
+    text = re.sub(r"```[\w]*\n?([\s\S]*?)```", save_code_block, text)
+    inline_codes: list[str] = []
+
+    def save_inline_code(m: re.Match) -> str:
+        inline_codes.append(m.group(1))
+        return f"\x00IC{len(inline_codes) - 1}\x00"
+
+    text = re.sub(r"`([^`]+)`", save_inline_code, text)
+    text = re.sub(r"^#{1,6}\s+(.+)$", r"\1", text, flags=re.MULTILINE)
+    text = re.sub(r"^>\s*(.*)$", r"\1", text, flags=re.MULTILINE)
+    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    text = re.sub(r"\[([^\]]+)\]\(([^)]+)\)", r'<a href="\2">\1</a>', text)
+    text = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", text)
+    text = re.sub(r"__(.+?)__", r"<b>\1</b>", text)
+    text = re.sub(r"(?<![a-zA-Z0-9])_([^_]+)_(?![a-zA-Z0-9])", r"<i>\1</i>", text)
+    text = re.sub(r"~~(.+?)~~", r"<s>\1</s>", text)
+    text = re.sub(r"^[-*]\s+", "• ", text, flags=re.MULTILINE)
+    for i, code in enumerate(inline_codes):
+        escaped = code.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        text = text.replace(f"\x00IC{i}\x00", f"<code>{escaped}</code>")
+    for i, code in enumerate(code_blocks):
+        escaped = code.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        text = text.replace(f"\x00CB{i}\x00", f"<pre><code>{escaped}</code></pre>")
+    return text
+
+
+_TABLE_RE = re.compile(
+    r"((?:^[ \t]*\|.+\|[ \t]*\n)(?:^[ \t]*\|[-:\s|]+\|[ \t]*\n)(?:^[ \t]*\|.+\|[ \t]*\n?)+)",
+    re.MULTILINE,
+)
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.+)$", re.MULTILINE)
+_CODE_BLOCK_RE = re.compile(r"(```[\s\S]*?```)", re.MULTILINE)
+
+
+def legacy_feishu(content: str) -> list[dict]:
+    elements, last_end = [], 0
+    for m in _TABLE_RE.finditer(content):
+        before = content[last_end:m.start()]
+        if before.strip():
+            elements.extend(_legacy_split_headings(before))
+        elements.append(_legacy_table(m.group(1)) or {"tag": "markdown", "content": m.group(1)})
+        last_end = m.end()
+    remaining = content[last_end:]
+    if remaining.strip():
+        elements.extend(_legacy_split_headings(remaining))
+    return elements or [{"tag": "markdown", "content": content}]
+
+
+def _legacy_table(table_text: str) -> dict | None:
+    lines = [line.strip() for line in table_text.strip().split("\n") if line.strip()]
+    if len(lines) < 3:
+        return None
+
+    def split(line: str) -> list[str]:
+        return [c.strip() for c in line.strip("|").split("|")]
+
+    headers = split(lines[0])
+    rows = [split(line) for line in lines[2:]]
+    return {
+        "tag": "table",
+        "page_size": len(rows) + 1,
+        "columns": [{"tag": "column", "name": f"c{i}", "display_name": h, "width": "auto"} for i, h in enumerate(headers)],
+        "rows": [{f"c{i}": r[i] if i < len(r) else "" for i in range(len(headers))} for r in rows],
+    }
+
+
+def _legacy_split_headings(content: str) -> list[dict]:
+    protected = content
+    code_blocks = []
+    for m in _CODE_BLOCK_RE.finditer(content):
+        code_blocks.append(m.group(1))
+        protected = protected.replace(m.group(1), f"\x00CODE{len(code_blocks) - 1}\x00", 1)
+    elements = []
+    last_end = 0
+    for m in _HEADING_RE.finditer(protected):
+        before = protected[last_end:m.start()].strip()
+        if before:
+            elements.append({"tag": "markdown", "content": before})
+        elements.append({"tag": "div", "text": {"tag": "lark_md", "content": f"**{m.group(2).strip()}**"}})
+        last_end = m.end()
+    remaining = protected[last_end:].strip()
+    if remaining:
+        elements.append({"tag": "markdown", "content": remaining})
+    for i, cb in enumerate(code_blocks):
+        for el in elements:
+            if el.get("tag") == "markdown":
+                el["content"] = el["content"].replace(f"\x00CODE{i}\x00", cb)
+    return elements or [{"tag": "markdown", "content": content}]
+
+
+def _legacy_slack() -> Callable[[str], Any] | None:
+    """Slack's old converter needs slackify-markdown, which is no longer a dependency."""
+    try:
+        from slackify_markdown import slackify_markdown
+    except ImportError:
+        return None
+
+    def convert(text: str) -> str:
+        def table(match: re.Match) -> str:
+            lines = [ln.strip() for ln in match.group(0).strip().splitlines() if ln.strip()]
+            headers = [h.strip() for h in lines[0].strip("|").split("|")]
+            rows = []
+            for line in lines[2:]:
+                cells = ([c.strip() for c in line.strip("|").split("|")] + [""] * len(headers))[:len(headers)]
+                rows.append(" · ".join(f"**{headers[i]}**: {cells[i]}" for i in range(len(headers)) if cells[i]))
+            return "\n".join(rows)
+
+        return slackify_markdown(re.sub(r"(?m)^\|.*\|$(?:\n\|[\s:|-]*\|$)(?:\n\|.*\|$)*", table, text))
+
+    return convert
+
+
+def _time(fn: Callable[[], Any], rounds: int, repeats: int = 5) -> float:
+    """Best of `repeats` runs, in milliseconds per call."""
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        best = min(best, time.perf_counter() - t0)
+    return best / rounds * 1000
+
+
+def run_benchmark(sections: int = 40, rounds: int = 50) -> list[dict[str, Any]]:
+    """Time each channel's conversion of one reply, old converter against parse-and-render (cache cleared)."""
+    text = sample_reply(sections)
+    telegram, slack, discord, feishu = TelegramRenderer(), SlackRenderer(), DiscordRenderer(), FeishuCardRenderer()
+
+    def fresh(render: Callable[[], Any]) -> Callable[[], Any]:
+        def run() -> Any:
+            parse.cache_clear()
+            _inline.cache_clear()
+            return render()
+        return run
+
+    def all_channels() -> None:
+        for renderer in (telegram, slack, discord):
+            renderer.chunks(text)  # Parsed by the first, cached for the rest
+        feishu.elements(parse(text))
+
+    slack_legacy = _legacy_slack()
+
+    def all_legacy() -> None:
+        legacy_telegram(text)
+        legacy_feishu(text)
+        if slack_legacy:
+            slack_legacy(text)
+
+    cases: list[tuple[str, Callable[[], Any] | None, Callable[[], Any]]] = [
+        ("telegram", lambda: legacy_telegram(text), fresh(lambda: telegram.chunks(text))),
+        ("slack", slack_legacy and (lambda: slack_legacy(text)), fresh(lambda: slack.chunks(text))),
+        ("feishu", lambda: legacy_feishu(text), fresh(lambda: feishu.elements(parse(text)))),
+        ("discord", None, fresh(lambda: discord.chunks(text))),
+        ("all four, one parse", all_legacy, fresh(all_channels)),
+    ]
+    return [
+        {
+            "target": name,
+            "chars": len(text),
+            "legacy_ms": _time(legacy, rounds) if legacy else None,
+            "shared_ms": _time(shared, rounds),
+        }
+        for name, legacy, shared in cases
+    ]
@@ -2,8 +2,12 @@
 
 import asyncio
 import json
+import random
+import time
+import zlib
 from pathlib import Path
 from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 import httpx
 import websockets
@@ -12,26 +16,127 @@ from loguru import logger
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.markdown import DiscordRenderer
+from nanobot.channels.media import MediaTooLargeError, get_media_store
+from nanobot.channels.typing_scheduler import TypingScheduler
 from nanobot.config.schema import DiscordConfig
-
+from nanobot.metrics import METRICS
 
 DISCORD_API_BASE = "https://discord.com/api/v10"
-MAX_ATTACHMENT_BYTES = 20 * 1024 * 1024  # 20MB
+ZLIB_SUFFIX = b"\x00\x00\xff\xff"  # Ends every complete zlib-stream message
+RESUME_DELAY_S = 1.0  # Pause before resuming a dropped session
+RECONNECT_DELAY_S = 5.0  # Pause after connection errors
+
+# Close codes after which reconnecting cannot succeed (bad token, intents, shard)
+_FATAL_CLOSE_CODES = {4004, 4010, 4011, 4012, 4013, 4014}
+# Close codes that end the session: reconnect with a fresh IDENTIFY
+_SESSION_CLOSE_CODES = {4007, 4009}
+
+_GATEWAY_SESSIONS = METRICS.counter(
+    "nanobot_discord_gateway_sessions_total", "Discord gateway handshakes by kind", ("kind",)
+)
+_RATE_LIMITED = METRICS.counter(
+    "nanobot_discord_rate_limited_total", "Discord REST 429 responses by scope", ("scope",)
+)
+
+
+class RestRateLimiter:
+    """
+    Discord REST rate limits, honoured before a request instead of after a 429.
+
+    Discord groups routes into buckets (X-RateLimit-Bucket) per major
+    parameter, here the channel id. Each response says how many requests
+    remain and when the bucket resets; once none remain, the next request
+    in that bucket waits for the reset. A 429 blocks its bucket, or every
+    route if it is global, for retry_after. Requests to one route and
+    channel are serialized so two sends can't both spend the last slot.
+    """
+
+    def __init__(self, max_attempts: int = 3):
+        self.max_attempts = max_attempts
+        self._buckets: dict[str, str] = {}  # Route -> bucket hash reported by Discord
+        self._reset_at: dict[str, float] = {}  # Bucket:major -> monotonic time requests may resume
+        self._global_until = 0.0
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def _key(self, route: str, major: str) -> str:
+        return f"{self._buckets.get(route, route)}:{major}"
+
+    async def request(
+        self, client: httpx.AsyncClient, method: str, route: str, major: str, url: str, **kwargs: Any
+    ) -> httpx.Response:
+        """Send one request, waiting out known limits first and retrying after 429s."""
+        async with self._locks.setdefault(f"{route}:{major}", asyncio.Lock()):
+            for _ in range(self.max_attempts):
+                await self._wait(self._key(route, major))
+                response = await client.request(method, url, **kwargs)
+                self._update(route, major, response)
+                if response.status_code != 429:
+                    break
+            return response
+
+    async def _wait(self, key: str) -> None:
+        delay = max(self._reset_at.get(key, 0.0), self._global_until) - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def _update(self, route: str, major: str, response: httpx.Response) -> None:
+        headers = response.headers
+        if bucket := headers.get("X-RateLimit-Bucket"):
+            self._buckets[route] = bucket
+        key = self._key(route, major)
+        now = time.monotonic()
+        if response.status_code == 429:
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            retry_after = float(body.get("retry_after") or headers.get("Retry-After") or 1.0)
+            if body.get("global") or headers.get("X-RateLimit-Global"):
+                self._global_until = now + retry_after
+                _RATE_LIMITED.inc(scope="global")
+            else:
+                self._reset_at[key] = now + retry_after
+                _RATE_LIMITED.inc(scope="bucket")
+            logger.warning(f"Discord rate limited on {route}, retrying in {retry_after}s")
+        elif headers.get("X-RateLimit-Remaining") == "0":
+            self._reset_at[key] = now + float(headers.get("X-RateLimit-Reset-After") or 1.0)
+        else:
+            self._reset_at.pop(key, None)
 
 
 class DiscordChannel(BaseChannel):
-    """Discord channel using Gateway websocket."""
+    """
+    Discord channel using Gateway websocket.
+
+    A dropped connection resumes the session (RESUME with the stored
+    session id and sequence, on the resume URL from READY) so events sent
+    meanwhile are replayed; only an invalidated session identifies again.
+    The reader task only decodes frames and tracks heartbeats: each
+    MESSAGE_CREATE is handled in its own task, in order per channel, so
+    attachment downloads never delay heartbeat acks or other channels.
+    """
 
     name = "discord"
 
+    _renderer = DiscordRenderer()
+
     def __init__(self, config: DiscordConfig, bus: MessageBus):
         super().__init__(config, bus)
         self.config: DiscordConfig = config
         self._ws: websockets.WebSocketClientProtocol | None = None
         self._seq: int | None = None
+        self._session_id: str | None = None
+        self._resume_url: str | None = None
         self._heartbeat_task: asyncio.Task | None = None
-        self._typing_tasks: dict[str, asyncio.Task] = {}
+        self._heartbeat_acked = True
+        self._inflator: Any = None
+        self._inflate_buffer = bytearray()
+        self._event_tails: dict[str, asyncio.Task] = {}  # Last pending event task per channel
+        # One task refreshes "typing..." (shown for 10s per call) in every active channel
+        self._typing = TypingScheduler("discord", self._send_typing, interval=8.0, rate=5.0)
         self._http: httpx.AsyncClient | None = None
+        self._rest = RestRateLimiter()
 
     async def start(self) -> None:
         """Start the Discord gateway connection."""
@@ -43,18 +148,57 @@ class DiscordChannel(BaseChannel):
         self._http = httpx.AsyncClient(timeout=30.0)
 
         while self._running:
-            try:
-                logger.info("Connecting to Discord gateway...")
-                async with websockets.connect(self.config.gateway_url) as ws:
-                    self._ws = ws
-                    await self._gateway_loop()
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.warning(f"Discord gateway error: {e}")
-                if self._running:
-                    logger.info("Reconnecting to Discord gateway in 5 seconds...")
-                    await asyncio.sleep(5)
+            delay = await self._connect_once()
+            if self._running and delay:
+                logger.info(f"Reconnecting to Discord gateway in {delay:.0f} seconds...")
+                await asyncio.sleep(delay)
+
+    async def _connect_once(self) -> float:
+        """Run one gateway connection; returns how long to wait before the next."""
+        url = self._resume_url if self._session_id and self._resume_url else self.config.gateway_url
+        self._inflator = zlib.decompressobj() if self.config.compress else None
+        self._inflate_buffer.clear()
+        close_code = None
+        delay = RESUME_DELAY_S
+        try:
+            logger.info("Connecting to Discord gateway...")
+            async with websockets.connect(self._gateway_url(url), max_size=None) as ws:
+                self._ws = ws
+                delay = await self._gateway_loop()
+                # Any close code but 1000/1001 keeps the session resumable
+                await ws.close(code=4000 if self._session_id else 1000)
+        except websockets.ConnectionClosed as e:
+            close_code = e.rcvd.code if e.rcvd else None
+            logger.warning(f"Discord gateway closed: {close_code}")
+        except Exception as e:
+            logger.warning(f"Discord gateway error: {e}")
+            delay = RECONNECT_DELAY_S
+        finally:
+            self._ws = None
+            if self._heartbeat_task:
+                self._heartbeat_task.cancel()
+                self._heartbeat_task = None
+
+        if close_code in _FATAL_CLOSE_CODES:
+            logger.error(f"Discord gateway refused the connection ({close_code}); check token and intents")
+            self._running = False
+        elif close_code in _SESSION_CLOSE_CODES:
+            self._clear_session()
+        return delay
+
+    def _gateway_url(self, base: str) -> str:
+        parts = urlsplit(base)
+        query = dict(parse_qsl(parts.query))
+        query.setdefault("v", "10")
+        query.setdefault("encoding", "json")
+        if self.config.compress:
+            query["compress"] = "zlib-stream"
+        return urlunsplit(parts._replace(path=parts.path or "/", query=urlencode(query)))
+
+    def _clear_session(self) -> None:
+        self._session_id = None
+        self._resume_url = None
+        self._seq = None
 
     async def stop(self) -> None:
         """Stop the Discord channel."""
@@ -62,9 +206,10 @@ class DiscordChannel(BaseChannel):
         if self._heartbeat_task:
             self._heartbeat_task.cancel()
             self._heartbeat_task = None
-        for task in self._typing_tasks.values():
+        for task in self._event_tails.values():
             task.cancel()
-        self._typing_tasks.clear()
+        self._event_tails.clear()
+        await self._typing.close()
         if self._ws:
             await self._ws.close()
             self._ws = None
@@ -79,44 +224,84 @@ class DiscordChannel(BaseChannel):
             return
 
         url = f"{DISCORD_API_BASE}/channels/{msg.chat_id}/messages"
-        payload: dict[str, Any] = {"content": msg.content}
-
-        if msg.reply_to:
-            payload["message_reference"] = {"message_id": msg.reply_to}
-            payload["allowed_mentions"] = {"replied_user": False}
-
         headers = {"Authorization": f"Bot {self.config.token}"}
+        self._end_status(msg)
 
         try:
-            for attempt in range(3):
-                try:
-                    response = await self._http.post(url, headers=headers, json=payload)
-                    if response.status_code == 429:
-                        data = response.json()
-                        retry_after = float(data.get("retry_after", 1.0))
-                        logger.warning(f"Discord rate limited, retrying in {retry_after}s")
-                        await asyncio.sleep(retry_after)
-                        continue
-                    response.raise_for_status()
-                    return
-                except Exception as e:
-                    if attempt == 2:
-                        logger.error(f"Error sending Discord message: {e}")
-                    else:
-                        await asyncio.sleep(1)
+            for i, content in enumerate(self._renderer.chunks(msg.content or "")):
+                payload: dict[str, Any] = {"content": content}
+                if msg.reply_to and i == 0:
+                    payload["message_reference"] = {"message_id": msg.reply_to}
+                    payload["allowed_mentions"] = {"replied_user": False}
+                if await self._post_message(msg.chat_id, url, headers, payload) is None:
+                    break
         finally:
             await self._stop_typing(msg.chat_id)
 
-    async def _gateway_loop(self) -> None:
-        """Main gateway loop: identify, heartbeat, dispatch events."""
-        if not self._ws:
+    async def send_progress(self, msg: OutboundMessage) -> None:
+        """Post the turn's status message once, then edit it as progress comes in."""
+        if not self._http:
             return
+        headers = {"Authorization": f"Bot {self.config.token}"}
+        payload = {"content": msg.content[:2000]}
+        message_id = self._status_message(msg)
+        if message_id is None:
+            url = f"{DISCORD_API_BASE}/channels/{msg.chat_id}/messages"
+            if response := await self._post_message(msg.chat_id, url, headers, payload):
+                self._remember_status(msg, response.json().get("id"))
+            return
+        url = f"{DISCORD_API_BASE}/channels/{msg.chat_id}/messages/{message_id}"
+        try:
+            response = await self._rest.request(
+                self._http, "PATCH", "messages/edit", msg.chat_id, url, headers=headers, json=payload
+            )
+            response.raise_for_status()
+        except Exception as e:
+            logger.debug(f"Discord progress edit failed: {e}")
+
+    async def _post_message(
+        self, channel_id: str, url: str, headers: dict[str, str], payload: dict[str, Any]
+    ) -> httpx.Response | None:
+        """POST one message, retrying twice; None once it has failed for good."""
+        for attempt in range(3):
+            try:
+                response = await self._rest.request(
+                    self._http, "POST", "messages", channel_id, url, headers=headers, json=payload
+                )
+                response.raise_for_status()
+                return response
+            except Exception as e:
+                if attempt == 2:
+                    logger.error(f"Error sending Discord message: {e}")
+                else:
+                    await asyncio.sleep(1)
+        return None
+
+    def _decode(self, raw: str | bytes) -> dict[str, Any] | None:
+        """Parse one gateway frame; None while a zlib-stream message is incomplete."""
+        if isinstance(raw, bytes):
+            if self._inflator is None:
+                raw = raw.decode("utf-8", errors="replace")
+            else:
+                self._inflate_buffer.extend(raw)
+                if not self._inflate_buffer.endswith(ZLIB_SUFFIX):
+                    return None
+                raw = self._inflator.decompress(bytes(self._inflate_buffer)).decode("utf-8")
+                self._inflate_buffer.clear()
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(f"Invalid JSON from Discord gateway: {raw[:100]}")
+            return None
+
+    async def _gateway_loop(self) -> float:
+        """Read gateway frames until the server asks to reconnect; returns the reconnect delay."""
+        if not self._ws:
+            return RECONNECT_DELAY_S
 
         async for raw in self._ws:
-            try:
-                data = json.loads(raw)
-            except json.JSONDecodeError:
-                logger.warning(f"Invalid JSON from Discord gateway: {raw[:100]}")
+            data = self._decode(raw)
+            if data is None:
                 continue
 
             op = data.get("op")
@@ -128,22 +313,54 @@ class DiscordChannel(BaseChannel):
                 self._seq = seq
 
             if op == 10:
-                # HELLO: start heartbeat and identify
+                # HELLO: start heartbeat, then resume the old session or identify
                 interval_ms = payload.get("heartbeat_interval", 45000)
                 await self._start_heartbeat(interval_ms / 1000)
-                await self._identify()
+                if self._session_id:
+                    await self._resume()
+                else:
+                    await self._identify()
+            elif op == 11:
+                self._heartbeat_acked = True
+            elif op == 1:
+                await self._send_heartbeat()
             elif op == 0 and event_type == "READY":
+                self._session_id = payload.get("session_id")
+                self._resume_url = payload.get("resume_gateway_url")
                 logger.info("Discord gateway READY")
+            elif op == 0 and event_type == "RESUMED":
+                logger.info("Discord gateway session resumed")
             elif op == 0 and event_type == "MESSAGE_CREATE":
-                await self._handle_message_create(payload)
+                self._dispatch(payload)
             elif op == 7:
-                # RECONNECT: exit loop to reconnect
+                # RECONNECT: reconnect and resume
                 logger.info("Discord gateway requested reconnect")
-                break
+                return RESUME_DELAY_S
             elif op == 9:
-                # INVALID_SESSION: reconnect
+                # INVALID_SESSION: d says whether the session can still be resumed
                 logger.warning("Discord gateway invalid session")
-                break
+                if not payload:
+                    self._clear_session()
+                return random.uniform(1, 5)
+        return RESUME_DELAY_S
+
+    def _dispatch(self, payload: dict[str, Any]) -> None:
+        """Handle a message in its own task, after earlier messages from the same channel."""
+        channel_id = str(payload.get("channel_id", ""))
+        previous = self._event_tails.get(channel_id)
+        task = asyncio.create_task(self._handle_event(payload, previous))
+        self._event_tails[channel_id] = task
+        task.add_done_callback(
+            lambda t: self._event_tails.pop(channel_id, None) if self._event_tails.get(channel_id) is t else None
+        )
+
+    async def _handle_event(self, payload: dict[str, Any], previous: asyncio.Task | None) -> None:
+        if previous:
+            await asyncio.wait([previous])
+        try:
+            await self._handle_message_create(payload)
+        except Exception as e:
+            logger.error(f"Error handling Discord message: {e}")
 
     async def _identify(self) -> None:
         """Send IDENTIFY payload."""
@@ -162,18 +379,42 @@ class DiscordChannel(BaseChannel):
                 },
             },
         }
+        _GATEWAY_SESSIONS.inc(kind="identify")
         await self._ws.send(json.dumps(identify))
 
+    async def _resume(self) -> None:
+        """Send RESUME for the stored session; Discord replays the events missed since seq."""
+        if not self._ws:
+            return
+
+        resume = {
+            "op": 6,
+            "d": {"token": self.config.token, "session_id": self._session_id, "seq": self._seq},
+        }
+        _GATEWAY_SESSIONS.inc(kind="resume")
+        await self._ws.send(json.dumps(resume))
+
+    async def _send_heartbeat(self) -> None:
+        if self._ws:
+            self._heartbeat_acked = False
+            await self._ws.send(json.dumps({"op": 1, "d": self._seq}))
+
     async def _start_heartbeat(self, interval_s: float) -> None:
         """Start or restart the heartbeat loop."""
         if self._heartbeat_task:
             self._heartbeat_task.cancel()
+        self._heartbeat_acked = True
 
         async def heartbeat_loop() -> None:
+            await asyncio.sleep(interval_s * random.random())  # Jitter, as the gateway asks
             while self._running and self._ws:
-                payload = {"op": 1, "d": self._seq}
+                if not self._heartbeat_acked:
+                    # No ACK since the last beat: the connection is dead, resume on a new one
+                    logger.warning("Discord heartbeat not acknowledged, reconnecting")
+                    await self._ws.close(code=4000)
+                    break
                 try:
-                    await self._ws.send(json.dumps(payload))
+                    await self._send_heartbeat()
                 except Exception as e:
                     logger.warning(f"Discord heartbeat failed: {e}")
                     break
@@ -181,6 +422,27 @@ class DiscordChannel(BaseChannel):
 
         self._heartbeat_task = asyncio.create_task(heartbeat_loop())
 
+    async def _download_attachment(self, attachment: dict[str, Any]) -> tuple[str | None, str]:
+        """Download one attachment through the shared media store; returns (path, content part)."""
+        filename = attachment.get("filename") or "attachment"
+        store = get_media_store()
+        size = attachment.get("size") or 0
+        if size and size > store.max_file_bytes:
+            return None, f"[attachment: {filename} - too large]"
+        try:
+            file_path = await store.download(
+                attachment["url"],
+                ext=Path(filename).suffix,
+                source_id=f"discord:{attachment.get('id') or attachment['url']}",
+                client=self._http,
+            )
+            return str(file_path), f"[attachment: {file_path}]"
+        except MediaTooLargeError:
+            return None, f"[attachment: {filename} - too large]"
+        except Exception as e:
+            logger.warning(f"Failed to download Discord attachment: {e}")
+            return None, f"[attachment: {filename} - download failed]"
+
     async def _handle_message_create(self, payload: dict[str, Any]) -> None:
         """Handle incoming Discord messages."""
         author = payload.get("author") or {}
@@ -199,28 +461,14 @@ class DiscordChannel(BaseChannel):
 
         content_parts = [content] if content else []
         media_paths: list[str] = []
-        media_dir = Path.home() / ".nanobot" / "media"
 
-        for attachment in payload.get("attachments") or []:
-            url = attachment.get("url")
-            filename = attachment.get("filename") or "attachment"
-            size = attachment.get("size") or 0
-            if not url or not self._http:
-                continue
-            if size and size > MAX_ATTACHMENT_BYTES:
-                content_parts.append(f"[attachment: {filename} - too large]")
-                continue
-            try:
-                media_dir.mkdir(parents=True, exist_ok=True)
-                file_path = media_dir / f"{attachment.get('id', 'file')}_{filename.replace('/', '_')}"
-                resp = await self._http.get(url)
-                resp.raise_for_status()
-                file_path.write_bytes(resp.content)
-                media_paths.append(str(file_path))
-                content_parts.append(f"[attachment: {file_path}]")
-            except Exception as e:
-                logger.warning(f"Failed to download Discord attachment: {e}")
-                content_parts.append(f"[attachment: {filename} - download failed]")
+        attachments = [a for a in payload.get("attachments") or [] if a.get("url")]
+        if attachments and self._http:
+            results = await asyncio.gather(*(self._download_attachment(a) for a in attachments))
+            for path, part in results:
+                if path:
+                    media_paths.append(path)
+                content_parts.append(part)
 
         reply_to = (payload.get("referenced_message") or {}).get("id")
 
@@ -240,22 +488,14 @@ class DiscordChannel(BaseChannel):
 
     async def _start_typing(self, channel_id: str) -> None:
         """Start periodic typing indicator for a channel."""
-        await self._stop_typing(channel_id)
-
-        async def typing_loop() -> None:
-            url = f"{DISCORD_API_BASE}/channels/{channel_id}/typing"
-            headers = {"Authorization": f"Bot {self.config.token}"}
-            while self._running:
-                try:
-                    await self._http.post(url, headers=headers)
-                except Exception:
-                    pass
-                await asyncio.sleep(8)
-
-        self._typing_tasks[channel_id] = asyncio.create_task(typing_loop())
+        self._typing.start(channel_id)
 
     async def _stop_typing(self, channel_id: str) -> None:
         """Stop typing indicator for a channel."""
-        task = self._typing_tasks.pop(channel_id, None)
-        if task:
-            task.cancel()
+        self._typing.stop(channel_id)
+
+    async def _send_typing(self, channel_id: str) -> None:
+        url = f"{DISCORD_API_BASE}/channels/{channel_id}/typing"
+        headers = {"Authorization": f"Bot {self.config.token}"}
+        response = await self._rest.request(self._http, "POST", "typing", channel_id, url, headers=headers)
+        response.raise_for_status()
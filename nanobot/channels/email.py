@@ -1,17 +1,22 @@
-"""Email channel implementation using IMAP polling + SMTP replies."""
+"""Email channel implementation using IMAP IDLE/polling + SMTP replies."""
 
 import asyncio
 import html
 import imaplib
+import json
 import re
+import select
 import smtplib
 import ssl
+import threading
+import time
 from datetime import date
 from email import policy
 from email.header import decode_header, make_header
 from email.message import EmailMessage
 from email.parser import BytesParser
 from email.utils import parseaddr
+from pathlib import Path
 from typing import Any
 
 from loguru import logger
@@ -20,6 +25,8 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import EmailConfig
+from nanobot.utils.files import atomic_write_text
+from nanobot.utils.helpers import ensure_dir, get_data_path, safe_filename
 
 
 class EmailChannel(BaseChannel):
@@ -27,11 +34,15 @@ class EmailChannel(BaseChannel):
     Email channel.
 
     Inbound:
-    - Poll IMAP mailbox for unread messages.
-    - Convert each message into an inbound event.
+    - Keep one IMAP session open and wait in IDLE for new mail (servers
+      without IDLE are polled every poll_interval_seconds instead).
+    - Find new unread mail with UID SEARCH from a persisted cursor
+      (UIDVALIDITY + last UID), fetch it with one batched UID FETCH and
+      convert each message into an inbound event.
 
     Outbound:
-    - Send responses via SMTP back to the sender address.
+    - Send responses via SMTP back to the sender address, reusing one
+      logged-in SMTP connection.
     """
 
     name = "email"
@@ -49,17 +60,22 @@ class EmailChannel(BaseChannel):
         "Nov",
         "Dec",
     )
+    _FETCH_BATCH = 50  # UIDs per UID FETCH command
 
     def __init__(self, config: EmailConfig, bus: MessageBus):
         super().__init__(config, bus)
         self.config: EmailConfig = config
         self._last_subject_by_chat: dict[str, str] = {}
         self._last_message_id_by_chat: dict[str, str] = {}
-        self._processed_uids: set[str] = set()  # Capped to prevent unbounded growth
-        self._MAX_PROCESSED_UIDS = 100000
+        self._imap: imaplib.IMAP4 | None = None
+        self._uidvalidity = ""
+        self._uidnext = 0
+        self._cursor_path: Path | None = None
+        self._smtp: smtplib.SMTP | None = None
+        self._smtp_lock = threading.Lock()
 
     async def start(self) -> None:
-        """Start polling IMAP for inbound emails."""
+        """Start receiving inbound emails."""
         if not self.config.consent_granted:
             logger.warning(
                 "Email channel disabled: consent_granted is false. "
@@ -71,36 +87,44 @@ class EmailChannel(BaseChannel):
             return
 
         self._running = True
-        logger.info("Starting Email channel (IMAP polling mode)...")
+        logger.info("Starting Email channel (IMAP IDLE / polling mode)...")
 
         poll_seconds = max(5, int(self.config.poll_interval_seconds))
-        while self._running:
-            try:
-                inbound_items = await asyncio.to_thread(self._fetch_new_messages)
-                for item in inbound_items:
-                    sender = item["sender"]
-                    subject = item.get("subject", "")
-                    message_id = item.get("message_id", "")
-
-                    if subject:
-                        self._last_subject_by_chat[sender] = subject
-                    if message_id:
-                        self._last_message_id_by_chat[sender] = message_id
-
-                    await self._handle_message(
-                        sender_id=sender,
-                        chat_id=sender,
-                        content=item["content"],
-                        metadata=item.get("metadata", {}),
-                    )
-            except Exception as e:
-                logger.error(f"Email polling error: {e}")
-
-            await asyncio.sleep(poll_seconds)
+        try:
+            while self._running:
+                try:
+                    inbound_items = await asyncio.to_thread(self._fetch_new_messages)
+                    for item in inbound_items:
+                        sender = item["sender"]
+                        subject = item.get("subject", "")
+                        message_id = item.get("message_id", "")
+
+                        if subject:
+                            self._last_subject_by_chat[sender] = subject
+                        if message_id:
+                            self._last_message_id_by_chat[sender] = message_id
+
+                        await self._handle_message(
+                            sender_id=sender,
+                            chat_id=sender,
+                            content=item["content"],
+                            metadata=item.get("metadata", {}),
+                        )
+                    if self._supports_idle():
+                        await asyncio.to_thread(self._idle, self.config.idle_timeout_seconds)
+                        continue
+                except Exception as e:
+                    logger.error(f"Email receive error: {e}")
+                    await asyncio.to_thread(self._close_imap)
+
+                await asyncio.sleep(poll_seconds)
+        finally:
+            await asyncio.to_thread(self._close_imap)
 
     async def stop(self) -> None:
-        """Stop polling loop."""
+        """Stop receiving; an IDLE wait notices within a second."""
         self._running = False
+        await asyncio.to_thread(self._close_smtp)
 
     async def send(self, msg: OutboundMessage) -> None:
         """Send email via SMTP."""
@@ -167,31 +191,59 @@ class EmailChannel(BaseChannel):
         return True
 
     def _smtp_send(self, msg: EmailMessage) -> None:
+        """Send over the cached SMTP connection, reconnecting once if the server dropped it."""
+        with self._smtp_lock:
+            for attempt in range(2):
+                if self._smtp is None:
+                    self._smtp = self._smtp_connect()
+                try:
+                    self._smtp.send_message(msg)
+                    return
+                except (smtplib.SMTPServerDisconnected, OSError):
+                    self._smtp = None
+                    if attempt:
+                        raise
+
+    def _smtp_connect(self) -> smtplib.SMTP:
         timeout = 30
         if self.config.smtp_use_ssl:
-            with smtplib.SMTP_SSL(
-                self.config.smtp_host,
-                self.config.smtp_port,
-                timeout=timeout,
-            ) as smtp:
-                smtp.login(self.config.smtp_username, self.config.smtp_password)
-                smtp.send_message(msg)
-            return
-
-        with smtplib.SMTP(self.config.smtp_host, self.config.smtp_port, timeout=timeout) as smtp:
+            smtp = smtplib.SMTP_SSL(self.config.smtp_host, self.config.smtp_port, timeout=timeout)
+        else:
+            smtp = smtplib.SMTP(self.config.smtp_host, self.config.smtp_port, timeout=timeout)
             if self.config.smtp_use_tls:
                 smtp.starttls(context=ssl.create_default_context())
-            smtp.login(self.config.smtp_username, self.config.smtp_password)
-            smtp.send_message(msg)
+        smtp.login(self.config.smtp_username, self.config.smtp_password)
+        return smtp
+
+    def _close_smtp(self) -> None:
+        with self._smtp_lock:
+            if self._smtp is not None:
+                try:
+                    self._smtp.quit()
+                except Exception:
+                    pass
+                self._smtp = None
 
     def _fetch_new_messages(self) -> list[dict[str, Any]]:
-        """Poll IMAP and return parsed unread messages."""
-        return self._fetch_messages(
-            search_criteria=("UNSEEN",),
-            mark_seen=self.config.mark_seen,
-            dedupe=True,
-            limit=0,
-        )
+        """Return unread messages newer than the cursor and advance it."""
+        client = self._imap_session()
+        cursor = self._load_cursor()
+        last_uid = int(cursor.get("last_uid", 0)) if cursor.get("uidvalidity") == self._uidvalidity else 0
+        if cursor and not last_uid:
+            logger.info("Email mailbox UIDVALIDITY changed, rescanning unread mail")
+
+        criteria = ("UNSEEN", "UID", f"{last_uid + 1}:*") if last_uid else ("UNSEEN",)
+        status, data = client.uid("SEARCH", *criteria)
+        if status != "OK":
+            return []
+        # "n:*" always matches the newest message, even when its UID is below n
+        uids = [uid for uid in (data[0] or b"").decode().split() if int(uid) > last_uid]
+        messages = self._fetch_uids(client, uids, mark_seen=self.config.mark_seen)
+
+        newest = max([last_uid, self._uidnext - 1, *(int(uid) for uid in uids)])
+        if newest != last_uid or cursor.get("uidvalidity") != self._uidvalidity:
+            self._save_cursor({"uidvalidity": self._uidvalidity, "last_uid": newest})
+        return messages
 
     def fetch_messages_between_dates(
         self,
@@ -215,7 +267,6 @@ class EmailChannel(BaseChannel):
                 self._format_imap_date(end_date),
             ),
             mark_seen=False,
-            dedupe=False,
             limit=max(1, int(limit)),
         )
 
@@ -223,98 +274,202 @@ class EmailChannel(BaseChannel):
         self,
         search_criteria: tuple[str, ...],
         mark_seen: bool,
-        dedupe: bool,
         limit: int,
     ) -> list[dict[str, Any]]:
-        """Fetch messages by arbitrary IMAP search criteria."""
+        """Fetch messages by arbitrary IMAP search criteria on a short-lived connection."""
+        client = self._imap_connect()
+        try:
+            if not self._imap_select(client):
+                return []
+            status, data = client.uid("SEARCH", *search_criteria)
+            if status != "OK" or not data:
+                return []
+            uids = (data[0] or b"").decode().split()
+            if limit > 0 and len(uids) > limit:
+                uids = uids[-limit:]
+            return self._fetch_uids(client, uids, mark_seen)
+        finally:
+            try:
+                client.logout()
+            except Exception:
+                pass
+
+    def _fetch_uids(self, client: imaplib.IMAP4, uids: list[str], mark_seen: bool) -> list[dict[str, Any]]:
+        """Fetch and parse messages by UID, one round trip per batch."""
         messages: list[dict[str, Any]] = []
-        mailbox = self.config.imap_mailbox or "INBOX"
+        for i in range(0, len(uids), self._FETCH_BATCH):
+            batch = ",".join(uids[i:i + self._FETCH_BATCH])
+            status, fetched = client.uid("FETCH", batch, "(UID BODY.PEEK[])")
+            if status != "OK" or not fetched:
+                continue
+            for uid, raw_bytes in self._split_fetch(fetched):
+                if item := self._parse_message(uid, raw_bytes):
+                    messages.append(item)
+            if mark_seen:
+                client.uid("STORE", batch, "+FLAGS", "\\Seen")
+        return messages
+
+    def _parse_message(self, uid: str, raw_bytes: bytes) -> dict[str, Any] | None:
+        parsed = BytesParser(policy=policy.default).parsebytes(raw_bytes)
+        sender = parseaddr(parsed.get("From", ""))[1].strip().lower()
+        if not sender:
+            return None
+
+        subject = self._decode_header_value(parsed.get("Subject", ""))
+        date_value = parsed.get("Date", "")
+        message_id = parsed.get("Message-ID", "").strip()
+        body = self._extract_text_body(parsed)
+
+        if not body:
+            body = "(empty email body)"
+
+        body = body[: self.config.max_body_chars]
+        content = (
+            f"Email received.\n"
+            f"From: {sender}\n"
+            f"Subject: {subject}\n"
+            f"Date: {date_value}\n\n"
+            f"{body}"
+        )
 
+        metadata = {
+            "message_id": message_id,
+            "subject": subject,
+            "date": date_value,
+            "sender_email": sender,
+            "uid": uid,
+        }
+        return {
+            "sender": sender,
+            "subject": subject,
+            "message_id": message_id,
+            "content": content,
+            "metadata": metadata,
+        }
+
+    # --- IMAP session -------------------------------------------------------
+
+    def _imap_connect(self) -> imaplib.IMAP4:
         if self.config.imap_use_ssl:
             client = imaplib.IMAP4_SSL(self.config.imap_host, self.config.imap_port)
         else:
             client = imaplib.IMAP4(self.config.imap_host, self.config.imap_port)
+        client.login(self.config.imap_username, self.config.imap_password)
+        return client
 
-        try:
-            client.login(self.config.imap_username, self.config.imap_password)
-            status, _ = client.select(mailbox)
-            if status != "OK":
-                return messages
+    def _imap_select(self, client: imaplib.IMAP4) -> bool:
+        """Select the mailbox and note its UIDVALIDITY/UIDNEXT."""
+        status, _ = client.select(self.config.imap_mailbox or "INBOX")
+        if status != "OK":
+            return False
+        _, validity = client.response("UIDVALIDITY")
+        _, uidnext = client.response("UIDNEXT")
+        self._uidvalidity = (validity[0] or b"").decode() if validity else ""
+        self._uidnext = int(uidnext[0]) if uidnext and uidnext[0] else 0
+        return True
 
-            status, data = client.search(None, *search_criteria)
-            if status != "OK" or not data:
-                return messages
-
-            ids = data[0].split()
-            if limit > 0 and len(ids) > limit:
-                ids = ids[-limit:]
-            for imap_id in ids:
-                status, fetched = client.fetch(imap_id, "(BODY.PEEK[] UID)")
-                if status != "OK" or not fetched:
-                    continue
+    def _imap_session(self) -> imaplib.IMAP4:
+        """The long-lived IMAP connection, (re)connected and selected on demand."""
+        if self._imap is None:
+            client = self._imap_connect()
+            if not self._imap_select(client):
+                client.logout()
+                raise imaplib.IMAP4.error(f"cannot select mailbox {self.config.imap_mailbox}")
+            self._imap = client
+        return self._imap
 
-                raw_bytes = self._extract_message_bytes(fetched)
-                if raw_bytes is None:
-                    continue
+    def _close_imap(self) -> None:
+        if self._imap is not None:
+            try:
+                self._imap.logout()
+            except Exception:
+                pass
+            self._imap = None
 
-                uid = self._extract_uid(fetched)
-                if dedupe and uid and uid in self._processed_uids:
-                    continue
+    def _supports_idle(self) -> bool:
+        return bool(self.config.idle and self._imap and "IDLE" in self._imap.capabilities)
 
-                parsed = BytesParser(policy=policy.default).parsebytes(raw_bytes)
-                sender = parseaddr(parsed.get("From", ""))[1].strip().lower()
-                if not sender:
-                    continue
+    @staticmethod
+    def _line_ready(client: imaplib.IMAP4) -> bool:
+        """
+        Whether server data can be read without blocking: already in imaplib's
+        buffered file (which select() cannot see), in the TLS layer, or on the socket.
+        """
+        timeout = client.sock.gettimeout()
+        client.sock.setblocking(False)
+        try:
+            return bool(client.file.peek(1))
+        except (BlockingIOError, ssl.SSLWantReadError):
+            return False
+        finally:
+            client.sock.settimeout(timeout)
+
+    def _idle(self, timeout: float) -> bool:
+        """
+        Wait in IMAP IDLE until the mailbox changes, timeout passes or the
+        channel stops; True if new mail may have arrived.
 
-                subject = self._decode_header_value(parsed.get("Subject", ""))
-                date_value = parsed.get("Date", "")
-                message_id = parsed.get("Message-ID", "").strip()
-                body = self._extract_text_body(parsed)
-
-                if not body:
-                    body = "(empty email body)"
-
-                body = body[: self.config.max_body_chars]
-                content = (
-                    f"Email received.\n"
-                    f"From: {sender}\n"
-                    f"Subject: {subject}\n"
-                    f"Date: {date_value}\n\n"
-                    f"{body}"
-                )
-
-                metadata = {
-                    "message_id": message_id,
-                    "subject": subject,
-                    "date": date_value,
-                    "sender_email": sender,
-                    "uid": uid,
-                }
-                messages.append(
-                    {
-                        "sender": sender,
-                        "subject": subject,
-                        "message_id": message_id,
-                        "content": content,
-                        "metadata": metadata,
-                    }
-                )
-
-                if dedupe and uid:
-                    self._processed_uids.add(uid)
-                    # mark_seen is the primary dedup; this set is a safety net
-                    if len(self._processed_uids) > self._MAX_PROCESSED_UIDS:
-                        self._processed_uids.clear()
-
-                if mark_seen:
-                    client.store(imap_id, "+FLAGS", "\\Seen")
+        imaplib only gains IDLE in Python 3.14, so the command is spoken
+        directly over the session's socket.
+        """
+        client = self._imap
+        if client is None:
+            return False
+        tag = client._new_tag()
+        client.send(tag + b" IDLE\r\n")
+        if not client.readline().startswith(b"+"):
+            raise imaplib.IMAP4.error("IDLE rejected")
+        changed = False
+        deadline = time.monotonic() + timeout
+        try:
+            while self._running and time.monotonic() < deadline:
+                if not self._line_ready(client) and not select.select([client.sock], [], [], 1.0)[0]:
+                    continue
+                line = client.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("connection closed during IDLE")
+                if re.match(rb"\* \d+ (EXISTS|RECENT)", line):
+                    changed = True
+                    break
         finally:
-            try:
-                client.logout()
-            except Exception:
-                pass
+            client.send(b"DONE\r\n")
+            while True:
+                line = client.readline()
+                if not line:
+                    raise imaplib.IMAP4.abort("connection closed ending IDLE")
+                if line.startswith(tag):
+                    break
+        return changed
+
+    def _cursor_file(self) -> Path:
+        if self._cursor_path is None:
+            name = safe_filename(f"{self.config.imap_username}@{self.config.imap_host}_{self.config.imap_mailbox}")
+            self._cursor_path = ensure_dir(get_data_path() / "email") / f"{name}.json"
+        return self._cursor_path
+
+    def _load_cursor(self) -> dict[str, Any]:
+        try:
+            return json.loads(self._cursor_file().read_text())
+        except (OSError, ValueError):
+            return {}
 
-        return messages
+    def _save_cursor(self, cursor: dict[str, Any]) -> None:
+        atomic_write_text(self._cursor_file(), json.dumps(cursor))
+
+    @staticmethod
+    def _split_fetch(fetched: list[Any]) -> list[tuple[str, bytes]]:
+        """(uid, raw message) pairs from a multi-message FETCH response."""
+        out: list[tuple[str, bytes]] = []
+        for i, item in enumerate(fetched):
+            if not (isinstance(item, tuple) and len(item) >= 2 and isinstance(item[1], (bytes, bytearray))):
+                continue
+            head = bytes(item[0]).decode("utf-8", errors="ignore")
+            # Some servers put UID after the literal, in the closing part
+            if i + 1 < len(fetched) and isinstance(fetched[i + 1], (bytes, bytearray)):
+                head += bytes(fetched[i + 1]).decode("utf-8", errors="ignore")
+            m = re.search(r"UID\s+(\d+)", head)
+            out.append((m.group(1) if m else "", bytes(item[1])))
+        return out
 
     @classmethod
     def _format_imap_date(cls, value: date) -> str:
@@ -322,23 +477,6 @@ class EmailChannel(BaseChannel):
         month = cls._IMAP_MONTHS[value.month - 1]
         return f"{value.day:02d}-{month}-{value.year}"
 
-    @staticmethod
-    def _extract_message_bytes(fetched: list[Any]) -> bytes | None:
-        for item in fetched:
-            if isinstance(item, tuple) and len(item) >= 2 and isinstance(item[1], (bytes, bytearray)):
-                return bytes(item[1])
-        return None
-
-    @staticmethod
-    def _extract_uid(fetched: list[Any]) -> str:
-        for item in fetched:
-            if isinstance(item, tuple) and item and isinstance(item[0], (bytes, bytearray)):
-                head = bytes(item[0]).decode("utf-8", errors="ignore")
-                m = re.search(r"UID\s+(\d+)", head)
-                if m:
-                    return m.group(1)
-        return ""
-
     @staticmethod
     def _decode_header_value(value: str) -> str:
         if not value:
@@ -2,17 +2,19 @@
 
 import asyncio
 import json
-import re
 import threading
 from collections import OrderedDict
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
 
 from loguru import logger
 
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.markdown import FeishuCardRenderer, parse
 from nanobot.config.schema import FeishuConfig
+from nanobot.metrics import METRICS
 
 try:
     import lark_oapi as lark
@@ -30,6 +32,11 @@ except ImportError:
     lark = None
     Emoji = None
 
+_API_LATENCY = METRICS.histogram("nanobot_feishu_api_duration_seconds", "Feishu SDK call latency", ("api",))
+_LOOP_CALLS = METRICS.counter(
+    "nanobot_feishu_loop_calls_total", "Feishu SDK calls attempted on the event loop thread (always refused)",
+)
+
 # 消息类型显示映射
 MSG_TYPE_MAP = {
     "image": "[image]",
@@ -96,9 +103,16 @@ class FeishuChannel(BaseChannel):
     - 飞书开放平台的 App ID 和 App Secret
     - 已启用机器人能力
     - 已启用事件订阅 (im.message.receive_v1)
+
+    lark-oapi 是同步 SDK：所有 SDK 调用都经由 _call 在专用的有界线程池中执行，
+    在事件循环线程上调用会被拒绝并计入 nanobot_feishu_loop_calls_total。
+    同一个 lark.Client 在整个生命周期内复用，租户 access token 由其缓存。
+    发送按会话排队：同一会话内保持顺序，不同会话的卡片并发发送。
     """
     
     name = "feishu"
+
+    _card_renderer = FeishuCardRenderer()
     
     def __init__(self, config: FeishuConfig, bus: MessageBus):
         super().__init__(config, bus)
@@ -108,6 +122,9 @@ class FeishuChannel(BaseChannel):
         self._ws_thread: threading.Thread | None = None
         self._processed_message_ids: OrderedDict[str, None] = OrderedDict()  # 有序去重缓存
         self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._executor = ThreadPoolExecutor(max(1, config.sdk_workers), thread_name_prefix="feishu-sdk")
+        self._chat_tails: dict[str, asyncio.Task] = {}  # 每个会话最后一条待发送消息
     
     async def start(self) -> None:
         """使用 WebSocket 长连接启动飞书机器人。"""
@@ -121,6 +138,7 @@ class FeishuChannel(BaseChannel):
         
         self._running = True
         self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
         
         # 创建 Lark 客户端用于发送消息
         self._client = lark.Client.builder() \
@@ -165,12 +183,26 @@ class FeishuChannel(BaseChannel):
     async def stop(self) -> None:
         """停止飞书机器人。"""
         self._running = False
+        if self._chat_tails:
+            await asyncio.wait(list(self._chat_tails.values()), timeout=10)
         if self._ws_client:
             try:
                 self._ws_client.stop()
             except Exception as e:
                 logger.warning(f"停止 WebSocket 客户端时出错: {e}")
+        self._executor.shutdown(wait=False, cancel_futures=True)
         logger.info("飞书机器人已停止")
+
+    async def _call(self, api: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """在 SDK 线程池中执行一次同步 SDK 调用。"""
+        with _API_LATENCY.time(api=api):
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self._off_loop, fn, *args)
+
+    def _off_loop(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if threading.get_ident() == self._loop_thread:
+            _LOOP_CALLS.inc()
+            raise RuntimeError("Feishu SDK call on the event loop thread")
+        return fn(*args)
     
     def _add_reaction_sync(self, message_id: str, emoji_type: str) -> None:
         """添加表情回应的同步辅助函数（在线程池中运行）。"""
@@ -201,92 +233,29 @@ class FeishuChannel(BaseChannel):
         if not self._client or not Emoji:
             return
         
-        loop = asyncio.get_running_loop()
-        await loop.run_in_executor(None, self._add_reaction_sync, message_id, emoji_type)
+        await self._call("message_reaction.create", self._add_reaction_sync, message_id, emoji_type)
     
-    # Regex to match markdown tables (header + separator + data rows)
-    _TABLE_RE = re.compile(
-        r"((?:^[ \t]*\|.+\|[ \t]*\n)(?:^[ \t]*\|[-:\s|]+\|[ \t]*\n)(?:^[ \t]*\|.+\|[ \t]*\n?)+)",
-        re.MULTILINE,
-    )
-
-    _HEADING_RE = re.compile(r"^(#{1,6})\s+(.+)$", re.MULTILINE)
-
-    _CODE_BLOCK_RE = re.compile(r"(```[\s\S]*?```)", re.MULTILINE)
-
-    @staticmethod
-    def _parse_md_table(table_text: str) -> dict | None:
-        """Parse a markdown table into a Feishu table element."""
-        lines = [l.strip() for l in table_text.strip().split("\n") if l.strip()]
-        if len(lines) < 3:
-            return None
-        split = lambda l: [c.strip() for c in l.strip("|").split("|")]
-        headers = split(lines[0])
-        rows = [split(l) for l in lines[2:]]
-        columns = [{"tag": "column", "name": f"c{i}", "display_name": h, "width": "auto"}
-                   for i, h in enumerate(headers)]
-        return {
-            "tag": "table",
-            "page_size": len(rows) + 1,
-            "columns": columns,
-            "rows": [{f"c{i}": r[i] if i < len(r) else "" for i in range(len(headers))} for r in rows],
-        }
-
-    def _build_card_elements(self, content: str) -> list[dict]:
-        """Split content into div/markdown + table elements for Feishu card."""
-        elements, last_end = [], 0
-        for m in self._TABLE_RE.finditer(content):
-            before = content[last_end:m.start()]
-            if before.strip():
-                elements.extend(self._split_headings(before))
-            elements.append(self._parse_md_table(m.group(1)) or {"tag": "markdown", "content": m.group(1)})
-            last_end = m.end()
-        remaining = content[last_end:]
-        if remaining.strip():
-            elements.extend(self._split_headings(remaining))
-        return elements or [{"tag": "markdown", "content": content}]
-
-    def _split_headings(self, content: str) -> list[dict]:
-        """Split content by headings, converting headings to div elements."""
-        protected = content
-        code_blocks = []
-        for m in self._CODE_BLOCK_RE.finditer(content):
-            code_blocks.append(m.group(1))
-            protected = protected.replace(m.group(1), f"\x00CODE{len(code_blocks)-1}\x00", 1)
-
-        elements = []
-        last_end = 0
-        for m in self._HEADING_RE.finditer(protected):
-            before = protected[last_end:m.start()].strip()
-            if before:
-                elements.append({"tag": "markdown", "content": before})
-            level = len(m.group(1))
-            text = m.group(2).strip()
-            elements.append({
-                "tag": "div",
-                "text": {
-                    "tag": "lark_md",
-                    "content": f"**{text}**",
-                },
-            })
-            last_end = m.end()
-        remaining = protected[last_end:].strip()
-        if remaining:
-            elements.append({"tag": "markdown", "content": remaining})
-
-        for i, cb in enumerate(code_blocks):
-            for el in elements:
-                if el.get("tag") == "markdown":
-                    el["content"] = el["content"].replace(f"\x00CODE{i}\x00", cb)
-
-        return elements or [{"tag": "markdown", "content": content}]
+    def _card_elements(self, content: str) -> list[dict]:
+        """把 Markdown 转成卡片元素：标题转为 div，表格转为原生表格，其余按 markdown 元素发送。"""
+        return self._card_renderer.elements(parse(content)) or [{"tag": "markdown", "content": content}]
 
     async def send(self, msg: OutboundMessage) -> None:
-        """通过飞书发送消息。"""
+        """通过飞书发送消息：排入该会话的发送队列后立即返回，不阻塞其他通道的出站分发。"""
         if not self._client:
             logger.warning("飞书客户端未初始化")
             return
         
+        previous = self._chat_tails.get(msg.chat_id)
+        task = asyncio.create_task(self._deliver(msg, previous))
+        self._chat_tails[msg.chat_id] = task
+        task.add_done_callback(
+            lambda t: self._chat_tails.pop(msg.chat_id, None) if self._chat_tails.get(msg.chat_id) is t else None
+        )
+
+    async def _deliver(self, msg: OutboundMessage, previous: asyncio.Task | None) -> None:
+        """等同一会话的上一条消息发完后，以卡片形式发送。"""
+        if previous:
+            await asyncio.wait([previous])
         try:
             # 根据 chat_id 格式确定 receive_id_type
             # open_id 以 "ou_" 开头，chat_id 以 "oc_" 开头
@@ -295,8 +264,9 @@ class FeishuChannel(BaseChannel):
             else:
                 receive_id_type = "open_id"
             
-            # 构建文本消息内容
-            content = json.dumps({"text": msg.content})
+            # 构建卡片消息内容
+            card = {"config": {"wide_screen_mode": True}, "elements": self._card_elements(msg.content)}
+            content = json.dumps(card, ensure_ascii=False)
             
             request = CreateMessageRequest.builder() \
                 .receive_id_type(receive_id_type) \
@@ -308,7 +278,7 @@ class FeishuChannel(BaseChannel):
                     .build()
                 ).build()
             
-            response = self._client.im.v1.message.create(request)
+            response = await self._call("message.create", self._client.im.v1.message.create, request)
             
             if not response.success():
                 logger.error(
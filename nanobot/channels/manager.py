@@ -10,7 +10,14 @@ from loguru import logger
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.media import MediaStore, configure_media_store
 from nanobot.config.schema import Config
+from nanobot.metrics import METRICS
+
+_CHANNEL_SENDS = METRICS.counter("nanobot_channel_sends_total", "Outbound messages dispatched", ("channel",))
+_CHANNEL_SEND_FAILURES = METRICS.counter(
+    "nanobot_channel_send_failures_total", "Outbound messages a channel failed to send", ("channel",)
+)
 
 
 class ChannelManager:
@@ -29,6 +36,13 @@ class ChannelManager:
         self.channels: dict[str, BaseChannel] = {}
         self._dispatch_task: asyncio.Task | None = None
         
+        media = config.channels.media
+        configure_media_store(MediaStore(
+            max_file_bytes=media.max_file_mb * 1024 * 1024,
+            max_total_bytes=media.max_total_mb * 1024 * 1024,
+            ttl_s=media.ttl_days * 86400,
+            max_concurrent_downloads=media.max_concurrent_downloads,
+        ))
         self._init_channels()
     
     def _init_channels(self) -> None:
@@ -52,7 +66,9 @@ class ChannelManager:
             try:
                 from nanobot.channels.whatsapp import WhatsAppChannel
                 self.channels["whatsapp"] = WhatsAppChannel(
-                    self.config.channels.whatsapp, self.bus
+                    self.config.channels.whatsapp,
+                    self.bus,
+                    groq_api_key=self.config.providers.groq.api_key,
                 )
                 logger.info("WhatsApp channel enabled")
             except ImportError as e:
@@ -195,9 +211,14 @@ class ChannelManager:
                 
                 channel = self.channels.get(msg.channel)
                 if channel:
+                    _CHANNEL_SENDS.inc(channel=msg.channel)
                     try:
-                        await channel.send(msg)
+                        if msg.metadata.get("_progress"):
+                            await channel.send_progress(msg)
+                        else:
+                            await channel.send(msg)
                     except Exception as e:
+                        _CHANNEL_SEND_FAILURES.inc(channel=msg.channel)
                         logger.error(f"Error sending to {msg.channel}: {e}")
                 else:
                     logger.warning(f"Unknown channel: {msg.channel}")
@@ -0,0 +1,528 @@
+"""Markdown parsed once into a small block tree and rendered per channel.
+
+A reply is parsed in one pass over its lines into `Block`s, with inline spans
+read by a single tokenizer regex. Each channel then renders the same tree:
+Telegram HTML, Slack mrkdwn, Discord markdown, plain text or Feishu card
+elements. `Renderer.split` cuts a document into chunks that fit a platform's
+length limit. Oversized blocks are halved along lines, table rows or words and
+each half is rendered whole, so a chunk never ends inside a tag or a fence.
+"""
+
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, NamedTuple
+
+
+# Named tuples rather than dataclasses: a long reply builds thousands of nodes, and tuples are cheapest to create
+class Inline(NamedTuple):
+    """An inline span. "text" and "code" are leaves; "bold", "italic", "strike" and "link" wrap children."""
+
+    kind: str
+    text: str = ""  # Leaf text, or a link's URL
+    children: tuple[Inline, ...] = ()
+
+
+Line = tuple[Inline, ...]
+# Block text is kept as raw markdown and tokenized into spans on first render, so a
+# renderer that passes markdown through (Feishu) never pays for inline parsing
+Text = str | Line
+
+
+class Block(NamedTuple):
+    """A block: paragraph, heading, item, quote, code, table or rule."""
+
+    kind: str
+    source: str = ""  # The markdown this block was parsed from
+    lines: tuple[Text, ...] = ()  # Text of paragraphs, headings, items and quotes, one entry per line
+    level: int = 0  # Heading level, or a list item's indent
+    marker: str = ""  # List item marker: "-", "*", "+" or "1."
+    code: str = ""
+    lang: str = ""
+    rows: tuple[tuple[Text, ...], ...] = ()  # Table header, then body rows
+    gap: int = 0  # Newlines before this block; 0 continues the previous block's line
+
+
+class Document(NamedTuple):
+    blocks: tuple[Block, ...] = ()
+
+
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})\s*([\w+#.-]*)")
+_HEADING_RE = re.compile(r"^ {0,3}(#{1,6})\s+(.+?)(?:\s+#+)?\s*$")
+_RULE_RE = re.compile(r"^ {0,3}([-*_])(?:\s*\1){2,}\s*$")
+_ITEM_RE = re.compile(r"^(\s*)([-*+]|\d{1,9}[.)])\s+(.*)$")
+_QUOTE_RE = re.compile(r"^ {0,3}>\s?(.*)$")
+_TABLE_SEP_RE = re.compile(r"^\s*\|?\s*:?-+:?\s*(?:\|\s*:?-+:?\s*)*\|?\s*$")
+
+_INLINE_RE = re.compile(
+    r"(?=[`\[*_~])(?:"  # Skip ahead to a markup character before trying the alternatives
+    r"(?P<ticks>`+)(?P<code>.+?)(?P=ticks)"
+    r"|\[(?P<label>[^\]\n]+)\]\((?P<link>[^)\s]+)\)"
+    r"|\*\*(?P<bold>.+?)\*\*"
+    r"|(?<!\w)__(?P<bold_u>.+?)__(?!\w)"
+    r"|~~(?P<strike>.+?)~~"
+    r"|(?<![\w*])\*(?P<italic>[^\s*](?:[^*]*[^\s*])?)\*(?![\w*])"
+    r"|(?<!\w)_(?P<italic_u>[^\s_](?:[^_]*[^\s_])?)_(?!\w)"
+    r")"
+)
+_MARKUP_RE = re.compile(r"[`\[*_~]")
+_WORD_RE = re.compile(r"\S+\s*|\s+")
+
+
+@lru_cache(maxsize=4096)
+def _inline(text: str) -> Line:
+    """Tokenize one line of text into inline spans; styled spans are tokenized recursively."""
+    if not _MARKUP_RE.search(text):
+        return (Inline("text", text),) if text else ()
+    out: list[Inline] = []
+    pos = 0
+    for m in _INLINE_RE.finditer(text):
+        if m.start() > pos:
+            out.append(Inline("text", text[pos:m.start()]))
+        pos = m.end()
+        kind = m.lastgroup
+        if kind == "code":
+            out.append(Inline("code", m.group("code")))
+        elif kind == "link":
+            out.append(Inline("link", m.group("link"), _inline(m.group("label"))))
+        else:
+            out.append(Inline(kind.removesuffix("_u"), children=_inline(m.group(kind))))
+    if pos < len(text):
+        out.append(Inline("text", text[pos:]))
+    return tuple(out)
+
+
+def _spans(text: Text) -> Line:
+    return _inline(text) if isinstance(text, str) else text
+
+
+def _cells(line: str) -> tuple[str, ...]:
+    return tuple(cell.strip() for cell in line.strip().strip("|").split("|"))
+
+
+def _is_table(lines: list[str], i: int) -> bool:
+    return (
+        lines[i].lstrip().startswith("|")
+        and i + 1 < len(lines)
+        and "-" in lines[i + 1]
+        and _TABLE_SEP_RE.match(lines[i + 1]) is not None
+    )
+
+
+@lru_cache(maxsize=64)
+def parse(text: str) -> Document:
+    """Parse markdown into a `Document`. Cached, so one reply is parsed once however many times it is rendered."""
+    lines = text.split("\n")
+    blocks: list[Block] = []
+    gap = 0
+    i = 0
+
+    def add(kind: str, raw: list[str], **fields: Any) -> None:
+        nonlocal gap
+        blocks.append(Block(kind, "\n".join(raw), gap=gap if blocks else 0, **fields))
+        gap = 1
+
+    while i < len(lines):
+        line = lines[i]
+        if not line.strip():
+            gap += 1
+            i += 1
+            continue
+
+        if fence := _FENCE_RE.match(line):
+            end = i + 1
+            while end < len(lines) and not lines[end].lstrip().startswith(fence.group(1)):
+                end += 1
+            add("code", lines[i:end + 1], code="\n".join(lines[i + 1:end]), lang=fence.group(2))
+            i = end + 1
+        elif heading := _HEADING_RE.match(line):
+            add("heading", [line], lines=(heading.group(2),), level=len(heading.group(1)))
+            i += 1
+        elif _RULE_RE.match(line):
+            add("rule", [line])
+            i += 1
+        elif _is_table(lines, i):
+            end = i + 2
+            while end < len(lines) and lines[end].lstrip().startswith("|"):
+                end += 1
+            rows = (_cells(lines[i]),) + tuple(_cells(row) for row in lines[i + 2:end])
+            add("table", lines[i:end], rows=rows)
+            i = end
+        elif item := _ITEM_RE.match(line):
+            add("item", [line], lines=(item.group(3),), level=len(item.group(1)), marker=item.group(2))
+            i += 1
+        elif _QUOTE_RE.match(line):
+            end = i
+            while end < len(lines) and _QUOTE_RE.match(lines[end]):
+                end += 1
+            quoted_lines = tuple(_QUOTE_RE.match(raw).group(1) for raw in lines[i:end])
+            add("quote", lines[i:end], lines=quoted_lines)
+            i = end
+        else:
+            end = i + 1
+            while end < len(lines) and lines[end].strip() and not _starts_block(lines, end):
+                end += 1
+            add("paragraph", lines[i:end], lines=tuple(lines[i:end]))
+            i = end
+    return Document(tuple(blocks))
+
+
+def _starts_block(lines: list[str], i: int) -> bool:
+    line = lines[i]
+    return bool(
+        _FENCE_RE.match(line) or _HEADING_RE.match(line) or _RULE_RE.match(line) or _ITEM_RE.match(line)
+        or _QUOTE_RE.match(line) or _is_table(lines, i)
+    )
+
+
+def _atoms(line: Text) -> list[Inline]:
+    """Flatten a line into the smallest pieces that can be rendered apart: single words, each with its styles."""
+    atoms: list[Inline] = []
+    for node in _spans(line):
+        if node.kind == "text":
+            atoms.extend(Inline("text", word) for word in _WORD_RE.findall(node.text))
+        elif node.kind == "code":
+            atoms.append(node)
+        else:
+            atoms.extend(Inline(node.kind, node.text, (atom,)) for atom in _atoms(node.children))
+    return atoms
+
+
+def _with_leaf(atom: Inline, text: str) -> Inline:
+    """The same chain of styles around different leaf text."""
+    if atom.children:
+        return Inline(atom.kind, atom.text, (_with_leaf(atom.children[0], text),))
+    return Inline(atom.kind, text)
+
+
+def _leaf(atom: Inline) -> Inline:
+    return _leaf(atom.children[0]) if atom.children else atom
+
+
+def _units(block: Block) -> tuple[list[Any], Callable[[list[Any], bool], Block]]:
+    """The pieces a block can be cut between, and how to rebuild a block from a run of them.
+
+    Cuts happen at the coarsest level that has more than one piece: lines of code,
+    table rows or text lines first, then words, then characters.
+    """
+    def gap(first: bool) -> int:
+        return block.gap if first else 1
+
+    if block.kind == "code":
+        if "\n" in block.code:
+            return block.code.split("\n"), lambda u, first: block._replace(code="\n".join(u), gap=gap(first))
+        return list(block.code), lambda u, first: block._replace(code="".join(u), gap=gap(first))
+    if block.kind == "table":
+        header, body = block.rows[0], list(block.rows[1:])
+        if len(body) > 1:
+            return body, lambda u, first: block._replace(rows=(header, *u), gap=gap(first))
+        separator = (Inline("text", " | "),)
+        rows = tuple(sum((_spans(cell) + separator for cell in row), ())[:-1] for row in block.rows)
+        return _units(block._replace(kind="paragraph", lines=rows))
+    if len(block.lines) > 1:
+        return list(block.lines), lambda u, first: block._replace(lines=tuple(u), gap=gap(first))
+
+    def rebuild(line: Line, first: bool) -> Block:
+        # The rest of a cut line continues it, so it carries no marker or heading prefix
+        return block._replace(lines=(line,)) if first else Block("paragraph", lines=(line,))
+
+    atoms = _atoms(block.lines[0]) if block.lines else []
+    if len(atoms) > 1:
+        return atoms, lambda u, first: rebuild(tuple(u), first)
+    if atoms:
+        return list(_leaf(atoms[0]).text), lambda u, first: rebuild((_with_leaf(atoms[0], "".join(u)),), first)
+    return [], lambda u, first: block
+
+
+def _plain(line: Text) -> str:
+    return "".join(node.text if not node.children else _plain(node.children) for node in _spans(line))
+
+
+def _grid(rows: tuple[tuple[Text, ...], ...]) -> str:
+    """Lay out table rows as padded monospace columns."""
+    cells = [[_plain(cell) for cell in row] for row in rows]
+    count = max(len(row) for row in cells)
+    cells = [row + [""] * (count - len(row)) for row in cells]
+    widths = [max(len(row[c]) for row in cells) for c in range(count)]
+    lines = [" | ".join(cell.ljust(widths[c]) for c, cell in enumerate(row)).rstrip() for row in cells]
+    lines.insert(1, "-+-".join("-" * width for width in widths))
+    return "\n".join(lines)
+
+
+class Renderer:
+    """Renders a `Document` for one platform. Subclasses override the span and block hooks they need."""
+
+    limit = 0  # Longest message the platform accepts, in characters; 0 for no limit
+    bullet = "• "
+    rule_text = "──────────"
+
+    def render(self, doc: Document) -> str:
+        parts: list[str] = []
+        for block in doc.blocks:
+            if parts:
+                parts.append("\n" * block.gap)
+            parts.append(self.block(block))
+        return "".join(parts)
+
+    def split(self, doc: Document) -> list[Document]:
+        """Group blocks into documents whose rendering fits `limit`, cutting blocks that are too long alone."""
+        return [Document(tuple(block for block, _ in group)) for group in self._pack(doc)]
+
+    def chunks(self, text: str) -> list[str]:
+        """Parse, split and render in one call, reusing the renderings measured while splitting."""
+        out = []
+        for group in self._pack(parse(text)):
+            parts = [group[0][1]]
+            for block, rendered in group[1:]:
+                parts.append("\n" * block.gap)
+                parts.append(rendered)
+            out.append("".join(parts))
+        return out
+
+    def _pack(self, doc: Document) -> list[list[tuple[Block, str]]]:
+        if not self.limit:
+            return [[(block, self.block(block)) for block in doc.blocks]] if doc.blocks else []
+        groups: list[list[tuple[Block, str]]] = []
+        current: list[tuple[Block, str]] = []
+        size = 0
+        for block in doc.blocks:
+            for piece, rendered in self._fit(block):
+                sep = piece.gap if current else 0
+                if current and size + sep + len(rendered) > self.limit:
+                    groups.append(current)
+                    current, size, sep = [], 0, 0
+                current.append((piece, rendered))
+                size += sep + len(rendered)
+        if current:
+            groups.append(current)
+        return groups
+
+    def _fit(self, block: Block) -> list[tuple[Block, str]]:
+        """Cut a block into pieces that each render within `limit`, each as long as possible."""
+        pieces: list[tuple[Block, str]] = []
+        while True:
+            rendered = self.block(block)
+            units, rebuild = _units(block) if len(rendered) > self.limit else ([], None)
+            if len(units) < 2:
+                pieces.append((block, rendered))
+                return pieces
+            # The longest head that fits, by binary search over the cut point
+            lo, hi = 1, len(units) - 1
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if len(self.block(rebuild(units[:mid], True))) <= self.limit:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            pieces.extend(self._fit(rebuild(units[:lo], True)))
+            block = rebuild(units[lo:], False)
+
+    def block(self, block: Block) -> str:
+        if block.kind == "paragraph":
+            return "\n".join(self.inlines(line) for line in block.lines)
+        if block.kind == "heading":
+            return self.heading(block.level, self.inlines(block.lines[0]))
+        if block.kind == "item":
+            marker = self.bullet if block.marker in "-*+" else f"{block.marker} "
+            return " " * block.level + marker + self.inlines(block.lines[0])
+        if block.kind == "quote":
+            return self.quote([self.inlines(line) for line in block.lines])
+        if block.kind == "code":
+            return self.code_block(block.code, block.lang)
+        if block.kind == "table":
+            return self.table(block.rows)
+        return self.rule_text
+
+    def inlines(self, line: Text) -> str:
+        out: list[str] = []
+        for node in _spans(line):
+            if node.kind == "text":
+                out.append(self.text(node.text))
+            elif node.kind == "code":
+                out.append(self.code(node.text))
+            elif node.kind == "link":
+                out.append(self.link(self.inlines(node.children), node.text))
+            else:
+                out.append(self.style(node.kind, self.inlines(node.children)))
+        return "".join(out)
+
+    # Hooks: plain text by default
+
+    def text(self, text: str) -> str:
+        return text
+
+    def code(self, text: str) -> str:
+        return text
+
+    def style(self, kind: str, inner: str) -> str:
+        return inner
+
+    def link(self, label: str, url: str) -> str:
+        return label if label == url else f"{label} ({url})"
+
+    def heading(self, level: int, inner: str) -> str:
+        return inner
+
+    def quote(self, lines: list[str]) -> str:
+        return "\n".join(lines)
+
+    def code_block(self, code: str, lang: str) -> str:
+        return code
+
+    def table(self, rows: tuple[tuple[Text, ...], ...]) -> str:
+        return _grid(rows)
+
+
+class PlainTextRenderer(Renderer):
+    """Markup removed; used where a platform rejects the formatted version."""
+
+
+def _escape_html(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+class TelegramRenderer(Renderer):
+    """Telegram's HTML parse mode."""
+
+    limit = 4000
+    _TAGS = {"bold": "b", "italic": "i", "strike": "s"}
+
+    def text(self, text: str) -> str:
+        return _escape_html(text)
+
+    def code(self, text: str) -> str:
+        return f"<code>{_escape_html(text)}</code>"
+
+    def style(self, kind: str, inner: str) -> str:
+        tag = self._TAGS[kind]
+        return f"<{tag}>{inner}</{tag}>"
+
+    def link(self, label: str, url: str) -> str:
+        return f'<a href="{_escape_html(url).replace(chr(34), "&quot;")}">{label}</a>'
+
+    def heading(self, level: int, inner: str) -> str:
+        return f"<b>{inner}</b>"
+
+    def quote(self, lines: list[str]) -> str:
+        return "<blockquote>" + "\n".join(lines) + "</blockquote>"
+
+    def code_block(self, code: str, lang: str) -> str:
+        attr = f' class="language-{_escape_html(lang)}"' if lang else ""
+        return f"<pre><code{attr}>{_escape_html(code)}</code></pre>"
+
+    def table(self, rows: tuple[tuple[Text, ...], ...]) -> str:
+        return f"<pre>{_escape_html(_grid(rows))}</pre>"
+
+
+class SlackRenderer(Renderer):
+    """Slack mrkdwn. Tables become one line per row, since Slack has no monospace table layout worth using."""
+
+    limit = 40000
+    _MARKS = {"bold": "*", "italic": "_", "strike": "~"}
+
+    def text(self, text: str) -> str:
+        return _escape_html(text)
+
+    def code(self, text: str) -> str:
+        return f"`{_escape_html(text)}`"
+
+    def style(self, kind: str, inner: str) -> str:
+        mark = self._MARKS[kind]
+        return f"{mark}{inner}{mark}"
+
+    def link(self, label: str, url: str) -> str:
+        return f"<{url}|{label}>"
+
+    def heading(self, level: int, inner: str) -> str:
+        return f"*{inner}*"
+
+    def quote(self, lines: list[str]) -> str:
+        return "\n".join(f"> {line}" for line in lines)
+
+    def code_block(self, code: str, lang: str) -> str:
+        return f"```\n{_escape_html(code)}\n```"
+
+    def table(self, rows: tuple[tuple[Text, ...], ...]) -> str:
+        headers = [self.inlines(cell) for cell in rows[0]]
+        out = []
+        for row in rows[1:]:
+            cells = [self.inlines(cell) for cell in row]
+            parts = [f"*{header}*: {cell}" for header, cell in zip(headers, cells) if cell]
+            if parts:
+                out.append(" · ".join(parts))
+        return "\n".join(out)
+
+
+class DiscordRenderer(Renderer):
+    """Discord's markdown dialect. Tables go in a code block, since Discord does not render them."""
+
+    limit = 2000
+    bullet = "- "
+    _MARKS = {"bold": "**", "italic": "*", "strike": "~~"}
+
+    def code(self, text: str) -> str:
+        return f"`` {text} ``" if "`" in text else f"`{text}`"
+
+    def style(self, kind: str, inner: str) -> str:
+        mark = self._MARKS[kind]
+        return f"{mark}{inner}{mark}"
+
+    def link(self, label: str, url: str) -> str:
+        return f"[{label}]({url})"
+
+    def heading(self, level: int, inner: str) -> str:
+        return f"{'#' * min(level, 3)} {inner}"
+
+    def quote(self, lines: list[str]) -> str:
+        return "\n".join(f"> {line}" for line in lines)
+
+    def code_block(self, code: str, lang: str) -> str:
+        return f"```{lang}\n{code}\n```"
+
+    def table(self, rows: tuple[tuple[Text, ...], ...]) -> str:
+        return f"```\n{_grid(rows)}\n```"
+
+
+class FeishuCardRenderer:
+    """Feishu interactive card elements.
+
+    Lark markdown renders most of the source as-is, so runs of ordinary blocks are
+    passed through as markdown elements. Headings become bold div elements and
+    tables become native table elements.
+    """
+
+    def elements(self, doc: Document) -> list[dict[str, Any]]:
+        elements: list[dict[str, Any]] = []
+        run: list[str] = []
+
+        def flush() -> None:
+            if run:
+                elements.append({"tag": "markdown", "content": "".join(run).strip("\n")})
+                run.clear()
+
+        for block in doc.blocks:
+            if block.kind == "heading":
+                flush()
+                text = _HEADING_RE.match(block.source).group(2)
+                elements.append({"tag": "div", "text": {"tag": "lark_md", "content": f"**{text}**"}})
+            elif block.kind == "table":
+                flush()
+                elements.append(self.table(block.rows))
+            else:
+                run.append(("\n" * block.gap if run else "") + block.source)
+        flush()
+        return elements
+
+    @staticmethod
+    def table(rows: tuple[tuple[Text, ...], ...]) -> dict[str, Any]:
+        headers = [_plain(cell) for cell in rows[0]]
+        body = [[_plain(cell) for cell in row] for row in rows[1:]]
+        return {
+            "tag": "table",
+            "page_size": len(body) + 1,
+            "columns": [
+                {"tag": "column", "name": f"c{i}", "display_name": h, "width": "auto"} for i, h in enumerate(headers)
+            ],
+            "rows": [{f"c{i}": row[i] if i < len(row) else "" for i in range(len(headers))} for row in body],
+        }
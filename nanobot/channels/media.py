@@ -0,0 +1,295 @@
+"""Shared media pipeline for channels: content-addressed storage, bounded downloads, eviction."""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import httpx
+from loguru import logger
+
+from nanobot.metrics import METRICS
+
+DEFAULT_MAX_FILE_BYTES = 20 * 1024 * 1024  # 20MB
+DEFAULT_MAX_TOTAL_BYTES = 1024 * 1024 * 1024  # 1GB
+DEFAULT_TTL_S = 7 * 24 * 3600  # 7 days since last access
+EVICT_INTERVAL_S = 60
+
+_MEDIA_REQUESTS = METRICS.counter("nanobot_media_requests_total", "Media fetches by result", ("result",))
+_MEDIA_BYTES = METRICS.gauge("nanobot_media_store_bytes", "Bytes held in the media directory")
+
+
+class MediaTooLargeError(Exception):
+    """Raised when a media file exceeds the per-file size cap."""
+
+
+class MediaStore:
+    """
+    Content-addressed media cache shared by all channels.
+
+    Files are stored as <sha256[:32]><ext>, so the same photo sent twice (or
+    to two chats) lands on disk once. A small index maps platform file ids
+    (Telegram file_unique_id, Discord attachment id, ...) to stored files so
+    repeat downloads are skipped entirely, and caches voice transcriptions
+    by content hash. Least-recently-used files are evicted once they exceed
+    the TTL or the directory exceeds its byte budget.
+    """
+
+    def __init__(
+        self,
+        media_dir: Path | None = None,
+        max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+        max_total_bytes: int = DEFAULT_MAX_TOTAL_BYTES,
+        ttl_s: int = DEFAULT_TTL_S,
+        max_concurrent_downloads: int = 4,
+    ):
+        self.media_dir = media_dir or Path.home() / ".nanobot" / "media"
+        self.max_file_bytes = max_file_bytes
+        self.max_total_bytes = max_total_bytes
+        self.ttl_s = ttl_s
+        self._index_file = self.media_dir / ".index.json"
+        self._index: dict[str, str] | None = None  # source id -> file name
+        self._transcripts: dict[str, str] = {}  # file name -> transcription
+        self._downloads = asyncio.Semaphore(max(1, max_concurrent_downloads))
+        self._inflight: dict[str, asyncio.Future[Path]] = {}
+        self._lock = threading.Lock()  # Index is touched from worker threads
+        self._last_evict = 0.0
+        self._bytes = 0  # Running total of stored files: counted once on first use, then kept up to date
+        _MEDIA_BYTES.set_function(lambda: float(self._bytes))
+
+    # ---------------------------------------------------------------- index
+
+    def _load_index(self) -> dict[str, str]:
+        """Load the index on first use (blocking; call via to_thread from async code)."""
+        with self._lock:
+            if self._index is None:
+                index: dict[str, str] = {}
+                if self._index_file.exists():
+                    try:
+                        data = json.loads(self._index_file.read_text(encoding="utf-8"))
+                        index = data.get("sources", {})
+                        self._transcripts = data.get("transcripts", {})
+                    except (OSError, json.JSONDecodeError) as e:
+                        logger.warning(f"Media index unreadable, starting fresh: {e}")
+                self._index = index
+                self._bytes = self._dir_bytes()
+            return self._index
+
+    def _save_index(self) -> None:
+        with self._lock:
+            data = json.dumps({"sources": self._index, "transcripts": self._transcripts})
+        self.media_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self._index_file.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_text(data, encoding="utf-8")
+        tmp.replace(self._index_file)
+
+    async def lookup(self, source_id: str) -> Path | None:
+        """Return the stored file for a platform file id, refreshing its LRU position."""
+        return await asyncio.to_thread(self._lookup, source_id)
+
+    def _lookup(self, source_id: str) -> Path | None:
+        name = self._load_index().get(source_id)
+        if not name:
+            return None
+        path = self.media_dir / name
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._index.pop(source_id, None)
+            return None
+        return path
+
+    # -------------------------------------------------------------- storing
+
+    async def store_bytes(self, data: bytes, ext: str = "", source_id: str | None = None) -> Path:
+        """Store bytes under their content hash and return the path."""
+        if len(data) > self.max_file_bytes:
+            raise MediaTooLargeError(f"{len(data)} bytes exceeds cap of {self.max_file_bytes}")
+        path = await asyncio.to_thread(self._write_blob, data, ext, source_id)
+        self._maybe_evict()
+        return path
+
+    def _write_blob(self, data: bytes, ext: str, source_id: str | None) -> Path:
+        index = self._load_index()
+        self.media_dir.mkdir(parents=True, exist_ok=True)
+        name = hashlib.sha256(data).hexdigest()[:32] + ext
+        path = self.media_dir / name
+        if path.exists():
+            os.utime(path)
+        else:
+            tmp = path.with_suffix(path.suffix + ".part")
+            tmp.write_bytes(data)
+            tmp.replace(path)
+            with self._lock:
+                self._bytes += len(data)
+        if source_id and index.get(source_id) != name:
+            with self._lock:
+                index[source_id] = name
+            self._save_index()
+        return path
+
+    async def fetch(
+        self,
+        source_id: str,
+        ext: str,
+        loader: Callable[[], Awaitable[bytes]],
+        size_hint: int | None = None,
+    ) -> Path:
+        """
+        Return the stored file for source_id, calling loader() only on a miss.
+
+        Concurrent requests for the same source share one download, and the
+        number of downloads running at once is bounded.
+        """
+        if path := await self.lookup(source_id):
+            _MEDIA_REQUESTS.inc(result="hit")
+            return path
+        if size_hint and size_hint > self.max_file_bytes:
+            _MEDIA_REQUESTS.inc(result="too_large")
+            raise MediaTooLargeError(f"{size_hint} bytes exceeds cap of {self.max_file_bytes}")
+        if pending := self._inflight.get(source_id):
+            _MEDIA_REQUESTS.inc(result="shared")
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future[Path] = asyncio.get_running_loop().create_future()
+        self._inflight[source_id] = future
+        try:
+            async with self._downloads:
+                data = await loader()
+            path = await self.store_bytes(data, ext, source_id)
+            _MEDIA_REQUESTS.inc(result="miss")
+            future.set_result(path)
+            return path
+        except Exception as e:
+            _MEDIA_REQUESTS.inc(result="error")
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else is waiting
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            self._inflight.pop(source_id, None)
+
+    async def download(
+        self,
+        url: str,
+        ext: str = "",
+        source_id: str | None = None,
+        client: httpx.AsyncClient | None = None,
+        headers: dict[str, str] | None = None,
+    ) -> Path:
+        """Stream a URL into the store, aborting as soon as the size cap is crossed."""
+
+        async def _load() -> bytes:
+            async def _stream(c: httpx.AsyncClient) -> bytes:
+                async with c.stream("GET", url, headers=headers) as resp:
+                    resp.raise_for_status()
+                    declared = int(resp.headers.get("content-length") or 0)
+                    if declared > self.max_file_bytes:
+                        raise MediaTooLargeError(f"{declared} bytes exceeds cap of {self.max_file_bytes}")
+                    buf = bytearray()
+                    async for chunk in resp.aiter_bytes():
+                        buf.extend(chunk)
+                        if len(buf) > self.max_file_bytes:
+                            raise MediaTooLargeError(f"download exceeds cap of {self.max_file_bytes}")
+                    return bytes(buf)
+
+            if client:
+                return await _stream(client)
+            async with httpx.AsyncClient(timeout=60.0, follow_redirects=True) as c:
+                return await _stream(c)
+
+        return await self.fetch(source_id or url, ext, _load)
+
+    # -------------------------------------------------------- transcription
+
+    async def transcribe(self, path: Path, transcriber) -> str:
+        """Transcribe an audio file once; repeats of the same content hit the cache."""
+        await asyncio.to_thread(self._load_index)
+        if (cached := self._transcripts.get(path.name)) is not None:
+            return cached
+        text = await transcriber.transcribe(path)
+        if text:
+            with self._lock:
+                self._transcripts[path.name] = text
+            await asyncio.to_thread(self._save_index)
+        return text
+
+    # ------------------------------------------------------------- eviction
+
+    def _dir_bytes(self) -> int:
+        if not self.media_dir.exists():
+            return 0
+        return sum(e.stat().st_size for e in os.scandir(self.media_dir) if e.is_file() and not e.name.startswith("."))
+
+    def _maybe_evict(self) -> None:
+        now = time.monotonic()
+        if now - self._last_evict < EVICT_INTERVAL_S:
+            return
+        self._last_evict = now
+        future = asyncio.get_running_loop().run_in_executor(None, self.evict)
+        future.add_done_callback(self._log_evict_failure)
+
+    @staticmethod
+    def _log_evict_failure(future: asyncio.Future) -> None:
+        if not future.cancelled() and (e := future.exception()):
+            logger.warning(f"Media store eviction failed: {e}")
+
+    def evict(self) -> int:
+        """Remove expired files, then least-recently-used ones until under budget."""
+        if not self.media_dir.exists():
+            return 0
+        entries = []
+        for e in os.scandir(self.media_dir):
+            if e.is_file() and not e.name.startswith("."):
+                st = e.stat()
+                entries.append((st.st_mtime, st.st_size, Path(e.path)))
+        entries.sort()  # Oldest access first
+
+        cutoff = time.time() - self.ttl_s
+        total = sum(size for _, size, _ in entries)
+        removed: set[str] = set()
+        for mtime, size, path in entries:
+            if mtime >= cutoff and total <= self.max_total_bytes:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+            removed.add(path.name)
+            with self._lock:
+                self._bytes -= size
+
+        if removed:
+            index = self._load_index()
+            with self._lock:
+                for key in [k for k, v in index.items() if v in removed]:
+                    del index[key]
+                for name in removed:
+                    self._transcripts.pop(name, None)
+            self._save_index()
+            logger.debug(f"Media store evicted {len(removed)} files")
+        return len(removed)
+
+
+_default_store: MediaStore | None = None
+
+
+def get_media_store() -> MediaStore:
+    """Return the process-wide media store, creating it with defaults on first use."""
+    global _default_store
+    if _default_store is None:
+        _default_store = MediaStore()
+    return _default_store
+
+
+def configure_media_store(store: MediaStore) -> None:
+    """Install the process-wide media store (called by ChannelManager from config)."""
+    global _default_store
+    _default_store = store
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import json
+import time
 from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -16,6 +17,8 @@ from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
 from nanobot.config.schema import MochatConfig
+from nanobot.metrics import METRICS
+from nanobot.utils.files import FILES, atomic_write_text
 from nanobot.utils.helpers import get_data_path
 
 try:
@@ -33,6 +36,12 @@ except ImportError:
 
 MAX_SEEN_MESSAGE_IDS = 2000
 CURSOR_SAVE_DEBOUNCE_S = 0.5
+CURSOR_JOURNAL_COMPACT_MIN = 256  # Journal lines before it is folded back into the snapshot
+PANEL_POLL_LIMIT = 10  # Messages per panel poll; grows up to watch_limit while pages come back full
+
+_POLL_REQUESTS = METRICS.counter(
+    "nanobot_mochat_poll_requests_total", "Mochat fallback poll requests by target kind and result", ("kind", "result")
+)
 
 
 # ---------------------------------------------------------------------------
@@ -59,6 +68,16 @@ class DelayState:
     timer: asyncio.Task | None = None
 
 
+@dataclass
+class PollTarget:
+    """One session or panel in the fallback poll rotation."""
+    kind: str
+    id: str
+    interval: float
+    due: float = 0.0
+    in_flight: bool = False
+
+
 @dataclass
 class MochatTarget:
     """Outbound target resolution result."""
@@ -213,7 +232,17 @@ def parse_timestamp(value: Any) -> int | None:
 # ---------------------------------------------------------------------------
 
 class MochatChannel(BaseChannel):
-    """Mochat channel using socket.io with fallback polling workers."""
+    """
+    Mochat channel using socket.io with an HTTP polling fallback.
+
+    Without the socket, one poller shares a few request slots
+    (fallbackConcurrency) across every session and panel. Each target has
+    its own interval: it drops to pollMinIntervalMs when the target had
+    new events and doubles up to pollMaxIntervalMs while it stays quiet,
+    so request volume follows activity rather than the number of targets.
+    Panels are read from a per-panel cursor (newest createdAt handled) and
+    only ask for a short page unless the last one came back full.
+    """
 
     name = "mochat"
 
@@ -226,7 +255,11 @@ class MochatChannel(BaseChannel):
 
         self._state_dir = get_data_path() / "mochat"
         self._cursor_path = self._state_dir / "session_cursors.json"
+        self._cursor_journal_path = self._state_dir / "session_cursors.journal"
         self._session_cursor: dict[str, int] = {}
+        self._panel_cursor: dict[str, int] = {}  # Newest createdAt (epoch ms) handled per panel
+        self._dirty_cursors: set[tuple[str, str]] = set()
+        self._journal_lines = 0
         self._cursor_save_task: asyncio.Task | None = None
 
         self._session_set: set[str] = set()
@@ -241,8 +274,9 @@ class MochatChannel(BaseChannel):
         self._delay_states: dict[str, DelayState] = {}
 
         self._fallback_mode = False
-        self._session_fallback_tasks: dict[str, asyncio.Task] = {}
-        self._panel_fallback_tasks: dict[str, asyncio.Task] = {}
+        self._fallback_task: asyncio.Task | None = None
+        self._poll_targets: dict[tuple[str, str], PollTarget] = {}
+        self._panel_limit: dict[str, int] = {}
         self._refresh_task: asyncio.Task | None = None
         self._target_locks: dict[str, asyncio.Lock] = {}
 
@@ -262,7 +296,7 @@ class MochatChannel(BaseChannel):
         await self._refresh_targets(subscribe_new=False)
 
         if not await self._start_socket_client():
-            await self._ensure_fallback_workers()
+            await self._ensure_fallback_poller()
 
         self._refresh_task = asyncio.create_task(self._refresh_loop())
         while self._running:
@@ -275,7 +309,7 @@ class MochatChannel(BaseChannel):
             self._refresh_task.cancel()
             self._refresh_task = None
 
-        await self._stop_fallback_workers()
+        await self._stop_fallback_poller()
         await self._cancel_delay_timers()
 
         if self._socket:
@@ -368,7 +402,7 @@ class MochatChannel(BaseChannel):
             logger.info("Mochat websocket connected")
             subscribed = await self._subscribe_all()
             self._ws_ready = subscribed
-            await (self._stop_fallback_workers() if subscribed else self._ensure_fallback_workers())
+            await (self._stop_fallback_poller() if subscribed else self._ensure_fallback_poller())
 
         @client.event
         async def disconnect() -> None:
@@ -376,7 +410,7 @@ class MochatChannel(BaseChannel):
                 return
             self._ws_connected = self._ws_ready = False
             logger.warning("Mochat websocket disconnected")
-            await self._ensure_fallback_workers()
+            await self._ensure_fallback_poller()
 
         @client.event
         async def connect_error(data: Any) -> None:
@@ -490,7 +524,7 @@ class MochatChannel(BaseChannel):
             except Exception as e:
                 logger.warning(f"Mochat refresh failed: {e}")
             if self._fallback_mode:
-                await self._ensure_fallback_workers()
+                await self._ensure_fallback_poller()
 
     async def _refresh_targets(self, subscribe_new: bool) -> None:
         if self._auto_discover_sessions:
@@ -530,7 +564,7 @@ class MochatChannel(BaseChannel):
         if self._ws_ready and subscribe_new:
             await self._subscribe_sessions(new_ids)
         if self._fallback_mode:
-            await self._ensure_fallback_workers()
+            await self._ensure_fallback_poller()
 
     async def _refresh_panels(self, subscribe_new: bool) -> None:
         try:
@@ -560,73 +594,124 @@ class MochatChannel(BaseChannel):
         if self._ws_ready and subscribe_new:
             await self._subscribe_panels(new_ids)
         if self._fallback_mode:
-            await self._ensure_fallback_workers()
+            await self._ensure_fallback_poller()
 
-    # ---- fallback workers --------------------------------------------------
+    # ---- fallback poller --------------------------------------------------
 
-    async def _ensure_fallback_workers(self) -> None:
+    async def _ensure_fallback_poller(self) -> None:
         if not self._running:
             return
         self._fallback_mode = True
-        for sid in sorted(self._session_set):
-            t = self._session_fallback_tasks.get(sid)
-            if not t or t.done():
-                self._session_fallback_tasks[sid] = asyncio.create_task(self._session_watch_worker(sid))
-        for pid in sorted(self._panel_set):
-            t = self._panel_fallback_tasks.get(pid)
-            if not t or t.done():
-                self._panel_fallback_tasks[pid] = asyncio.create_task(self._panel_poll_worker(pid))
-
-    async def _stop_fallback_workers(self) -> None:
+        if not self._fallback_task or self._fallback_task.done():
+            self._fallback_task = asyncio.create_task(self._fallback_loop())
+
+    async def _stop_fallback_poller(self) -> None:
         self._fallback_mode = False
-        tasks = [*self._session_fallback_tasks.values(), *self._panel_fallback_tasks.values()]
-        for t in tasks:
-            t.cancel()
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
-        self._session_fallback_tasks.clear()
-        self._panel_fallback_tasks.clear()
-
-    async def _session_watch_worker(self, session_id: str) -> None:
-        while self._running and self._fallback_mode:
-            try:
-                payload = await self._post_json("/api/claw/sessions/watch", {
-                    "sessionId": session_id, "cursor": self._session_cursor.get(session_id, 0),
-                    "timeoutMs": self.config.watch_timeout_ms, "limit": self.config.watch_limit,
-                })
-                await self._handle_watch_payload(payload, "session")
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.warning(f"Mochat watch fallback error ({session_id}): {e}")
-                await asyncio.sleep(max(0.1, self.config.retry_delay_ms / 1000.0))
+        task, self._fallback_task = self._fallback_task, None
+        if task:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        for target in self._poll_targets.values():
+            target.in_flight = False
+
+    def _sync_poll_targets(self) -> None:
+        """Add newly discovered sessions/panels to the rotation, due immediately."""
+        base = max(0.1, self.config.poll_min_interval_ms / 1000.0)
+        for kind, ids in (("session", self._session_set), ("panel", self._panel_set)):
+            for target_id in ids:
+                if (kind, target_id) not in self._poll_targets:
+                    self._poll_targets[(kind, target_id)] = PollTarget(kind, target_id, base)
+
+    async def _fallback_loop(self) -> None:
+        slots = asyncio.Semaphore(max(1, self.config.fallback_concurrency))
+        polls: set[asyncio.Task] = set()
+        try:
+            while self._running and self._fallback_mode:
+                self._sync_poll_targets()
+                waiting = [t for t in self._poll_targets.values() if not t.in_flight]
+                if not waiting:
+                    await asyncio.sleep(0.5)
+                    continue
+                target = min(waiting, key=lambda t: t.due)
+                wait = target.due - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(min(wait, 1.0))  # Re-check: new targets may be due sooner
+                    continue
+                await slots.acquire()
+                target.in_flight = True
+                task = asyncio.create_task(self._poll_target(target))
+                polls.add(task)
+                task.add_done_callback(lambda t: (polls.discard(t), slots.release()))
+        finally:
+            for task in polls:
+                task.cancel()
+
+    async def _poll_target(self, target: PollTarget) -> None:
+        """Poll one target once and reschedule it by how active it was."""
+        min_s = max(0.1, self.config.poll_min_interval_ms / 1000.0)
+        max_s = max(min_s, self.config.poll_max_interval_ms / 1000.0)
+        try:
+            if target.kind == "session":
+                active = await self._poll_session(target.id)
+            else:
+                active = await self._poll_panel(target.id)
+            _POLL_REQUESTS.inc(kind=target.kind, result="active" if active else "idle")
+            target.interval = min_s if active else min(target.interval * 2, max_s)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _POLL_REQUESTS.inc(kind=target.kind, result="error")
+            logger.warning(f"Mochat {target.kind} polling error ({target.id}): {e}")
+            target.interval = min(max(target.interval * 2, self.config.retry_delay_ms / 1000.0), max_s)
+        finally:
+            target.due = time.monotonic() + target.interval
+            target.in_flight = False
+
+    async def _poll_session(self, session_id: str) -> bool:
+        before = self._session_cursor.get(session_id, 0)
+        payload = await self._post_json("/api/claw/sessions/watch", {
+            "sessionId": session_id, "cursor": before,
+            "timeoutMs": 0, "limit": self.config.watch_limit,
+        })
+        await self._handle_watch_payload(payload, "session")
+        return self._session_cursor.get(session_id, 0) > before
+
+    async def _poll_panel(self, panel_id: str) -> bool:
+        """Fetch a panel's newest messages and handle those past its cursor; True if any were new."""
+        cursor = self._panel_cursor.get(panel_id)
+        limit = self._panel_limit.get(panel_id, PANEL_POLL_LIMIT)
+        resp = await self._post_json("/api/claw/groups/panels/messages", {"panelId": panel_id, "limit": limit})
+        msgs = [m for m in resp.get("messages") or [] if isinstance(m, dict)]
+        stamped = [(parse_timestamp(m.get("createdAt")), m) for m in reversed(msgs)]  # Oldest first
+        newest = max((ts for ts, _ in stamped if ts is not None), default=None)
+        if cursor is None:
+            # First sight of this panel: start from now instead of replaying its history
+            if newest is not None:
+                self._mark_panel_cursor(panel_id, newest)
+            return False
 
-    async def _panel_poll_worker(self, panel_id: str) -> None:
-        sleep_s = max(1.0, self.config.refresh_interval_ms / 1000.0)
-        while self._running and self._fallback_mode:
-            try:
-                resp = await self._post_json("/api/claw/groups/panels/messages", {
-                    "panelId": panel_id, "limit": min(100, max(1, self.config.watch_limit)),
-                })
-                msgs = resp.get("messages")
-                if isinstance(msgs, list):
-                    for m in reversed(msgs):
-                        if not isinstance(m, dict):
-                            continue
-                        evt = _make_synthetic_event(
-                            message_id=str(m.get("messageId") or ""),
-                            author=str(m.get("author") or ""),
-                            content=m.get("content"),
-                            meta=m.get("meta"), group_id=str(resp.get("groupId") or ""),
-                            converse_id=panel_id, timestamp=m.get("createdAt"),
-                            author_info=m.get("authorInfo"),
-                        )
-                        await self._process_inbound_event(panel_id, evt, "panel")
-            except asyncio.CancelledError:
-                break
-            except Exception as e:
-                logger.warning(f"Mochat panel polling error ({panel_id}): {e}")
-            await asyncio.sleep(sleep_s)
+        fresh = [m for ts, m in stamped if ts is None or ts > cursor]
+        full_watch = max(PANEL_POLL_LIMIT, min(100, self.config.watch_limit))
+        if len(msgs) >= limit and all(ts is not None and ts > cursor for ts, _ in stamped):
+            # The whole page is new, so more may sit past it: read a bigger page next time
+            self._panel_limit[panel_id] = min(limit * 2, full_watch)
+        else:
+            self._panel_limit.pop(panel_id, None)
+
+        handled = False
+        for m in fresh:
+            evt = _make_synthetic_event(
+                message_id=str(m.get("messageId") or ""),
+                author=str(m.get("author") or ""),
+                content=m.get("content"),
+                meta=m.get("meta"), group_id=str(resp.get("groupId") or ""),
+                converse_id=panel_id, timestamp=m.get("createdAt"),
+                author_info=m.get("authorInfo"),
+            )
+            handled = await self._process_inbound_event(panel_id, evt, "panel") or handled
+        if newest is not None:
+            self._mark_panel_cursor(panel_id, newest)
+        return handled or panel_id in self._panel_limit
 
     # ---- inbound event processing ------------------------------------------
 
@@ -660,21 +745,22 @@ class MochatChannel(BaseChannel):
                 if event.get("type") == "message.add":
                     await self._process_inbound_event(target_id, event, target_kind)
 
-    async def _process_inbound_event(self, target_id: str, event: dict[str, Any], target_kind: str) -> None:
+    async def _process_inbound_event(self, target_id: str, event: dict[str, Any], target_kind: str) -> bool:
+        """Handle one message event; True if it was new (not a duplicate or our own)."""
         payload = event.get("payload")
         if not isinstance(payload, dict):
-            return
+            return False
 
         author = _str_field(payload, "author")
         if not author or (self.config.agent_user_id and author == self.config.agent_user_id):
-            return
+            return False
         if not self.is_allowed(author):
-            return
+            return False
 
         message_id = _str_field(payload, "messageId")
         seen_key = f"{target_kind}:{target_id}"
         if message_id and self._remember_message_id(seen_key, message_id):
-            return
+            return False
 
         raw_body = normalize_mochat_content(payload.get("content")) or "[empty message]"
         ai = _safe_dict(payload.get("authorInfo"))
@@ -688,7 +774,7 @@ class MochatChannel(BaseChannel):
         use_delay = target_kind == "panel" and self.config.reply_delay_mode == "non-mention"
 
         if require_mention and not was_mentioned and not use_delay:
-            return
+            return True
 
         entry = MochatBufferedEntry(
             raw_body=raw_body, author=author, sender_name=sender_name,
@@ -702,9 +788,10 @@ class MochatChannel(BaseChannel):
                 await self._flush_delayed_entries(delay_key, target_id, target_kind, "mention", entry)
             else:
                 await self._enqueue_delayed_entry(delay_key, target_id, target_kind, entry)
-            return
+            return True
 
         await self._dispatch_entries(target_id, target_kind, [entry], was_mentioned)
+        return True
 
     # ---- dedup / buffering -------------------------------------------------
 
@@ -818,11 +905,25 @@ class MochatChannel(BaseChannel):
         await self._process_inbound_event(session_id, evt, "session")
 
     # ---- cursor persistence ------------------------------------------------
+    #
+    # session_cursors.json is a snapshot; changes since then are appended to
+    # session_cursors.journal one line per changed cursor, and the journal is
+    # folded into a new snapshot once it outgrows the cursor count.
 
     def _mark_session_cursor(self, session_id: str, cursor: int) -> None:
         if cursor < 0 or cursor < self._session_cursor.get(session_id, 0):
             return
-        self._session_cursor[session_id] = cursor
+        if cursor != self._session_cursor.get(session_id):
+            self._session_cursor[session_id] = cursor
+            self._mark_cursor_dirty("session", session_id)
+
+    def _mark_panel_cursor(self, panel_id: str, cursor: int) -> None:
+        if cursor > self._panel_cursor.get(panel_id, -1):
+            self._panel_cursor[panel_id] = cursor
+            self._mark_cursor_dirty("panel", panel_id)
+
+    def _mark_cursor_dirty(self, kind: str, target_id: str) -> None:
+        self._dirty_cursors.add((kind, target_id))
         if not self._cursor_save_task or self._cursor_save_task.done():
             self._cursor_save_task = asyncio.create_task(self._save_cursor_debounced())
 
@@ -831,29 +932,62 @@ class MochatChannel(BaseChannel):
         await self._save_session_cursors()
 
     async def _load_session_cursors(self) -> None:
-        if not self._cursor_path.exists():
-            return
-        try:
-            data = json.loads(self._cursor_path.read_text("utf-8"))
-        except Exception as e:
-            logger.warning(f"Failed to read Mochat cursor file: {e}")
+        await FILES.run(self._read_cursor_files)
+
+    def _read_cursor_files(self) -> None:
+        if self._cursor_path.exists():
+            try:
+                data = json.loads(self._cursor_path.read_text("utf-8"))
+            except Exception as e:
+                logger.warning(f"Failed to read Mochat cursor file: {e}")
+                data = {}
+            if isinstance(data, dict):
+                for key, into in (("cursors", self._session_cursor), ("panelCursors", self._panel_cursor)):
+                    cursors = data.get(key)
+                    if isinstance(cursors, dict):
+                        into.update({k: v for k, v in cursors.items() if isinstance(v, int) and v >= 0})
+        if not self._cursor_journal_path.exists():
             return
-        cursors = data.get("cursors") if isinstance(data, dict) else None
-        if isinstance(cursors, dict):
-            for sid, cur in cursors.items():
-                if isinstance(sid, str) and isinstance(cur, int) and cur >= 0:
-                    self._session_cursor[sid] = cur
+        for line in self._cursor_journal_path.read_text("utf-8").splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # Torn final line
+            into = self._panel_cursor if entry.get("kind") == "panel" else self._session_cursor
+            if isinstance(entry.get("id"), str) and isinstance(entry.get("cursor"), int):
+                into[entry["id"]] = entry["cursor"]
+            self._journal_lines += 1
 
     async def _save_session_cursors(self) -> None:
+        dirty, self._dirty_cursors = self._dirty_cursors, set()
         try:
-            self._state_dir.mkdir(parents=True, exist_ok=True)
-            self._cursor_path.write_text(json.dumps({
-                "schemaVersion": 1, "updatedAt": datetime.utcnow().isoformat(),
-                "cursors": self._session_cursor,
-            }, ensure_ascii=False, indent=2) + "\n", "utf-8")
+            await FILES.run(self._write_cursor_changes, dirty)
         except Exception as e:
+            self._dirty_cursors |= dirty
             logger.warning(f"Failed to save Mochat cursor file: {e}")
 
+    def _write_cursor_changes(self, dirty: set[tuple[str, str]]) -> None:
+        if not dirty:
+            return
+        self._state_dir.mkdir(parents=True, exist_ok=True)
+        total = len(self._session_cursor) + len(self._panel_cursor)
+        if self._journal_lines + len(dirty) > max(CURSOR_JOURNAL_COMPACT_MIN, 2 * total):
+            atomic_write_text(self._cursor_path, json.dumps({
+                "schemaVersion": 1, "updatedAt": datetime.utcnow().isoformat(),
+                "cursors": self._session_cursor, "panelCursors": self._panel_cursor,
+            }, ensure_ascii=False, indent=2) + "\n")
+            self._cursor_journal_path.unlink(missing_ok=True)
+            self._journal_lines = 0
+            return
+        lines = []
+        for kind, target_id in sorted(dirty):
+            cursor = (self._panel_cursor if kind == "panel" else self._session_cursor).get(target_id)
+            if cursor is not None:
+                lines.append(json.dumps({"kind": kind, "id": target_id, "cursor": cursor}, ensure_ascii=False))
+        with open(self._cursor_journal_path, "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+        self._journal_lines += len(lines)
+
     # ---- HTTP helpers ------------------------------------------------------
 
     async def _post_json(self, path: str, payload: dict[str, Any]) -> dict[str, Any]:
@@ -10,11 +10,10 @@ from slack_sdk.socket_mode.request import SocketModeRequest
 from slack_sdk.socket_mode.response import SocketModeResponse
 from slack_sdk.web.async_client import AsyncWebClient
 
-from slackify_markdown import slackify_markdown
-
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.markdown import SlackRenderer
 from nanobot.config.schema import SlackConfig
 
 
@@ -23,6 +22,8 @@ class SlackChannel(BaseChannel):
 
     name = "slack"
 
+    _renderer = SlackRenderer()
+
     def __init__(self, config: SlackConfig, bus: MessageBus):
         super().__init__(config, bus)
         self.config: SlackConfig = config
@@ -78,20 +79,40 @@ class SlackChannel(BaseChannel):
         if not self._web_client:
             logger.warning("Slack client not running")
             return
+        self._end_status(msg)
         try:
-            slack_meta = msg.metadata.get("slack", {}) if msg.metadata else {}
-            thread_ts = slack_meta.get("thread_ts")
-            channel_type = slack_meta.get("channel_type")
-            # Only reply in thread for channel/group messages; DMs don't use threads
-            use_thread = thread_ts and channel_type != "im"
-            await self._web_client.chat_postMessage(
-                channel=msg.chat_id,
-                text=self._to_mrkdwn(msg.content),
-                thread_ts=thread_ts if use_thread else None,
-            )
+            for text in self._renderer.chunks(msg.content or ""):
+                await self._web_client.chat_postMessage(
+                    channel=msg.chat_id,
+                    text=text,
+                    thread_ts=self._reply_thread(msg),
+                )
         except Exception as e:
             logger.error(f"Error sending Slack message: {e}")
 
+    async def send_progress(self, msg: OutboundMessage) -> None:
+        """Post the turn's status message once, then update it as progress comes in."""
+        if not self._web_client:
+            return
+        try:
+            ts = self._status_message(msg)
+            if ts is None:
+                response = await self._web_client.chat_postMessage(
+                    channel=msg.chat_id, text=msg.content, thread_ts=self._reply_thread(msg),
+                )
+                self._remember_status(msg, response.get("ts"))
+            else:
+                await self._web_client.chat_update(channel=msg.chat_id, ts=ts, text=msg.content)
+        except Exception as e:
+            logger.debug(f"Slack progress update failed: {e}")
+
+    @staticmethod
+    def _reply_thread(msg: OutboundMessage) -> str | None:
+        slack_meta = msg.metadata.get("slack", {}) if msg.metadata else {}
+        thread_ts = slack_meta.get("thread_ts")
+        # Only reply in thread for channel/group messages; DMs don't use threads
+        return thread_ts if thread_ts and slack_meta.get("channel_type") != "im" else None
+
     async def _on_socket_request(
         self,
         client: SocketModeClient,
@@ -207,31 +228,3 @@ class SlackChannel(BaseChannel):
         if not text or not self._bot_user_id:
             return text
         return re.sub(rf"<@{re.escape(self._bot_user_id)}>\s*", "", text).strip()
-
-    _TABLE_RE = re.compile(r"(?m)^\|.*\|$(?:\n\|[\s:|-]*\|$)(?:\n\|.*\|$)*")
-
-    @classmethod
-    def _to_mrkdwn(cls, text: str) -> str:
-        """Convert Markdown to Slack mrkdwn, including tables."""
-        if not text:
-            return ""
-        text = cls._TABLE_RE.sub(cls._convert_table, text)
-        return slackify_markdown(text)
-
-    @staticmethod
-    def _convert_table(match: re.Match) -> str:
-        """Convert a Markdown table to a Slack-readable list."""
-        lines = [ln.strip() for ln in match.group(0).strip().splitlines() if ln.strip()]
-        if len(lines) < 2:
-            return match.group(0)
-        headers = [h.strip() for h in lines[0].strip("|").split("|")]
-        start = 2 if re.fullmatch(r"[|\s:\-]+", lines[1]) else 1
-        rows: list[str] = []
-        for line in lines[start:]:
-            cells = [c.strip() for c in line.strip("|").split("|")]
-            cells = (cells + [""] * len(headers))[: len(headers)]
-            parts = [f"**{headers[i]}**: {cells[i]}" for i in range(len(headers)) if cells[i]]
-            if parts:
-                rows.append(" · ".join(parts))
-        return "\n".join(rows)
-
@@ -3,7 +3,11 @@
 from __future__ import annotations
 
 import asyncio
-import re
+import hmac
+import json
+import secrets
+from typing import Any, Coroutine
+
 from loguru import logger
 from telegram import BotCommand, Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
@@ -12,97 +16,21 @@ from telegram.request import HTTPXRequest
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.markdown import PlainTextRenderer, TelegramRenderer, parse
+from nanobot.channels.media import MediaTooLargeError, get_media_store
+from nanobot.channels.typing_scheduler import TypingScheduler
 from nanobot.config.schema import TelegramConfig
-
-
-def _markdown_to_telegram_html(text: str) -> str:
-    """
-    Convert markdown to Telegram-safe HTML.
-    """
-    if not text:
-        return ""
-    
-    # 1. Extract and protect code blocks (preserve content from other processing)
-    code_blocks: list[str] = []
-    def save_code_block(m: re.Match) -> str:
-        code_blocks.append(m.group(1))
-        return f"\x00CB{len(code_blocks) - 1}\x00"
-    
-    text = re.sub(r'```[\w]*\n?([\s\S]*?)```', save_code_block, text)
-    
-    # 2. Extract and protect inline code
-    inline_codes: list[str] = []
-    def save_inline_code(m: re.Match) -> str:
-        inline_codes.append(m.group(1))
-        return f"\x00IC{len(inline_codes) - 1}\x00"
-    
-    text = re.sub(r'`([^`]+)`', save_inline_code, text)
-    
-    # 3. Headers # Title -> just the title text
-    text = re.sub(r'^#{1,6}\s+(.+)$', r'\1', text, flags=re.MULTILINE)
-    
-    # 4. Blockquotes > text -> just the text (before HTML escaping)
-    text = re.sub(r'^>\s*(.*)$', r'\1', text, flags=re.MULTILINE)
-    
-    # 5. Escape HTML special characters
-    text = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-    
-    # 6. Links [text](url) - must be before bold/italic to handle nested cases
-    text = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2">\1</a>', text)
-    
-    # 7. Bold **text** or __text__
-    text = re.sub(r'\*\*(.+?)\*\*', r'<b>\1</b>', text)
-    text = re.sub(r'__(.+?)__', r'<b>\1</b>', text)
-    
-    # 8. Italic _text_ (avoid matching inside words like some_var_name)
-    text = re.sub(r'(?<![a-zA-Z0-9])_([^_]+)_(?![a-zA-Z0-9])', r'<i>\1</i>', text)
-    
-    # 9. Strikethrough ~~text~~
-    text = re.sub(r'~~(.+?)~~', r'<s>\1</s>', text)
-    
-    # 10. Bullet lists - item -> • item
-    text = re.sub(r'^[-*]\s+', '• ', text, flags=re.MULTILINE)
-    
-    # 11. Restore inline code with HTML tags
-    for i, code in enumerate(inline_codes):
-        # Escape HTML in code content
-        escaped = code.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-        text = text.replace(f"\x00IC{i}\x00", f"<code>{escaped}</code>")
-    
-    # 12. Restore code blocks with HTML tags
-    for i, code in enumerate(code_blocks):
-        # Escape HTML in code content
-        escaped = code.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
-        text = text.replace(f"\x00CB{i}\x00", f"<pre><code>{escaped}</code></pre>")
-    
-    return text
-
-
-def _split_message(content: str, max_len: int = 4000) -> list[str]:
-    """Split content into chunks within max_len, preferring line breaks."""
-    if len(content) <= max_len:
-        return [content]
-    chunks: list[str] = []
-    while content:
-        if len(content) <= max_len:
-            chunks.append(content)
-            break
-        cut = content[:max_len]
-        pos = cut.rfind('\n')
-        if pos == -1:
-            pos = cut.rfind(' ')
-        if pos == -1:
-            pos = max_len
-        chunks.append(content[:pos])
-        content = content[pos:].lstrip()
-    return chunks
+from nanobot.providers.transcription import GroqTranscriptionProvider
+from nanobot.utils.httpserver import HTTPRequest, HTTPResponse, HTTPServer
 
 
 class TelegramChannel(BaseChannel):
     """
-    Telegram channel using long polling.
+    Telegram channel using long polling (default) or a webhook.
     
-    Simple and reliable - no webhook/public IP needed.
+    Polling is simple and reliable - no public IP needed. Webhook mode serves
+    an embedded HTTP listener that Telegram pushes updates to, which removes
+    the polling round-trip for busy bots.
     """
     
     name = "telegram"
@@ -113,6 +41,9 @@ class TelegramChannel(BaseChannel):
         BotCommand("new", "Start a new conversation"),
         BotCommand("help", "Show available commands"),
     ]
+
+    _renderer = TelegramRenderer()
+    _plain = PlainTextRenderer()
     
     def __init__(
         self,
@@ -123,9 +54,21 @@ class TelegramChannel(BaseChannel):
         super().__init__(config, bus)
         self.config: TelegramConfig = config
         self.groq_api_key = groq_api_key
+        self._transcriber = GroqTranscriptionProvider(api_key=groq_api_key)
+        self._background: set[asyncio.Task] = set()  # Pending transcribe-then-forward tasks
+        self._chat_tail: dict[str, asyncio.Task] = {}  # chat_id -> last deferred forward, for ordering
         self._app: Application | None = None
         self._chat_ids: dict[str, int] = {}  # Map sender_id to chat_id for replies
-        self._typing_tasks: dict[str, asyncio.Task] = {}  # chat_id -> typing loop task
+        # One task refreshes "typing..." (shown for 5s per call) in every active chat
+        self._typing = TypingScheduler("telegram", self._send_typing, interval=4.0, rate=20.0)
+        self._stop_event = asyncio.Event()
+        self._webhook_server: HTTPServer | None = None
+        # Every webhook delivery must carry this; without one configured, anyone who
+        # can reach the port could post forged updates, so generate one per start.
+        self._webhook_secret = config.webhook_secret or secrets.token_urlsafe(32)
+        self._webhook_tasks: set[asyncio.Task] = set()
+        self._webhook_tails: dict[int, asyncio.Task] = {}  # chat id -> last update in processing, for ordering
+        self._webhook_slots = asyncio.Semaphore(max(1, config.webhook_max_connections))
     
     async def start(self) -> None:
         """Start the Telegram bot with long polling."""
@@ -134,6 +77,7 @@ class TelegramChannel(BaseChannel):
             return
         
         self._running = True
+        self._stop_event.clear()
         
         # Build the application with larger connection pool to avoid pool-timeout on long runs
         req = HTTPXRequest(connection_pool_size=16, pool_timeout=5.0, connect_timeout=30.0, read_timeout=30.0)
@@ -157,9 +101,10 @@ class TelegramChannel(BaseChannel):
             )
         )
         
-        logger.info("Starting Telegram bot (polling mode)...")
+        webhook = self.config.mode == "webhook"
+        logger.info(f"Starting Telegram bot ({'webhook' if webhook else 'polling'} mode)...")
         
-        # Initialize and start polling
+        # Initialize and start the application
         await self._app.initialize()
         await self._app.start()
         
@@ -173,27 +118,91 @@ class TelegramChannel(BaseChannel):
         except Exception as e:
             logger.warning(f"Failed to register bot commands: {e}")
         
-        # Start polling (this runs until stopped)
-        await self._app.updater.start_polling(
-            allowed_updates=["message"],
-            drop_pending_updates=True  # Ignore old messages on startup
-        )
+        if webhook:
+            await self._start_webhook()
+        else:
+            await self._app.updater.start_polling(
+                allowed_updates=["message"],
+                drop_pending_updates=True  # Ignore old messages on startup
+            )
         
         # Keep running until stopped
-        while self._running:
-            await asyncio.sleep(1)
+        await self._stop_event.wait()
+
+    async def _start_webhook(self) -> None:
+        """Serve the webhook endpoint and register it with Telegram."""
+        if not self.config.webhook_url:
+            raise ValueError("Telegram webhook mode requires webhookUrl")
+        await self._serve_webhook()
+        await self._app.bot.set_webhook(
+            url=self.config.webhook_url,
+            secret_token=self._webhook_secret,
+            allowed_updates=["message"],
+            max_connections=self.config.webhook_max_connections,
+            drop_pending_updates=True,
+        )
+        logger.info(f"Telegram webhook registered at {self.config.webhook_url}")
+
+    async def _serve_webhook(self) -> None:
+        """Start the local HTTP listener that receives webhook updates."""
+        self._webhook_server = HTTPServer(self.config.webhook_host, self.config.webhook_port)
+        self._webhook_server.route("POST", self.config.webhook_path, self._on_webhook)
+        await self._webhook_server.start()
+
+    async def _on_webhook(self, request: HTTPRequest) -> HTTPResponse:
+        """Validate a webhook delivery and process it without blocking the response."""
+        token = request.headers.get("x-telegram-bot-api-secret-token", "")
+        if not hmac.compare_digest(token.encode(), self._webhook_secret.encode()):
+            logger.warning("Telegram webhook: rejected request with invalid secret token")
+            return HTTPResponse(status=403)
+        if not self._app:
+            return HTTPResponse(status=500)
+        try:
+            update = Update.de_json(json.loads(request.body), self._app.bot)
+        except Exception as e:
+            logger.warning(f"Telegram webhook: bad update payload: {e}")
+            return HTTPResponse(status=400)
+
+        # Acknowledge immediately; chats are handled concurrently, each one's updates in order
+        chat_id = update.effective_chat.id if update.effective_chat else None
+        previous = self._webhook_tails.get(chat_id)
+        task = asyncio.create_task(self._process_webhook_update(update, previous))
+        self._webhook_tasks.add(task)
+        if chat_id is not None:
+            self._webhook_tails[chat_id] = task
+
+        def _done(t: asyncio.Task) -> None:
+            self._webhook_tasks.discard(t)
+            if self._webhook_tails.get(chat_id) is t:
+                del self._webhook_tails[chat_id]
+
+        task.add_done_callback(_done)
+        return HTTPResponse(status=200)
+
+    async def _process_webhook_update(self, update: Update, previous: asyncio.Task | None) -> None:
+        if previous and not previous.done():
+            await asyncio.wait([previous])
+        async with self._webhook_slots:
+            await self._app.process_update(update)
     
     async def stop(self) -> None:
         """Stop the Telegram bot."""
         self._running = False
+        self._stop_event.set()
         
         # Cancel all typing indicators
-        for chat_id in list(self._typing_tasks):
-            self._stop_typing(chat_id)
+        await self._typing.close()
+
+        if self._webhook_server:
+            await self._webhook_server.stop()
+            self._webhook_server = None
+        for task in list(self._webhook_tasks) + list(self._background):
+            task.cancel()
         
         if self._app:
             logger.info("Stopping Telegram bot...")
-            await self._app.updater.stop()
+            if self._app.updater and self._app.updater.running:
+                await self._app.updater.stop()
             await self._app.stop()
             await self._app.shutdown()
             self._app = None
@@ -217,6 +226,7 @@ class TelegramChannel(BaseChannel):
             return
 
         self._stop_typing(msg.chat_id)
+        self._end_status(msg)
 
         try:
             chat_id = int(msg.chat_id)
@@ -243,17 +253,33 @@ class TelegramChannel(BaseChannel):
 
         # Send text content
         if msg.content and msg.content != "[empty message]":
-            for chunk in _split_message(msg.content):
+            for part in self._renderer.split(parse(msg.content)):
                 try:
-                    html = _markdown_to_telegram_html(chunk)
+                    html = self._renderer.render(part)
                     await self._app.bot.send_message(chat_id=chat_id, text=html, parse_mode="HTML")
                 except Exception as e:
                     logger.warning(f"HTML parse failed, falling back to plain text: {e}")
                     try:
-                        await self._app.bot.send_message(chat_id=chat_id, text=chunk)
+                        await self._app.bot.send_message(chat_id=chat_id, text=self._plain.render(part))
                     except Exception as e2:
                         logger.error(f"Error sending Telegram message: {e2}")
     
+    async def send_progress(self, msg: OutboundMessage) -> None:
+        """Post the turn's status message once, then edit it as progress comes in."""
+        if not self._app:
+            return
+        text = msg.content[:4000]
+        try:
+            chat_id = int(msg.chat_id)
+            message_id = self._status_message(msg)
+            if message_id is None:
+                sent = await self._app.bot.send_message(chat_id=chat_id, text=text)
+                self._remember_status(msg, sent.message_id)
+            else:
+                await self._app.bot.edit_message_text(text, chat_id=chat_id, message_id=message_id)
+        except Exception as e:
+            logger.debug(f"Telegram progress update failed: {e}")
+
     async def _on_start(self, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Handle /start command."""
         if not update.message or not update.effective_user:
@@ -322,86 +348,137 @@ class TelegramChannel(BaseChannel):
             media_file = message.document
             media_type = "file"
         
-        # Download media if present
+        metadata = {
+            "message_id": message.message_id,
+            "user_id": user.id,
+            "username": user.username,
+            "first_name": user.first_name,
+            "is_group": message.chat.type != "private"
+        }
+        str_chat_id = str(chat_id)
+
+        # Download media if present (deduplicated and size-capped by the shared media store)
         if media_file and self._app:
             try:
-                file = await self._app.bot.get_file(media_file.file_id)
-                ext = self._get_extension(media_type, getattr(media_file, 'mime_type', None))
-                
-                # Save to workspace/media/
-                from pathlib import Path
-                media_dir = Path.home() / ".nanobot" / "media"
-                media_dir.mkdir(parents=True, exist_ok=True)
-                
-                file_path = media_dir / f"{media_file.file_id[:16]}{ext}"
-                await file.download_to_drive(str(file_path))
-                
+                file_path = await self._download_media(media_file, media_type)
                 media_paths.append(str(file_path))
-                
-                # Handle voice transcription
-                if media_type == "voice" or media_type == "audio":
-                    from nanobot.providers.transcription import GroqTranscriptionProvider
-                    transcriber = GroqTranscriptionProvider(api_key=self.groq_api_key)
-                    transcription = await transcriber.transcribe(file_path)
-                    if transcription:
-                        logger.info(f"Transcribed {media_type}: {transcription[:50]}...")
-                        content_parts.append(f"[transcription: {transcription}]")
-                    else:
-                        content_parts.append(f"[{media_type}: {file_path}]")
-                else:
-                    content_parts.append(f"[{media_type}: {file_path}]")
-                    
                 logger.debug(f"Downloaded {media_type} to {file_path}")
+                if media_type in ("voice", "audio"):
+                    # Transcribe in the background so this handler returns immediately
+                    self._forward_in_order(str_chat_id, self._transcribe_and_forward(
+                        sender_id, str_chat_id, content_parts, media_type, file_path, metadata,
+                    ))
+                    self._start_typing(str_chat_id)
+                    return
+                content_parts.append(f"[{media_type}: {file_path}]")
+            except MediaTooLargeError:
+                content_parts.append(f"[{media_type}: too large]")
             except Exception as e:
                 logger.error(f"Failed to download media: {e}")
                 content_parts.append(f"[{media_type}: download failed]")
         
+        if str_chat_id in self._chat_tail:
+            # A voice note from this chat is still transcribing: queue behind it
+            self._forward_in_order(
+                str_chat_id, self._forward(sender_id, str_chat_id, content_parts, media_paths, metadata),
+            )
+        else:
+            await self._forward(sender_id, str_chat_id, content_parts, media_paths, metadata)
+
+    def _forward_in_order(self, chat_id: str, forward: Coroutine[Any, Any, None]) -> None:
+        """Run a forward in the background, after any earlier deferred forward for the chat."""
+        previous = self._chat_tail.get(chat_id)
+
+        async def _run() -> None:
+            if previous and not previous.done():
+                await asyncio.wait([previous])
+            try:
+                await forward
+            except Exception as e:
+                logger.error(f"Failed to forward Telegram message for {chat_id}: {e}")
+
+        task = asyncio.create_task(_run())
+        self._chat_tail[chat_id] = task
+        self._background.add(task)
+
+        def _done(t: asyncio.Task) -> None:
+            self._background.discard(t)
+            if self._chat_tail.get(chat_id) is t:
+                del self._chat_tail[chat_id]
+
+        task.add_done_callback(_done)
+
+    async def _download_media(self, media_file, media_type: str):
+        """Fetch a Telegram file through the shared media store."""
+        ext = self._get_extension(media_type, getattr(media_file, 'mime_type', None))
+
+        async def _load() -> bytes:
+            file = await self._app.bot.get_file(media_file.file_id)
+            return bytes(await file.download_as_bytearray())
+
+        return await get_media_store().fetch(
+            f"telegram:{media_file.file_unique_id}", ext, _load,
+            size_hint=getattr(media_file, "file_size", None),
+        )
+
+    async def _transcribe_and_forward(
+        self,
+        sender_id: str,
+        chat_id: str,
+        content_parts: list[str],
+        media_type: str,
+        file_path,
+        metadata: dict,
+    ) -> None:
+        """Transcribe a voice note, then forward the message to the bus."""
+        try:
+            transcription = await get_media_store().transcribe(file_path, self._transcriber)
+        except Exception as e:
+            logger.error(f"Transcription failed: {e}")
+            transcription = ""
+        if transcription:
+            logger.info(f"Transcribed {media_type}: {transcription[:50]}...")
+            content_parts.append(f"[transcription: {transcription}]")
+        else:
+            content_parts.append(f"[{media_type}: {file_path}]")
+        await self._forward(sender_id, chat_id, content_parts, [str(file_path)], metadata)
+
+    async def _forward(
+        self,
+        sender_id: str,
+        chat_id: str,
+        content_parts: list[str],
+        media_paths: list[str],
+        metadata: dict,
+    ) -> None:
+        """Show the typing indicator and publish the message to the bus."""
         content = "\n".join(content_parts) if content_parts else "[empty message]"
         
         logger.debug(f"Telegram message from {sender_id}: {content[:50]}...")
         
-        str_chat_id = str(chat_id)
-        
         # Start typing indicator before processing
-        self._start_typing(str_chat_id)
+        self._start_typing(chat_id)
         
         # Forward to the message bus
         await self._handle_message(
             sender_id=sender_id,
-            chat_id=str_chat_id,
+            chat_id=chat_id,
             content=content,
             media=media_paths,
-            metadata={
-                "message_id": message.message_id,
-                "user_id": user.id,
-                "username": user.username,
-                "first_name": user.first_name,
-                "is_group": message.chat.type != "private"
-            }
+            metadata=metadata,
         )
     
     def _start_typing(self, chat_id: str) -> None:
         """Start sending 'typing...' indicator for a chat."""
-        # Cancel any existing typing task for this chat
-        self._stop_typing(chat_id)
-        self._typing_tasks[chat_id] = asyncio.create_task(self._typing_loop(chat_id))
+        self._typing.start(chat_id)
     
     def _stop_typing(self, chat_id: str) -> None:
         """Stop the typing indicator for a chat."""
-        task = self._typing_tasks.pop(chat_id, None)
-        if task and not task.done():
-            task.cancel()
+        self._typing.stop(chat_id)
     
-    async def _typing_loop(self, chat_id: str) -> None:
-        """Repeatedly send 'typing' action until cancelled."""
-        try:
-            while self._app:
-                await self._app.bot.send_chat_action(chat_id=int(chat_id), action="typing")
-                await asyncio.sleep(4)
-        except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            logger.debug(f"Typing indicator stopped for {chat_id}: {e}")
+    async def _send_typing(self, chat_id: str) -> None:
+        if self._app:
+            await self._app.bot.send_chat_action(chat_id=int(chat_id), action="typing")
     
     async def _on_error(self, update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
         """Log polling / handler errors instead of silently swallowing them."""
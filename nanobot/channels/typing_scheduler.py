@@ -0,0 +1,103 @@
+"""One task per channel that keeps typing indicators alive for all its chats."""
+
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+from loguru import logger
+
+from nanobot.metrics import METRICS
+
+_TYPING_SENDS = METRICS.counter(
+    "nanobot_typing_indicator_sends_total", "Typing indicator API calls by channel and result", ("channel", "result"),
+)
+_TYPING_ACTIVE = METRICS.gauge("nanobot_typing_indicator_chats", "Chats showing a typing indicator", ("channel",))
+
+
+class TypingScheduler:
+    """
+    Refreshes the typing indicator of every active chat from a single task.
+
+    Platforms show "typing" for a few seconds per API call, so each active chat
+    is refreshed every `interval` seconds. Refreshes that fall due together are
+    sent as one concurrent batch of at most `batch` calls, and batches are paced
+    to `rate` calls per second across all chats, so many concurrent chats share
+    the platform's rate limit instead of each looping on its own. A chat stops
+    after `max_age` seconds even if no reply cleared it.
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        send: Callable[[str], Awaitable[None]],
+        interval: float,
+        rate: float = 10.0,
+        batch: int = 10,
+        max_age: float = 300.0,
+    ):
+        self.channel = channel
+        self._send = send
+        self.interval = interval
+        self.rate = rate
+        self.batch = batch
+        self.max_age = max_age
+        self._due: dict[str, float] = {}  # chat_id -> next refresh (monotonic)
+        self._since: dict[str, float] = {}  # chat_id -> when typing started
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        _TYPING_ACTIVE.set_function(lambda: len(self._due), channel=channel)
+
+    def start(self, chat_id: str) -> None:
+        """Show typing in a chat now and keep it up until `stop`."""
+        now = time.monotonic()
+        self._due[chat_id] = now
+        self._since.setdefault(chat_id, now)
+        self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self, chat_id: str) -> None:
+        self._due.pop(chat_id, None)
+        self._since.pop(chat_id, None)
+
+    def is_active(self, chat_id: str) -> bool:
+        return chat_id in self._due
+
+    async def close(self) -> None:
+        self._due.clear()
+        self._since.clear()
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while self._due:
+            now = time.monotonic()
+            for chat_id in [c for c, since in self._since.items() if now - since > self.max_age]:
+                self.stop(chat_id)
+            ready = sorted((due, chat_id) for chat_id, due in self._due.items() if due <= now)[:self.batch]
+            if ready:
+                for _, chat_id in ready:
+                    self._due[chat_id] = now + self.interval
+                await asyncio.gather(*(self._refresh(chat_id) for _, chat_id in ready))
+                # Pace batches so the channel stays within `rate` calls per second
+                await asyncio.sleep(len(ready) / self.rate)
+                continue
+            if not self._due:
+                break
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), min(self._due.values()) - now)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refresh(self, chat_id: str) -> None:
+        try:
+            await self._send(chat_id)
+            _TYPING_SENDS.inc(channel=self.channel, result="ok")
+        except Exception as e:
+            # The chat is gone or the bot was removed: stop trying
+            _TYPING_SENDS.inc(channel=self.channel, result="error")
+            logger.debug(f"Typing indicator stopped for {self.channel}:{chat_id}: {e}")
+            self.stop(chat_id)
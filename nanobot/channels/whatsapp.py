@@ -1,148 +1,397 @@
 """WhatsApp channel implementation using Node.js bridge."""
 
 import asyncio
+import base64
 import json
+import mimetypes
+import secrets
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
 from typing import Any
 
+import msgpack
 from loguru import logger
 
 from nanobot.bus.events import OutboundMessage
 from nanobot.bus.queue import MessageBus
 from nanobot.channels.base import BaseChannel
+from nanobot.channels.media import MediaTooLargeError, get_media_store
 from nanobot.config.schema import WhatsAppConfig
+from nanobot.metrics import METRICS
+from nanobot.providers.transcription import GroqTranscriptionProvider
+from nanobot.utils.files import FILES
+
+PROTOCOL_VERSION = 2
+HELLO_TIMEOUT_S = 2.0  # A bridge that hasn't answered hello by then speaks protocol v1
+BATCH_WINDOW_S = 0.005  # Sends queued within this window share one frame
+# Where mimetypes' first guess is a rare extension (.oga, .jpe) that transcription or viewers reject
+_EXTENSIONS = {"audio/ogg": ".ogg", "image/jpeg": ".jpg", "audio/mpeg": ".mp3"}
+
+_SEND_LATENCY = METRICS.histogram(
+    "nanobot_whatsapp_send_latency_seconds", "Time from send() to the bridge acknowledging delivery"
+)
+_SENDS = METRICS.counter("nanobot_whatsapp_sends_total", "WhatsApp sends by result", ("result",))
+_BATCH_SIZE = METRICS.histogram(
+    "nanobot_whatsapp_batch_size", "Messages per frame written to the bridge", buckets=(1, 2, 5, 10, 20, 50)
+)
+_IN_FLIGHT = METRICS.gauge("nanobot_whatsapp_in_flight", "WhatsApp sends awaiting a bridge ack")
+
+
+@dataclass
+class _Pending:
+    """An outbound message the bridge has not acknowledged yet."""
+    item: dict[str, Any]
+    queued_at: float
+    attempts: int = 0
+    retry_at: float = 0.0  # Resend at this time unless acked; 0 while queued
 
 
 class WhatsAppChannel(BaseChannel):
     """
     WhatsApp channel that connects to a Node.js bridge.
-    
+
     The bridge uses @whiskeysockets/baileys to handle the WhatsApp Web protocol.
     Communication between Python and Node.js is via WebSocket.
+
+    With a protocol v2 bridge, sends carry an id and are acknowledged:
+    send() returns once the message is queued, at most maxInFlight sends
+    wait for an ack at a time, sends queued together go out as one batch
+    frame, and unacknowledged sends are retried (the bridge drops repeats
+    of an id it has already delivered). Frames are msgpack when both
+    sides support it, so media travels as raw bytes. Older bridges get
+    the original one-JSON-frame-per-message protocol.
     """
-    
+
     name = "whatsapp"
-    
-    def __init__(self, config: WhatsAppConfig, bus: MessageBus):
+
+    def __init__(self, config: WhatsAppConfig, bus: MessageBus, groq_api_key: str = ""):
         super().__init__(config, bus)
         self.config: WhatsAppConfig = config
         self._ws = None
         self._connected = False
-    
+        self._protocol = 1
+        self._binary = False
+        self._max_batch = max(1, config.max_batch)
+        self._id_prefix = secrets.token_hex(4)  # Keeps ids unique across restarts for the bridge's dedupe
+        self._next_id = 0
+        self._pending: dict[str, _Pending] = {}
+        self._outbox: deque[str] = deque()
+        self._outbox_ready = asyncio.Event()
+        self._window = asyncio.Semaphore(max(1, config.max_in_flight))
+        self._inbound_tails: dict[str, asyncio.Task] = {}  # Last pending inbound task per chat
+        self._transcriber = GroqTranscriptionProvider(api_key=groq_api_key)
+        _IN_FLIGHT.set_function(lambda: len(self._pending))
+
     async def start(self) -> None:
         """Start the WhatsApp channel by connecting to the bridge."""
         import websockets
-        
+
         bridge_url = self.config.bridge_url
-        
+
         logger.info(f"Connecting to WhatsApp bridge at {bridge_url}...")
-        
+
         self._running = True
-        
+
         while self._running:
             try:
-                async with websockets.connect(bridge_url) as ws:
+                async with websockets.connect(bridge_url, max_size=None) as ws:
                     self._ws = ws
                     # Send auth token if configured
                     if self.config.bridge_token:
                         await ws.send(json.dumps({"type": "auth", "token": self.config.bridge_token}))
+                    await self._handshake(ws)
                     self._connected = True
-                    logger.info("Connected to WhatsApp bridge")
-                    
-                    # Listen for messages
-                    async for message in ws:
-                        try:
-                            await self._handle_bridge_message(message)
-                        except Exception as e:
-                            logger.error(f"Error handling bridge message: {e}")
-                    
+                    logger.info(f"Connected to WhatsApp bridge (protocol v{self._protocol})")
+
+                    self._requeue_pending()
+                    tasks = [asyncio.create_task(self._write_loop(ws)), asyncio.create_task(self._retry_loop())]
+                    try:
+                        # Listen for messages
+                        async for message in ws:
+                            try:
+                                await self._handle_bridge_message(message)
+                            except Exception as e:
+                                logger.error(f"Error handling bridge message: {e}")
+                    finally:
+                        self._connected = False
+                        for task in tasks:
+                            task.cancel()
+
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 self._connected = False
                 self._ws = None
                 logger.warning(f"WhatsApp bridge connection error: {e}")
-                
+
                 if self._running:
                     logger.info("Reconnecting in 5 seconds...")
                     await asyncio.sleep(5)
-    
+
     async def stop(self) -> None:
         """Stop the WhatsApp channel."""
         self._running = False
         self._connected = False
-        
+        for task in self._inbound_tails.values():
+            task.cancel()
+        self._inbound_tails.clear()
+
         if self._ws:
             await self._ws.close()
             self._ws = None
-    
+
     async def send(self, msg: OutboundMessage) -> None:
-        """Send a message through WhatsApp."""
+        """Queue a message for the bridge; waits only while the in-flight window is full."""
         if not self._ws or not self._connected:
             logger.warning("WhatsApp bridge not connected")
             return
-        
-        try:
-            payload = {
-                "type": "send",
-                "to": msg.chat_id,
-                "text": msg.content
-            }
-            await self._ws.send(json.dumps(payload))
-        except Exception as e:
-            logger.error(f"Error sending WhatsApp message: {e}")
-    
-    async def _handle_bridge_message(self, raw: str) -> None:
-        """Handle a message from the bridge."""
+
+        item: dict[str, Any] = {"to": msg.chat_id, "text": msg.content}
+        if self._protocol < 2:
+            if msg.media:
+                logger.warning("WhatsApp bridge predates protocol v2, sending text only")
+            try:
+                await self._ws.send(json.dumps({"type": "send", **item}))
+            except Exception as e:
+                logger.error(f"Error sending WhatsApp message: {e}")
+            return
+
+        if msg.media:
+            item["media"] = [m for m in [await self._read_media(p) for p in msg.media] if m]
         try:
-            data = json.loads(raw)
-        except json.JSONDecodeError:
-            logger.warning(f"Invalid JSON from bridge: {raw[:100]}")
+            # Bounded: while the bridge is away nothing acks, and the outbound dispatcher is shared by all channels
+            await asyncio.wait_for(self._window.acquire(), self.config.ack_timeout_seconds)
+        except asyncio.TimeoutError:
+            _SENDS.inc(result="failed")
+            logger.error(f"Error sending WhatsApp message to {msg.chat_id}: in-flight window full, bridge not acking")
             return
-        
+        self._next_id += 1
+        item["id"] = f"{self._id_prefix}-{self._next_id}"
+        self._pending[item["id"]] = _Pending(item, time.monotonic())
+        self._outbox.append(item["id"])
+        self._outbox_ready.set()
+
+    async def _read_media(self, path: str) -> dict[str, Any] | None:
+        try:
+            data = await FILES.read_bytes(Path(path))
+        except OSError as e:
+            logger.warning(f"WhatsApp media not readable ({path}): {e}")
+            return None
+        mime = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        return {"name": Path(path).name, "mime": mime, "data": data}
+
+    # ---- bridge protocol ---------------------------------------------------
+
+    async def _handshake(self, ws) -> None:
+        """Negotiate protocol v2; a v1 bridge treats hello as a send and answers "sent"."""
+        encodings = ["msgpack", "json"] if self.config.binary_frames else ["json"]
+        await ws.send(json.dumps({"type": "hello", "version": PROTOCOL_VERSION, "encodings": encodings}))
+        self._protocol, self._binary = 1, False
+        deadline = time.monotonic() + HELLO_TIMEOUT_S
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                raw = await asyncio.wait_for(ws.recv(), remaining)
+            except asyncio.TimeoutError:
+                break
+            data = self._decode(raw)
+            if data.get("type") == "hello" and int(data.get("version") or 1) >= 2:
+                self._protocol = 2
+                self._binary = data.get("encoding") == "msgpack"
+                self._max_batch = max(1, min(self.config.max_batch, int(data.get("maxBatch") or 1)))
+                return
+            if data.get("type") == "sent":
+                break
+            await self._handle_bridge_message(raw)  # A status or QR event that raced the reply
+        logger.info("WhatsApp bridge speaks protocol v1: no acks, batching or media")
+
+    def _decode(self, raw: str | bytes) -> dict[str, Any]:
+        try:
+            data = msgpack.unpackb(raw, raw=False) if isinstance(raw, bytes) else json.loads(raw)
+        except (ValueError, msgpack.UnpackException):
+            logger.warning(f"Invalid frame from bridge: {raw[:100]!r}")
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _encode(self, frame: dict[str, Any]) -> str | bytes:
+        if self._binary:
+            return msgpack.packb(frame, use_bin_type=True)
+        return json.dumps(frame, default=lambda b: base64.b64encode(b).decode("ascii"))
+
+    def _requeue_pending(self) -> None:
+        """After (re)connecting, send everything not yet acknowledged, oldest first."""
+        self._outbox = deque(sorted(self._pending, key=lambda i: int(i.rsplit("-", 1)[1])))
+        for pending in self._pending.values():
+            pending.retry_at = 0.0
+        if self._outbox:
+            self._outbox_ready.set()
+
+    async def _write_loop(self, ws) -> None:
+        while True:
+            await self._outbox_ready.wait()
+            await asyncio.sleep(BATCH_WINDOW_S)
+            self._outbox_ready.clear()
+            items = []
+            now = time.monotonic()
+            while self._outbox and len(items) < self._max_batch:
+                if pending := self._pending.get(self._outbox.popleft()):
+                    pending.attempts += 1
+                    pending.retry_at = now + self.config.ack_timeout_seconds
+                    items.append(pending.item)
+            if self._outbox:
+                self._outbox_ready.set()
+            if not items:
+                continue
+            frame = {"type": "send", **items[0]} if len(items) == 1 else {"type": "batch", "items": items}
+            await ws.send(self._encode(frame))
+            _BATCH_SIZE.observe(len(items))
+
+    async def _retry_loop(self) -> None:
+        """Resend sends whose ack timed out or whose retry backoff elapsed."""
+        while True:
+            await asyncio.sleep(0.5)
+            now = time.monotonic()
+            for msg_id, pending in list(self._pending.items()):
+                if not pending.retry_at or now < pending.retry_at:
+                    continue
+                if pending.attempts > self.config.max_retries:
+                    self._finish(msg_id, ok=False, error="no ack from bridge")
+                    continue
+                pending.retry_at = 0.0
+                self._outbox.append(msg_id)
+                self._outbox_ready.set()
+                _SENDS.inc(result="retried")
+
+    def _on_ack(self, ack: dict[str, Any]) -> None:
+        msg_id = str(ack.get("id"))
+        pending = self._pending.get(msg_id)
+        if pending is None:
+            return  # Ack for an attempt already settled
+        if ack.get("ok"):
+            self._finish(msg_id, ok=True)
+        elif ack.get("retry") and pending.attempts <= self.config.max_retries:
+            # Transient (e.g. WhatsApp reconnecting): back off, then resend
+            pending.retry_at = time.monotonic() + min(0.5 * 2 ** pending.attempts, 30)
+        else:
+            self._finish(msg_id, ok=False, error=str(ack.get("error") or "rejected"))
+
+    def _finish(self, msg_id: str, ok: bool, error: str = "") -> None:
+        pending = self._pending.pop(msg_id)
+        self._window.release()
+        if ok:
+            _SENDS.inc(result="ok")
+            _SEND_LATENCY.observe(time.monotonic() - pending.queued_at)
+        else:
+            _SENDS.inc(result="failed")
+            logger.error(f"Error sending WhatsApp message to {pending.item['to']}: {error}")
+
+    # ---- inbound -----------------------------------------------------------
+
+    async def _handle_bridge_message(self, raw: str | bytes) -> None:
+        """Handle a message from the bridge."""
+        data = self._decode(raw)
         msg_type = data.get("type")
-        
+
         if msg_type == "message":
-            # Incoming message from WhatsApp
-            # Deprecated by whatsapp: old phone number style typically: <phone>@s.whatspp.net
-            pn = data.get("pn", "")
-            # New LID sytle typically: 
-            sender = data.get("sender", "")
-            content = data.get("content", "")
-            
-            # Extract just the phone number or lid as chat_id
-            user_id = pn if pn else sender
-            sender_id = user_id.split("@")[0] if "@" in user_id else user_id
-            logger.info(f"Sender {sender}")
-            
-            # Handle voice transcription if it's a voice message
-            if content == "[Voice Message]":
-                logger.info(f"Voice message received from {sender_id}, but direct download from bridge is not yet supported.")
-                content = "[Voice Message: Transcription not available for WhatsApp yet]"
-            
-            await self._handle_message(
-                sender_id=sender_id,
-                chat_id=sender,  # Use full LID for replies
-                content=content,
-                metadata={
-                    "message_id": data.get("id"),
-                    "timestamp": data.get("timestamp"),
-                    "is_group": data.get("isGroup", False)
-                }
-            )
-        
+            chat = data.get("sender", "")
+            previous = self._inbound_tails.get(chat)
+            if data.get("media") or previous:
+                # Storing and transcribing media must not hold up acks: queue per chat,
+                # and keep later messages of that chat behind it
+                task = asyncio.create_task(self._forward_in_order(data, previous))
+                self._inbound_tails[chat] = task
+                task.add_done_callback(
+                    lambda t: self._inbound_tails.pop(chat, None) if self._inbound_tails.get(chat) is t else None
+                )
+            else:
+                await self._forward_message(data)
+
+        elif msg_type == "ack":
+            self._on_ack(data)
+
+        elif msg_type == "acks":
+            for ack in data.get("items") or []:
+                self._on_ack(ack)
+
         elif msg_type == "status":
             # Connection status update
             status = data.get("status")
             logger.info(f"WhatsApp status: {status}")
-            
+
             if status == "connected":
                 self._connected = True
             elif status == "disconnected":
                 self._connected = False
-        
+
         elif msg_type == "qr":
             # QR code for authentication
             logger.info("Scan QR code in the bridge terminal to connect WhatsApp")
-        
+
         elif msg_type == "error":
             logger.error(f"WhatsApp bridge error: {data.get('error')}")
+
+    async def _forward_in_order(self, data: dict[str, Any], previous: asyncio.Task | None) -> None:
+        if previous:
+            await asyncio.wait([previous])
+        try:
+            await self._forward_message(data)
+        except Exception as e:
+            logger.error(f"Error handling WhatsApp message: {e}")
+
+    async def _forward_message(self, data: dict[str, Any]) -> None:
+        """Incoming message from WhatsApp, with its media stored (and voice notes transcribed)."""
+        # Deprecated by whatsapp: old phone number style typically: <phone>@s.whatspp.net
+        pn = data.get("pn", "")
+        # New LID sytle typically:
+        sender = data.get("sender", "")
+        content = data.get("content", "")
+
+        # Extract just the phone number or lid as chat_id
+        user_id = pn if pn else sender
+        sender_id = user_id.split("@")[0] if "@" in user_id else user_id
+        logger.info(f"Sender {sender}")
+
+        media_paths: list[str] = []
+        if media := data.get("media"):
+            content, media_paths = await self._store_media(data, media, content)
+        elif content == "[Voice Message]":
+            logger.info(f"Voice message received from {sender_id}, but the bridge did not pass the audio through.")
+            content = "[Voice Message: Transcription not available for WhatsApp yet]"
+
+        await self._handle_message(
+            sender_id=sender_id,
+            chat_id=sender,  # Use full LID for replies
+            content=content,
+            media=media_paths,
+            metadata={
+                "message_id": data.get("id"),
+                "timestamp": data.get("timestamp"),
+                "is_group": data.get("isGroup", False)
+            }
+        )
+
+    async def _store_media(self, data: dict[str, Any], media: dict[str, Any], content: str) -> tuple[str, list[str]]:
+        kind = media.get("kind") or "file"
+        raw = media.get("data") or b""
+        if isinstance(raw, str):
+            raw = base64.b64decode(raw)
+        mime = (media.get("mime") or "").split(";")[0].strip()
+        ext = _EXTENSIONS.get(mime) or mimetypes.guess_extension(mime) or ""
+        store = get_media_store()
+        try:
+            path = await store.store_bytes(raw, ext=ext, source_id=f"whatsapp:{data.get('id')}")
+        except MediaTooLargeError:
+            return f"{content}\n[{kind}: too large]".strip(), []
+
+        if kind == "audio":
+            try:
+                transcription = await store.transcribe(path, self._transcriber)
+            except Exception as e:
+                logger.error(f"Transcription failed: {e}")
+                transcription = ""
+            if transcription:
+                logger.info(f"Transcribed voice message: {transcription[:50]}...")
+                return f"[transcription: {transcription}]", [str(path)]
+            return f"[voice: {path}]", [str(path)]
+        return f"{content}\n[{kind}: {path}]".strip(), [str(path)]
@@ -317,6 +317,30 @@ def _make_provider(config: Config):
     )
 
 
+def _configure_storage(config: Config) -> None:
+    """Apply agents.storage to the shared async file I/O pool."""
+    from nanobot.utils.files import FILES
+
+    storage = config.agents.storage
+    FILES.configure(workers=storage.io_threads, fsync=storage.fsync)
+
+
+def _make_session_manager(config: Config):
+    """Create the session manager from agents.sessions."""
+    from nanobot.session.manager import SessionManager
+
+    sessions_cfg = config.agents.sessions
+    return SessionManager(
+        config.workspace_path,
+        max_sessions=sessions_cfg.cache_max_sessions,
+        max_bytes=sessions_cfg.cache_max_mb * 1024 * 1024,
+        idle_s=sessions_cfg.idle_minutes * 60,
+        tail_messages=sessions_cfg.tail_messages,
+        engine=sessions_cfg.engine,
+        compress=sessions_cfg.compress,
+    )
+
+
 # ============================================================================
 # Gateway / Server
 # ============================================================================
@@ -332,10 +356,10 @@ def gateway(
     from nanobot.bus.queue import MessageBus
     from nanobot.agent.loop import AgentLoop
     from nanobot.channels.manager import ChannelManager
-    from nanobot.session.manager import SessionManager
     from nanobot.cron.service import CronService
     from nanobot.cron.types import CronJob
     from nanobot.heartbeat.service import HeartbeatService
+    from nanobot.metrics import LoopMonitor, MetricsServer
     
     if verbose:
         import logging
@@ -344,13 +368,19 @@ def gateway(
     console.print(f"{__logo__} Starting nanobot gateway on port {port}...")
     
     config = load_config()
+    _configure_storage(config)
     bus = MessageBus()
     provider = _make_provider(config)
-    session_manager = SessionManager(config.workspace_path)
+    session_manager = _make_session_manager(config)
     
     # Create cron service first (callback set after agent creation)
-    cron_store_path = get_data_dir() / "cron" / "jobs.json"
-    cron = CronService(cron_store_path)
+    cron_store_path = get_data_dir() / "cron" / "jobs.db"
+    cron = CronService(
+        cron_store_path,
+        max_concurrent_jobs=config.gateway.cron.max_concurrent_jobs,
+        catch_up=config.gateway.cron.catch_up,
+        jitter_ms=config.gateway.cron.jitter_s * 1000,
+    )
     
     # Create agent with cron service
     agent = AgentLoop(
@@ -368,6 +398,9 @@ def gateway(
         restrict_to_workspace=config.tools.restrict_to_workspace,
         session_manager=session_manager,
         mcp_servers=config.tools.mcp_servers,
+        session_token_budget=config.agents.defaults.session_token_budget,
+        consolidation_model=config.agents.defaults.consolidation_model,
+        progress_interval=config.agents.defaults.progress_interval_seconds,
     )
     
     # Set cron callback (needs agent)
@@ -394,11 +427,14 @@ def gateway(
         """Execute heartbeat through the agent."""
         return await agent.process_direct(prompt, session_key="heartbeat")
     
+    heartbeat_cfg = config.gateway.heartbeat
     heartbeat = HeartbeatService(
         workspace=config.workspace_path,
         on_heartbeat=on_heartbeat,
-        interval_s=30 * 60,  # 30 minutes
-        enabled=True
+        interval_s=heartbeat_cfg.interval_s,
+        enabled=heartbeat_cfg.enabled,
+        max_interval_s=heartbeat_cfg.max_interval_s,
+        poll_s=heartbeat_cfg.poll_s,
     )
     
     # Create channel manager
@@ -413,10 +449,26 @@ def gateway(
     if cron_status["jobs"] > 0:
         console.print(f"[green]✓[/green] Cron: {cron_status['jobs']} scheduled jobs")
     
-    console.print(f"[green]✓[/green] Heartbeat: every 30m")
+    if heartbeat_cfg.enabled:
+        console.print(f"[green]✓[/green] Heartbeat: every {heartbeat_cfg.interval_s // 60}m (on HEARTBEAT.md changes)")
+
+    metrics_cfg = config.gateway.metrics
+    metrics_server = None
+    if metrics_cfg.enabled:
+        metrics_server = MetricsServer(host=metrics_cfg.host, port=metrics_cfg.port, path=metrics_cfg.path)
+        console.print(
+            f"[green]✓[/green] Metrics: http://{metrics_cfg.host}:{metrics_cfg.port}{metrics_cfg.path}"
+        )
+    
+    loop_cfg = config.gateway.loop_monitor
+    loop_monitor = LoopMonitor(interval_s=loop_cfg.interval_ms / 1000, slow_s=loop_cfg.slow_ms / 1000)
     
     async def run():
         try:
+            if loop_cfg.enabled:
+                await loop_monitor.start()
+            if metrics_server:
+                await metrics_server.start()
             await cron.start()
             await heartbeat.start()
             await asyncio.gather(
@@ -430,7 +482,11 @@ def gateway(
             heartbeat.stop()
             cron.stop()
             agent.stop()
+            session_manager.flush()
             await channels.stop_all()
+            if metrics_server:
+                await metrics_server.stop()
+            loop_monitor.stop()
     
     asyncio.run(run())
 
@@ -462,8 +518,10 @@ def agent(
     provider = _make_provider(config)
 
     # Create cron service for tool usage (no callback needed for CLI unless running)
-    cron_store_path = get_data_dir() / "cron" / "jobs.json"
+    cron_store_path = get_data_dir() / "cron" / "jobs.db"
     cron = CronService(cron_store_path)
+    _configure_storage(config)
+    session_manager = _make_session_manager(config)
 
     if logs:
         logger.enable("nanobot")
@@ -483,7 +541,11 @@ def agent(
         exec_config=config.tools.exec,
         cron_service=cron,
         restrict_to_workspace=config.tools.restrict_to_workspace,
+        session_manager=session_manager,
         mcp_servers=config.tools.mcp_servers,
+        session_token_budget=config.agents.defaults.session_token_budget,
+        consolidation_model=config.agents.defaults.consolidation_model,
+        progress_interval=config.agents.defaults.progress_interval_seconds,
     )
     
     # Show spinner when logs are off (no output to miss); skip when logs are on
@@ -504,6 +566,7 @@ def agent(
                 response = await agent_loop.process_direct(message, session_id, on_progress=_cli_progress)
             _print_agent_response(response, render_markdown=markdown)
             await agent_loop.close_mcp()
+            session_manager.flush()
         
         asyncio.run(run_once())
     else:
@@ -546,6 +609,7 @@ def agent(
                         break
             finally:
                 await agent_loop.close_mcp()
+                session_manager.flush()
         
         asyncio.run(run_interactive())
 
@@ -707,6 +771,25 @@ def channels_login():
         console.print("[red]npm not found. Please install Node.js.[/red]")
 
 
+@channels_app.command("bench")
+def channels_bench(
+    sections: int = typer.Option(40, "--sections", "-n", help="Sections in the synthetic reply"),
+    rounds: int = typer.Option(50, "--rounds", help="Conversions timed per target"),
+):
+    """Benchmark the markdown renderers against the old per-channel converters."""
+    from nanobot.channels.bench import run_benchmark
+
+    results = run_benchmark(sections=sections, rounds=rounds)
+    table = Table(title=f"Markdown rendering ({results[0]['chars']} chars)")
+    table.add_column("Target", style="cyan")
+    table.add_column("Old converter", justify="right")
+    table.add_column("Parse + render", justify="right")
+    for r in results:
+        legacy = f"{r['legacy_ms']:.2f}ms" if r["legacy_ms"] is not None else "[dim]—[/dim]"
+        table.add_row(r["target"], legacy, f"{r['shared_ms']:.2f}ms")
+    console.print(table)
+
+
 # ============================================================================
 # Cron Commands
 # ============================================================================
@@ -718,14 +801,21 @@ app.add_typer(cron_app, name="cron")
 @cron_app.command("list")
 def cron_list(
     all: bool = typer.Option(False, "--all", "-a", help="Include disabled jobs"),
+    history: bool = typer.Option(False, "--history", "-H", help="Show recent runs instead of jobs"),
+    job_id: str | None = typer.Option(None, "--job", "-j", help="Only show runs of this job (with --history)"),
+    limit: int = typer.Option(20, "--limit", "-l", help="Number of runs to show (with --history)"),
 ):
     """List scheduled jobs."""
     from nanobot.config.loader import get_data_dir
     from nanobot.cron.service import CronService
     
-    store_path = get_data_dir() / "cron" / "jobs.json"
+    store_path = get_data_dir() / "cron" / "jobs.db"
     service = CronService(store_path)
     
+    if history:
+        _print_cron_history(service, job_id, limit)
+        return
+    
     jobs = service.list_jobs(include_disabled=all)
     
     if not jobs:
@@ -768,6 +858,29 @@ def cron_list(
     console.print(table)
 
 
+def _print_cron_history(service, job_id: str | None, limit: int) -> None:
+    """Print recent cron executions from the run history table."""
+    import time
+
+    runs = service.history(job_id, limit)
+    if not runs:
+        console.print("No recorded runs.")
+        return
+
+    table = Table(title="Recent Runs")
+    table.add_column("Job", style="cyan")
+    table.add_column("Started")
+    table.add_column("Duration", justify="right")
+    table.add_column("Status")
+    table.add_column("Error")
+    for run in runs:
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(run.started_at_ms / 1000))
+        color = {"ok": "green", "skipped": "yellow"}.get(run.status, "red")
+        status = f"[{color}]{run.status}[/{color}]"
+        table.add_row(run.job_id, started, f"{run.duration_ms / 1000:.1f}s", status, (run.error or "")[:60])
+    console.print(table)
+
+
 @cron_app.command("add")
 def cron_add(
     name: str = typer.Option(..., "--name", "-n", help="Job name"),
@@ -779,15 +892,31 @@ def cron_add(
     deliver: bool = typer.Option(False, "--deliver", "-d", help="Deliver response to channel"),
     to: str = typer.Option(None, "--to", help="Recipient for delivery"),
     channel: str = typer.Option(None, "--channel", help="Channel for delivery (e.g. 'telegram', 'whatsapp')"),
+    catch_up: str | None = typer.Option(None, "--catch-up", help="Missed runs after downtime: skip, once, all"),
+    jitter: int | None = typer.Option(None, "--jitter", help="Spread runs by up to N seconds (stable per job)"),
+    precheck_command: str | None = typer.Option(None, "--precheck-command", help="Only run when this command's output changes"),
+    precheck_url: str | None = typer.Option(None, "--precheck-url", help="Only run when this URL changes"),
+    precheck_file: str | None = typer.Option(None, "--precheck-file", help="Only run when this file changes"),
 ):
     """Add a scheduled job."""
     from nanobot.config.loader import get_data_dir
     from nanobot.cron.service import CronService
-    from nanobot.cron.types import CronSchedule
+    from nanobot.cron.types import CronPrecheck, CronSchedule
     
     if tz and not cron_expr:
         console.print("[red]Error: --tz can only be used with --cron[/red]")
         raise typer.Exit(1)
+    if catch_up and catch_up not in ("skip", "once", "all"):
+        console.print("[red]Error: --catch-up must be skip, once or all[/red]")
+        raise typer.Exit(1)
+    prechecks = [
+        CronPrecheck(kind=kind, target=target)
+        for kind, target in (("command", precheck_command), ("http", precheck_url), ("file", precheck_file))
+        if target
+    ]
+    if len(prechecks) > 1:
+        console.print("[red]Error: use only one of --precheck-command, --precheck-url, --precheck-file[/red]")
+        raise typer.Exit(1)
 
     # Determine schedule type
     if every:
@@ -802,7 +931,7 @@ def cron_add(
         console.print("[red]Error: Must specify --every, --cron, or --at[/red]")
         raise typer.Exit(1)
     
-    store_path = get_data_dir() / "cron" / "jobs.json"
+    store_path = get_data_dir() / "cron" / "jobs.db"
     service = CronService(store_path)
     
     job = service.add_job(
@@ -812,6 +941,9 @@ def cron_add(
         deliver=deliver,
         to=to,
         channel=channel,
+        catch_up=catch_up,
+        jitter_ms=jitter * 1000 if jitter is not None else None,
+        precheck=prechecks[0] if prechecks else None,
     )
     
     console.print(f"[green]✓[/green] Added job '{job.name}' ({job.id})")
@@ -825,7 +957,7 @@ def cron_remove(
     from nanobot.config.loader import get_data_dir
     from nanobot.cron.service import CronService
     
-    store_path = get_data_dir() / "cron" / "jobs.json"
+    store_path = get_data_dir() / "cron" / "jobs.db"
     service = CronService(store_path)
     
     if service.remove_job(job_id):
@@ -843,7 +975,7 @@ def cron_enable(
     from nanobot.config.loader import get_data_dir
     from nanobot.cron.service import CronService
     
-    store_path = get_data_dir() / "cron" / "jobs.json"
+    store_path = get_data_dir() / "cron" / "jobs.db"
     service = CronService(store_path)
     
     job = service.enable_job(job_id, enabled=not disable)
@@ -863,7 +995,7 @@ def cron_run(
     from nanobot.config.loader import get_data_dir
     from nanobot.cron.service import CronService
     
-    store_path = get_data_dir() / "cron" / "jobs.json"
+    store_path = get_data_dir() / "cron" / "jobs.db"
     service = CronService(store_path)
     
     async def run():
@@ -875,6 +1007,47 @@ def cron_run(
         console.print(f"[red]Failed to run job {job_id}[/red]")
 
 
+# ============================================================================
+# Usage Commands
+# ============================================================================
+
+
+@app.command()
+def usage(
+    by: str = typer.Option("session", "--by", "-b", help="Group by: session, model, origin, day"),
+    days: int = typer.Option(None, "--days", "-d", help="Only include the last N days"),
+):
+    """Show token usage from the usage ledger."""
+    from nanobot.agent.usage import UsageLedger
+    from nanobot.config.loader import load_config
+
+    config = load_config()
+    ledger = UsageLedger(config.workspace_path)
+    try:
+        report = ledger.report(group_by=by, days=days)
+    except ValueError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+
+    if not report:
+        console.print("No usage recorded.")
+        return
+
+    table = Table(title=f"Token Usage by {by}")
+    table.add_column(by.capitalize(), style="cyan")
+    table.add_column("Calls", justify="right")
+    table.add_column("Prompt", justify="right")
+    table.add_column("Completion", justify="right")
+    table.add_column("Cached", justify="right")
+    table.add_column("Total", justify="right", style="green")
+
+    rows = sorted(report.items(), key=lambda kv: kv[0] if by == "day" else -kv[1].total)
+    for name, t in rows:
+        table.add_row(name, str(t.calls), f"{t.prompt:,}", f"{t.completion:,}", f"{t.cached:,}", f"{t.total:,}")
+
+    console.print(table)
+
+
 # ============================================================================
 # Status Commands
 # ============================================================================
@@ -917,6 +1090,172 @@ def status():
                 console.print(f"{spec.label}: {'[green]✓[/green]' if has_key else '[dim]not set[/dim]'}")
 
 
+# ============================================================================
+# Doctor Commands
+# ============================================================================
+
+
+@app.command()
+def doctor(
+    loop: bool = typer.Option(False, "--loop", help="Check event-loop health"),
+    slow_ms: int = typer.Option(50, "--slow-ms", help="Flag operations that block the loop longer than this"),
+):
+    """Diagnose problems with a nanobot installation."""
+    if not loop:
+        console.print("Choose a check: [cyan]--loop[/cyan]")
+        raise typer.Exit(1)
+
+    import time
+
+    import httpx
+
+    from nanobot.agent.context import ContextBuilder
+    from nanobot.agent.memory import MemoryStore
+    from nanobot.agent.skills import SkillsLoader
+    from nanobot.config.loader import load_config
+    from nanobot.metrics import LoopMonitor
+    from nanobot.metrics.loop import summarize_lag
+    from nanobot.session.manager import SessionManager
+
+    config = load_config()
+    workspace = config.workspace_path
+
+    # Live figures from a running gateway, if it exposes metrics
+    metrics_cfg = config.gateway.metrics
+    if metrics_cfg.enabled:
+        url = f"http://{metrics_cfg.host}:{metrics_cfg.port}{metrics_cfg.path}"
+        try:
+            live = summarize_lag(httpx.get(url, timeout=2.0).text)
+        except httpx.HTTPError as e:
+            console.print(f"[yellow]Gateway metrics unreachable at {url}: {e}[/yellow]")
+        else:
+            if live:
+                color = "green" if live["p99_ms"] <= slow_ms else "red"
+                console.print(
+                    f"Gateway loop lag: mean {live['mean_ms']:.1f}ms, "
+                    f"p99 [{color}]<= {live['p99_ms']:g}ms[/{color}] over {live['samples']} samples, "
+                    f"{live['stalls']} stall(s)"
+                )
+            else:
+                console.print("[yellow]Gateway is not sampling loop lag (gateway.loopMonitor.enabled)[/yellow]")
+    else:
+        console.print("[dim]Gateway metrics are disabled; enable gateway.metrics to see live loop lag[/dim]")
+
+    # Time the synchronous work hot paths do on the loop, against this workspace
+    sessions_cfg = config.agents.sessions
+    session_manager = SessionManager(workspace, engine=sessions_cfg.engine, tail_messages=sessions_cfg.tail_messages)
+    infos = session_manager.list_sessions()
+    largest = max(infos, key=lambda s: Path(s["path"]).stat().st_size if Path(s["path"]).exists() else 0, default=None)
+    probes = [
+        ("skills scan", lambda: SkillsLoader(workspace).build_skills_summary()),
+        ("memory context", lambda: MemoryStore(workspace).get_memory_context("")),
+        ("system prompt", lambda: ContextBuilder(workspace).build_system_prompt()),
+        ("session list", session_manager.list_sessions),
+    ]
+    if largest:
+        probes.append((f"session load ({largest['key']})", lambda: session_manager.get_or_create(largest["key"])))
+
+    async def run() -> tuple[list[tuple[str, float]], list]:
+        monitor = LoopMonitor(interval_s=0.005, slow_s=slow_ms / 1000)
+        await monitor.start()
+        timings = []
+        try:
+            for name, probe in probes:
+                start = time.perf_counter()
+                probe()
+                timings.append((name, (time.perf_counter() - start) * 1000))
+                await asyncio.sleep(0.02)  # Let the sampler catch up
+        finally:
+            monitor.stop()
+        return timings, list(monitor.stalls)
+
+    timings, stalls = asyncio.run(run())
+
+    table = Table(title="Blocking work on the event loop")
+    table.add_column("Operation", style="cyan")
+    table.add_column("Time", justify="right")
+    table.add_column("Status")
+    for name, ms in timings:
+        status = "[green]ok[/green]" if ms <= slow_ms else "[red]blocks the loop[/red]"
+        table.add_row(name, f"{ms:.1f}ms", status)
+    console.print(table)
+
+    for stall in stalls:
+        if stall.stack:
+            where = stall.stack.strip().splitlines()[-2:]
+            console.print(f"[red]Blocked {stall.blocked_s * 1000:.0f}ms[/red] at:\n" + "\n".join(where))
+
+
+# ============================================================================
+# Session Commands
+# ============================================================================
+
+sessions_app = typer.Typer(help="Manage conversation sessions")
+app.add_typer(sessions_app, name="sessions")
+
+
+@sessions_app.command("convert")
+def sessions_convert(
+    to: str = typer.Option(..., "--to", help="Target engine: jsonl, msgpack or sqlite"),
+):
+    """Convert every session in the workspace to another storage engine."""
+    from nanobot.config.loader import load_config
+    from nanobot.session.store import SESSION_ENGINES, create_store
+
+    if to not in SESSION_ENGINES:
+        console.print(f"[red]Error: --to must be one of {', '.join(SESSION_ENGINES)}[/red]")
+        raise typer.Exit(1)
+
+    config = load_config()
+    sessions_dir = config.workspace_path / "sessions"
+    target = create_store(to, sessions_dir, compress=config.agents.sessions.compress)
+    converted = 0
+    for engine in SESSION_ENGINES:
+        if engine == to:
+            continue
+        source = create_store(engine, sessions_dir)
+        for info in source.list_sessions():
+            key = info["key"]
+            if Path(info["path"]) != source.path(key):
+                continue  # Listed by the source but stored in another format
+            record = source.load(key, 0)
+            messages = source.read(key, 0, record.total)
+            meta = {k: v for k, v in record.meta.items() if k not in ("_type", "bytes")}
+            meta["messages"] = len(messages)
+            target.rewrite(key, meta, messages)
+            source.retire(key)
+            converted += 1
+
+    console.print(f"[green]✓[/green] Converted {converted} sessions to {to}")
+
+
+@sessions_app.command("bench")
+def sessions_bench(
+    messages: int = typer.Option(10_000, "--messages", "-n", help="Messages in the synthetic session"),
+    tail: int = typer.Option(200, "--tail", help="Messages loaded per session"),
+):
+    """Benchmark the session storage engines."""
+    from nanobot.session.bench import run_benchmark
+
+    table = Table(title=f"Session engines ({messages} messages)")
+    table.add_column("Engine", style="cyan")
+    table.add_column("Bulk write", justify="right")
+    table.add_column("Append", justify="right")
+    table.add_column(f"Load tail ({tail})", justify="right")
+    table.add_column("Read all", justify="right")
+    table.add_column("Disk", justify="right")
+    for r in run_benchmark(messages=messages, tail=tail):
+        table.add_row(
+            r["engine"],
+            f"{r['write_s']:.2f}s",
+            f"{r['append_ms']:.2f}ms",
+            f"{r['load_tail_ms']:.1f}ms",
+            f"{r['read_all_s']:.2f}s",
+            f"{r['disk_bytes'] / 1024 / 1024:.1f}MB",
+        )
+    console.print(table)
+
+
 # ============================================================================
 # OAuth Login
 # ============================================================================
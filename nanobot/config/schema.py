@@ -1,6 +1,8 @@
 """Configuration schema using Pydantic."""
 
 from pathlib import Path
+from typing import Literal
+
 from pydantic import BaseModel, Field, ConfigDict
 from pydantic.alias_generators import to_camel
 from pydantic_settings import BaseSettings
@@ -19,6 +21,11 @@ class WhatsAppConfig(Base):
     bridge_url: str = "ws://localhost:3001"
     bridge_token: str = ""  # Shared token for bridge auth (optional, recommended)
     allow_from: list[str] = Field(default_factory=list)  # Allowed phone numbers
+    binary_frames: bool = True  # msgpack frames (raw media bytes) when the bridge supports them
+    max_in_flight: int = 32  # Sends awaiting a bridge ack before send() waits
+    max_batch: int = 20  # Sends per bridge frame
+    ack_timeout_seconds: float = 15.0  # Resend when the bridge hasn't acked by then
+    max_retries: int = 3
 
 
 class TelegramConfig(Base):
@@ -28,6 +35,13 @@ class TelegramConfig(Base):
     token: str = ""  # Bot token from @BotFather
     allow_from: list[str] = Field(default_factory=list)  # Allowed user IDs or usernames
     proxy: str | None = None  # HTTP/SOCKS5 proxy URL, e.g. "http://127.0.0.1:7890" or "socks5://127.0.0.1:1080"
+    mode: Literal["polling", "webhook"] = "polling"
+    webhook_url: str = ""  # Public HTTPS URL Telegram posts updates to, e.g. "https://bot.example.com/telegram"
+    webhook_host: str = "0.0.0.0"  # Local listener address (put a TLS-terminating proxy in front)
+    webhook_port: int = 8443
+    webhook_path: str = "/telegram"
+    webhook_secret: str = ""  # Checked against X-Telegram-Bot-Api-Secret-Token; random per start if empty
+    webhook_max_connections: int = 40  # Max concurrent deliveries Telegram opens (and we process)
 
 
 class FeishuConfig(Base):
@@ -39,6 +53,7 @@ class FeishuConfig(Base):
     encrypt_key: str = ""  # Encrypt Key for event subscription (optional)
     verification_token: str = ""  # Verification Token for event subscription (optional)
     allow_from: list[str] = Field(default_factory=list)  # Allowed user open_ids
+    sdk_workers: int = 4  # Threads running blocking SDK calls (sends, reactions)
 
 
 class DingTalkConfig(Base):
@@ -58,6 +73,7 @@ class DiscordConfig(Base):
     allow_from: list[str] = Field(default_factory=list)  # Allowed user IDs
     gateway_url: str = "wss://gateway.discord.gg/?v=10&encoding=json"
     intents: int = 37377  # GUILDS + GUILD_MESSAGES + DIRECT_MESSAGES + MESSAGE_CONTENT
+    compress: bool = False  # zlib-stream transport compression for the gateway
 
 
 class EmailConfig(Base):
@@ -85,7 +101,9 @@ class EmailConfig(Base):
 
     # Behavior
     auto_reply_enabled: bool = True  # If false, inbound email is read but no automatic reply is sent
-    poll_interval_seconds: int = 30
+    poll_interval_seconds: int = 30  # Used when the server has no IDLE support (or idle is off)
+    idle: bool = True  # Wait for new mail with IMAP IDLE when the server supports it
+    idle_timeout_seconds: int = 1500  # Re-issue IDLE this often (servers drop it after ~30 min)
     mark_seen: bool = True
     max_body_chars: int = 12000
     subject_prefix: str = "Re: "
@@ -120,6 +138,9 @@ class MochatConfig(Base):
     watch_limit: int = 100
     retry_delay_ms: int = 500
     max_retry_attempts: int = 0  # 0 means unlimited retries
+    fallback_concurrency: int = 4  # Poll requests in flight at once without the socket
+    poll_min_interval_ms: int = 2000  # Poll interval for a target that just had new messages
+    poll_max_interval_ms: int = 60000  # Poll interval a quiet target backs off to
     claw_token: str = ""
     agent_user_id: str = ""
     sessions: list[str] = Field(default_factory=list)
@@ -164,6 +185,15 @@ class QQConfig(Base):
     allow_from: list[str] = Field(default_factory=list)  # Allowed user openids (empty = public access)
 
 
+class MediaConfig(Base):
+    """Shared media store for inbound attachments (~/.nanobot/media)."""
+
+    max_file_mb: int = 20  # Larger attachments are skipped
+    max_total_mb: int = 1024  # LRU eviction keeps the directory under this size
+    ttl_days: int = 7  # Files untouched for this long are evicted
+    max_concurrent_downloads: int = 4
+
+
 class ChannelsConfig(Base):
     """Configuration for chat channels."""
 
@@ -176,6 +206,7 @@ class ChannelsConfig(Base):
     email: EmailConfig = Field(default_factory=EmailConfig)
     slack: SlackConfig = Field(default_factory=SlackConfig)
     qq: QQConfig = Field(default_factory=QQConfig)
+    media: MediaConfig = Field(default_factory=MediaConfig)
 
 
 class AgentDefaults(Base):
@@ -187,12 +218,36 @@ class AgentDefaults(Base):
     temperature: float = 0.7
     max_tool_iterations: int = 20
     memory_window: int = 50
+    session_token_budget: int = 0  # Max tokens per session per UTC day (0 = unlimited)
+    consolidation_model: str | None = None  # Cheaper model for memory consolidation (default: model)
+    progress_interval_seconds: float = 3.0  # Min time between progress updates (one edited status per turn)
+
+
+class SessionsConfig(Base):
+    """Session loading and in-memory cache configuration."""
+
+    cache_max_sessions: int = 256  # Sessions kept in memory (LRU)
+    cache_max_mb: int = 64  # Approximate memory budget for cached sessions
+    idle_minutes: int = 60  # Drop sessions from memory after this long without activity
+    tail_messages: int = 200  # Messages loaded per session; older ones are read on demand
+    engine: Literal["jsonl", "msgpack", "sqlite"] = "jsonl"  # Other engines import JSONL sessions on load
+    compress: bool = True  # msgpack only: compress large records (zstd if installed, else zlib)
+
+
+class StorageConfig(Base):
+    """File I/O done off the event loop (sessions, memory, file tools)."""
+
+    io_threads: int = 4  # Dedicated thread pool for blocking file I/O
+    # none: never fsync; data: fsync atomic writes before the rename; full: also directories and session appends
+    fsync: Literal["none", "data", "full"] = "data"
 
 
 class AgentsConfig(Base):
     """Agent configuration."""
 
     defaults: AgentDefaults = Field(default_factory=AgentDefaults)
+    sessions: SessionsConfig = Field(default_factory=SessionsConfig)
+    storage: StorageConfig = Field(default_factory=StorageConfig)
 
 
 class ProviderConfig(Base):
@@ -224,11 +279,49 @@ class ProvidersConfig(Base):
     github_copilot: ProviderConfig = Field(default_factory=ProviderConfig)  # Github Copilot (OAuth)
 
 
+class MetricsConfig(Base):
+    """Metrics exposition endpoint (Prometheus text format)."""
+
+    enabled: bool = False
+    host: str = "127.0.0.1"  # Local scrapers only by default
+    port: int = 18791
+    path: str = "/metrics"
+
+
+class CronConfig(Base):
+    """Cron scheduler configuration."""
+
+    max_concurrent_jobs: int = 4  # Due jobs run in parallel up to this limit
+    catch_up: Literal["skip", "once", "all"] = "skip"  # Runs missed while the gateway was down
+    jitter_s: int = 0  # Spread recurring runs by a stable per-job offset up to this many seconds
+
+
+class HeartbeatConfig(Base):
+    """Heartbeat (HEARTBEAT.md) configuration."""
+
+    enabled: bool = True
+    interval_s: int = 30 * 60  # Base interval for undated tasks
+    max_interval_s: int = 4 * 60 * 60  # Backoff ceiling while every check answers HEARTBEAT_OK
+    poll_s: int = 5  # How often HEARTBEAT.md is checked for edits and due tasks
+
+
+class LoopMonitorConfig(Base):
+    """Event-loop lag sampling and blocked-loop detection."""
+
+    enabled: bool = True
+    interval_ms: int = 250  # Lag sample period
+    slow_ms: int = 100  # Blocking longer than this is logged with the blocking stack
+
+
 class GatewayConfig(Base):
     """Gateway/server configuration."""
 
     host: str = "0.0.0.0"
     port: int = 18790
+    metrics: MetricsConfig = Field(default_factory=MetricsConfig)
+    cron: CronConfig = Field(default_factory=CronConfig)
+    heartbeat: HeartbeatConfig = Field(default_factory=HeartbeatConfig)
+    loop_monitor: LoopMonitorConfig = Field(default_factory=LoopMonitorConfig)
 
 
 class WebSearchConfig(Base):
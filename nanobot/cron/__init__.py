@@ -1,6 +1,6 @@
 """Cron service for scheduled agent tasks."""
 
 from nanobot.cron.service import CronService
-from nanobot.cron.types import CronJob, CronSchedule
+from nanobot.cron.types import CronJob, CronPrecheck, CronSchedule
 
-__all__ = ["CronService", "CronJob", "CronSchedule"]
+__all__ = ["CronService", "CronJob", "CronPrecheck", "CronSchedule"]
@@ -0,0 +1,132 @@
+"""LLM-free prechecks that decide whether a cron job's agent turn is needed."""
+
+import asyncio
+import hashlib
+from pathlib import Path
+
+import httpx
+from loguru import logger
+
+from nanobot.cron.types import CronPrecheck
+
+COMMAND_TIMEOUT_S = 30
+HTTP_TIMEOUT_S = 15
+MAX_BODY_BYTES = 5 * 1024 * 1024  # Body hashed when a server sends no validators
+
+
+class PrecheckError(Exception):
+    """A precheck could not produce a fingerprint."""
+
+
+class PrecheckRunner:
+    """
+    Computes fingerprints for prechecks.
+
+    A job runs its agent turn only when the fingerprint differs from the one
+    recorded at its previous run. Identical checks that are due together
+    (e.g. fifty jobs watching the same URL) share one in-flight request.
+    """
+
+    def __init__(self, client: httpx.AsyncClient | None = None):
+        self._client = client
+        self._inflight: dict[tuple[str, str], asyncio.Future[str]] = {}
+
+    async def fingerprint(self, check: CronPrecheck) -> str:
+        """Return a stable fingerprint for the check's current state."""
+        key = (check.kind, check.target)
+        if pending := self._inflight.get(key):
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future[str] = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._compute(check)
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved when nobody else is waiting
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            self._inflight.pop(key, None)
+
+    async def _compute(self, check: CronPrecheck) -> str:
+        if check.kind == "command":
+            return await self._command(check.target)
+        if check.kind == "http":
+            return await self._http(check.target)
+        if check.kind == "file":
+            return await asyncio.to_thread(self._file, check.target)
+        raise PrecheckError(f"unknown precheck kind: {check.kind}")
+
+    @staticmethod
+    async def _command(command: str) -> str:
+        """Fingerprint a shell command's stdout; a non-zero exit is an error."""
+        process = await asyncio.create_subprocess_shell(
+            command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=COMMAND_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            process.kill()
+            raise PrecheckError(f"command timed out after {COMMAND_TIMEOUT_S}s")
+        if process.returncode != 0:
+            raise PrecheckError(f"command exited {process.returncode}: {stderr.decode(errors='replace')[:200]}")
+        return "cmd:" + hashlib.sha256(stdout).hexdigest()
+
+    async def _http(self, url: str) -> str:
+        """Fingerprint a URL by ETag/Last-Modified, falling back to hashing the body."""
+        if self._client:
+            return await self._http_with(self._client, url)
+        async with httpx.AsyncClient(timeout=HTTP_TIMEOUT_S, follow_redirects=True) as client:
+            return await self._http_with(client, url)
+
+    @staticmethod
+    async def _http_with(client: httpx.AsyncClient, url: str) -> str:
+        resp = await client.head(url)
+        if resp.status_code < 400:
+            validator = resp.headers.get("etag") or resp.headers.get("last-modified")
+            if validator:
+                return "http:" + validator
+        # No validators (or HEAD unsupported): hash the body, capped
+        digest = hashlib.sha256()
+        size = 0
+        async with client.stream("GET", url) as resp:
+            resp.raise_for_status()
+            if validator := resp.headers.get("etag") or resp.headers.get("last-modified"):
+                return "http:" + validator
+            async for chunk in resp.aiter_bytes():
+                size += len(chunk)
+                if size > MAX_BODY_BYTES:
+                    raise PrecheckError(f"body exceeds {MAX_BODY_BYTES} bytes without ETag/Last-Modified")
+                digest.update(chunk)
+        return "body:" + digest.hexdigest()
+
+    @staticmethod
+    def _file(path: str) -> str:
+        """Fingerprint a file by content hash; a missing file has its own fingerprint."""
+        p = Path(path).expanduser()
+        if not p.exists():
+            return "file:missing"
+        digest = hashlib.sha256()
+        with open(p, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return "file:" + digest.hexdigest()
+
+
+async def should_run(runner: PrecheckRunner, check: CronPrecheck, previous: str | None) -> tuple[bool, str | None]:
+    """
+    Decide whether a job's agent turn is needed.
+
+    Returns (run, fingerprint). Errors fail open: the job runs, so a broken
+    check never silently suppresses work.
+    """
+    try:
+        current = await runner.fingerprint(check)
+    except Exception as e:
+        logger.warning(f"Cron precheck {check.kind} '{check.target}' failed, running job: {e}")
+        return True, previous
+    return current != previous, current
@@ -1,7 +1,9 @@
 """Cron service for scheduling agent tasks."""
 
 import asyncio
-import json
+import hashlib
+import heapq
+import itertools
 import time
 import uuid
 from datetime import datetime
@@ -10,7 +12,27 @@ from typing import Any, Callable, Coroutine
 
 from loguru import logger
 
-from nanobot.cron.types import CronJob, CronJobState, CronPayload, CronSchedule, CronStore
+from nanobot.cron.precheck import PrecheckRunner, should_run
+from nanobot.cron.store import CronDB, CronRun
+from nanobot.cron.types import (
+    CronJob,
+    CronJobState,
+    CronPayload,
+    CronPrecheck,
+    CronSchedule,
+    CronStore,
+)
+from nanobot.metrics import METRICS
+
+_CRON_LATENESS = METRICS.histogram(
+    "nanobot_cron_job_lateness_seconds", "Delay between a job's scheduled and actual start",
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0, 3600.0),
+)
+_CRON_RUNS = METRICS.counter("nanobot_cron_job_runs_total", "Cron job executions", ("status",))
+_CRON_ACTIVE = METRICS.gauge("nanobot_cron_jobs_active", "Cron jobs queued or running")
+
+CATCH_UP_POLICIES = ("skip", "once", "all")
+MAX_CATCH_UP_RUNS = 100  # Upper bound for the "all" policy
 
 
 def _now_ms() -> int:
@@ -45,118 +67,108 @@ def _compute_next_run(schedule: CronSchedule, now_ms: int) -> int | None:
     return None
 
 
+def _jitter_offset(job_id: str, spread_ms: int) -> int:
+    """Stable offset in [0, spread_ms) derived from the job id."""
+    if spread_ms <= 0:
+        return 0
+    return int.from_bytes(hashlib.sha256(job_id.encode()).digest()[:8], "big") % spread_ms
+
+
+def _count_missed(schedule: CronSchedule, due_ms: int, now_ms: int) -> int:
+    """Count scheduled runs in [due_ms, now_ms], capped at MAX_CATCH_UP_RUNS."""
+    count = 0
+    t: int | None = due_ms
+    while t is not None and t <= now_ms and count < MAX_CATCH_UP_RUNS:
+        count += 1
+        t = _compute_next_run(schedule, t)
+    return count
+
+
 class CronService:
-    """Service for managing and executing scheduled jobs."""
+    """
+    Service for managing and executing scheduled jobs.
+    
+    Due times live in a min-heap of (next_run_at_ms, seq, job_id) entries.
+    Entries are invalidated lazily: one is only acted on if the job still
+    exists, is enabled and still has that next_run_at_ms, so enable/disable/
+    remove never have to search the heap. Due jobs run concurrently up to
+    max_concurrent_jobs, and a job never overlaps with itself; runs that
+    come due while it is still running coalesce into one.
+    
+    With jitter, "every"/"cron" runs are shifted by a stable per-job offset
+    so hundreds of jobs on the same schedule don't fire in the same second,
+    and a job with a precheck only calls on_job (the LLM turn) when the
+    precheck's fingerprint changed since its last run.
+    """
     
     def __init__(
         self,
         store_path: Path,
-        on_job: Callable[[CronJob], Coroutine[Any, Any, str | None]] | None = None
+        on_job: Callable[[CronJob], Coroutine[Any, Any, str | None]] | None = None,
+        max_concurrent_jobs: int = 4,
+        catch_up: str = "skip",
+        jitter_ms: int = 0,
     ):
+        if catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"catch_up must be one of {CATCH_UP_POLICIES}")
         self.store_path = store_path
+        self.db = CronDB(store_path.with_suffix(".db"))  # Imports a legacy jobs.json on first use
         self.on_job = on_job  # Callback to execute job, returns response text
+        self.catch_up = catch_up  # Default policy for runs missed while stopped
+        self.jitter_ms = jitter_ms  # Default spread for jobs without their own jitter_ms
+        self._prechecks = PrecheckRunner()
         self._store: CronStore | None = None
+        self._jobs: dict[str, CronJob] = {}  # job_id -> job, mirrors self._store.jobs
+        self._heap: list[tuple[int, int, str]] = []
+        self._seq = itertools.count()  # Tie-breaker so equal times never compare ids
         self._timer_task: asyncio.Task | None = None
+        self._wake = asyncio.Event()
         self._running = False
+        self._workers = asyncio.Semaphore(max(1, max_concurrent_jobs))
+        self._job_locks: dict[str, asyncio.Lock] = {}
+        self._active: set[str] = set()  # Jobs dispatched and not yet finished
+        self._tasks: set[asyncio.Task] = set()
+        self._catch_up_pending: dict[str, int] = {}  # job_id -> missed runs still to execute
+        self._sorted: list[CronJob] | None = None  # list_jobs() view, reset whenever a run time changes
+        _CRON_ACTIVE.set_function(lambda: len(self._active))
     
     def _load_store(self) -> CronStore:
         """Load jobs from disk."""
         if self._store:
             return self._store
         
-        if self.store_path.exists():
-            try:
-                data = json.loads(self.store_path.read_text())
-                jobs = []
-                for j in data.get("jobs", []):
-                    jobs.append(CronJob(
-                        id=j["id"],
-                        name=j["name"],
-                        enabled=j.get("enabled", True),
-                        schedule=CronSchedule(
-                            kind=j["schedule"]["kind"],
-                            at_ms=j["schedule"].get("atMs"),
-                            every_ms=j["schedule"].get("everyMs"),
-                            expr=j["schedule"].get("expr"),
-                            tz=j["schedule"].get("tz"),
-                        ),
-                        payload=CronPayload(
-                            kind=j["payload"].get("kind", "agent_turn"),
-                            message=j["payload"].get("message", ""),
-                            deliver=j["payload"].get("deliver", False),
-                            channel=j["payload"].get("channel"),
-                            to=j["payload"].get("to"),
-                        ),
-                        state=CronJobState(
-                            next_run_at_ms=j.get("state", {}).get("nextRunAtMs"),
-                            last_run_at_ms=j.get("state", {}).get("lastRunAtMs"),
-                            last_status=j.get("state", {}).get("lastStatus"),
-                            last_error=j.get("state", {}).get("lastError"),
-                        ),
-                        created_at_ms=j.get("createdAtMs", 0),
-                        updated_at_ms=j.get("updatedAtMs", 0),
-                        delete_after_run=j.get("deleteAfterRun", False),
-                    ))
-                self._store = CronStore(jobs=jobs)
-            except Exception as e:
-                logger.warning(f"Failed to load cron store: {e}")
-                self._store = CronStore()
-        else:
+        try:
+            self._store = CronStore(jobs=self.db.load_jobs())
+        except Exception as e:
+            logger.warning(f"Failed to load cron store: {e}")
             self._store = CronStore()
         
+        self._jobs = {j.id: j for j in self._store.jobs}
+        self._rebuild_heap()
         return self._store
     
-    def _save_store(self) -> None:
-        """Save jobs to disk."""
-        if not self._store:
-            return
-        
-        self.store_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        data = {
-            "version": self._store.version,
-            "jobs": [
-                {
-                    "id": j.id,
-                    "name": j.name,
-                    "enabled": j.enabled,
-                    "schedule": {
-                        "kind": j.schedule.kind,
-                        "atMs": j.schedule.at_ms,
-                        "everyMs": j.schedule.every_ms,
-                        "expr": j.schedule.expr,
-                        "tz": j.schedule.tz,
-                    },
-                    "payload": {
-                        "kind": j.payload.kind,
-                        "message": j.payload.message,
-                        "deliver": j.payload.deliver,
-                        "channel": j.payload.channel,
-                        "to": j.payload.to,
-                    },
-                    "state": {
-                        "nextRunAtMs": j.state.next_run_at_ms,
-                        "lastRunAtMs": j.state.last_run_at_ms,
-                        "lastStatus": j.state.last_status,
-                        "lastError": j.state.last_error,
-                    },
-                    "createdAtMs": j.created_at_ms,
-                    "updatedAtMs": j.updated_at_ms,
-                    "deleteAfterRun": j.delete_after_run,
-                }
-                for j in self._store.jobs
-            ]
-        }
-        
-        self.store_path.write_text(json.dumps(data, indent=2))
+    def _forget_missing(self, missing: set[str]) -> None:
+        """Drop jobs whose rows were deleted by another process."""
+        for job_id in missing:
+            logger.info(f"Cron: job {job_id} was removed externally, unscheduling")
+            self._drop(job_id)
+    
+    async def _persist(self, job: CronJob) -> None:
+        """Write one job's current state (or its deletion) to disk, off the event loop."""
+        if job.id in self._jobs:
+            self._forget_missing(await asyncio.to_thread(self.db.update_jobs, [job]))
+        else:
+            await asyncio.to_thread(self.db.delete_job, job.id)
     
     async def start(self) -> None:
         """Start the cron service."""
         self._running = True
         self._load_store()
-        self._recompute_next_runs()
-        self._save_store()
-        self._arm_timer()
+        self._apply_catch_up()
+        self._rebuild_heap()
+        self._forget_missing(await asyncio.to_thread(self.db.update_jobs, self._store.jobs))
+        self._wake.clear()
+        self._timer_task = asyncio.create_task(self._timer_loop())
         logger.info(f"Cron service started with {len(self._store.jobs if self._store else [])} jobs")
     
     def stop(self) -> None:
@@ -165,100 +177,212 @@ class CronService:
         if self._timer_task:
             self._timer_task.cancel()
             self._timer_task = None
+        for task in list(self._tasks):
+            task.cancel()
     
-    def _recompute_next_runs(self) -> None:
-        """Recompute next run times for all enabled jobs."""
+    def _apply_catch_up(self) -> None:
+        """Resolve runs missed while the service was stopped, per catch-up policy."""
         if not self._store:
             return
         now = _now_ms()
         for job in self._store.jobs:
-            if job.enabled:
-                job.state.next_run_at_ms = _compute_next_run(job.schedule, now)
+            if not job.enabled:
+                continue
+            due = job.state.next_run_at_ms
+            if due is None:
+                job.state.next_run_at_ms = self._next_run(job, now)
+                continue
+            if due > now:
+                continue
+            missed = _count_missed(job.schedule, due, now)
+            policy = job.catch_up or self.catch_up
+            if policy == "skip":
+                job.state.next_run_at_ms = self._next_run(job, now)
+                logger.info(f"Cron: skipping {missed} missed run(s) of '{job.name}'")
+            else:
+                # Leave next_run_at_ms in the past so the job is due immediately
+                self._catch_up_pending[job.id] = missed if policy == "all" else 1
+                logger.info(f"Cron: catching up {self._catch_up_pending[job.id]} run(s) of '{job.name}'")
+    
+    def _next_run(self, job: CronJob, now_ms: int) -> int | None:
+        """Next run time for a job, including its jitter offset."""
+        spread = job.jitter_ms if job.jitter_ms is not None else self.jitter_ms
+        if not spread or job.schedule.kind == "at":
+            return _compute_next_run(job.schedule, now_ms)
+        if job.schedule.kind == "every":
+            every = job.schedule.every_ms
+            if not every or every <= 0:
+                return None
+            # Next slot on a fixed grid shifted by the offset, so equal intervals don't align
+            offset = _jitter_offset(job.id, min(spread, every))
+            return now_ms - (now_ms - offset) % every + every
+        offset = _jitter_offset(job.id, spread)
+        base = _compute_next_run(job.schedule, now_ms - offset)
+        return base + offset if base is not None else None
+    
+    def _rebuild_heap(self) -> None:
+        """Rebuild the heap from scratch (drops all stale entries)."""
+        self._heap = [
+            (j.state.next_run_at_ms, next(self._seq), j.id)
+            for j in self._jobs.values()
+            if j.enabled and j.state.next_run_at_ms is not None
+        ]
+        heapq.heapify(self._heap)
+        self._sorted = None
+    
+    def _schedule(self, job: CronJob) -> None:
+        """Push a job's current next run onto the heap."""
+        self._sorted = None
+        if job.enabled and job.state.next_run_at_ms is not None:
+            heapq.heappush(self._heap, (job.state.next_run_at_ms, next(self._seq), job.id))
+            if len(self._heap) > 2 * len(self._jobs) + 64:
+                self._rebuild_heap()
+    
+    def _is_live(self, entry: tuple[int, int, str]) -> bool:
+        at_ms, _, job_id = entry
+        job = self._jobs.get(job_id)
+        return (
+            job is not None and job.enabled
+            and job.state.next_run_at_ms == at_ms
+            and job_id not in self._active
+        )
     
     def _get_next_wake_ms(self) -> int | None:
         """Get the earliest next run time across all jobs."""
-        if not self._store:
-            return None
-        times = [j.state.next_run_at_ms for j in self._store.jobs 
-                 if j.enabled and j.state.next_run_at_ms]
-        return min(times) if times else None
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
     
     def _arm_timer(self) -> None:
-        """Schedule the next timer tick."""
-        if self._timer_task:
-            self._timer_task.cancel()
-        
-        next_wake = self._get_next_wake_ms()
-        if not next_wake or not self._running:
-            return
-        
-        delay_ms = max(0, next_wake - _now_ms())
-        delay_s = delay_ms / 1000
-        
-        async def tick():
-            await asyncio.sleep(delay_s)
+        """Wake the timer loop so it re-reads the earliest due time."""
+        self._wake.set()
+    
+    async def _timer_loop(self) -> None:
+        """Sleep until the earliest due job (or a wake-up), then dispatch due jobs."""
+        while self._running:
+            next_wake = self._get_next_wake_ms()
+            timeout = None if next_wake is None else max(0, next_wake - _now_ms()) / 1000
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
             if self._running:
-                await self._on_timer()
-        
-        self._timer_task = asyncio.create_task(tick())
+                self._on_timer()
     
-    async def _on_timer(self) -> None:
-        """Handle timer tick - run due jobs."""
-        if not self._store:
-            return
-        
+    def _on_timer(self) -> None:
+        """Pop every due job off the heap and run it in the background."""
         now = _now_ms()
-        due_jobs = [
-            j for j in self._store.jobs
-            if j.enabled and j.state.next_run_at_ms and now >= j.state.next_run_at_ms
-        ]
-        
-        for job in due_jobs:
-            await self._execute_job(job)
-        
-        self._save_store()
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if not self._is_live(entry):
+                continue
+            job = self._jobs[entry[2]]
+            self._active.add(job.id)
+            task = asyncio.create_task(self._run_dispatched(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _run_dispatched(self, job: CronJob) -> None:
+        """Run a dispatched job under the worker limit, then persist and reschedule."""
+        try:
+            async with self._workers:
+                await self._execute_job(job)
+        finally:
+            self._active.discard(job.id)
+        await self._persist(job)
         self._arm_timer()
     
-    async def _execute_job(self, job: CronJob) -> None:
-        """Execute a single job."""
+    async def _execute_job(self, job: CronJob, precheck: bool = True) -> None:
+        """Execute a single job (never concurrently with itself) and compute its next run."""
+        lock = self._job_locks.setdefault(job.id, asyncio.Lock())
+        async with lock:
+            await self._run_job_once(job, precheck)
+        
+        pending = self._catch_up_pending.pop(job.id, 0) - 1
+        if pending > 0:
+            # More missed runs to replay: due again right away
+            self._catch_up_pending[job.id] = pending
+            job.state.next_run_at_ms = _now_ms()
+        elif job.schedule.kind == "at":
+            # Handle one-shot jobs
+            if job.delete_after_run:
+                self._drop(job.id)
+            else:
+                job.enabled = False
+                job.state.next_run_at_ms = None
+        else:
+            # Compute next run
+            job.state.next_run_at_ms = self._next_run(job, _now_ms())
+        self._schedule(job)
+    
+    async def _run_job_once(self, job: CronJob, precheck: bool = True) -> None:
         start_ms = _now_ms()
-        logger.info(f"Cron: executing job '{job.name}' ({job.id})")
+        if job.state.next_run_at_ms:
+            _CRON_LATENESS.observe(max(0, start_ms - job.state.next_run_at_ms) / 1000)
         
         try:
-            response = None
-            if self.on_job:
-                response = await self.on_job(job)
+            fingerprint = job.state.precheck_fingerprint
+            changed = True
+            if precheck and job.precheck:
+                changed, fingerprint = await should_run(self._prechecks, job.precheck, fingerprint)
             
-            job.state.last_status = "ok"
+            if changed:
+                logger.info(f"Cron: executing job '{job.name}' ({job.id})")
+                if self.on_job:
+                    await self.on_job(job)
+                job.state.last_status = "ok"
+                # Only remember the fingerprint once the run succeeded, so failures retry
+                job.state.precheck_fingerprint = fingerprint
+                logger.info(f"Cron: job '{job.name}' completed")
+            else:
+                job.state.last_status = "skipped"
+                logger.debug(f"Cron: job '{job.name}' skipped, precheck unchanged")
             job.state.last_error = None
-            logger.info(f"Cron: job '{job.name}' completed")
             
         except Exception as e:
             job.state.last_status = "error"
             job.state.last_error = str(e)
             logger.error(f"Cron: job '{job.name}' failed: {e}")
         
+        _CRON_RUNS.inc(status=job.state.last_status)
         job.state.last_run_at_ms = start_ms
         job.updated_at_ms = _now_ms()
-        
-        # Handle one-shot jobs
-        if job.schedule.kind == "at":
-            if job.delete_after_run:
-                self._store.jobs = [j for j in self._store.jobs if j.id != job.id]
-            else:
-                job.enabled = False
-                job.state.next_run_at_ms = None
-        else:
-            # Compute next run
-            job.state.next_run_at_ms = _compute_next_run(job.schedule, _now_ms())
+        try:
+            await asyncio.to_thread(self.db.record_run, CronRun(
+                job_id=job.id,
+                started_at_ms=start_ms,
+                duration_ms=job.updated_at_ms - start_ms,
+                status=job.state.last_status,
+                error=job.state.last_error,
+            ))
+        except Exception as e:
+            logger.warning(f"Cron: failed to record run of '{job.name}': {e}")
+    
+    def _drop(self, job_id: str) -> bool:
+        """Remove a job from the store and index; its heap entries go stale."""
+        if self._jobs.pop(job_id, None) is None:
+            return False
+        self._store.jobs = [j for j in self._store.jobs if j.id != job_id]
+        self._job_locks.pop(job_id, None)
+        self._catch_up_pending.pop(job_id, None)
+        self._sorted = None
+        return True
     
     # ========== Public API ==========
     
     def list_jobs(self, include_disabled: bool = False) -> list[CronJob]:
         """List all jobs."""
-        store = self._load_store()
-        jobs = store.jobs if include_disabled else [j for j in store.jobs if j.enabled]
-        return sorted(jobs, key=lambda j: j.state.next_run_at_ms or float('inf'))
+        if self._store is None:
+            # Not scheduling: let SQLite filter and sort instead of building the heap
+            return self.db.load_jobs(include_disabled=include_disabled)
+        if self._sorted is None:
+            self._sorted = sorted(self._store.jobs, key=lambda j: j.state.next_run_at_ms or float('inf'))
+        return list(self._sorted) if include_disabled else [j for j in self._sorted if j.enabled]
+    
+    def history(self, job_id: str | None = None, limit: int = 20) -> list[CronRun]:
+        """Most recent executions, newest first."""
+        return self.db.history(job_id, limit)
     
     def add_job(
         self,
@@ -269,8 +393,13 @@ class CronService:
         channel: str | None = None,
         to: str | None = None,
         delete_after_run: bool = False,
+        catch_up: str | None = None,
+        jitter_ms: int | None = None,
+        precheck: CronPrecheck | None = None,
     ) -> CronJob:
         """Add a new job."""
+        if catch_up is not None and catch_up not in CATCH_UP_POLICIES:
+            raise ValueError(f"catch_up must be one of {CATCH_UP_POLICIES}")
         store = self._load_store()
         now = _now_ms()
         
@@ -286,14 +415,20 @@ class CronService:
                 channel=channel,
                 to=to,
             ),
-            state=CronJobState(next_run_at_ms=_compute_next_run(schedule, now)),
+            state=CronJobState(),
             created_at_ms=now,
             updated_at_ms=now,
             delete_after_run=delete_after_run,
+            catch_up=catch_up,
+            jitter_ms=jitter_ms,
+            precheck=precheck,
         )
+        job.state.next_run_at_ms = self._next_run(job, now)
         
         store.jobs.append(job)
-        self._save_store()
+        self._jobs[job.id] = job
+        self._schedule(job)
+        self.db.insert_jobs([job])
         self._arm_timer()
         
         logger.info(f"Cron: added job '{name}' ({job.id})")
@@ -301,13 +436,11 @@ class CronService:
     
     def remove_job(self, job_id: str) -> bool:
         """Remove a job by ID."""
-        store = self._load_store()
-        before = len(store.jobs)
-        store.jobs = [j for j in store.jobs if j.id != job_id]
-        removed = len(store.jobs) < before
+        self._load_store()
+        removed = self._drop(job_id)
         
         if removed:
-            self._save_store()
+            self.db.delete_job(job_id)
             self._arm_timer()
             logger.info(f"Cron: removed job {job_id}")
         
@@ -315,32 +448,34 @@ class CronService:
     
     def enable_job(self, job_id: str, enabled: bool = True) -> CronJob | None:
         """Enable or disable a job."""
-        store = self._load_store()
-        for job in store.jobs:
-            if job.id == job_id:
-                job.enabled = enabled
-                job.updated_at_ms = _now_ms()
-                if enabled:
-                    job.state.next_run_at_ms = _compute_next_run(job.schedule, _now_ms())
-                else:
-                    job.state.next_run_at_ms = None
-                self._save_store()
-                self._arm_timer()
-                return job
-        return None
+        self._load_store()
+        job = self._jobs.get(job_id)
+        if not job:
+            return None
+        job.enabled = enabled
+        job.updated_at_ms = _now_ms()
+        if enabled:
+            job.state.next_run_at_ms = self._next_run(job, _now_ms())
+            self._schedule(job)
+        else:
+            job.state.next_run_at_ms = None
+            self._sorted = None
+        if missing := self.db.update_jobs([job]):
+            self._forget_missing(missing)
+            return None
+        self._arm_timer()
+        return job
     
     async def run_job(self, job_id: str, force: bool = False) -> bool:
         """Manually run a job."""
-        store = self._load_store()
-        for job in store.jobs:
-            if job.id == job_id:
-                if not force and not job.enabled:
-                    return False
-                await self._execute_job(job)
-                self._save_store()
-                self._arm_timer()
-                return True
-        return False
+        self._load_store()
+        job = self._jobs.get(job_id)
+        if not job or (not force and not job.enabled):
+            return False
+        await self._execute_job(job, precheck=False)  # An explicit run bypasses the precheck
+        await self._persist(job)
+        self._arm_timer()
+        return True
     
     def status(self) -> dict:
         """Get service status."""
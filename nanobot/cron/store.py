@@ -0,0 +1,270 @@
+"""SQLite-backed persistence for cron jobs and their run history."""
+
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from nanobot.cron.types import CronJob, CronJobState, CronPayload, CronPrecheck, CronSchedule
+
+HISTORY_PER_JOB = 200  # Run history rows kept per job
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    enabled INTEGER NOT NULL,
+    next_run_at_ms INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_next_run ON jobs (enabled, next_run_at_ms);
+CREATE TABLE IF NOT EXISTS run_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    started_at_ms INTEGER NOT NULL,
+    duration_ms INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS run_history_job ON run_history (job_id, id);
+"""
+
+
+def job_to_dict(j: CronJob) -> dict[str, Any]:
+    """Serialize a job to the camelCase layout used by jobs.json."""
+    return {
+        "id": j.id,
+        "name": j.name,
+        "enabled": j.enabled,
+        "schedule": {
+            "kind": j.schedule.kind,
+            "atMs": j.schedule.at_ms,
+            "everyMs": j.schedule.every_ms,
+            "expr": j.schedule.expr,
+            "tz": j.schedule.tz,
+        },
+        "payload": {
+            "kind": j.payload.kind,
+            "message": j.payload.message,
+            "deliver": j.payload.deliver,
+            "channel": j.payload.channel,
+            "to": j.payload.to,
+        },
+        "state": {
+            "nextRunAtMs": j.state.next_run_at_ms,
+            "lastRunAtMs": j.state.last_run_at_ms,
+            "lastStatus": j.state.last_status,
+            "lastError": j.state.last_error,
+            "precheckFingerprint": j.state.precheck_fingerprint,
+        },
+        "createdAtMs": j.created_at_ms,
+        "updatedAtMs": j.updated_at_ms,
+        "deleteAfterRun": j.delete_after_run,
+        "catchUp": j.catch_up,
+        "jitterMs": j.jitter_ms,
+        "precheck": {"kind": j.precheck.kind, "target": j.precheck.target} if j.precheck else None,
+    }
+
+
+def job_from_dict(j: dict[str, Any]) -> CronJob:
+    """Inverse of job_to_dict."""
+    return CronJob(
+        id=j["id"],
+        name=j["name"],
+        enabled=j.get("enabled", True),
+        schedule=CronSchedule(
+            kind=j["schedule"]["kind"],
+            at_ms=j["schedule"].get("atMs"),
+            every_ms=j["schedule"].get("everyMs"),
+            expr=j["schedule"].get("expr"),
+            tz=j["schedule"].get("tz"),
+        ),
+        payload=CronPayload(
+            kind=j["payload"].get("kind", "agent_turn"),
+            message=j["payload"].get("message", ""),
+            deliver=j["payload"].get("deliver", False),
+            channel=j["payload"].get("channel"),
+            to=j["payload"].get("to"),
+        ),
+        state=CronJobState(
+            next_run_at_ms=j.get("state", {}).get("nextRunAtMs"),
+            last_run_at_ms=j.get("state", {}).get("lastRunAtMs"),
+            last_status=j.get("state", {}).get("lastStatus"),
+            last_error=j.get("state", {}).get("lastError"),
+            precheck_fingerprint=j.get("state", {}).get("precheckFingerprint"),
+        ),
+        created_at_ms=j.get("createdAtMs", 0),
+        updated_at_ms=j.get("updatedAtMs", 0),
+        delete_after_run=j.get("deleteAfterRun", False),
+        catch_up=j.get("catchUp"),
+        jitter_ms=j.get("jitterMs"),
+        precheck=CronPrecheck(**j["precheck"]) if j.get("precheck") else None,
+    )
+
+
+@dataclass
+class CronRun:
+    """One recorded execution of a job."""
+    job_id: str
+    started_at_ms: int
+    duration_ms: int
+    status: str
+    error: str | None = None
+
+
+class CronDB:
+    """
+    Cron persistence in a single SQLite file (WAL mode, synchronous=FULL).
+
+    Each job is one row, so a state change rewrites only that job inside a
+    transaction, and a crash can never leave a half-written store. Methods
+    are blocking; CronService calls them from worker threads. Every
+    execution is appended to run_history. An existing jobs.json next to the
+    database is imported once and renamed to jobs.json.migrated.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.RLock()  # conn may migrate (and write) on first use
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._migrate_json()
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _migrate_json(self) -> None:
+        legacy = self.path.with_suffix(".json")
+        if not legacy.exists():
+            return
+        try:
+            data = json.loads(legacy.read_text(encoding="utf-8"))
+            jobs = [job_from_dict(j) for j in data.get("jobs", [])]
+        except Exception as e:
+            logger.warning(f"Failed to migrate {legacy}: {e}")
+            return
+        self.insert_jobs(jobs)
+        legacy.replace(legacy.with_suffix(".json.migrated"))
+        logger.info(f"Cron: migrated {len(jobs)} jobs from {legacy.name}")
+
+    # ----------------------------------------------------------------- jobs
+
+    def load_jobs(self, include_disabled: bool = True, limit: int | None = None) -> list[CronJob]:
+        """Load jobs ordered by next run (NULLs last)."""
+        sql = "SELECT data FROM jobs"
+        if not include_disabled:
+            sql += " WHERE enabled = 1"
+        sql += " ORDER BY next_run_at_ms IS NULL, next_run_at_ms"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self.conn.execute(sql).fetchall()
+        return [job_from_dict(json.loads(data)) for (data,) in rows]
+
+    def count_jobs(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def insert_jobs(self, jobs: list[CronJob]) -> None:
+        """Insert (or replace) jobs in one transaction; used for new jobs and migration."""
+        rows = [
+            (j.id, int(j.enabled), j.state.next_run_at_ms, json.dumps(job_to_dict(j), ensure_ascii=False))
+            for j in jobs
+        ]
+        if not rows:
+            return
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO jobs (id, enabled, next_run_at_ms, data) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def update_jobs(self, jobs: list[CronJob]) -> set[str]:
+        """
+        Update existing jobs in one transaction.
+
+        Rows that no longer exist (removed by another process, e.g. `nanobot
+        cron remove` while the gateway runs) are not re-created; their ids are
+        returned so the caller can forget them.
+        """
+        missing: set[str] = set()
+        if not jobs:
+            return missing
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN")
+            try:
+                for j in jobs:
+                    cur = conn.execute(
+                        "UPDATE jobs SET enabled = ?, next_run_at_ms = ?, data = ? WHERE id = ?",
+                        (int(j.enabled), j.state.next_run_at_ms,
+                         json.dumps(job_to_dict(j), ensure_ascii=False), j.id),
+                    )
+                    if cur.rowcount == 0:
+                        missing.add(j.id)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return missing
+
+    def delete_job(self, job_id: str) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    # -------------------------------------------------------------- history
+
+    def record_run(self, run: CronRun) -> None:
+        """Append one execution and trim that job's history to HISTORY_PER_JOB rows."""
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN")
+            try:
+                conn.execute(
+                    "INSERT INTO run_history (job_id, started_at_ms, duration_ms, status, error) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (run.job_id, run.started_at_ms, run.duration_ms, run.status, run.error),
+                )
+                conn.execute(
+                    "DELETE FROM run_history WHERE job_id = ? AND id <= ("
+                    "SELECT id FROM run_history WHERE job_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (run.job_id, run.job_id, HISTORY_PER_JOB),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def history(self, job_id: str | None = None, limit: int = 20) -> list[CronRun]:
+        """Most recent runs first, optionally for a single job."""
+        sql = "SELECT job_id, started_at_ms, duration_ms, status, error FROM run_history"
+        args: tuple = ()
+        if job_id:
+            sql += " WHERE job_id = ?"
+            args = (job_id,)
+        sql += " ORDER BY id DESC LIMIT ?"
+        with self._lock:
+            rows = self.conn.execute(sql, (*args, limit)).fetchall()
+        return [CronRun(*row) for row in rows]
@@ -29,6 +29,14 @@ class CronPayload:
     to: str | None = None  # e.g. phone number
 
 
+@dataclass
+class CronPrecheck:
+    """Cheap check run before the agent turn; the LLM is only called on change."""
+    kind: Literal["command", "http", "file"]
+    # Shell command (stdout is fingerprinted), URL (ETag/Last-Modified) or file path (content hash)
+    target: str
+
+
 @dataclass
 class CronJobState:
     """Runtime state of a job."""
@@ -36,6 +44,7 @@ class CronJobState:
     last_run_at_ms: int | None = None
     last_status: Literal["ok", "error", "skipped"] | None = None
     last_error: str | None = None
+    precheck_fingerprint: str | None = None  # Result of the last precheck that triggered a run
 
 
 @dataclass
@@ -50,6 +59,11 @@ class CronJob:
     created_at_ms: int = 0
     updated_at_ms: int = 0
     delete_after_run: bool = False
+    # What to do with runs missed while the gateway was down (None = service default)
+    catch_up: Literal["skip", "once", "all"] | None = None
+    # Spread runs by a stable per-job offset in [0, jitter_ms) (None = service default)
+    jitter_ms: int | None = None
+    precheck: CronPrecheck | None = None
 
 
 @dataclass
@@ -1,13 +1,24 @@
 """Heartbeat service - periodic agent wake-up to check for tasks."""
 
 import asyncio
+import hashlib
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Callable, Coroutine
 
 from loguru import logger
 
+from nanobot.metrics import METRICS
+
+_HEARTBEAT_RUNS = METRICS.counter("nanobot_heartbeat_runs_total", "Heartbeat agent turns", ("reason",))
+
 # Default interval: 30 minutes
 DEFAULT_HEARTBEAT_INTERVAL_S = 30 * 60
+DEFAULT_MAX_INTERVAL_S = 4 * 60 * 60  # Backoff ceiling while nothing needs attention
+DEFAULT_POLL_S = 5  # How often HEARTBEAT.md is checked for edits and due tasks
 
 # The prompt sent to agent during heartbeat
 HEARTBEAT_PROMPT = """Read HEARTBEAT.md in your workspace (if it exists).
@@ -18,21 +29,51 @@ If nothing needs attention, reply with just: HEARTBEAT_OK"""
 HEARTBEAT_OK_TOKEN = "HEARTBEAT_OK"
 
 
-def _is_heartbeat_empty(content: str | None) -> bool:
-    """Check if HEARTBEAT.md has no actionable content."""
+# A date or date-time on a task line, e.g. "- [ ] renew cert 2026-03-01 09:00"
+_DUE_RE = re.compile(r"\b(\d{4}-\d{2}-\d{2}(?:[T ]\d{1,2}:\d{2})?)\b")
+
+
+@dataclass(frozen=True)
+class HeartbeatTask:
+    """An actionable line of HEARTBEAT.md."""
+    text: str
+    due_at: float | None = None  # Epoch seconds, local time when no offset is given
+
+
+def _parse_due(text: str) -> float | None:
+    match = _DUE_RE.search(text)
+    if not match:
+        return None
+    try:
+        return datetime.fromisoformat(match.group(1)).timestamp()
+    except ValueError:
+        return None
+
+
+def _parse_tasks(content: str | None) -> list[HeartbeatTask]:
+    """Extract actionable lines from HEARTBEAT.md."""
     if not content:
-        return True
+        return []
     
     # Lines to skip: empty, headers, HTML comments, empty checkboxes
     skip_patterns = {"- [ ]", "* [ ]", "- [x]", "* [x]"}
     
+    tasks = []
     for line in content.split("\n"):
         line = line.strip()
         if not line or line.startswith("#") or line.startswith("<!--") or line in skip_patterns:
             continue
-        return False  # Found actionable content
-    
-    return True
+        tasks.append(HeartbeatTask(line, _parse_due(line)))
+    return tasks
+
+
+def _is_heartbeat_empty(content: str | None) -> bool:
+    """Check if HEARTBEAT.md has no actionable content."""
+    return not _parse_tasks(content)
+
+
+def _digest(tasks: list[HeartbeatTask]) -> str:
+    return hashlib.sha256("\n".join(t.text for t in tasks).encode()).hexdigest()
 
 
 class HeartbeatService:
@@ -41,6 +82,11 @@ class HeartbeatService:
     
     The agent reads HEARTBEAT.md from the workspace and executes any
     tasks listed there. If nothing needs attention, it replies HEARTBEAT_OK.
+    
+    The file is polled cheaply (stat only) and the agent is only woken when
+    the task list changed, a dated task came due, or the interval elapsed
+    for undated tasks. That interval doubles up to max_interval_s while the
+    agent keeps answering HEARTBEAT_OK and resets on any change or action.
     """
     
     def __init__(
@@ -49,13 +95,24 @@ class HeartbeatService:
         on_heartbeat: Callable[[str], Coroutine[Any, Any, str]] | None = None,
         interval_s: int = DEFAULT_HEARTBEAT_INTERVAL_S,
         enabled: bool = True,
+        max_interval_s: int = DEFAULT_MAX_INTERVAL_S,
+        poll_s: float = DEFAULT_POLL_S,
     ):
         self.workspace = workspace
         self.on_heartbeat = on_heartbeat
         self.interval_s = interval_s
+        self.max_interval_s = max(max_interval_s, interval_s)
+        self.poll_s = poll_s
         self.enabled = enabled
         self._running = False
         self._task: asyncio.Task | None = None
+        # Change detection state
+        self._stat: tuple[int, int] | None = None
+        self._tasks: list[HeartbeatTask] = []
+        self._digest: str | None = None  # Task list the agent last saw
+        self._fired: set[str] = set()  # Dated tasks already handled
+        self._last_run = 0.0
+        self._interval = interval_s  # Current (backed-off) interval
     
     @property
     def heartbeat_file(self) -> Path:
@@ -70,6 +127,39 @@ class HeartbeatService:
                 return None
         return None
     
+    def _stat_file(self) -> tuple[int, int] | None:
+        try:
+            st = self.heartbeat_file.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+    
+    def _refresh(self) -> None:
+        """Re-parse HEARTBEAT.md if it changed on disk."""
+        stat = self._stat_file()
+        if stat != self._stat:
+            self._stat = stat
+            self._tasks = _parse_tasks(self._read_heartbeat_file())
+    
+    def _baseline(self, now: float) -> None:
+        """Treat the file as already seen so a restart doesn't wake the agent."""
+        self._refresh()
+        self._digest = _digest(self._tasks)
+        self._fired = {t.text for t in self._tasks if t.due_at is not None and t.due_at <= now}
+        self._last_run = now
+    
+    def _wake_reason(self, now: float) -> str | None:
+        """Why the agent should run now, or None to skip the LLM call."""
+        if not self._tasks:
+            return None
+        if _digest(self._tasks) != self._digest:
+            return "changed"
+        if any(t.due_at is not None and t.due_at <= now and t.text not in self._fired for t in self._tasks):
+            return "due"
+        if any(t.due_at is None for t in self._tasks) and now - self._last_run >= self._interval:
+            return "interval"
+        return None
+    
     async def start(self) -> None:
         """Start the heartbeat service."""
         if not self.enabled:
@@ -77,6 +167,7 @@ class HeartbeatService:
             return
         
         self._running = True
+        self._baseline(time.time())
         self._task = asyncio.create_task(self._run_loop())
         logger.info(f"Heartbeat started (every {self.interval_s}s)")
     
@@ -91,7 +182,7 @@ class HeartbeatService:
         """Main heartbeat loop."""
         while self._running:
             try:
-                await asyncio.sleep(self.interval_s)
+                await asyncio.sleep(self.poll_s)
                 if self._running:
                     await self._tick()
             except asyncio.CancelledError:
@@ -101,27 +192,45 @@ class HeartbeatService:
     
     async def _tick(self) -> None:
         """Execute a single heartbeat tick."""
-        content = self._read_heartbeat_file()
+        self._refresh()
+        now = time.time()
         
-        # Skip if HEARTBEAT.md is empty or doesn't exist
-        if _is_heartbeat_empty(content):
-            logger.debug("Heartbeat: no tasks (HEARTBEAT.md empty)")
+        # Skip if HEARTBEAT.md is empty, unchanged, or has nothing due
+        reason = self._wake_reason(now)
+        if reason is None:
             return
         
-        logger.info("Heartbeat: checking for tasks...")
+        logger.info(f"Heartbeat: checking for tasks ({reason})...")
+        _HEARTBEAT_RUNS.inc(reason=reason)
+        
+        # Record what the agent saw up front so a failing call doesn't retry every poll
+        self._digest = _digest(self._tasks)
+        self._fired = {t.text for t in self._tasks if t.due_at is not None and t.due_at <= now}
+        self._last_run = now
         
+        idle = False
         if self.on_heartbeat:
             try:
                 response = await self.on_heartbeat(HEARTBEAT_PROMPT)
                 
                 # Check if agent said "nothing to do"
-                if HEARTBEAT_OK_TOKEN.replace("_", "") in response.upper().replace("_", ""):
+                if HEARTBEAT_OK_TOKEN.replace("_", "") in (response or "").upper().replace("_", ""):
                     logger.info("Heartbeat: OK (no action needed)")
+                    idle = True
                 else:
-                    logger.info(f"Heartbeat: completed task")
+                    logger.info("Heartbeat: completed task")
                     
             except Exception as e:
                 logger.error(f"Heartbeat execution failed: {e}")
+            # The agent may have edited HEARTBEAT.md (e.g. ticked a task off); that is not a new change
+            self._refresh()
+            self._digest = _digest(self._tasks)
+        
+        # Back off while routine checks find nothing; any change or action resets
+        if idle and reason == "interval":
+            self._interval = min(self._interval * 2, self.max_interval_s)
+        else:
+            self._interval = self.interval_s
     
     async def trigger_now(self) -> str | None:
         """Manually trigger a heartbeat."""
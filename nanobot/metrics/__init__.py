@@ -0,0 +1,7 @@
+"""In-process metrics (counters, gauges, histograms) with text exposition."""
+
+from nanobot.metrics.loop import LoopMonitor
+from nanobot.metrics.registry import METRICS, Counter, Gauge, Histogram, MetricsRegistry
+from nanobot.metrics.server import MetricsServer
+
+__all__ = ["METRICS", "Counter", "Gauge", "Histogram", "LoopMonitor", "MetricsRegistry", "MetricsServer"]
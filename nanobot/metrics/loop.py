@@ -0,0 +1,159 @@
+"""Event-loop health: lag sampling and blocked-loop detection."""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+from loguru import logger
+
+from nanobot.metrics.registry import METRICS
+
+LAG_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_LOOP_LAG = METRICS.histogram("nanobot_loop_lag_seconds", "How late the event loop ran a due timer", buckets=LAG_BUCKETS)
+_LOOP_STALLS = METRICS.counter("nanobot_loop_stalls_total", "Times the event loop was blocked past the slow threshold")
+
+
+@dataclass
+class LoopStall:
+    """One period during which the event loop did not run."""
+    at: float  # Wall-clock time the stall was detected
+    blocked_s: float  # At least this long; final once the loop resumed
+    stack: str  # Loop thread's stack while it was blocked ("" if it ended before the watchdog looked)
+
+
+class LoopBlockedError(AssertionError):
+    """Raised by assert_no_blocking when a coroutine held the loop too long."""
+
+
+class LoopMonitor:
+    """
+    Samples event-loop lag and catches the code that blocks it.
+
+    A sampler task sleeps `interval_s` at a time and records how late it
+    wakes up in nanobot_loop_lag_seconds. A watchdog thread notices when
+    the sampler is overdue by more than `slow_s` and captures the loop
+    thread's stack right then, which points at the blocking call; the
+    stall is logged once with that stack and kept for report(). Cost while
+    healthy is one timer per interval and a thread waking a few times per
+    slow threshold.
+    """
+
+    def __init__(self, interval_s: float = 0.25, slow_s: float = 0.1, keep: int = 20):
+        self.interval_s = interval_s
+        self.slow_s = slow_s
+        self.stalls: deque[LoopStall] = deque(maxlen=keep)
+        self.samples = 0
+        self.max_lag_s = 0.0
+        self._due = 0.0
+        self._pending: LoopStall | None = None
+        self._thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._stop = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    async def start(self) -> None:
+        self._thread_id = threading.get_ident()
+        self._due = time.perf_counter() + self.interval_s
+        self._stop.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _sample(self) -> None:
+        while True:
+            self._due = time.perf_counter() + self.interval_s
+            await asyncio.sleep(self.interval_s)
+            lag = max(time.perf_counter() - self._due, 0.0)
+            self.samples += 1
+            self.max_lag_s = max(self.max_lag_s, lag)
+            _LOOP_LAG.observe(lag)
+            if stall := self._pending:
+                stall.blocked_s = max(stall.blocked_s, lag)
+                self._pending = None
+                logger.warning(
+                    f"Event loop was blocked for {stall.blocked_s * 1000:.0f}ms; stack while blocked:\n{stall.stack}"
+                )
+            elif lag > self.slow_s:
+                # Blocked for less than a watchdog period; no stack, but still a stall
+                _LOOP_STALLS.inc()
+                self.stalls.append(LoopStall(at=time.time(), blocked_s=lag, stack=""))
+                logger.warning(f"Event loop was blocked for {lag * 1000:.0f}ms")
+
+    def _watch(self) -> None:
+        period = max(self.slow_s / 4, 0.001)
+        while not self._stop.wait(period):
+            overdue = time.perf_counter() - self._due
+            if overdue <= self.slow_s or self._pending is not None:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            stack = "".join(traceback.format_stack(frame, limit=12)) if frame else ""
+            if time.perf_counter() - self._due <= self.slow_s:
+                continue  # The loop caught up while we looked
+            stall = LoopStall(at=time.time(), blocked_s=overdue, stack=stack)
+            self._pending = stall
+            self.stalls.append(stall)
+            _LOOP_STALLS.inc()
+
+    def report(self) -> dict:
+        return {
+            "samples": self.samples,
+            "max_lag_ms": self.max_lag_s * 1000,
+            "stalls": list(self.stalls),
+        }
+
+
+@asynccontextmanager
+async def assert_no_blocking(max_ms: float) -> AsyncIterator[LoopMonitor]:
+    """
+    Fail if the enclosed code blocks the running loop for more than max_ms.
+
+    For tests: the monitor samples every few milliseconds and the error
+    carries the stack of each blocking call it caught.
+    """
+    slow_s = max_ms / 1000
+    monitor = LoopMonitor(interval_s=min(0.005, slow_s / 2), slow_s=slow_s)
+    await monitor.start()
+    try:
+        yield monitor
+        await asyncio.sleep(monitor.interval_s * 2)  # Let the sampler see the last stretch
+    finally:
+        monitor.stop()
+    if monitor.stalls:
+        details = "\n\n".join(
+            f"blocked {s.blocked_s * 1000:.0f}ms\n{s.stack or '(ended before a stack was captured)'}"
+            for s in monitor.stalls
+        )
+        raise LoopBlockedError(f"event loop blocked for more than {max_ms:g}ms:\n\n{details}")
+
+
+def summarize_lag(exposition: str) -> dict | None:
+    """Lag and stall figures from a Prometheus text page served by a running nanobot."""
+    buckets: list[tuple[float, float]] = []
+    total = count = stalls = 0.0
+    for line in exposition.splitlines():
+        if line.startswith("nanobot_loop_lag_seconds_bucket"):
+            bound = line.split('le="', 1)[1].split('"', 1)[0]
+            buckets.append((float("inf") if bound == "+Inf" else float(bound), float(line.rsplit(" ", 1)[1])))
+        elif line.startswith("nanobot_loop_lag_seconds_sum"):
+            total = float(line.rsplit(" ", 1)[1])
+        elif line.startswith("nanobot_loop_lag_seconds_count"):
+            count = float(line.rsplit(" ", 1)[1])
+        elif line.startswith("nanobot_loop_stalls_total"):
+            stalls = float(line.rsplit(" ", 1)[1])
+    if not count:
+        return None
+    p99 = next((bound for bound, seen in sorted(buckets) if seen >= 0.99 * count), float("inf"))
+    return {"samples": int(count), "mean_ms": total / count * 1000, "p99_ms": p99 * 1000, "stalls": int(stalls)}
@@ -0,0 +1,35 @@
+"""HTTP exposition endpoint for the metrics registry."""
+
+from nanobot.metrics.registry import METRICS, MetricsRegistry
+from nanobot.utils.httpserver import HTTPRequest, HTTPResponse, HTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsServer:
+    """Serve the registry in Prometheus text format for a local scraper."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 18791,
+        path: str = "/metrics",
+        registry: MetricsRegistry | None = None,
+    ):
+        self.registry = registry or METRICS
+        self.path = path
+        self._http = HTTPServer(host, port)
+        self._http.route("GET", path, self._handle)
+
+    @property
+    def port(self) -> int:
+        return self._http.port
+
+    async def _handle(self, request: HTTPRequest) -> HTTPResponse:
+        return HTTPResponse(body=self.registry.render().encode(), content_type=CONTENT_TYPE)
+
+    async def start(self) -> None:
+        await self._http.start()
+
+    async def stop(self) -> None:
+        await self._http.stop()
@@ -4,6 +4,12 @@ from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from typing import Any
 
+from nanobot.metrics import METRICS
+
+_LLM_REQUESTS = METRICS.counter("nanobot_llm_requests_total", "LLM chat calls", ("model", "status"))
+_LLM_TOKENS = METRICS.counter("nanobot_llm_tokens_total", "LLM tokens consumed", ("model", "direction"))
+_LLM_LATENCY = METRICS.histogram("nanobot_llm_request_duration_seconds", "LLM chat call latency", ("model",))
+
 
 @dataclass
 class ToolCallRequest:
@@ -64,6 +70,15 @@ class LLMProvider(ABC):
         """
         pass
     
+    def _record_metrics(self, model: str, response: LLMResponse, elapsed_s: float) -> None:
+        """Record latency, status and token usage for one chat call."""
+        status = "error" if response.finish_reason == "error" else "ok"
+        _LLM_REQUESTS.inc(model=model, status=status)
+        _LLM_LATENCY.observe(elapsed_s, model=model)
+        if usage := response.usage:
+            _LLM_TOKENS.inc(usage.get("prompt_tokens", 0), model=model, direction="in")
+            _LLM_TOKENS.inc(usage.get("completion_tokens", 0), model=model, direction="out")
+
     @abstractmethod
     def get_default_model(self) -> str:
         """Get the default model for this provider."""
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import time
 from typing import Any
 
 import json_repair
@@ -23,10 +24,13 @@ class CustomProvider(LLMProvider):
                                   "max_tokens": max(1, max_tokens), "temperature": temperature}
         if tools:
             kwargs.update(tools=tools, tool_choice="auto")
+        start = time.perf_counter()
         try:
-            return self._parse(await self._client.chat.completions.create(**kwargs))
+            result = self._parse(await self._client.chat.completions.create(**kwargs))
         except Exception as e:
-            return LLMResponse(content=f"Error: {e}", finish_reason="error")
+            result = LLMResponse(content=f"Error: {e}", finish_reason="error")
+        self._record_metrics(kwargs["model"], result, time.perf_counter() - start)
+        return result
 
     def _parse(self, response: Any) -> LLMResponse:
         choice = response.choices[0]
@@ -37,9 +41,12 @@ class CustomProvider(LLMProvider):
             for tc in (msg.tool_calls or [])
         ]
         u = response.usage
+        usage = {"prompt_tokens": u.prompt_tokens, "completion_tokens": u.completion_tokens, "total_tokens": u.total_tokens} if u else {}
+        if u and (cached := getattr(getattr(u, "prompt_tokens_details", None), "cached_tokens", None)):
+            usage["cached_tokens"] = cached
         return LLMResponse(
             content=msg.content, tool_calls=tool_calls, finish_reason=choice.finish_reason or "stop",
-            usage={"prompt_tokens": u.prompt_tokens, "completion_tokens": u.completion_tokens, "total_tokens": u.total_tokens} if u else {},
+            usage=usage,
             reasoning_content=getattr(msg, "reasoning_content", None),
         )
 
@@ -3,6 +3,7 @@
 import json
 import json_repair
 import os
+import time
 from typing import Any
 
 import litellm
@@ -156,15 +157,18 @@ class LiteLLMProvider(LLMProvider):
             kwargs["tools"] = tools
             kwargs["tool_choice"] = "auto"
         
+        start = time.perf_counter()
         try:
             response = await acompletion(**kwargs)
-            return self._parse_response(response)
+            result = self._parse_response(response)
         except Exception as e:
             # Return error as content for graceful handling
-            return LLMResponse(
+            result = LLMResponse(
                 content=f"Error calling LLM: {str(e)}",
                 finish_reason="error",
             )
+        self._record_metrics(model, result, time.perf_counter() - start)
+        return result
     
     def _parse_response(self, response: Any) -> LLMResponse:
         """Parse LiteLLM response into our standard format."""
@@ -192,6 +196,10 @@ class LiteLLMProvider(LLMProvider):
                 "completion_tokens": response.usage.completion_tokens,
                 "total_tokens": response.usage.total_tokens,
             }
+            details = getattr(response.usage, "prompt_tokens_details", None)
+            cached = getattr(details, "cached_tokens", None) or getattr(response.usage, "cache_read_input_tokens", None)
+            if cached:
+                usage["cached_tokens"] = cached
         
         reasoning_content = getattr(message, "reasoning_content", None)
         
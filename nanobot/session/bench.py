@@ -0,0 +1,66 @@
+"""Micro-benchmark comparing session storage engines."""
+
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+from nanobot.session.store import SESSION_ENGINES, create_store
+
+_TOOL_OUTPUT = "\n".join(f"drwxr-xr-x  2 user user 4096 Jan  1 00:00 project-{i}" for i in range(150))
+
+
+def sample_messages(count: int) -> list[dict[str, Any]]:
+    """A synthetic conversation: short turns with a large tool result every few messages."""
+    start = datetime(2026, 1, 1)
+    messages = []
+    for i in range(count):
+        msg: dict[str, Any] = {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": _TOOL_OUTPUT if i % 10 == 9 else f"message {i}: can you check the build status again?",
+            "timestamp": (start + timedelta(seconds=30 * i)).isoformat(),
+        }
+        if i % 10 == 9:
+            msg["tools_used"] = ["exec", "read_file"]
+        messages.append(msg)
+    return messages
+
+
+def run_benchmark(messages: int = 10_000, tail: int = 200, appends: int = 200) -> list[dict[str, Any]]:
+    """Time bulk write, per-turn append, tail load and full read for each engine."""
+    data = sample_messages(messages + appends)
+    meta = {"created_at": datetime.now().isoformat(), "metadata": {}, "last_consolidated": 0}
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for engine in SESSION_ENGINES:
+            root = Path(tmp) / engine
+            root.mkdir()
+            store = create_store(engine, root)
+
+            t0 = time.perf_counter()
+            store.rewrite("bench:1", {**meta, "messages": messages}, data[:messages])
+            write_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            for i in range(messages, messages + appends):
+                store.append("bench:1", {**meta, "messages": i + 1}, [data[i]])
+            append_s = (time.perf_counter() - t0) / appends
+
+            t0 = time.perf_counter()
+            record = store.load("bench:1", tail)
+            load_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            store.read("bench:1", 0, record.total)
+            read_s = time.perf_counter() - t0
+
+            results.append({
+                "engine": engine,
+                "write_s": write_s,
+                "append_ms": append_s * 1000,
+                "load_tail_ms": load_s * 1000,
+                "read_all_s": read_s,
+                "disk_bytes": sum(p.stat().st_size for p in root.iterdir()),
+            })
+    return results
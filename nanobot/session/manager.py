@@ -1,6 +1,7 @@
 """Session management for conversation history."""
 
-import json
+import time
+from collections import OrderedDict
 from pathlib import Path
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -8,8 +9,22 @@ from typing import Any
 
 from loguru import logger
 
+from nanobot.metrics import METRICS
+from nanobot.session.store import create_store
+from nanobot.utils.files import FILES
 from nanobot.utils.helpers import ensure_dir, safe_filename
 
+_SESSION_CACHE_SIZE = METRICS.gauge("nanobot_session_cache_size", "Sessions held in memory")
+_SESSION_CACHE_BYTES = METRICS.gauge("nanobot_session_cache_bytes", "Approximate size of cached sessions")
+_SESSION_CACHE_EVENTS = METRICS.counter(
+    "nanobot_session_cache_events_total", "Session cache hits, misses and evictions", ("event",),
+)
+
+DEFAULT_CACHE_SESSIONS = 256
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+DEFAULT_IDLE_S = 60 * 60  # Sessions untouched this long are dropped from memory
+DEFAULT_TAIL_MESSAGES = 200  # Messages loaded per session; older ones are read on demand
+
 
 @dataclass
 class Session:
@@ -29,6 +44,13 @@ class Session:
     updated_at: datetime = field(default_factory=datetime.now)
     metadata: dict[str, Any] = field(default_factory=dict)
     last_consolidated: int = 0  # Number of messages already consolidated to files
+    offset: int = 0  # Older messages left on disk; messages[0] has absolute index offset
+    _persisted: int | None = field(default=None, init=False, repr=False)  # Messages on disk; None if not from the store
+    
+    @property
+    def total_messages(self) -> int:
+        """Number of messages in the session, including those not loaded."""
+        return self.offset + len(self.messages)
     
     def add_message(self, role: str, content: str, **kwargs: Any) -> None:
         """Add a message to the session."""
@@ -55,27 +77,73 @@ class Session:
     def clear(self) -> None:
         """Clear all messages and reset session to initial state."""
         self.messages = []
+        self.offset = 0
         self.last_consolidated = 0
         self.updated_at = datetime.now()
+        self._persisted = None  # The stored history is stale: the next save rewrites it
+
+
+def _approx_size(session: Session) -> int:
+    """Rough in-memory footprint of a session, dominated by message content."""
+    return sum(len(str(m.get("content") or "")) + 200 for m in session.messages)
+
+
+def _snapshot(session: Session) -> tuple:
+    """What a save persists; a cached session whose snapshot changed is dirty."""
+    return session.total_messages, session.last_consolidated, session.updated_at
+
+
+def _parse_time(value: str | None) -> datetime:
+    return datetime.fromisoformat(value) if value else datetime.now()
+
+
+@dataclass
+class _CacheEntry:
+    session: Session
+    size: int
+    used_at: float
+    saved: tuple
 
 
 class SessionManager:
     """
     Manages conversation sessions.
 
-    Sessions are stored as JSONL files in the sessions directory.
+    Sessions are stored by a SessionStore engine in the sessions directory
+    (JSONL by default, or compact msgpack records). Only the
+    newest tail_messages of a session are loaded; consolidation and export
+    page older ones in through read_messages(). Loaded sessions are kept in an LRU cache bounded by count and approximate
+    bytes; sessions idle longer than idle_s are dropped too. A session with
+    unsaved changes is written back before it leaves the cache.
     """
 
-    def __init__(self, workspace: Path):
+    def __init__(
+        self,
+        workspace: Path,
+        max_sessions: int = DEFAULT_CACHE_SESSIONS,
+        max_bytes: int = DEFAULT_CACHE_BYTES,
+        idle_s: float = DEFAULT_IDLE_S,
+        tail_messages: int = DEFAULT_TAIL_MESSAGES,
+        engine: str = "jsonl",
+        compress: bool = True,
+    ):
         self.workspace = workspace
         self.sessions_dir = ensure_dir(self.workspace / "sessions")
         self.legacy_sessions_dir = Path.home() / ".nanobot" / "sessions"
-        self._cache: dict[str, Session] = {}
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.idle_s = idle_s
+        self.tail_messages = tail_messages
+        self.store = create_store(engine, self.sessions_dir, compress=compress)
+        self._cache: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._cache_bytes = 0
+        self._writing_back: set[str] = set()  # Evicted sessions being written back off the loop
+        _SESSION_CACHE_SIZE.set_function(lambda: len(self._cache))
+        _SESSION_CACHE_BYTES.set_function(lambda: self._cache_bytes)
     
     def _get_session_path(self, key: str) -> Path:
         """Get the file path for a session."""
-        safe_key = safe_filename(key.replace(":", "_"))
-        return self.sessions_dir / f"{safe_key}.jsonl"
+        return self.store.path(key)
 
     def _get_legacy_session_path(self, key: str) -> Path:
         """Legacy global session path (~/.nanobot/sessions/)."""
@@ -92,82 +160,188 @@ class SessionManager:
         Returns:
             The session.
         """
-        if key in self._cache:
-            return self._cache[key]
+        if entry := self._cache.get(key):
+            _SESSION_CACHE_EVENTS.inc(event="hit")
+            entry.used_at = time.monotonic()
+            self._cache.move_to_end(key)
+            return entry.session
         
+        _SESSION_CACHE_EVENTS.inc(event="miss")
         session = self._load(key)
         if session is None:
             session = Session(key=key)
+            session._persisted = 0  # Nothing stored yet, so saves append
         
-        self._cache[key] = session
+        self._remember(session)
+        return session
+
+    async def get_or_create_async(self, key: str) -> Session:
+        """get_or_create() that loads from disk on the I/O pool instead of the event loop."""
+        if key in self._cache:
+            return self.get_or_create(key)
+        _SESSION_CACHE_EVENTS.inc(event="miss")
+        session = await FILES.run(self._load, key)
+        if key in self._cache:  # Loaded by someone else meanwhile
+            return self.get_or_create(key)
+        if session is None:
+            session = Session(key=key)
+            session._persisted = 0
+        self._remember(session, evict=False)
+        await self._evict_async(keep=key)
         return session
     
+    def _remember(self, session: Session, evict: bool = True) -> None:
+        """Insert or refresh a session in the cache as clean, then enforce the bounds."""
+        if old := self._cache.pop(session.key, None):
+            self._cache_bytes -= old.size
+        size = _approx_size(session)
+        self._cache[session.key] = _CacheEntry(session, size, time.monotonic(), _snapshot(session))
+        self._cache_bytes += size
+        if evict:
+            self._evict(keep=session.key)
+
+    def _victims(self, keep: str | None) -> list[tuple[str, _CacheEntry]]:
+        """Idle sessions, then least recently used ones, until the cache is within bounds."""
+        now = time.monotonic()
+        count, size = len(self._cache), self._cache_bytes
+        victims = []
+        for key, entry in self._cache.items():
+            over = count > self.max_sessions or size > self.max_bytes
+            if not over and now - entry.used_at < self.idle_s:
+                break  # Entries are in LRU order, so the rest are newer
+            if key == keep:
+                continue
+            victims.append((key, entry))
+            count, size = count - 1, size - entry.size
+        return victims
+
+    def _evict(self, keep: str | None = None) -> None:
+        """Drop idle and least recently used sessions, writing dirty ones back first."""
+        for key, entry in self._victims(keep):
+            self._drop(key, entry)
+
+    async def _evict_async(self, keep: str | None = None) -> None:
+        """_evict() with write-backs on the I/O pool; a session used meanwhile stays cached."""
+        for key, entry in self._victims(keep):
+            if key in self._writing_back:
+                continue  # Another save is already evicting it
+            used_at = entry.used_at
+            if _snapshot(entry.session) != entry.saved:
+                self._writing_back.add(key)
+                try:
+                    await FILES.run(self._write, entry.session)
+                except Exception as e:
+                    logger.warning(f"Failed to write back session {key}, keeping it cached: {e}")
+                    continue
+                finally:
+                    self._writing_back.discard(key)
+                entry.saved = _snapshot(entry.session)
+            if self._cache.get(key) is entry and entry.used_at == used_at and _snapshot(entry.session) == entry.saved:
+                self._forget(key, entry)
+    
+    def _drop(self, key: str, entry: _CacheEntry) -> None:
+        if _snapshot(entry.session) != entry.saved:
+            try:
+                self._write(entry.session)
+            except Exception as e:
+                logger.warning(f"Failed to write back session {key}, keeping it cached: {e}")
+                return
+        self._forget(key, entry)
+
+    def _forget(self, key: str, entry: _CacheEntry) -> None:
+        del self._cache[key]
+        self._cache_bytes -= entry.size
+        _SESSION_CACHE_EVENTS.inc(event="evict")
+    
     def _load(self, key: str) -> Session | None:
-        """Load a session from disk."""
-        path = self._get_session_path(key)
-        if not path.exists():
+        """Load a session's metadata and recent tail from disk."""
+        if not self.store.exists(key):
             legacy_path = self._get_legacy_session_path(key)
             if legacy_path.exists():
                 import shutil
-                shutil.move(str(legacy_path), str(path))
+                # Legacy files are JSONL; other engines convert them on load
+                shutil.move(str(legacy_path), str(self.sessions_dir / legacy_path.name))
                 logger.info(f"Migrated session {key} from legacy path")
 
-        if not path.exists():
-            return None
-
         try:
-            messages = []
-            metadata = {}
-            created_at = None
-            last_consolidated = 0
-
-            with open(path) as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    data = json.loads(line)
-
-                    if data.get("_type") == "metadata":
-                        metadata = data.get("metadata", {})
-                        created_at = datetime.fromisoformat(data["created_at"]) if data.get("created_at") else None
-                        last_consolidated = data.get("last_consolidated", 0)
-                    else:
-                        messages.append(data)
-
-            return Session(
+            record = self.store.load(key, self.tail_messages)
+            if record is None:
+                return None
+
+            meta = record.meta
+            session = Session(
                 key=key,
-                messages=messages,
-                created_at=created_at or datetime.now(),
-                metadata=metadata,
-                last_consolidated=last_consolidated
+                messages=record.messages,
+                created_at=_parse_time(meta.get("created_at")),
+                updated_at=_parse_time(meta.get("updated_at")),
+                metadata=meta.get("metadata", {}),
+                last_consolidated=meta.get("last_consolidated", 0),
+                offset=record.total - len(record.messages),
             )
+            session._persisted = record.total
+            return session
         except Exception as e:
             logger.warning(f"Failed to load session {key}: {e}")
             return None
     
+    def read_messages(self, session: Session, start: int, end: int | None = None) -> list[dict[str, Any]]:
+        """
+        Read messages [start, end) by absolute index, paging in older ones from disk.
+        
+        Used for consolidation and export; blocking, so call it via a thread
+        from async code when the range may reach past the loaded tail.
+        """
+        end = session.total_messages if end is None else min(end, session.total_messages)
+        start = max(start, 0)
+        if start >= end:
+            return []
+        older = self.store.read(session.key, start, min(end, session.offset)) if start < session.offset else []
+        return older + session.messages[max(start - session.offset, 0):end - session.offset]
+    
     def save(self, session: Session) -> None:
         """Save a session to disk."""
-        path = self._get_session_path(session.key)
-
-        with open(path, "w") as f:
-            metadata_line = {
-                "_type": "metadata",
-                "created_at": session.created_at.isoformat(),
-                "updated_at": session.updated_at.isoformat(),
-                "metadata": session.metadata,
-                "last_consolidated": session.last_consolidated
-            }
-            f.write(json.dumps(metadata_line) + "\n")
-            for msg in session.messages:
-                f.write(json.dumps(msg) + "\n")
-
-        self._cache[session.key] = session
+        self._write(session)
+        self._remember(session)
+
+    async def save_async(self, session: Session) -> None:
+        """save() with the disk write on the I/O pool; the cache is still updated on the loop."""
+        await FILES.run(self._write, session)
+        self._remember(session, evict=False)
+        await self._evict_async(keep=session.key)
+    
+    def _write(self, session: Session) -> None:
+        """Append new messages (or rewrite after a reset) and trim the in-memory tail."""
+        meta = {
+            "created_at": session.created_at.isoformat(),
+            "updated_at": session.updated_at.isoformat(),
+            "metadata": session.metadata,
+            "last_consolidated": session.last_consolidated,
+            "messages": session.total_messages,
+        }
+        if session._persisted is None:
+            # Built outside the manager (owns its full history), or cleared since the last save
+            self.store.rewrite(session.key, meta, session.messages)
+        else:
+            self.store.append(session.key, meta, session.messages[session._persisted - session.offset:])
+        session._persisted = session.total_messages
+
+        # Older messages stay on disk; keep memory bounded for long-lived sessions
+        if len(session.messages) > 2 * self.tail_messages:
+            cut = len(session.messages) - self.tail_messages
+            session.messages = session.messages[cut:]
+            session.offset += cut
     
     def invalidate(self, key: str) -> None:
-        """Remove a session from the in-memory cache."""
-        self._cache.pop(key, None)
+        """Remove a session from the in-memory cache (without writing it back)."""
+        if entry := self._cache.pop(key, None):
+            self._cache_bytes -= entry.size
+    
+    def flush(self) -> None:
+        """Write back every cached session with unsaved changes."""
+        for entry in list(self._cache.values()):
+            if _snapshot(entry.session) != entry.saved:
+                self._write(entry.session)
+                entry.saved = _snapshot(entry.session)
     
     def list_sessions(self) -> list[dict[str, Any]]:
         """
@@ -176,23 +350,5 @@ class SessionManager:
         Returns:
             List of session info dicts.
         """
-        sessions = []
-        
-        for path in self.sessions_dir.glob("*.jsonl"):
-            try:
-                # Read just the metadata line
-                with open(path) as f:
-                    first_line = f.readline().strip()
-                    if first_line:
-                        data = json.loads(first_line)
-                        if data.get("_type") == "metadata":
-                            sessions.append({
-                                "key": path.stem.replace("_", ":"),
-                                "created_at": data.get("created_at"),
-                                "updated_at": data.get("updated_at"),
-                                "path": str(path)
-                            })
-            except Exception:
-                continue
-        
+        sessions = self.store.list_sessions()
         return sorted(sessions, key=lambda x: x.get("updated_at", ""), reverse=True)
@@ -0,0 +1,224 @@
+"""Compact binary session storage: length-prefixed msgpack records."""
+
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import Any
+
+import msgpack
+from loguru import logger
+
+from nanobot.session.store import (
+    JsonlSessionStore,
+    SessionRecord,
+    SessionStore,
+    meta_path,
+    read_meta,
+    write_meta,
+)
+from nanobot.utils.files import sync_appended
+
+_HEADER = struct.Struct(">IB")  # Body length, encoding
+_OFFSET = struct.Struct("<Q")  # One entry per message in the .idx file
+RAW, ZLIB, ZSTD = 0, 1, 2
+COMPRESS_MIN_BYTES = 1024  # Short chat turns don't compress well on their own
+
+# Frequent message keys are stored as small integers instead of strings
+_KEYS = ("role", "content", "timestamp", "tools_used", "tool_calls", "tool_call_id", "name")
+_KEY_IDS = {k: i for i, k in enumerate(_KEYS)}
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def encode_record(msg: dict[str, Any], compress: bool = True) -> bytes:
+    """Encode one message as a framed record."""
+    body = msgpack.packb({_KEY_IDS.get(k, k): v for k, v in msg.items()}, use_bin_type=True)
+    flag = RAW
+    if compress and len(body) >= COMPRESS_MIN_BYTES:
+        if zstd := _zstd():
+            packed, packed_flag = zstd.ZstdCompressor(level=3).compress(body), ZSTD
+        else:
+            packed, packed_flag = zlib.compress(body, 6), ZLIB
+        if len(packed) < len(body):
+            body, flag = packed, packed_flag
+    return _HEADER.pack(len(body), flag) + body
+
+
+def decode_records(data: bytes) -> list[dict[str, Any]]:
+    """Decode consecutive framed records."""
+    out = []
+    pos = 0
+    while pos + _HEADER.size <= len(data):
+        length, flag = _HEADER.unpack_from(data, pos)
+        pos += _HEADER.size
+        body = data[pos:pos + length]
+        pos += length
+        if flag == ZLIB:
+            body = zlib.decompress(body)
+        elif flag == ZSTD:
+            zstd = _zstd()
+            if zstd is None:
+                raise RuntimeError("session record is zstd-compressed but zstandard is not installed")
+            body = zstd.ZstdDecompressor().decompress(body)
+        raw = msgpack.unpackb(body, raw=False, strict_map_key=False)
+        out.append({_KEYS[k] if isinstance(k, int) else k: v for k, v in raw.items()})
+    return out
+
+
+class MsgpackSessionStore(SessionStore):
+    """
+    One file of framed msgpack records per session, an offset index and
+    the shared metadata sidecar.
+
+    Each record is a 5-byte header (length, encoding) followed by the
+    msgpack body; bodies over 1KB are zstd-compressed when zstandard is
+    installed, zlib otherwise. The .idx file holds one 8-byte offset per
+    message, so any index or tail is one seek away. Sessions still stored
+    as JSONL are converted on first access and the old file is kept as
+    <name>.jsonl.migrated.
+    """
+
+    def __init__(self, sessions_dir: Path, compress: bool = True):
+        self.sessions_dir = sessions_dir
+        self.compress = compress
+        self._jsonl = JsonlSessionStore(sessions_dir)
+
+    def path(self, key: str) -> Path:
+        return self._jsonl.path(key).with_suffix(".msgpack")
+
+    def _index_path(self, key: str) -> Path:
+        return self.path(key).with_suffix(".idx")
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).exists() or self._jsonl.exists(key)
+
+    def load(self, key: str, tail: int) -> SessionRecord | None:
+        self._migrate(key)
+        path = self.path(key)
+        if not path.exists():
+            return None
+        meta = read_meta(meta_path(path)) or {}
+        total = self._check_index(key, meta)
+        start = max(total - max(tail, 0), 0)
+        return SessionRecord(meta=meta, messages=self._read_range(key, start, total, total), total=total)
+
+    def read(self, key: str, start: int, end: int) -> list[dict[str, Any]]:
+        self._migrate(key)
+        total = self._count(key)
+        end = min(end, total)
+        if end <= max(start, 0):
+            return []
+        return self._read_range(key, max(start, 0), end, total)
+
+    def append(self, key: str, meta: dict[str, Any], messages: list[dict[str, Any]]) -> None:
+        self._migrate(key)
+        path = self.path(key)
+        offsets = []
+        with open(path, "ab") as f:
+            pos = f.tell()
+            for msg in messages:
+                record = encode_record(msg, self.compress)
+                offsets.append(pos)
+                f.write(record)
+                pos += len(record)
+            sync_appended(f)
+        with open(self._index_path(key), "ab") as f:
+            f.write(b"".join(_OFFSET.pack(o) for o in offsets))
+        write_meta(meta_path(path), meta, path.stat().st_size)
+
+    def rewrite(self, key: str, meta: dict[str, Any], messages: list[dict[str, Any]]) -> None:
+        path = self.path(key)
+        index_path = self._index_path(key)
+        records = [encode_record(msg, self.compress) for msg in messages]
+        offsets, pos = [], 0
+        for record in records:
+            offsets.append(pos)
+            pos += len(record)
+        tmp = path.with_suffix(".msgpack.tmp")
+        tmp.write_bytes(b"".join(records))
+        index_tmp = index_path.with_suffix(".idx.tmp")
+        index_tmp.write_bytes(b"".join(_OFFSET.pack(o) for o in offsets))
+        os.replace(index_tmp, index_path)
+        os.replace(tmp, path)
+        write_meta(meta_path(path), meta, pos)
+
+    def list_sessions(self) -> list[dict[str, Any]]:
+        sessions = []
+        for path in self.sessions_dir.glob("*.msgpack"):
+            data = read_meta(meta_path(path))
+            if data:
+                sessions.append({
+                    "key": path.stem.replace("_", ":"),
+                    "created_at": data.get("created_at"),
+                    "updated_at": data.get("updated_at"),
+                    "path": str(path)
+                })
+        seen = {s["key"] for s in sessions}
+        return sessions + [s for s in self._jsonl.list_sessions() if s["key"] not in seen]
+
+    def retire(self, key: str) -> None:
+        super().retire(key)
+        self._index_path(key).unlink(missing_ok=True)
+
+    def _count(self, key: str) -> int:
+        try:
+            return self._index_path(key).stat().st_size // _OFFSET.size
+        except OSError:
+            return 0
+
+    def _offset(self, f, i: int) -> int:
+        f.seek(i * _OFFSET.size)
+        return _OFFSET.unpack(f.read(_OFFSET.size))[0]
+
+    def _read_range(self, key: str, start: int, end: int, total: int) -> list[dict[str, Any]]:
+        if end <= start:
+            return []
+        with open(self._index_path(key), "rb") as idx:
+            begin = self._offset(idx, start)
+            stop = self._offset(idx, end) if end < total else None
+        with open(self.path(key), "rb") as f:
+            f.seek(begin)
+            data = f.read() if stop is None else f.read(stop - begin)
+        return decode_records(data)
+
+    def _check_index(self, key: str, meta: dict[str, Any]) -> int:
+        """Message count, rebuilding the index if a crash left it out of step with the data."""
+        size = self.path(key).stat().st_size
+        total = self._count(key)
+        if meta.get("bytes") == size and meta.get("messages") == total:
+            return total
+        logger.warning(f"Session {key}: index out of date, rebuilding")
+        offsets, pos = [], 0
+        with open(self.path(key), "rb") as f:
+            while pos + _HEADER.size <= size:
+                f.seek(pos)
+                length, _ = _HEADER.unpack(f.read(_HEADER.size))
+                if pos + _HEADER.size + length > size:
+                    break  # Torn final record
+                offsets.append(pos)
+                pos += _HEADER.size + length
+        if pos < size:
+            with open(self.path(key), "r+b") as f:
+                f.truncate(pos)
+        self._index_path(key).write_bytes(b"".join(_OFFSET.pack(o) for o in offsets))
+        write_meta(meta_path(self.path(key)), {**meta, "messages": len(offsets)}, pos)
+        return len(offsets)
+
+    def _migrate(self, key: str) -> None:
+        """Convert a JSONL session to this format the first time it is touched."""
+        if self.path(key).exists() or not self._jsonl.exists(key):
+            return
+        record = self._jsonl.load(key, 0)
+        messages = self._jsonl.read(key, 0, record.total)
+        meta = {k: v for k, v in record.meta.items() if k not in ("_type", "bytes")}
+        meta["messages"] = len(messages)
+        self.rewrite(key, meta, messages)
+        self._jsonl.retire(key)
+        logger.info(f"Migrated session {key} to msgpack ({len(messages)} messages)")
@@ -0,0 +1,200 @@
+"""SQLite session storage for workspaces shared by several nanobot processes."""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+from nanobot.session.store import JsonlSessionStore, SessionRecord, SessionStore
+from nanobot.utils.files import FILES
+
+BUSY_TIMEOUT_MS = 5000  # How long a writer waits for another process's transaction
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    key TEXT PRIMARY KEY,
+    created_at TEXT,
+    updated_at TEXT,
+    metadata TEXT NOT NULL DEFAULT '{}',
+    last_consolidated INTEGER NOT NULL DEFAULT 0,
+    messages INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated_at);
+CREATE TABLE IF NOT EXISTS messages (
+    session_key TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (session_key, idx)
+) WITHOUT ROWID;
+"""
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    Sessions in one SQLite file (WAL mode) under the sessions directory.
+
+    Each save is one IMMEDIATE transaction that appends the turn's messages
+    and updates the session row, so `nanobot agent` and `nanobot gateway`
+    can share a workspace without interleaving or clobbering writes.
+    Message indexes are assigned inside the transaction, so concurrent
+    appends to the same session from two processes both land, in commit
+    order. Sessions still stored as files are imported on first access and
+    the file is kept as <name>.migrated.
+    """
+
+    def __init__(self, sessions_dir: Path):
+        self.sessions_dir = sessions_dir
+        self.db_path = sessions_dir / "sessions.db"
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.RLock()
+        self._files = [JsonlSessionStore(sessions_dir)]
+        from nanobot.session.packed import MsgpackSessionStore
+        self._files.append(MsgpackSessionStore(sessions_dir))
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.sessions_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+            conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={'FULL' if FILES.fsync == 'full' else 'NORMAL'}")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def path(self, key: str) -> Path:
+        return self.db_path
+
+    def exists(self, key: str) -> bool:
+        with self._lock:
+            row = self.conn.execute("SELECT 1 FROM sessions WHERE key = ?", (key,)).fetchone()
+        return row is not None or any(self._file_path(store, key) for store in self._files)
+
+    def load(self, key: str, tail: int) -> SessionRecord | None:
+        self._import_file(key)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT created_at, updated_at, metadata, last_consolidated, messages FROM sessions WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            rows = self.conn.execute(
+                "SELECT data FROM messages WHERE session_key = ? ORDER BY idx DESC LIMIT ?",
+                (key, max(tail, 0)),
+            ).fetchall()
+        created_at, updated_at, metadata, last_consolidated, total = row
+        meta = {
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "metadata": json.loads(metadata),
+            "last_consolidated": last_consolidated,
+        }
+        return SessionRecord(meta=meta, messages=[json.loads(d) for (d,) in reversed(rows)], total=total)
+
+    def read(self, key: str, start: int, end: int) -> list[dict[str, Any]]:
+        if end <= start:
+            return []
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT data FROM messages WHERE session_key = ? AND idx >= ? AND idx < ? ORDER BY idx",
+                (key, start, end),
+            ).fetchall()
+        return [json.loads(d) for (d,) in rows]
+
+    def append(self, key: str, meta: dict[str, Any], messages: list[dict[str, Any]]) -> None:
+        self._write(key, meta, messages, replace=False)
+
+    def rewrite(self, key: str, meta: dict[str, Any], messages: list[dict[str, Any]]) -> None:
+        self._write(key, meta, messages, replace=True)
+
+    def list_sessions(self) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT key, created_at, updated_at FROM sessions ORDER BY updated_at DESC"
+            ).fetchall()
+        sessions = [
+            {"key": key, "created_at": created, "updated_at": updated, "path": str(self.db_path)}
+            for key, created, updated in rows
+        ]
+        seen = {s["key"] for s in sessions}
+        for store in self._files:
+            for info in store.list_sessions():
+                if info["key"] not in seen and Path(info["path"]) == store.path(info["key"]):
+                    sessions.append(info)
+                    seen.add(info["key"])
+        return sessions
+
+    def retire(self, key: str) -> None:
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM messages WHERE session_key = ?", (key,))
+                conn.execute("DELETE FROM sessions WHERE key = ?", (key,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    def _write(self, key: str, meta: dict[str, Any], messages: list[dict[str, Any]], replace: bool) -> None:
+        with self._lock:
+            conn = self.conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if replace:
+                    conn.execute("DELETE FROM messages WHERE session_key = ?", (key,))
+                    start = 0
+                else:
+                    start = conn.execute(
+                        "SELECT COALESCE(MAX(idx) + 1, 0) FROM messages WHERE session_key = ?", (key,)
+                    ).fetchone()[0]
+                conn.executemany(
+                    "INSERT INTO messages (session_key, idx, data) VALUES (?, ?, ?)",
+                    [(key, start + i, json.dumps(m, ensure_ascii=False)) for i, m in enumerate(messages)],
+                )
+                conn.execute(
+                    "INSERT INTO sessions (key, created_at, updated_at, metadata, last_consolidated, messages) "
+                    "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "updated_at = excluded.updated_at, metadata = excluded.metadata, "
+                    "last_consolidated = excluded.last_consolidated, messages = excluded.messages",
+                    (
+                        key, meta.get("created_at"), meta.get("updated_at"),
+                        json.dumps(meta.get("metadata", {}), ensure_ascii=False),
+                        meta.get("last_consolidated", 0), start + len(messages),
+                    ),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _file_path(store: SessionStore, key: str) -> Path | None:
+        path = store.path(key)
+        return path if path.exists() else None
+
+    def _import_file(self, key: str) -> None:
+        """Import a file-based session the first time it is touched."""
+        for store in self._files:
+            path = self._file_path(store, key)
+            if path is None:
+                continue
+            with self._lock:
+                if self.conn.execute("SELECT 1 FROM sessions WHERE key = ?", (key,)).fetchone():
+                    return
+                record = store.load(key, 0)
+                messages = store.read(key, 0, record.total)
+                self.rewrite(key, record.meta, messages)
+            store.retire(key)
+            logger.info(f"Migrated session {key} to SQLite ({len(messages)} messages)")
+            return
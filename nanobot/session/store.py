@@ -0,0 +1,230 @@
+"""Session storage engines."""
+
+import json
+import os
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from nanobot.utils.files import atomic_write_text, sync_appended
+from nanobot.utils.helpers import safe_filename
+
+TAIL_BLOCK_BYTES = 64 * 1024  # Read size when scanning a file backwards
+SESSION_ENGINES = ("jsonl", "msgpack", "sqlite")
+
+
+@dataclass
+class SessionRecord:
+    """What a store returns for a session: its metadata and the newest messages."""
+    meta: dict[str, Any]
+    messages: list[dict[str, Any]] = field(default_factory=list)
+    total: int = 0  # Messages in the store, including those not loaded
+
+
+class SessionStore(ABC):
+    """
+    Abstract storage engine for session messages.
+
+    Messages are addressed by their absolute index in the session. Stores
+    are append-only except for rewrite(), which replaces a session wholesale
+    (e.g. after /new). Metadata is the dict written by SessionManager:
+    created_at, updated_at, metadata, last_consolidated.
+    """
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether the store holds a session for key."""
+        pass
+
+    @abstractmethod
+    def load(self, key: str, tail: int) -> SessionRecord | None:
+        """Load metadata and the last `tail` messages, or None if missing."""
+        pass
+
+    @abstractmethod
+    def read(self, key: str, start: int, end: int) -> list[dict[str, Any]]:
+        """Read messages [start, end) by absolute index."""
+        pass
+
+    @abstractmethod
+    def append(self, key: str, meta: dict[str, Any], messages: list[dict[str, Any]]) -> None:
+        """Append messages and replace the metadata."""
+        pass
+
+    @abstractmethod
+    def rewrite(self, key: str, meta: dict[str, Any], messages: list[dict[str, Any]]) -> None:
+        """Replace the whole session."""
+        pass
+
+    @abstractmethod
+    def list_sessions(self) -> list[dict[str, Any]]:
+        """Session info dicts with key, created_at, updated_at and path."""
+        pass
+
+    @abstractmethod
+    def path(self, key: str) -> Path:
+        """File holding the session's messages."""
+        pass
+
+    def retire(self, key: str) -> None:
+        """Set a session aside after it was copied to another engine (kept as <name>.migrated)."""
+        path = self.path(key)
+        path.rename(path.with_name(path.name + ".migrated"))
+
+
+class JsonlSessionStore(SessionStore):
+    """
+    One JSONL file of messages per session plus a small metadata sidecar.
+
+    Older files carry the metadata as their first line instead; they are
+    read as-is and get a sidecar on the next save. The sidecar records the
+    message count and file size so a load only reads the file backwards
+    until it has the requested tail; a size mismatch (e.g. a crash between
+    the append and the sidecar write) falls back to counting lines.
+    """
+
+    def __init__(self, sessions_dir: Path):
+        self.sessions_dir = sessions_dir
+
+    def path(self, key: str) -> Path:
+        safe_key = safe_filename(key.replace(":", "_"))
+        return self.sessions_dir / f"{safe_key}.jsonl"
+
+    def _meta_path(self, key: str) -> Path:
+        return meta_path(self.path(key))
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def load(self, key: str, tail: int) -> SessionRecord | None:
+        path = self.path(key)
+        if not path.exists():
+            return None
+        size = path.stat().st_size
+        meta = read_meta(self._meta_path(key))
+        header = _read_header(path)
+        if meta is None:
+            meta = header or {}
+        total = meta.get("messages")
+        if total is None or meta.get("bytes") != size:
+            total = sum(1 for _ in _message_lines(path))
+        lines = _tail_lines(path, size, tail, skip_header=header is not None)
+        return SessionRecord(meta=meta, messages=[json.loads(line) for line in lines], total=total)
+
+    def read(self, key: str, start: int, end: int) -> list[dict[str, Any]]:
+        path = self.path(key)
+        if end <= start or not path.exists():
+            return []
+        out = []
+        for i, line in enumerate(_message_lines(path)):
+            if i >= end:
+                break
+            if i >= start:
+                out.append(json.loads(line))
+        return out
+
+    def append(self, key: str, meta: dict[str, Any], messages: list[dict[str, Any]]) -> None:
+        path = self.path(key)
+        with open(path, "ab") as f:
+            for msg in messages:
+                f.write(json.dumps(msg).encode() + b"\n")
+            sync_appended(f)
+        write_meta(self._meta_path(key), meta, path.stat().st_size)
+
+    def rewrite(self, key: str, meta: dict[str, Any], messages: list[dict[str, Any]]) -> None:
+        path = self.path(key)
+        tmp = path.with_suffix(".jsonl.tmp")
+        with open(tmp, "wb") as f:
+            for msg in messages:
+                f.write(json.dumps(msg).encode() + b"\n")
+            sync_appended(f)
+        os.replace(tmp, path)
+        write_meta(self._meta_path(key), meta, path.stat().st_size)
+
+    def list_sessions(self) -> list[dict[str, Any]]:
+        sessions = []
+        for path in self.sessions_dir.glob("*.jsonl"):
+            try:
+                data = read_meta(meta_path(path)) or _read_header(path)
+                if data:
+                    sessions.append({
+                        "key": path.stem.replace("_", ":"),
+                        "created_at": data.get("created_at"),
+                        "updated_at": data.get("updated_at"),
+                        "path": str(path)
+                    })
+            except Exception:
+                continue
+        return sessions
+
+
+def create_store(engine: str, sessions_dir: Path, compress: bool = True) -> SessionStore:
+    """Build the session store for a configured engine name."""
+    if engine == "jsonl":
+        return JsonlSessionStore(sessions_dir)
+    if engine == "msgpack":
+        from nanobot.session.packed import MsgpackSessionStore
+        return MsgpackSessionStore(sessions_dir, compress=compress)
+    if engine == "sqlite":
+        from nanobot.session.sqlite import SqliteSessionStore
+        return SqliteSessionStore(sessions_dir)
+    raise ValueError(f"unknown session engine: {engine}")
+
+
+def meta_path(data_path: Path) -> Path:
+    """Metadata sidecar for a session data file."""
+    return data_path.with_suffix(".meta.json")
+
+
+def read_meta(path: Path) -> dict[str, Any] | None:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def write_meta(path: Path, meta: dict[str, Any], size: int) -> None:
+    """Atomically replace a metadata sidecar; size is the data file's byte length."""
+    atomic_write_text(path, json.dumps({"_type": "metadata", **meta, "bytes": size}))
+
+
+def _is_header(line: bytes) -> bool:
+    return line.startswith(b'{"_type": "metadata"')
+
+
+def _read_header(path: Path) -> dict[str, Any] | None:
+    """Metadata from the first line of an older session file, if present."""
+    with open(path, "rb") as f:
+        first = f.readline().strip()
+    return json.loads(first) if first and _is_header(first) else None
+
+
+def _message_lines(path: Path):
+    """Yield raw message lines in order, skipping blanks and the legacy header."""
+    with open(path, "rb") as f:
+        for line in f:
+            line = line.strip()
+            if line and not _is_header(line):
+                yield line
+
+
+def _tail_lines(path: Path, size: int, n: int, skip_header: bool) -> list[bytes]:
+    """The last n non-empty lines of a file, read backwards in blocks."""
+    if n <= 0:
+        return []
+    buf = b""
+    pos = size
+    with open(path, "rb") as f:
+        while pos > 0 and buf.count(b"\n") <= n:
+            step = min(TAIL_BLOCK_BYTES, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+    lines = buf.split(b"\n")
+    if pos > 0:
+        lines = lines[1:]  # The first line may be cut off
+    lines = [line.strip() for line in lines if line.strip()]
+    if pos == 0 and skip_header and lines and _is_header(lines[0]):
+        lines = lines[1:]
+    return lines[-n:]
@@ -0,0 +1,146 @@
+"""Async file I/O for the agent's hot paths: a dedicated thread pool, coalesced atomic writes."""
+
+import asyncio
+import functools
+import os
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, TypeVar
+
+T = TypeVar("T")
+
+FSYNC_POLICIES = ("none", "data", "full")
+
+
+def atomic_write_text(path: Path, content: str, fsync: str | None = None, encoding: str = "utf-8") -> None:
+    """
+    Replace a file via a temp file and rename, so readers never see a partial write.
+
+    fsync "data" flushes the temp file before the rename, "full" also the
+    directory entry after it; None uses the process-wide policy.
+    """
+    policy = fsync or FILES.fsync
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w", encoding=encoding) as f:
+        f.write(content)
+        if policy != "none":
+            f.flush()
+            os.fsync(f.fileno())
+    try:
+        os.chmod(tmp, stat.S_IMODE(os.stat(path).st_mode))  # Keep e.g. the executable bit
+    except FileNotFoundError:
+        pass
+    os.replace(tmp, path)
+    if policy == "full":
+        sync_dir(path.parent)
+
+
+def sync_appended(f) -> None:
+    """fsync a file that was appended to, under the "full" policy only."""
+    if FILES.fsync == "full":
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def sync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # Directories can't be opened on Windows
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@dataclass
+class _PendingWrite:
+    content: str
+    fsync: str | None
+    done: asyncio.Future = field(default_factory=lambda: asyncio.get_running_loop().create_future())
+
+
+class AsyncFiles:
+    """
+    File access for coroutines, run on a small dedicated thread pool.
+
+    write_text() is atomic (temp file + rename) and coalescing: writes to a
+    path issued within one loop tick, or while an earlier write to it is
+    still running, collapse into a single write of the newest content, and
+    every caller is released when that write lands. Writes to one path
+    happen in order. run() executes any other blocking call (a session
+    save, a prompt build) on the same pool.
+    """
+
+    def __init__(self, workers: int = 4, fsync: str = "data"):
+        self.workers = workers
+        self.fsync = fsync
+        self._executor: ThreadPoolExecutor | None = None
+        self._pending: dict[Path, _PendingWrite] = {}
+        self._writing: dict[Path, asyncio.Future] = {}
+
+    def configure(self, workers: int | None = None, fsync: str | None = None) -> None:
+        if fsync is not None:
+            if fsync not in FSYNC_POLICIES:
+                raise ValueError(f"unknown fsync policy: {fsync}")
+            self.fsync = fsync
+        if workers is not None and workers != self.workers:
+            self.workers = workers
+            self.shutdown()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max(1, self.workers), thread_name_prefix="nanobot-io")
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking call on the I/O pool."""
+        call = functools.partial(fn, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    async def read_text(self, path: Path, encoding: str = "utf-8") -> str:
+        return await self.run(Path(path).read_text, encoding=encoding)
+
+    async def read_bytes(self, path: Path) -> bytes:
+        return await self.run(Path(path).read_bytes)
+
+    async def write_text(self, path: Path, content: str, fsync: str | None = None) -> None:
+        """Atomically replace path with content; coalesces with other pending writes to it."""
+        path = Path(path)
+        pending = self._pending.get(path)
+        if pending is None:
+            pending = self._pending[path] = _PendingWrite(content, fsync)
+            asyncio.ensure_future(self._flush(path))
+        else:
+            pending.content, pending.fsync = content, fsync or pending.fsync
+        await asyncio.shield(pending.done)
+
+    async def _flush(self, path: Path) -> None:
+        if previous := self._writing.get(path):
+            await asyncio.wait([previous])  # Later writes keep merging while this one runs
+        else:
+            await asyncio.sleep(0)  # Let writes from the same tick merge
+        pending = self._pending.pop(path)
+        task = asyncio.ensure_future(self.run(atomic_write_text, path, pending.content, pending.fsync))
+        self._writing[path] = task
+        try:
+            await task
+        except Exception as e:
+            pending.done.set_exception(e)
+        else:
+            pending.done.set_result(None)
+        finally:
+            if self._writing.get(path) is task:
+                del self._writing[path]
+
+
+# Process-wide instance; configured from agents.storage at startup
+FILES = AsyncFiles()
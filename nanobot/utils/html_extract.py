@@ -0,0 +1,128 @@
+"""HTML extraction for web_fetch, run in worker processes off the event loop.
+
+Kept outside nanobot.agent so worker processes start without importing the agent stack.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from html.parser import HTMLParser
+from typing import Any
+
+from loguru import logger
+
+EXTRACT_WORKERS = max(1, min(2, (os.cpu_count() or 1) - 1))
+
+_SKIP_TAGS = {"script", "style", "noscript", "template", "svg", "head"}
+_BLOCK_TAGS = {"p", "div", "section", "article", "ul", "ol", "table", "tr", "blockquote", "pre", "main"}
+_SPACES_RE = re.compile(r"\s+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+_pool: ProcessPoolExecutor | None = None
+
+
+class _Converter(HTMLParser):
+    """Streams HTML into markdown (or plain text) in a single pass over the document."""
+
+    def __init__(self, markdown: bool):
+        super().__init__(convert_charrefs=True)
+        self.markdown = markdown
+        self.out: list[str] = []
+        self._skip = 0
+        self._links: list[str | None] = []
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        elif self._skip:
+            return
+        elif tag == "a":
+            href = dict(attrs).get("href") if self.markdown else None
+            self._links.append(href)
+            if href:
+                self.out.append("[")
+        elif tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            self.out.append("\n\n" + ("#" * int(tag[1]) + " " if self.markdown else ""))
+        elif tag == "li":
+            self.out.append("\n- " if self.markdown else "\n")
+        elif tag in ("br", "hr"):
+            self.out.append("\n")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip = max(self._skip - 1, 0)
+        elif self._skip:
+            return
+        elif tag == "a" and self._links:
+            if href := self._links.pop():
+                self.out.append(f"]({href})")
+        elif tag in _BLOCK_TAGS or tag in ("h1", "h2", "h3", "h4", "h5", "h6"):
+            self.out.append("\n\n")
+
+    def handle_data(self, data: str) -> None:
+        if not self._skip:
+            self.out.append(_SPACES_RE.sub(" ", data))
+
+    def text(self) -> str:
+        lines = (line.strip() for line in "".join(self.out).split("\n"))
+        return _BLANK_LINES_RE.sub("\n\n", "\n".join(lines)).strip()
+
+
+def html_to_markdown(html: str) -> str:
+    """Convert HTML to markdown: links, headings, list items and paragraph breaks."""
+    parser = _Converter(markdown=True)
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+
+def html_to_text(html: str) -> str:
+    """Visible text of an HTML document, keeping paragraph breaks."""
+    parser = _Converter(markdown=False)
+    parser.feed(html)
+    parser.close()
+    return parser.text()
+
+
+def extract(html: str, mode: str = "markdown") -> dict[str, Any]:
+    """Readability + conversion for one page; returns title, text and the time it took."""
+    from readability import Document
+
+    start = time.perf_counter()
+    doc = Document(html)
+    summary = doc.summary()
+    content = html_to_markdown(summary) if mode == "markdown" else html_to_text(summary)
+    title = doc.title()
+    text = f"# {title}\n\n{content}" if title else content
+    return {"text": text, "seconds": time.perf_counter() - start}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: forking a process that runs an event loop and threads is unsafe
+        _pool = ProcessPoolExecutor(EXTRACT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+async def extract_async(html: str, mode: str = "markdown") -> dict[str, Any]:
+    """Run extract() in the worker pool, falling back to a thread if processes are unavailable."""
+    global _pool
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_get_pool(), extract, html, mode)
+    except (BrokenProcessPool, OSError, NotImplementedError) as e:
+        logger.warning(f"HTML extraction pool unavailable ({e}), extracting in a thread")
+        _pool = None
+        return await asyncio.to_thread(extract, html, mode)
+
+
+def shutdown() -> None:
+    """Stop the worker processes (they are restarted on the next extraction)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,139 @@
+"""Minimal asyncio HTTP/1.1 listener for local endpoints (metrics, webhooks)."""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+from urllib.parse import parse_qs, urlsplit
+
+from loguru import logger
+
+_REASONS = {200: "OK", 204: "No Content", 400: "Bad Request", 401: "Unauthorized",
+            403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+@dataclass
+class HTTPRequest:
+    """A parsed HTTP request."""
+    method: str
+    path: str
+    query: dict[str, list[str]] = field(default_factory=dict)
+    headers: dict[str, str] = field(default_factory=dict)  # Lower-cased names
+    body: bytes = b""
+
+
+@dataclass
+class HTTPResponse:
+    """An HTTP response to write back to the client."""
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "text/plain; charset=utf-8"
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+Handler = Callable[[HTTPRequest], Awaitable[HTTPResponse]]
+
+
+class HTTPServer:
+    """
+    Tiny keep-alive HTTP server built on asyncio streams.
+
+    Only what local endpoints need: exact-path routing, Content-Length
+    bodies and a request body size cap. No TLS, no chunked uploads.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, max_body_bytes: int = 1024 * 1024):
+        self.host = host
+        self.port = port
+        self.max_body_bytes = max_body_bytes
+        self._routes: dict[tuple[str, str], Handler] = {}
+        self._server: asyncio.AbstractServer | None = None
+
+    def route(self, method: str, path: str, handler: Handler) -> None:
+        """Register a handler for an exact method and path."""
+        self._routes[(method.upper(), path)] = handler
+
+    async def start(self) -> None:
+        """Bind and start serving. port=0 binds an ephemeral port."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"HTTP listener on {self.host}:{self.port}")
+
+    async def stop(self) -> None:
+        """Stop accepting connections."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                request, error = self._parse_head(head)
+                if error:
+                    await self._write(writer, error, keep_alive=False)
+                    break
+
+                raw_length = request.headers.get("content-length") or "0"
+                if not raw_length.isdigit():  # Rejects negatives and junk before readexactly
+                    await self._write(writer, HTTPResponse(status=400), keep_alive=False)
+                    break
+                length = int(raw_length)
+                if length > self.max_body_bytes:
+                    await self._write(writer, HTTPResponse(status=413), keep_alive=False)
+                    break
+                if length:
+                    request.body = await reader.readexactly(length)
+
+                handler = self._routes.get((request.method, request.path))
+                if handler is None:
+                    known_path = any(p == request.path for _, p in self._routes)
+                    response = HTTPResponse(status=405 if known_path else 404)
+                else:
+                    try:
+                        response = await handler(request)
+                    except Exception as e:
+                        logger.error(f"HTTP handler error for {request.path}: {e}")
+                        response = HTTPResponse(status=500)
+
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                await self._write(writer, response, keep_alive=keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _parse_head(head: bytes) -> tuple[HTTPRequest, HTTPResponse | None]:
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            return HTTPRequest(method="", path=""), HTTPResponse(status=400)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        url = urlsplit(target)
+        return HTTPRequest(method=method.upper(), path=url.path, query=parse_qs(url.query), headers=headers), None
+
+    @staticmethod
+    async def _write(writer: asyncio.StreamWriter, response: HTTPResponse, keep_alive: bool) -> None:
+        reason = _REASONS.get(response.status, "")
+        headers = {
+            "Content-Type": response.content_type,
+            "Content-Length": str(len(response.body)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **response.headers,
+        }
+        head = f"HTTP/1.1 {response.status} {reason}\r\n"
+        head += "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+        writer.write(head.encode("latin-1") + response.body)
+        await writer.drain()
@@ -0,0 +1,17 @@
+import inspect
+import os
+
+import pytest
+
+from nanobot.metrics.loop import assert_no_blocking
+
+
+@pytest.fixture(autouse=True)
+async def _loop_strict(request):
+    """With NANOBOT_LOOP_STRICT_MS=N, fail any async test that blocks the loop for more than N ms."""
+    max_ms = os.environ.get("NANOBOT_LOOP_STRICT_MS")
+    if not max_ms or not inspect.iscoroutinefunction(request.node.function):
+        yield
+        return
+    async with assert_no_blocking(float(max_ms)):
+        yield
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from nanobot.agent.tools.filesystem import EditFileTool
+from nanobot.session.manager import SessionManager
+from nanobot.utils import files
+from nanobot.utils.files import AsyncFiles, atomic_write_text
+
+
+@pytest.mark.asyncio
+async def test_writes_in_one_tick_coalesce(tmp_path, monkeypatch) -> None:
+    writes: list[str] = []
+    real = files.atomic_write_text
+
+    def counting(path, content, fsync=None):
+        writes.append(content)
+        real(path, content, fsync)
+
+    monkeypatch.setattr(files, "atomic_write_text", counting)
+    io = AsyncFiles(workers=2)
+    target = tmp_path / "MEMORY.md"
+
+    await asyncio.gather(*(io.write_text(target, f"v{i}") for i in range(10)))
+
+    assert writes == ["v9"]
+    assert target.read_text() == "v9"
+    io.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_writes_during_a_write_land_in_order(tmp_path) -> None:
+    io = AsyncFiles(workers=4)
+    target = tmp_path / "state.json"
+
+    first = asyncio.ensure_future(io.write_text(target, "a"))
+    await asyncio.sleep(0.01)  # "a" is running or done
+    await asyncio.gather(first, io.write_text(target, "b"), io.write_text(target, "c"))
+
+    assert target.read_text() == "c"
+    assert not list(tmp_path.glob(".*.tmp"))
+    io.shutdown()
+
+
+def test_atomic_write_keeps_mode(tmp_path) -> None:
+    script = tmp_path / "run.sh"
+    script.write_text("echo hi\n")
+    script.chmod(0o755)
+
+    atomic_write_text(script, "echo bye\n", fsync="full")
+
+    assert script.read_text() == "echo bye\n"
+    assert os.stat(script).st_mode & 0o777 == 0o755
+
+
+@pytest.mark.asyncio
+async def test_session_io_runs_off_the_loop(tmp_path, monkeypatch) -> None:
+    manager = SessionManager(tmp_path)
+    loop_thread = threading.get_ident()
+    threads = []
+    real_write = manager._write
+    monkeypatch.setattr(manager, "_write", lambda s: (threads.append(threading.get_ident()), real_write(s)))
+
+    session = await manager.get_or_create_async("cli:direct")
+    session.add_message("user", "hello")
+    await manager.save_async(session)
+    manager.invalidate("cli:direct")
+
+    assert threads and loop_thread not in threads
+    reloaded = await manager.get_or_create_async("cli:direct")
+    assert reloaded.messages[-1]["content"] == "hello"
+
+
+@pytest.mark.asyncio
+async def test_edit_tool_writes_atomically(tmp_path) -> None:
+    target = tmp_path / "notes.md"
+    target.write_text("alpha beta")
+
+    result = await EditFileTool().execute(str(target), "beta", "gamma")
+
+    assert result.startswith("Successfully")
+    assert target.read_text() == "alpha gamma"
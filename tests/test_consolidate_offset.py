@@ -1,5 +1,7 @@
 """Test session management with cache-friendly message handling."""
 
+import threading
+
 import pytest
 from pathlib import Path
 from nanobot.session.manager import Session, SessionManager
@@ -475,3 +477,128 @@ class TestEmptyAndBoundarySessions:
         expected_count = 60 - KEEP_COUNT - 10
         assert len(old_messages) == expected_count
         assert_messages_content(old_messages, 10, 34)
+
+
+class TestSessionCache:
+    """Test the bounded session cache."""
+
+    def test_lru_eviction_writes_back_dirty_sessions(self, tmp_path) -> None:
+        manager = SessionManager(Path(tmp_path), max_sessions=2)
+        a = manager.get_or_create("test:a")
+        a.add_message("user", "unsaved")
+        manager.get_or_create("test:b")
+        manager.get_or_create("test:c")  # Evicts a, the least recently used
+
+        assert list(manager._cache) == ["test:b", "test:c"]
+        reloaded = manager.get_or_create("test:a")
+        assert reloaded is not a
+        assert [m["content"] for m in reloaded.messages] == ["unsaved"]
+
+    @pytest.mark.asyncio
+    async def test_async_eviction_writes_back_off_the_loop(self, tmp_path) -> None:
+        manager = SessionManager(Path(tmp_path), max_sessions=1)
+        a = await manager.get_or_create_async("test:a")
+        a.add_message("user", "unsaved")
+        writers: list[threading.Thread] = []
+        write = manager._write
+
+        def tracked(session) -> None:
+            writers.append(threading.current_thread())
+            write(session)
+
+        manager._write = tracked
+        b = await manager.get_or_create_async("test:b")  # Evicts a, which is dirty
+        b.add_message("user", "hi")
+        await manager.save_async(b)
+
+        assert len(writers) == 2 and threading.main_thread() not in writers
+        assert list(manager._cache) == ["test:b"]
+        manager._write = write
+        assert [m["content"] for m in manager.get_or_create("test:a").messages] == ["unsaved"]
+
+    def test_byte_budget_and_idle_eviction(self, tmp_path) -> None:
+        manager = SessionManager(Path(tmp_path), max_bytes=4200)  # ~4.1KB for 20 messages
+        manager.save(create_session_with_messages("test:big", 20))
+        manager.save(create_session_with_messages("test:small", 2))
+        assert list(manager._cache) == ["test:small"]
+
+        manager.idle_s = 0
+        manager.get_or_create("test:other")
+        assert list(manager._cache) == ["test:other"]
+        assert manager._cache_bytes == 0
+
+
+class TestTailLoading:
+    """Test that only the recent tail of a session is loaded."""
+
+    def test_reload_loads_tail_and_pages_in_older(self, tmp_path) -> None:
+        manager = SessionManager(Path(tmp_path), tail_messages=10)
+        manager.save(create_session_with_messages("test:tail", 100))
+        manager.invalidate("test:tail")
+
+        session = manager.get_or_create("test:tail")
+        assert session.total_messages == 100
+        assert session.offset == 90
+        assert_messages_content(session.messages, 90, 99)
+        assert_messages_content(manager.read_messages(session, 85, 95), 85, 94)
+
+    def test_appends_keep_older_messages_on_disk(self, tmp_path) -> None:
+        manager = SessionManager(Path(tmp_path), tail_messages=10)
+        manager.save(create_session_with_messages("test:append", 30))
+        manager.invalidate("test:append")
+
+        session = manager.get_or_create("test:append")
+        for i in range(30, 55):
+            session.add_message("user", f"msg{i}")
+        manager.save(session)
+        assert len(session.messages) == 10  # Trimmed back to the tail after saving
+        manager.invalidate("test:append")
+
+        reloaded = manager.get_or_create("test:append")
+        assert reloaded.total_messages == 55
+        assert_messages_content(manager.read_messages(reloaded, 0), 0, 54)
+
+    def test_legacy_file_with_metadata_header(self, tmp_path) -> None:
+        import json
+
+        sessions = Path(tmp_path) / "sessions"
+        sessions.mkdir()
+        lines = [{"_type": "metadata", "created_at": "2025-01-01T00:00:00", "metadata": {}, "last_consolidated": 3}]
+        lines += [{"role": "user", "content": f"msg{i}"} for i in range(8)]
+        (sessions / "test_legacy.jsonl").write_text("\n".join(json.dumps(x) for x in lines) + "\n")
+
+        manager = SessionManager(Path(tmp_path), tail_messages=5)
+        session = manager.get_or_create("test:legacy")
+        assert session.last_consolidated == 3
+        assert session.total_messages == 8
+        assert_messages_content(session.messages, 3, 7)
+        assert manager.list_sessions()[0]["key"] == "test:legacy"
+
+    def test_clear_rewrites_the_file(self, tmp_path) -> None:
+        manager = SessionManager(Path(tmp_path), tail_messages=5)
+        manager.save(create_session_with_messages("test:reset", 20))
+        manager.invalidate("test:reset")
+
+        session = manager.get_or_create("test:reset")
+        session.clear()
+        session.add_message("user", "fresh")
+        manager.save(session)
+        manager.invalidate("test:reset")
+
+        assert [m["content"] for m in manager.get_or_create("test:reset").messages] == ["fresh"]
+
+    def test_clear_then_more_messages_than_before_rewrites(self, tmp_path) -> None:
+        manager = SessionManager(Path(tmp_path), tail_messages=5)
+        manager.save(create_session_with_messages("test:reset", 3))
+        manager.invalidate("test:reset")
+
+        session = manager.get_or_create("test:reset")
+        session.clear()
+        for i in range(6):
+            session.add_message("user", f"fresh{i}")
+        manager.save(session)
+        manager.invalidate("test:reset")
+
+        reloaded = manager.get_or_create("test:reset")
+        assert reloaded.total_messages == 6
+        assert manager.read_messages(reloaded, 0) == session.messages
@@ -0,0 +1,129 @@
+import asyncio
+import json
+
+import pytest
+
+from nanobot.agent.consolidation import MemoryConsolidator
+from nanobot.agent.usage import UsageLedger
+from nanobot.providers.base import LLMResponse
+from nanobot.session.manager import SessionManager
+
+
+class FakeProvider:
+    def __init__(self, memory_update: str = "- likes tea", delay: float = 0.0, memory_ops: list | None = None):
+        self.calls: list[str] = []
+        self.memory_update = memory_update
+        self.memory_ops = memory_ops
+        self.delay = delay
+
+    async def chat(self, messages, model=None, **kwargs) -> LLMResponse:
+        prompt = messages[-1]["content"]
+        self.calls.append(prompt)
+        await asyncio.sleep(self.delay)
+        keys = [line.split(" ", 2)[2] for line in prompt.splitlines() if line.startswith("### Session ")]
+        body = {"history_entries": {k: f"[2026-01-01 00:00] talked in {k}" for k in keys},
+                "memory_update": self.memory_update}
+        if self.memory_ops is not None:
+            body = {"history_entries": body["history_entries"], "memory_ops": self.memory_ops}
+        return LLMResponse(content=json.dumps(body), usage={"prompt_tokens": 10, "completion_tokens": 5})
+
+
+def _setup(tmp_path, provider) -> tuple[MemoryConsolidator, SessionManager]:
+    sessions = SessionManager(tmp_path)
+    for key in ("telegram:1", "telegram:2"):
+        session = sessions.get_or_create(key)
+        for i in range(30):
+            session.add_message("user", f"{key} msg{i}")
+        sessions.save(session)
+    consolidator = MemoryConsolidator(
+        provider, tmp_path, sessions, UsageLedger(tmp_path), model="cheap", memory_window=20,
+    )
+    return consolidator, sessions
+
+
+@pytest.mark.asyncio
+async def test_repeated_requests_coalesce_into_one_call(tmp_path) -> None:
+    provider = FakeProvider(delay=0.02)
+    consolidator, sessions = _setup(tmp_path, provider)
+
+    for _ in range(5):
+        consolidator.request("telegram:1")
+        await asyncio.sleep(0)
+    await consolidator.drain()
+    consolidator.request("telegram:1")  # Nothing new since the last run
+    await consolidator.drain()
+
+    assert len(provider.calls) == 1
+    assert sessions.get_or_create("telegram:1").last_consolidated == 20
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_batched_into_one_call(tmp_path) -> None:
+    provider = FakeProvider()
+    consolidator, sessions = _setup(tmp_path, provider)
+
+    consolidator.request("telegram:1")
+    consolidator.request("telegram:2")
+    consolidator.archive("cli:direct", [{"role": "user", "content": "bye", "timestamp": "2026-01-01T00:00"}])
+    await consolidator.drain()
+
+    assert len(provider.calls) == 1
+    history = (tmp_path / "memory" / "HISTORY.md").read_text()
+    assert all(k in history for k in ("telegram:1", "telegram:2", "cli:direct"))
+    assert (tmp_path / "memory" / "MEMORY.md").read_text() == "- likes tea"
+
+
+@pytest.mark.asyncio
+async def test_memory_edited_during_call_is_kept(tmp_path) -> None:
+    provider = FakeProvider(delay=0.05)
+    consolidator, _ = _setup(tmp_path, provider)
+
+    consolidator.request("telegram:1")
+    await asyncio.sleep(0.01)
+    (tmp_path / "memory" / "MEMORY.md").write_text("- edited by the agent")
+    await consolidator.drain()
+
+    assert (tmp_path / "memory" / "MEMORY.md").read_text() == "- edited by the agent"
+
+
+@pytest.mark.asyncio
+async def test_memory_ops_merge_with_concurrent_edits(tmp_path) -> None:
+    ops = [
+        {"op": "add", "section": "Preferences", "fact": "Likes green tea"},
+        {"op": "update", "section": "Profile", "old": "Lives in Paris", "fact": "Lives in Berlin"},
+    ]
+    provider = FakeProvider(delay=0.05, memory_ops=ops)
+    consolidator, _ = _setup(tmp_path, provider)
+    memory_file = tmp_path / "memory" / "MEMORY.md"
+    memory_file.write_text("## Profile\n- Lives in Paris\n")
+
+    consolidator.request("telegram:1")
+    await asyncio.sleep(0.01)
+    memory_file.write_text("## Profile\n- Lives in Paris\n- Works nights\n")
+    await consolidator.drain()
+
+    assert "## Memory Sections\nProfile" in provider.calls[0]
+    text = memory_file.read_text()
+    assert "- Lives in Berlin" in text and "Paris" not in text
+    assert "- Works nights" in text
+    assert "## Preferences\n- Likes green tea" in text
+
+
+@pytest.mark.asyncio
+async def test_new_session_during_call_is_not_marked_consolidated(tmp_path) -> None:
+    provider = FakeProvider(delay=0.05)
+    consolidator, sessions = _setup(tmp_path, provider)
+
+    consolidator.request("telegram:1")
+    await asyncio.sleep(0.01)
+    # /new: clear, save, drop from the cache, then the next conversation starts
+    session = sessions.get_or_create("telegram:1")
+    session.clear()
+    await sessions.save_async(session)
+    sessions.invalidate("telegram:1")
+    fresh = sessions.get_or_create("telegram:1")
+    for i in range(25):
+        fresh.add_message("user", f"new msg{i}")
+    await consolidator.drain()
+
+    assert sessions.get_or_create("telegram:1").last_consolidated == 0
@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from nanobot.agent.tools.cron import CronTool
+from nanobot.cron.precheck import PrecheckRunner, should_run
+from nanobot.cron.service import CronService
+from nanobot.cron.types import CronPrecheck, CronSchedule
+
+
+@pytest.mark.asyncio
+async def test_unchanged_file_skips_the_agent_turn(tmp_path) -> None:
+    watched = tmp_path / "feed.txt"
+    watched.write_text("v1")
+    runs = 0
+
+    async def on_job(job):
+        nonlocal runs
+        runs += 1
+
+    service = CronService(tmp_path / "jobs.db", on_job=on_job)
+    job = service.add_job(
+        "watch", CronSchedule(kind="every", every_ms=60_000), "summarise",
+        precheck=CronPrecheck(kind="file", target=str(watched)),
+    )
+    await service._execute_job(job)
+    await service._execute_job(job)
+    assert runs == 1
+    assert job.state.last_status == "skipped"
+
+    watched.write_text("v2")
+    await service._execute_job(job)
+    assert runs == 2
+
+    assert await service.run_job(job.id)  # Explicit runs bypass the precheck
+    assert runs == 3
+    assert [r.status for r in service.history(job.id)].count("skipped") == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_run_keeps_the_old_fingerprint(tmp_path) -> None:
+    watched = tmp_path / "feed.txt"
+    watched.write_text("v1")
+
+    async def on_job(job):
+        raise RuntimeError("boom")
+
+    service = CronService(tmp_path / "jobs.db", on_job=on_job)
+    job = service.add_job(
+        "watch", CronSchedule(kind="every", every_ms=60_000), "summarise",
+        precheck=CronPrecheck(kind="file", target=str(watched)),
+    )
+    await service._execute_job(job)
+    await service._execute_job(job)
+    assert [r.status for r in service.history(job.id)] == ["error", "error"]
+
+
+@pytest.mark.asyncio
+async def test_identical_prechecks_share_one_call(monkeypatch) -> None:
+    runner = PrecheckRunner()
+    calls = 0
+
+    async def compute(check):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "fp"
+
+    monkeypatch.setattr(runner, "_compute", compute)
+    check = CronPrecheck(kind="http", target="https://example.com/feed")
+    results = await asyncio.gather(*(runner.fingerprint(check) for _ in range(5)))
+
+    assert calls == 1
+    assert results == ["fp"] * 5
+
+
+@pytest.mark.asyncio
+async def test_command_precheck_fails_open() -> None:
+    runner = PrecheckRunner()
+    assert await should_run(runner, CronPrecheck(kind="command", target="echo same"), None) == (
+        True, await runner.fingerprint(CronPrecheck(kind="command", target="echo same")),
+    )
+    run, fingerprint = await should_run(runner, CronPrecheck(kind="command", target="exit 3"), "old")
+    assert run and fingerprint == "old"
+
+
+def test_jitter_spreads_jobs_with_the_same_schedule(tmp_path) -> None:
+    service = CronService(tmp_path / "jobs.db", jitter_ms=60_000)
+    jobs = [service.add_job(f"j{i}", CronSchedule(kind="every", every_ms=3_600_000), "hi") for i in range(20)]
+    offsets = {j.state.next_run_at_ms % 3_600_000 for j in jobs}
+    assert len(offsets) > 10
+    assert all(o < 60_000 for o in offsets)
+
+    again = CronService(tmp_path / "jobs.db", jitter_ms=60_000)
+    assert again._next_run(jobs[0], 0) == jobs[0].state.next_run_at_ms % 3_600_000
+
+    at = service.add_job("once", CronSchedule(kind="at", at_ms=10**13), "hi")
+    assert at.state.next_run_at_ms == 10**13  # One-shot jobs keep their exact time
+
+
+@pytest.mark.asyncio
+async def test_tool_precheck_file_respects_workspace_restriction(tmp_path) -> None:
+    workspace = tmp_path / "workspace"
+    workspace.mkdir()
+    service = CronService(tmp_path / "jobs.db")
+    tool = CronTool(service, allowed_dir=workspace)
+    tool.set_context("telegram", "42")
+
+    result = await tool.execute("add", message="watch", every_seconds=60, precheck_file="/etc/passwd")
+    assert result.startswith("Error:") and "outside allowed directory" in result
+    assert service.list_jobs() == []
+
+    result = await tool.execute("add", message="watch", every_seconds=60, precheck_file=str(workspace / "feed.txt"))
+    assert result.startswith("Created job")
+    assert service.list_jobs()[0].precheck.target == str((workspace / "feed.txt").resolve())
+
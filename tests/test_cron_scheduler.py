@@ -0,0 +1,121 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from nanobot.cron.service import CronService
+from nanobot.cron.types import CronSchedule
+
+
+def _write_store(path, next_run_ms: int, every_ms: int = 60_000, catch_up: str | None = None) -> None:
+    path.write_text(json.dumps({"version": 1, "jobs": [{
+        "id": "j1",
+        "name": "report",
+        "schedule": {"kind": "every", "everyMs": every_ms},
+        "payload": {"message": "hi"},
+        "state": {"nextRunAtMs": next_run_ms},
+        "catchUp": catch_up,
+    }]}))
+
+
+@pytest.mark.asyncio
+async def test_due_jobs_run_concurrently(tmp_path) -> None:
+    running, peak = 0, 0
+
+    async def on_job(job):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.1)
+        running -= 1
+
+    service = CronService(tmp_path / "jobs.json", on_job=on_job, max_concurrent_jobs=2)
+    await service.start()
+    at_ms = int(time.time() * 1000) + 50
+    for i in range(3):
+        service.add_job(f"job{i}", CronSchedule(kind="at", at_ms=at_ms), "hi")
+
+    await asyncio.sleep(0.4)
+    service.stop()
+
+    assert peak == 2
+    assert all(j.state.last_status == "ok" for j in service.list_jobs(include_disabled=True))
+
+
+@pytest.mark.asyncio
+async def test_manual_runs_do_not_overlap(tmp_path) -> None:
+    running, peak = 0, 0
+
+    async def on_job(job):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+
+    service = CronService(tmp_path / "jobs.json", on_job=on_job)
+    job = service.add_job("slow", CronSchedule(kind="every", every_ms=3_600_000), "hi")
+
+    assert all(await asyncio.gather(*(service.run_job(job.id) for _ in range(3))))
+    assert peak == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy, expected", [("skip", 0), ("once", 1), ("all", 5)])
+async def test_catch_up_policies(tmp_path, policy, expected) -> None:
+    runs = 0
+
+    async def on_job(job):
+        nonlocal runs
+        runs += 1
+
+    store = tmp_path / "jobs.json"
+    _write_store(store, int(time.time() * 1000) - 4 * 60_000 - 30_000)  # 5 runs missed
+    service = CronService(store, on_job=on_job, catch_up=policy)
+    await service.start()
+    await asyncio.sleep(0.1)
+    service.stop()
+
+    assert runs == expected
+    assert service.status()["next_wake_at_ms"] > time.time() * 1000
+
+
+@pytest.mark.asyncio
+async def test_per_job_catch_up_overrides_default(tmp_path) -> None:
+    runs = 0
+
+    async def on_job(job):
+        nonlocal runs
+        runs += 1
+
+    store = tmp_path / "jobs.json"
+    _write_store(store, int(time.time() * 1000) - 10 * 60_000, catch_up="once")
+    service = CronService(store, on_job=on_job, catch_up="skip")
+    await service.start()
+    await asyncio.sleep(0.1)
+    service.stop()
+
+    assert runs == 1
+
+
+def test_disabled_and_removed_jobs_leave_the_heap(tmp_path) -> None:
+    service = CronService(tmp_path / "jobs.json")
+    a = service.add_job("a", CronSchedule(kind="every", every_ms=1000), "hi")
+    b = service.add_job("b", CronSchedule(kind="every", every_ms=5000), "hi")
+
+    assert service.status()["next_wake_at_ms"] == a.state.next_run_at_ms
+    service.enable_job(a.id, enabled=False)
+    assert service.status()["next_wake_at_ms"] == b.state.next_run_at_ms
+    service.remove_job(b.id)
+    assert service.status()["next_wake_at_ms"] is None
+
+    reloaded = CronService(tmp_path / "jobs.json")
+    assert [j.id for j in reloaded.list_jobs(include_disabled=True)] == [a.id]
+
+
+def test_cron_config_rejects_unknown_catch_up() -> None:
+    from nanobot.config.schema import CronConfig
+
+    with pytest.raises(ValueError):
+        CronConfig(catch_up="sometimes")
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from nanobot.cron import store as cron_store
+from nanobot.cron.service import CronService
+from nanobot.cron.store import CronDB, CronRun
+from nanobot.cron.types import CronSchedule
+
+
+def test_migrates_legacy_json(tmp_path) -> None:
+    legacy = tmp_path / "jobs.json"
+    legacy.write_text(json.dumps({"version": 1, "jobs": [{
+        "id": "old1",
+        "name": "daily",
+        "schedule": {"kind": "cron", "expr": "0 9 * * *"},
+        "payload": {"message": "report"},
+        "state": {"nextRunAtMs": 123},
+    }]}))
+
+    service = CronService(tmp_path / "jobs.db")
+    jobs = service.list_jobs()
+
+    assert [j.id for j in jobs] == ["old1"]
+    assert jobs[0].schedule.expr == "0 9 * * *"
+    assert not legacy.exists()
+    assert (tmp_path / "jobs.json.migrated").exists()
+
+
+def test_changes_are_written_per_job(tmp_path) -> None:
+    service = CronService(tmp_path / "jobs.db")
+    a = service.add_job("a", CronSchedule(kind="every", every_ms=1000), "hi")
+    b = service.add_job("b", CronSchedule(kind="every", every_ms=2000), "hi")
+    service.enable_job(a.id, enabled=False)
+
+    reloaded = CronService(tmp_path / "jobs.db")
+    assert [j.id for j in reloaded.list_jobs()] == [b.id]
+    assert {j.id: j.enabled for j in reloaded.list_jobs(include_disabled=True)} == {a.id: False, b.id: True}
+
+
+@pytest.mark.asyncio
+async def test_runs_are_recorded_in_history(tmp_path) -> None:
+    async def on_job(job):
+        raise RuntimeError("boom")
+
+    service = CronService(tmp_path / "jobs.db", on_job=on_job)
+    job = service.add_job("a", CronSchedule(kind="every", every_ms=60_000), "hi")
+    await service.run_job(job.id)
+
+    runs = service.history(job.id)
+    assert len(runs) == 1
+    assert runs[0].status == "error"
+    assert runs[0].error == "boom"
+    assert runs[0].duration_ms >= 0
+
+
+def test_history_is_trimmed_per_job(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(cron_store, "HISTORY_PER_JOB", 3)
+    db = CronDB(tmp_path / "jobs.db")
+    for i in range(5):
+        db.record_run(CronRun("a", i, 1, "ok"))
+    db.record_run(CronRun("b", 99, 1, "ok"))
+
+    assert [r.started_at_ms for r in db.history("a")] == [4, 3, 2]
+    assert len(db.history()) == 4
@@ -0,0 +1,181 @@
+import asyncio
+import json
+import time
+import zlib
+
+import httpx
+import pytest
+import websockets
+
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels import discord
+from nanobot.channels.discord import DiscordChannel, RestRateLimiter
+from nanobot.config.schema import DiscordConfig
+
+
+class FakeGateway:
+    """A gateway that drops the first connection after one event and expects a RESUME."""
+
+    def __init__(self, heartbeat_ms: int = 45000):
+        self.heartbeat_ms = heartbeat_ms
+        self.handshakes: list[dict] = []
+        self.paths: list[str] = []
+        self.heartbeats = 0
+        self.url = ""
+
+    async def handler(self, ws) -> None:
+        self.paths.append(ws.request.path)
+        deflate = zlib.compressobj() if "compress=zlib-stream" in ws.request.path else None
+
+        async def send(data: dict) -> None:
+            raw = json.dumps(data)
+            if deflate:
+                await ws.send(deflate.compress(raw.encode()) + deflate.flush(zlib.Z_SYNC_FLUSH))
+            else:
+                await ws.send(raw)
+
+        await send({"op": 10, "d": {"heartbeat_interval": self.heartbeat_ms}})
+        async for raw in ws:
+            data = json.loads(raw)
+            if data["op"] == 1:
+                self.heartbeats += 1
+                await send({"op": 11})
+            elif data["op"] in (2, 6):
+                self.handshakes.append(data)
+                if data["op"] == 2:
+                    await send({"op": 0, "t": "READY", "s": 1, "d": {
+                        "session_id": "sess-1", "resume_gateway_url": f"{self.url}/resume",
+                    }})
+                    await send({"op": 0, "t": "MESSAGE_CREATE", "s": 2, "d": _message("m1", "c1")})
+                    await ws.close(code=4000)  # Drop the connection; the session stays resumable
+                    return
+                # Replay what was missed since the client's seq
+                await send({"op": 0, "t": "RESUMED", "s": 3, "d": None})
+                await send({"op": 0, "t": "MESSAGE_CREATE", "s": 4, "d": _message("m2", "c1")})
+
+
+def _message(message_id: str, channel_id: str) -> dict:
+    return {
+        "id": message_id,
+        "channel_id": channel_id,
+        "content": f"hello {message_id}",
+        "author": {"id": "u1"},
+    }
+
+
+@pytest.fixture(autouse=True)
+def _fast_resume(monkeypatch):
+    monkeypatch.setattr(discord, "RESUME_DELAY_S", 0.01)
+
+
+async def _run(gateway: FakeGateway, compress: bool) -> tuple[DiscordChannel, list]:
+    async with websockets.serve(gateway.handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        gateway.url = f"ws://127.0.0.1:{port}"
+        config = DiscordConfig(token="t", gateway_url=f"{gateway.url}/?v=10&encoding=json", compress=compress)
+        channel = DiscordChannel(config, MessageBus())
+        channel._start_typing = lambda _channel_id: asyncio.sleep(0)
+        task = asyncio.create_task(channel.start())
+        received = [await asyncio.wait_for(channel.bus.consume_inbound(), 5) for _ in range(2)]
+        await channel.stop()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    return channel, received
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compress", [False, True])
+async def test_dropped_connection_resumes_session(compress) -> None:
+    gateway = FakeGateway()
+    _, received = await _run(gateway, compress)
+
+    assert [m.metadata["message_id"] for m in received] == ["m1", "m2"]
+    assert [h["op"] for h in gateway.handshakes] == [2, 6]
+    assert gateway.handshakes[1]["d"] == {"token": "t", "session_id": "sess-1", "seq": 2}
+    assert gateway.paths[1].startswith("/resume?")
+    assert all(("compress=zlib-stream" in p) == compress for p in gateway.paths)
+
+
+@pytest.mark.asyncio
+async def test_slow_handler_does_not_block_the_reader() -> None:
+    channel = DiscordChannel(DiscordConfig(token="t"), MessageBus())
+    order: list[str] = []
+
+    async def slow_handle(payload: dict) -> None:
+        order.append(f"start {payload['id']}")
+        await asyncio.sleep(0.2 if payload["id"] == "a1" else 0)
+        order.append(f"end {payload['id']}")
+
+    channel._handle_message_create = slow_handle
+    start = time.perf_counter()
+    for message_id, channel_id in (("a1", "A"), ("a2", "A"), ("b1", "B")):
+        channel._dispatch(_message(message_id, channel_id))
+    assert time.perf_counter() - start < 0.05  # The reader never waits on a handler
+    await asyncio.sleep(0.3)
+
+    # Other channels run concurrently; one channel keeps its order
+    assert order.index("end b1") < order.index("end a1")
+    assert order.index("end a1") < order.index("start a2")
+
+
+def _limited_transport(calls: list[float], responses: list[httpx.Response]) -> httpx.MockTransport:
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(time.monotonic())
+        return responses.pop(0)
+
+    return httpx.MockTransport(handler)
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_waits_for_bucket_reset_before_sending() -> None:
+    calls: list[float] = []
+    headers = {"X-RateLimit-Bucket": "abc", "X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "0.2"}
+    responses = [httpx.Response(200, headers=headers), httpx.Response(200), httpx.Response(200)]
+    limiter = RestRateLimiter()
+    async with httpx.AsyncClient(transport=_limited_transport(calls, responses)) as client:
+        await limiter.request(client, "POST", "messages", "c1", "https://x/c1")
+        await asyncio.gather(
+            limiter.request(client, "POST", "messages", "c1", "https://x/c1"),
+            limiter.request(client, "POST", "messages", "c2", "https://x/c2"),
+        )
+
+    assert len(calls) == 3
+    waits = sorted(t - calls[0] for t in calls[1:])
+    assert waits[0] < 0.1  # Another channel is another bucket
+    assert waits[1] >= 0.19
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_retries_after_429() -> None:
+    calls: list[float] = []
+    responses = [
+        httpx.Response(429, json={"retry_after": 0.1, "global": True}),
+        httpx.Response(200),
+    ]
+    async with httpx.AsyncClient(transport=_limited_transport(calls, responses)) as client:
+        response = await RestRateLimiter().request(client, "POST", "messages", "c1", "https://x/c1")
+
+    assert response.status_code == 200
+    assert calls[1] - calls[0] >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_long_reply_is_split_and_only_the_first_part_replies() -> None:
+    posted: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        posted.append(json.loads(request.content))
+        return httpx.Response(200)
+
+    channel = DiscordChannel(DiscordConfig(token="t"), MessageBus())
+    channel._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    content = "\n\n".join(f"paragraph {i} " + " ".join(["word"] * 60) for i in range(20))
+    await channel.send(OutboundMessage(channel="discord", chat_id="c1", content=content, reply_to="m1"))
+    await channel._http.aclose()
+
+    assert len(posted) > 1
+    assert all(len(p["content"]) <= 2000 for p in posted)
+    assert posted[0]["message_reference"] == {"message_id": "m1"}
+    assert all("message_reference" not in p for p in posted[1:])
+    assert "\n\n".join(p["content"] for p in posted) == content
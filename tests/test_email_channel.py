@@ -39,12 +39,13 @@ def _make_raw_email(
     return msg.as_bytes()
 
 
-def test_fetch_new_messages_parses_unseen_and_marks_seen(monkeypatch) -> None:
+def test_fetch_new_messages_parses_unseen_and_marks_seen(monkeypatch, tmp_path) -> None:
     raw = _make_raw_email(subject="Invoice", body="Please pay")
 
     class FakeIMAP:
         def __init__(self) -> None:
-            self.store_calls: list[tuple[bytes, str, str]] = []
+            self.search_calls: list[tuple] = []
+            self.store_calls: list[tuple[str, str, str]] = []
 
         def login(self, _user: str, _pw: str):
             return "OK", [b"logged in"]
@@ -52,15 +53,20 @@ def test_fetch_new_messages_parses_unseen_and_marks_seen(monkeypatch) -> None:
         def select(self, _mailbox: str):
             return "OK", [b"1"]
 
-        def search(self, *_args):
-            return "OK", [b"1"]
-
-        def fetch(self, _imap_id: bytes, _parts: str):
-            return "OK", [(b"1 (UID 123 BODY[] {200})", raw), b")"]
-
-        def store(self, imap_id: bytes, op: str, flags: str):
-            self.store_calls.append((imap_id, op, flags))
-            return "OK", [b""]
+        def response(self, code: str):
+            return code, [b"7" if code == "UIDVALIDITY" else b"124"]
+
+        def uid(self, command: str, *args):
+            if command == "SEARCH":
+                self.search_calls.append(args)
+                # "124:*" still matches the newest message
+                return "OK", [b"123"]
+            if command == "FETCH":
+                return "OK", [(b"1 (UID 123 BODY[] {200})", raw), b")"]
+            if command == "STORE":
+                self.store_calls.append(args)
+                return "OK", [b""]
+            raise AssertionError(command)
 
         def logout(self):
             return "BYE", [b""]
@@ -69,17 +75,24 @@ def test_fetch_new_messages_parses_unseen_and_marks_seen(monkeypatch) -> None:
     monkeypatch.setattr("nanobot.channels.email.imaplib.IMAP4_SSL", lambda _h, _p: fake)
 
     channel = EmailChannel(_make_config(), MessageBus())
+    channel._cursor_path = tmp_path / "cursor.json"
     items = channel._fetch_new_messages()
 
     assert len(items) == 1
     assert items[0]["sender"] == "alice@example.com"
     assert items[0]["subject"] == "Invoice"
+    assert items[0]["metadata"]["uid"] == "123"
     assert "Please pay" in items[0]["content"]
-    assert fake.store_calls == [(b"1", "+FLAGS", "\\Seen")]
+    assert fake.store_calls == [("123", "+FLAGS", "\\Seen")]
 
-    # Same UID should be deduped in-process.
+    # The persisted cursor skips the same UID, in this process and the next
     items_again = channel._fetch_new_messages()
     assert items_again == []
+    assert fake.search_calls[-1] == ("UNSEEN", "UID", "124:*")
+
+    restarted = EmailChannel(_make_config(), MessageBus())
+    restarted._cursor_path = tmp_path / "cursor.json"
+    assert restarted._fetch_new_messages() == []
 
 
 def test_extract_text_body_falls_back_to_html() -> None:
@@ -271,7 +284,7 @@ def test_fetch_messages_between_dates_uses_imap_since_before_without_mark_seen(m
     class FakeIMAP:
         def __init__(self) -> None:
             self.search_args = None
-            self.store_calls: list[tuple[bytes, str, str]] = []
+            self.store_calls: list[tuple] = []
 
         def login(self, _user: str, _pw: str):
             return "OK", [b"logged in"]
@@ -279,16 +292,19 @@ def test_fetch_messages_between_dates_uses_imap_since_before_without_mark_seen(m
         def select(self, _mailbox: str):
             return "OK", [b"1"]
 
-        def search(self, *_args):
-            self.search_args = _args
-            return "OK", [b"5"]
-
-        def fetch(self, _imap_id: bytes, _parts: str):
-            return "OK", [(b"5 (UID 999 BODY[] {200})", raw), b")"]
+        def response(self, code: str):
+            return code, [None]
 
-        def store(self, imap_id: bytes, op: str, flags: str):
-            self.store_calls.append((imap_id, op, flags))
-            return "OK", [b""]
+        def uid(self, command: str, *args):
+            if command == "SEARCH":
+                self.search_args = args
+                return "OK", [b"999"]
+            if command == "FETCH":
+                return "OK", [(b"5 (UID 999 BODY[] {200})", raw), b")"]
+            if command == "STORE":
+                self.store_calls.append(args)
+                return "OK", [b""]
+            raise AssertionError(command)
 
         def logout(self):
             return "BYE", [b""]
@@ -305,7 +321,5 @@ def test_fetch_messages_between_dates_uses_imap_since_before_without_mark_seen(m
 
     assert len(items) == 1
     assert items[0]["subject"] == "Status"
-    # search(None, "SINCE", "06-Feb-2026", "BEFORE", "07-Feb-2026")
-    assert fake.search_args is not None
-    assert fake.search_args[1:] == ("SINCE", "06-Feb-2026", "BEFORE", "07-Feb-2026")
+    assert fake.search_args == ("SINCE", "06-Feb-2026", "BEFORE", "07-Feb-2026")
     assert fake.store_calls == []
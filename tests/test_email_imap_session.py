@@ -0,0 +1,252 @@
+"""EmailChannel against small in-process IMAP and SMTP servers: session reuse, IDLE, UID cursor."""
+
+import asyncio
+import re
+import socket
+import socketserver
+import threading
+import time
+from email.message import EmailMessage
+
+import pytest
+
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.email import EmailChannel
+from nanobot.config.schema import EmailConfig
+
+
+def _raw(uid: int) -> bytes:
+    msg = EmailMessage()
+    msg["From"] = "alice@example.com"
+    msg["To"] = "bot@example.com"
+    msg["Subject"] = f"Message {uid}"
+    msg["Message-ID"] = f"<m{uid}@example.com>"
+    msg.set_content(f"Body {uid}")
+    return msg.as_bytes()
+
+
+class Mailbox:
+    def __init__(self) -> None:
+        self.messages: dict[int, bytes] = {}
+        self.seen: set[int] = set()
+        self.uidvalidity = 7
+        self.logins = 0
+        self.commands: list[str] = []
+        self.idling: list[socketserver.StreamRequestHandler] = []
+        self.exists_with_idle = False  # Send an EXISTS in the same write as the IDLE continuation
+        self.lock = threading.Lock()
+
+    def deliver(self, uid: int) -> None:
+        with self.lock:
+            self.messages[uid] = _raw(uid)
+            for handler in self.idling:
+                handler.wfile.write(f"* {len(self.messages)} EXISTS\r\n".encode())
+
+
+class IMAPHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        box: Mailbox = self.server.mailbox
+        self.wfile.write(b"* OK [CAPABILITY IMAP4rev1 IDLE] ready\r\n")
+        while line := self.rfile.readline():
+            tag, command, *rest = line.decode().rstrip("\r\n").split(" ", 2)
+            args = rest[0] if rest else ""
+            command = command.upper()
+            box.commands.append(f"{command} {args}".strip())
+            if command == "CAPABILITY":
+                self._ok(tag, "* CAPABILITY IMAP4rev1 IDLE")
+            elif command == "LOGIN":
+                box.logins += 1
+                self._ok(tag)
+            elif command == "SELECT":
+                with box.lock:
+                    self._ok(
+                        tag,
+                        f"* {len(box.messages)} EXISTS",
+                        f"* OK [UIDVALIDITY {box.uidvalidity}] UIDs valid",
+                        f"* OK [UIDNEXT {max(box.messages, default=0) + 1}] next",
+                        code="[READ-WRITE] ",
+                    )
+            elif command == "UID":
+                self._uid(tag, args, box)
+            elif command == "IDLE":
+                exists = f"* {len(box.messages)} EXISTS\r\n".encode() if box.exists_with_idle else b""
+                self.wfile.write(b"+ idling\r\n" + exists)
+                with box.lock:
+                    box.idling.append(self)
+                self.rfile.readline()  # DONE
+                with box.lock:
+                    box.idling.remove(self)
+                self._ok(tag)
+            elif command == "LOGOUT":
+                self.wfile.write(b"* BYE\r\n")
+                self._ok(tag)
+                return
+            else:
+                self._ok(tag)
+
+    def _uid(self, tag: str, args: str, box: Mailbox) -> None:
+        sub, rest = args.split(" ", 1)
+        sub = sub.upper()
+        with box.lock:
+            if sub == "SEARCH":
+                uids = [u for u in sorted(box.messages) if u not in box.seen]
+                if m := re.search(r"UID (\d+):\*", rest):
+                    low = int(m.group(1))
+                    uids = [u for u in uids if u >= low] or [u for u in [max(box.messages, default=0)] if u]
+                self._ok(tag, "* SEARCH " + " ".join(map(str, uids)))
+            elif sub == "FETCH":
+                for seq, uid in enumerate(int(u) for u in rest.split(" ", 1)[0].split(",")):
+                    data = box.messages[uid]
+                    self.wfile.write(f"* {seq + 1} FETCH (UID {uid} BODY[] {{{len(data)}}}\r\n".encode() + data + b")\r\n")
+                self._ok(tag)
+            elif sub == "STORE":
+                box.seen.update(int(u) for u in rest.split(" ", 1)[0].split(","))
+                self._ok(tag)
+
+    def _ok(self, tag: str, *untagged: str, code: str = "") -> None:
+        for line in untagged:
+            self.wfile.write(f"{line}\r\n".encode())
+        self.wfile.write(f"{tag} OK {code}done\r\n".encode())
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        self.server.connections.append(self.request)
+        self.wfile.write(b"220 ready\r\n")
+        while line := self.rfile.readline():
+            verb = line[:4].upper()
+            if verb == b"EHLO":
+                self.wfile.write(b"250-localhost\r\n250 AUTH PLAIN LOGIN\r\n")
+            elif verb == b"AUTH":
+                self.wfile.write(b"235 ok\r\n")
+            elif verb == b"DATA":
+                self.wfile.write(b"354 go\r\n")
+                while self.rfile.readline() != b".\r\n":
+                    pass
+                self.server.sent += 1
+                self.wfile.write(b"250 queued\r\n")
+            elif verb == b"QUIT":
+                self.wfile.write(b"221 bye\r\n")
+                return
+            else:
+                self.wfile.write(b"250 ok\r\n")
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+@pytest.fixture
+def servers():
+    imap = Server(("127.0.0.1", 0), IMAPHandler)
+    imap.mailbox = Mailbox()
+    smtp = Server(("127.0.0.1", 0), SMTPHandler)
+    smtp.connections, smtp.sent = [], 0
+    for server in (imap, smtp):
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield imap, smtp
+    for server in (imap, smtp):
+        server.shutdown()
+        server.server_close()
+
+
+def _channel(imap, smtp, tmp_path) -> EmailChannel:
+    config = EmailConfig(
+        enabled=True,
+        consent_granted=True,
+        imap_host="127.0.0.1",
+        imap_port=imap.server_address[1],
+        imap_username="bot@example.com",
+        imap_password="secret",
+        imap_use_ssl=False,
+        smtp_host="127.0.0.1",
+        smtp_port=smtp.server_address[1],
+        smtp_username="bot@example.com",
+        smtp_password="secret",
+        smtp_use_tls=False,
+        smtp_use_ssl=False,
+        from_address="bot@example.com",
+    )
+    channel = EmailChannel(config, MessageBus())
+    channel._cursor_path = tmp_path / "cursor.json"
+    return channel
+
+
+@pytest.mark.asyncio
+async def test_idle_delivers_new_mail_on_one_session(servers, tmp_path) -> None:
+    imap, smtp = servers
+    box: Mailbox = imap.mailbox
+    box.deliver(1)
+    channel = _channel(imap, smtp, tmp_path)
+    task = asyncio.create_task(channel.start())
+
+    first = await asyncio.wait_for(channel.bus.consume_inbound(), 5)
+    assert "Message 1" in first.content
+    for _ in range(100):
+        if box.idling:
+            break
+        await asyncio.sleep(0.02)
+    assert box.idling
+
+    box.deliver(2)
+    second = await asyncio.wait_for(channel.bus.consume_inbound(), 5)
+    assert "Message 2" in second.content
+    assert second.metadata["uid"] == "2"
+
+    await channel.stop()
+    await asyncio.wait_for(task, 5)
+    assert box.logins == 1
+    assert box.seen == {1, 2}
+    assert "UID SEARCH UNSEEN UID 2:*" in box.commands
+
+
+def test_idle_sees_mail_buffered_with_the_continuation(servers, tmp_path) -> None:
+    imap, smtp = servers
+    box: Mailbox = imap.mailbox
+    box.exists_with_idle = True
+    channel = _channel(imap, smtp, tmp_path)
+    channel._running = True
+    channel._imap_session()
+
+    started = time.monotonic()
+    assert channel._idle(timeout=5)
+    assert time.monotonic() - started < 1
+    channel._close_imap()
+
+
+def test_uidvalidity_change_resets_cursor(servers, tmp_path) -> None:
+    imap, smtp = servers
+    box: Mailbox = imap.mailbox
+    box.deliver(5)
+    channel = _channel(imap, smtp, tmp_path)
+    channel.config.mark_seen = False
+    assert [i["metadata"]["uid"] for i in channel._fetch_new_messages()] == ["5"]
+    assert channel._fetch_new_messages() == []
+
+    channel._close_imap()
+    box.uidvalidity = 8  # Mailbox was rebuilt; old UIDs mean nothing
+    assert [i["metadata"]["uid"] for i in channel._fetch_new_messages()] == ["5"]
+    channel._close_imap()
+
+
+@pytest.mark.asyncio
+async def test_smtp_connection_is_reused(servers, tmp_path) -> None:
+    imap, smtp = servers
+    channel = _channel(imap, smtp, tmp_path)
+    for text in ("one", "two", "three"):
+        await channel.send(
+            OutboundMessage(channel="email", chat_id="alice@example.com", content=text, metadata={"force_send": True})
+        )
+    assert smtp.sent == 3
+    assert len(smtp.connections) == 1
+
+    # A connection the server dropped is reopened once, transparently
+    smtp.connections[0].shutdown(socket.SHUT_RDWR)
+    await channel.send(
+        OutboundMessage(channel="email", chat_id="alice@example.com", content="four", metadata={"force_send": True})
+    )
+    assert smtp.sent == 4
+    assert len(smtp.connections) == 2
+    await channel.stop()
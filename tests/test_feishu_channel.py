@@ -0,0 +1,71 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.feishu import FeishuChannel
+from nanobot.config.schema import FeishuConfig
+
+
+class FakeMessageApi:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.sent: list[tuple[str, dict]] = []
+        self.threads: set[int] = set()
+
+    def create(self, request):
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)  # The real SDK blocks on HTTPS
+        body = request.request_body
+        self.sent.append((body.receive_id, json.loads(body.content)))
+        return SimpleNamespace(success=lambda: True)
+
+
+def _channel(delay: float = 0.1) -> tuple[FeishuChannel, FakeMessageApi]:
+    channel = FeishuChannel(FeishuConfig(app_id="a", app_secret="s", sdk_workers=4), MessageBus())
+    api = FakeMessageApi(delay)
+    channel._client = SimpleNamespace(im=SimpleNamespace(v1=SimpleNamespace(message=api)))
+    channel._loop_thread = threading.get_ident()
+    return channel, api
+
+
+@pytest.mark.asyncio
+async def test_send_never_blocks_the_loop() -> None:
+    channel, api = _channel(delay=0.1)
+
+    start = time.perf_counter()
+    for chat in ("ou_1", "ou_2", "ou_3"):
+        await channel.send(OutboundMessage(channel="feishu", chat_id=chat, content="## Done\nall good"))
+    queued = time.perf_counter() - start
+    await channel.stop()
+    total = time.perf_counter() - start
+
+    assert queued < 0.05
+    assert total < 0.25  # Three chats in parallel, not 0.3s in series
+    assert threading.get_ident() not in api.threads
+    card = api.sent[0][1]
+    assert card["elements"][0]["text"]["content"] == "**Done**"
+
+
+@pytest.mark.asyncio
+async def test_messages_to_one_chat_keep_their_order() -> None:
+    channel, api = _channel(delay=0.01)
+
+    for i in range(5):
+        await channel.send(OutboundMessage(channel="feishu", chat_id="oc_group", content=f"part {i}"))
+    await channel.stop()
+
+    assert [card["elements"][0]["content"] for _, card in api.sent] == [f"part {i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_sdk_call_on_loop_thread_is_refused() -> None:
+    channel, _ = _channel()
+
+    with pytest.raises(RuntimeError):
+        channel._off_loop(lambda: None)
+    assert await channel._call("noop", lambda: 42) == 42
@@ -0,0 +1,80 @@
+import time
+
+import pytest
+
+from nanobot.heartbeat.service import HeartbeatService, _parse_tasks
+
+
+def _service(tmp_path, replies: list[str]) -> tuple[HeartbeatService, list[str]]:
+    prompts: list[str] = []
+
+    async def on_heartbeat(prompt: str) -> str:
+        prompts.append(prompt)
+        return replies.pop(0) if replies else "HEARTBEAT_OK"
+
+    service = HeartbeatService(tmp_path, on_heartbeat=on_heartbeat, interval_s=60, max_interval_s=240)
+    return service, prompts
+
+
+def test_parse_tasks_reads_due_times() -> None:
+    tasks = _parse_tasks("# Tasks\n- [ ]\n- check inbox\n- renew cert 2026-03-01 09:00\n")
+    assert [t.text for t in tasks] == ["- check inbox", "- renew cert 2026-03-01 09:00"]
+    assert tasks[0].due_at is None
+    assert tasks[1].due_at is not None
+
+
+@pytest.mark.asyncio
+async def test_unchanged_file_skips_until_interval(tmp_path) -> None:
+    (tmp_path / "HEARTBEAT.md").write_text("- check inbox\n")
+    service, prompts = _service(tmp_path, [])
+    service._baseline(time.time())
+
+    await service._tick()
+    assert prompts == []  # Nothing changed since start
+
+    (tmp_path / "HEARTBEAT.md").write_text("- check inbox\n- water plants\n")
+    await service._tick()
+    await service._tick()
+    assert len(prompts) == 1  # Edit wakes the agent once
+
+    service._last_run -= 61
+    await service._tick()
+    assert len(prompts) == 2
+    assert service._interval == 120  # HEARTBEAT_OK on a routine check backs off
+
+
+@pytest.mark.asyncio
+async def test_dated_task_fires_once_when_due(tmp_path, monkeypatch) -> None:
+    (tmp_path / "HEARTBEAT.md").write_text("- renew cert 2099-01-01\n")
+    service, prompts = _service(tmp_path, ["Renewed."])
+    service._baseline(time.time())
+
+    await service._tick()
+    assert prompts == []  # Not due yet, and no undated tasks to check periodically
+
+    later = time.time() + 100 * 365 * 86400
+    monkeypatch.setattr("nanobot.heartbeat.service.time.time", lambda: later)
+    await service._tick()
+    await service._tick()
+    assert len(prompts) == 1
+    assert service._interval == 60  # Action taken: no backoff
+
+
+@pytest.mark.asyncio
+async def test_agent_edits_do_not_wake_it_again(tmp_path) -> None:
+    heartbeat = tmp_path / "HEARTBEAT.md"
+    heartbeat.write_text("- check inbox\n")
+    prompts: list[str] = []
+
+    async def on_heartbeat(prompt: str) -> str:
+        prompts.append(prompt)
+        heartbeat.write_text("- [x] check inbox\n- reply to Bob\n")  # The agent updates its task list
+        return "Done."
+
+    service = HeartbeatService(tmp_path, on_heartbeat=on_heartbeat, interval_s=60)
+    service._baseline(time.time())
+    heartbeat.write_text("- check inbox\n- reply to Bob\n")
+    await service._tick()
+    await service._tick()
+
+    assert len(prompts) == 1
@@ -0,0 +1,72 @@
+import base64
+import io
+import os
+
+import pytest
+
+from nanobot.agent.context import ContextBuilder
+from nanobot.agent.images import ImagePreparer, max_edge_for_model
+
+
+def test_max_edge_for_model() -> None:
+    assert max_edge_for_model("anthropic/claude-opus-4-5") == 1568
+    assert max_edge_for_model("gemini/gemini-2.0-flash") == 3072
+    assert max_edge_for_model(None) == 1568
+
+
+def test_data_url_is_cached_until_file_changes(tmp_path, monkeypatch) -> None:
+    img = tmp_path / "a.png"
+    img.write_bytes(b"\x89PNG fake")
+    prep = ImagePreparer()
+    monkeypatch.setattr("nanobot.agent.images.PIL_AVAILABLE", False)
+
+    first = prep.data_url(img)
+    assert first.startswith("data:image/png;base64,")
+    mtime = os.stat(img).st_mtime_ns
+    img.write_bytes(b"\x89PNG fak2")  # Same size and mtime: cache hit
+    os.utime(img, ns=(mtime, mtime))
+    assert prep.data_url(img) == first
+
+    os.utime(img, ns=(mtime, mtime + 10**9))
+    assert prep.data_url(img) != first
+    assert prep.data_url(tmp_path / "notes.txt") is None
+    assert prep.data_url(tmp_path / "missing.jpg") is None
+
+
+@pytest.mark.asyncio
+async def test_prepare_media_warms_build_messages(tmp_path) -> None:
+    img = tmp_path / "photo.jpg"
+    img.write_bytes(b"\xff\xd8\xff fake jpeg")
+    ctx = ContextBuilder(tmp_path, model="anthropic/claude-opus-4-5")
+
+    await ctx.prepare_media([str(img)])
+    assert len(ctx.images._cache) == 1
+
+    messages = ctx.build_messages([], "what is this?", media=[str(img)])
+    content = messages[-1]["content"]
+    assert content[0]["type"] == "image_url"
+    assert content[-1] == {"type": "text", "text": "what is this?"}
+
+
+def test_large_image_is_downscaled(tmp_path) -> None:
+    pil_image = pytest.importorskip("PIL.Image")
+    img = tmp_path / "big.png"
+    pil_image.new("RGB", (4000, 3000), (200, 10, 10)).save(img)
+
+    url = ImagePreparer().data_url(img, max_edge=1000)
+
+    header, b64 = url.split(",", 1)
+    assert header == "data:image/jpeg;base64"
+    with pil_image.open(io.BytesIO(base64.b64decode(b64))) as out:
+        assert max(out.size) == 1000
+
+
+def test_cache_is_bounded_by_bytes(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("nanobot.agent.images.PIL_AVAILABLE", False)
+    prep = ImagePreparer(max_bytes=3000)
+    for i in range(5):
+        (tmp_path / f"{i}.png").write_bytes(bytes(1000))
+        prep.data_url(tmp_path / f"{i}.png")
+
+    assert prep._cache_bytes <= 3000
+    assert len(prep._cache) == 2  # Each URL is ~1.4KB of base64
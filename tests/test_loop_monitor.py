@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+import pytest
+
+from nanobot.metrics.loop import LoopBlockedError, LoopMonitor, assert_no_blocking, summarize_lag
+from nanobot.metrics.registry import METRICS
+
+
+def _block(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_monitor_captures_blocking_stack() -> None:
+    monitor = LoopMonitor(interval_s=0.01, slow_s=0.05)
+    await monitor.start()
+    await asyncio.sleep(0.03)
+    _block(0.2)
+    await asyncio.sleep(0.03)
+    monitor.stop()
+
+    assert monitor.samples > 1
+    stall = monitor.stalls[-1]
+    assert stall.blocked_s >= 0.15
+    assert "_block" in stall.stack
+    assert monitor.report()["max_lag_ms"] >= 150
+
+
+@pytest.mark.asyncio
+async def test_assert_no_blocking() -> None:
+    async with assert_no_blocking(50):
+        await asyncio.sleep(0.05)
+
+    with pytest.raises(LoopBlockedError, match="_block"):
+        async with assert_no_blocking(50):
+            await asyncio.sleep(0.01)
+            _block(0.15)
+
+
+def test_summarize_lag_from_exposition() -> None:
+    METRICS.histogram("nanobot_loop_lag_seconds", "").observe(0.0005)
+    summary = summarize_lag(METRICS.render())
+
+    assert summary["samples"] >= 1
+    assert summary["p99_ms"] > 0
+    assert summarize_lag("") is None
@@ -0,0 +1,103 @@
+import re
+
+import pytest
+
+from nanobot.channels.markdown import (
+    DiscordRenderer,
+    FeishuCardRenderer,
+    PlainTextRenderer,
+    SlackRenderer,
+    TelegramRenderer,
+    parse,
+)
+
+REPLY = """# Report
+
+Some **bold _nested_** text, `a<b` and [docs](https://x.dev/?a=1&b=2) in some_var_name.
+
+- first
+- second ~~gone~~
+
+> quoted
+
+| name | state |
+|------|-------|
+| api | **up** |
+
+```py
+if a < b:
+    pass
+```"""
+
+
+def test_telegram_html() -> None:
+    html = TelegramRenderer().render(parse(REPLY))
+    assert html.startswith("<b>Report</b>\n\n")
+    assert "<b>bold <i>nested</i></b>" in html
+    assert "<code>a&lt;b</code>" in html
+    assert '<a href="https://x.dev/?a=1&amp;b=2">docs</a>' in html
+    assert "some_var_name" in html
+    assert "• second <s>gone</s>" in html
+    assert "<blockquote>quoted</blockquote>" in html
+    assert "<pre>name | state\n-----+------\napi  | up</pre>" in html
+    assert '<pre><code class="language-py">if a &lt; b:\n    pass</code></pre>' in html
+
+
+def test_slack_mrkdwn() -> None:
+    text = SlackRenderer().render(parse(REPLY))
+    assert text.startswith("*Report*\n\n")
+    assert "*bold _nested_*" in text
+    assert "<https://x.dev/?a=1&b=2|docs>" in text
+    assert "*name*: api · *state*: *up*" in text
+    assert "```\nif a &lt; b:\n    pass\n```" in text
+
+
+def test_plain_text_drops_markup() -> None:
+    text = PlainTextRenderer().render(parse(REPLY))
+    assert "Some bold nested text, a<b and docs (https://x.dev/?a=1&b=2)" in text
+    assert "*" not in text and "`" not in text
+
+
+def test_feishu_card_elements() -> None:
+    content = "intro\n\n## Title\n\n```\n# not a heading\n```\n\n| a | b |\n|---|---|\n| 1 | **2** |\n\noutro"
+    elements = FeishuCardRenderer().elements(parse(content))
+
+    assert [e["tag"] for e in elements] == ["markdown", "div", "markdown", "table", "markdown"]
+    assert elements[1]["text"]["content"] == "**Title**"
+    assert elements[2]["content"] == "```\n# not a heading\n```"
+    assert elements[3]["rows"] == [{"c0": "1", "c1": "2"}]
+    assert elements[4]["content"] == "outro"
+
+
+def test_parse_is_cached_per_text() -> None:
+    assert parse(REPLY) is parse(REPLY)
+
+
+def _balanced(html: str) -> bool:
+    return all(html.count(f"<{tag}>") + html.count(f"<{tag} ") == html.count(f"</{tag}>") for tag in ("b", "pre", "code"))
+
+
+@pytest.mark.parametrize("renderer", [TelegramRenderer(), DiscordRenderer()])
+def test_split_respects_limit_without_breaking_markup(renderer) -> None:
+    text = (
+        "intro " + "**bold words** " * 400
+        + "\n\n```\n" + "\n".join(f"line {i} <x>" for i in range(600)) + "\n```\n\n"
+        + "| k | v |\n|---|---|\n" + "\n".join(f"| r{i} | v&{i} |" for i in range(500)) + "\n\n"
+        + "- " + "x" * 9000
+    )
+    chunks = renderer.chunks(text)
+
+    assert all(len(chunk) <= renderer.limit for chunk in chunks)
+    assert all(chunk.count("```") % 2 == 0 for chunk in chunks)
+    if isinstance(renderer, TelegramRenderer):
+        assert all(_balanced(chunk) for chunk in chunks)
+    # Pieces are packed close to the limit rather than halved
+    assert len(chunks) <= len("".join(chunks)) // (renderer.limit * 3 // 4) + 2
+    # Every code line survives the cut exactly once
+    numbers = [int(n) for chunk in chunks for n in re.findall(r"line (\d+) ", chunk)]
+    assert numbers == list(range(600))
+
+
+def test_short_reply_is_one_chunk() -> None:
+    assert DiscordRenderer().chunks("hello **there**") == ["hello **there**"]
+    assert DiscordRenderer().chunks("") == []
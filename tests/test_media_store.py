@@ -0,0 +1,95 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from nanobot.channels.media import MediaStore, MediaTooLargeError
+
+
+@pytest.mark.asyncio
+async def test_same_content_is_stored_once(tmp_path) -> None:
+    store = MediaStore(tmp_path)
+
+    a = await store.store_bytes(b"photo", ".jpg", source_id="telegram:a")
+    b = await store.store_bytes(b"photo", ".jpg", source_id="discord:b")
+
+    assert a == b
+    assert [p.name for p in tmp_path.iterdir() if not p.name.startswith(".")] == [a.name]
+    assert await MediaStore(tmp_path).lookup("discord:b") == a  # Index survives restarts
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fetches_share_one_download(tmp_path) -> None:
+    store = MediaStore(tmp_path)
+    calls = 0
+
+    async def loader() -> bytes:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return b"voice"
+
+    paths = await asyncio.gather(*(store.fetch("telegram:v", ".ogg", loader) for _ in range(5)))
+    assert calls == 1
+    assert len(set(paths)) == 1
+
+    await store.fetch("telegram:v", ".ogg", loader)
+    assert calls == 1  # Cache hit
+
+
+@pytest.mark.asyncio
+async def test_size_cap_skips_loader(tmp_path) -> None:
+    store = MediaStore(tmp_path, max_file_bytes=10)
+
+    async def loader() -> bytes:
+        raise AssertionError("should not download")
+
+    with pytest.raises(MediaTooLargeError):
+        await store.fetch("x", ".bin", loader, size_hint=11)
+    with pytest.raises(MediaTooLargeError):
+        await store.store_bytes(b"x" * 11)
+
+
+@pytest.mark.asyncio
+async def test_evict_by_ttl_and_budget(tmp_path) -> None:
+    store = MediaStore(tmp_path, max_total_bytes=10, ttl_s=3600)
+    old = await store.store_bytes(b"o" * 4, source_id="old")
+    mid = await store.store_bytes(b"m" * 4, source_id="mid")
+    new = await store.store_bytes(b"n" * 4, source_id="new")
+    await store.store_bytes(b"n" * 4, source_id="again")  # Same content, no new bytes
+    assert store._bytes == 12  # Running total behind the bytes gauge
+    now = time.time()
+    os.utime(old, (now - 7200, now - 7200))  # Past TTL
+    os.utime(mid, (now - 60, now - 60))
+
+    assert store.evict() == 1
+    assert not old.exists() and mid.exists() and new.exists()
+    assert await store.lookup("old") is None
+
+    store.max_total_bytes = 4
+    assert store.evict() == 1
+    assert not mid.exists() and new.exists()
+    assert store._bytes == 4
+
+    restarted = MediaStore(tmp_path)
+    await restarted.lookup("new")
+    assert restarted._bytes == 4  # Counted from disk on first use
+
+
+@pytest.mark.asyncio
+async def test_transcription_is_cached(tmp_path) -> None:
+    store = MediaStore(tmp_path)
+    path = await store.store_bytes(b"audio", ".ogg")
+
+    class Transcriber:
+        calls = 0
+
+        async def transcribe(self, file_path) -> str:
+            self.calls += 1
+            return "hello"
+
+    t = Transcriber()
+    assert await store.transcribe(path, t) == "hello"
+    assert await MediaStore(tmp_path).transcribe(path, t) == "hello"
+    assert t.calls == 1
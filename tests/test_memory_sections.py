@@ -0,0 +1,68 @@
+from nanobot.agent.memory import MemoryStore, apply_memory_ops, parse_sections, render_sections
+
+MEMORY = """# Long-term Memory
+
+## Profile
+- Name: Ada
+- Lives in Paris
+
+## Projects
+Notes the user asked to keep.
+- nanobot: telegram gateway on a raspberry pi
+"""
+
+
+def test_sections_round_trip() -> None:
+    sections = parse_sections(MEMORY)
+
+    assert [s.title for s in sections] == ["", "Profile", "Projects"]
+    assert sections[2].facts == ["nanobot: telegram gateway on a raspberry pi"]
+    assert render_sections(sections) == MEMORY
+
+
+def test_apply_ops() -> None:
+    sections = parse_sections(MEMORY)
+    changed = apply_memory_ops(sections, [
+        {"op": "update", "section": "profile", "old": "lives in  paris", "fact": "Lives in Berlin"},
+        {"op": "delete", "section": "Projects", "fact": "nanobot: telegram gateway on a raspberry pi"},
+        {"op": "add", "section": "Profile", "fact": "Name: Ada"},  # Duplicate
+        {"op": "add", "section": "Preferences", "fact": "Prefers short answers"},
+        {"op": "delete", "section": "Profile", "fact": "not there"},
+        "garbage",
+    ])
+    text = render_sections(sections)
+
+    assert changed == 3
+    assert "- Lives in Berlin" in text and "Paris" not in text
+    assert "## Projects\nNotes the user asked to keep." in text
+    assert text.endswith("## Preferences\n- Prefers short answers\n")
+
+
+def test_delete_last_fact_removes_section() -> None:
+    sections = parse_sections("## Todo\n- buy milk\n")
+    apply_memory_ops(sections, [{"op": "delete", "section": "Todo", "fact": "buy milk"}])
+
+    assert sections == []
+
+
+def test_memory_context_keeps_relevant_sections(tmp_path) -> None:
+    store = MemoryStore(tmp_path)
+    filler = "\n".join(f"- unrelated fact number {i}" for i in range(40))
+    store.write_long_term(f"## Profile\n- Name: Ada\n\n## Archive\n{filler}\n\n## Garden\n- Tomatoes need water daily\n")
+
+    small = store.get_memory_context("when should I water the tomatoes?", max_chars=200)
+    full = store.get_memory_context("when should I water the tomatoes?", max_chars=10_000)
+
+    assert "Tomatoes need water daily" in small and "Name: Ada" in small
+    assert "unrelated fact" not in small
+    assert "(Not shown, see MEMORY.md: Archive)" in small
+    assert "unrelated fact number 39" in full
+
+
+def test_cjk_keywords_match(tmp_path) -> None:
+    store = MemoryStore(tmp_path)
+    store.write_long_term("## 工作\n- 用户在北京工作\n\n## 爱好\n- 喜欢喝绿茶\n")
+
+    context = store.get_memory_context("我想喝茶", max_chars=30)
+
+    assert "喜欢喝绿茶" in context and "北京" not in context
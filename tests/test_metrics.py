@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from nanobot.metrics import MetricsRegistry, MetricsServer
+
+
+def test_counter_and_gauge_render() -> None:
+    registry = MetricsRegistry()
+    tokens = registry.counter("llm_tokens_total", "Tokens", ("model", "direction"))
+    tokens.inc(10, model="gpt", direction="in")
+    tokens.inc(5, model="gpt", direction="in")
+    depth = registry.gauge("bus_depth", "Depth", ("queue",))
+    depth.set_function(lambda: 3, queue="inbound")
+
+    text = registry.render()
+
+    assert "# TYPE llm_tokens_total counter" in text
+    assert 'llm_tokens_total{model="gpt",direction="in"} 15' in text
+    assert 'bus_depth{queue="inbound"} 3' in text
+
+
+def test_histogram_buckets_are_cumulative() -> None:
+    registry = MetricsRegistry()
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 5.0):
+        latency.observe(value)
+
+    text = registry.render()
+
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 3' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "latency_seconds_count 4" in text
+    assert latency.get_sum() == pytest.approx(6.25)
+
+
+def test_registry_is_get_or_create_and_rejects_conflicts() -> None:
+    registry = MetricsRegistry()
+    a = registry.counter("x_total", "X", ("tool",))
+    assert registry.counter("x_total", "X", ("tool",)) is a
+    with pytest.raises(ValueError):
+        registry.gauge("x_total", "X", ("tool",))
+    with pytest.raises(ValueError):
+        a.inc(model="wrong")
+
+
+@pytest.mark.asyncio
+async def test_metrics_server_serves_text_exposition() -> None:
+    registry = MetricsRegistry()
+    registry.counter("hits_total", "Hits").inc()
+    server = MetricsServer(port=0, registry=registry)
+    await server.start()
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: x\r\nConnection: close\r\n\r\n")
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+    finally:
+        await server.stop()
+
+    head, body = raw.split(b"\r\n\r\n", 1)
+    assert head.startswith(b"HTTP/1.1 200")
+    assert b"hits_total 1" in body
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("length", [b"abc", b"-5"])
+async def test_http_server_rejects_bad_content_length(length) -> None:
+    server = MetricsServer(port=0, registry=MetricsRegistry())
+    await server.start()
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(b"POST /metrics HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\n")
+        await writer.drain()
+        raw = await reader.read()
+        writer.close()
+    finally:
+        await server.stop()
+
+    assert raw.startswith(b"HTTP/1.1 400")
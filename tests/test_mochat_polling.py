@@ -0,0 +1,147 @@
+import asyncio
+import json
+
+import pytest
+
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.mochat import MochatChannel
+from nanobot.config.schema import MochatConfig
+
+
+def _channel(tmp_path, **overrides) -> MochatChannel:
+    config = MochatConfig(
+        claw_token="t", poll_min_interval_ms=100, poll_max_interval_ms=800, reply_delay_mode="off", **overrides,
+    )
+    channel = MochatChannel(config, MessageBus())
+    channel._state_dir = tmp_path
+    channel._cursor_path = tmp_path / "session_cursors.json"
+    channel._cursor_journal_path = tmp_path / "session_cursors.journal"
+    channel._running = True
+    return channel
+
+
+def _panel_message(message_id: str, second: int) -> dict:
+    return {
+        "messageId": message_id, "author": "u1", "content": f"hi {message_id}",
+        "createdAt": f"2026-01-01T00:00:{second:02d}Z",
+    }
+
+
+@pytest.mark.asyncio
+async def test_idle_targets_share_a_few_request_slots_and_back_off(tmp_path) -> None:
+    channel = _channel(tmp_path, fallback_concurrency=4)
+    channel._session_set = {f"session_{i}" for i in range(200)}
+    for sid in channel._session_set:
+        channel._session_cursor[sid] = 1  # Warm sessions with nothing new
+    in_flight = peak = 0
+    calls: list[str] = []
+
+    async def post_json(path: str, payload: dict) -> dict:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        calls.append(payload["sessionId"])
+        await asyncio.sleep(0.002)
+        in_flight -= 1
+        if payload["sessionId"] == "session_0":
+            return {"sessionId": "session_0", "cursor": payload["cursor"] + 1, "events": []}
+        return {"sessionId": payload["sessionId"], "cursor": payload["cursor"], "events": []}
+
+    channel._post_json = post_json
+    await channel._ensure_fallback_poller()
+    await asyncio.sleep(1.0)
+    await channel._stop_fallback_poller()
+
+    assert peak <= 4
+    # Quiet sessions back off (0.1s, 0.2s, 0.4s, 0.8s...); the active one keeps its short interval
+    quiet = calls.count("session_1")
+    assert 2 <= quiet <= 5
+    assert calls.count("session_0") > quiet + 2
+    assert len(calls) < 200 * 6
+
+
+@pytest.mark.asyncio
+async def test_panel_polling_follows_cursor(tmp_path) -> None:
+    channel = _channel(tmp_path)
+    pages = [
+        [_panel_message("old", 1)],  # History at startup is skipped
+        [_panel_message("new", 2), _panel_message("old", 1)],
+        [_panel_message("new", 2), _panel_message("old", 1)],
+    ]
+    requests: list[dict] = []
+
+    async def post_json(path: str, payload: dict) -> dict:
+        requests.append(payload)
+        return {"messages": pages.pop(0), "groupId": ""}
+
+    channel._post_json = post_json
+    assert await channel._poll_panel("p1") is False
+    assert await channel._poll_panel("p1") is True
+    channel._seen_set.clear()  # As after a restart: the cursor alone keeps "new" from repeating
+    assert await channel._poll_panel("p1") is False
+
+    received = []
+    while channel.bus.inbound_size:
+        received.append(await channel.bus.consume_inbound())
+    assert [m.content for m in received] == ["hi new"]
+    assert all(r["limit"] == 10 for r in requests)
+
+
+@pytest.mark.asyncio
+async def test_full_panel_page_widens_the_next_request(tmp_path) -> None:
+    channel = _channel(tmp_path)
+    channel._panel_cursor["p1"] = 0
+    burst = [_panel_message(f"m{i}", 59 - i) for i in range(10)]
+    requests: list[int] = []
+
+    async def post_json(path: str, payload: dict) -> dict:
+        requests.append(payload["limit"])
+        return {"messages": burst, "groupId": ""}
+
+    channel._post_json = post_json
+    await channel._poll_panel("p1")
+    await channel._poll_panel("p1")
+    assert requests == [10, 20]
+    assert channel.bus.inbound_size == 10
+
+
+@pytest.mark.asyncio
+async def test_cursor_journal_appends_changes_and_reloads(tmp_path) -> None:
+    channel = _channel(tmp_path)
+    for i in range(50):
+        channel._session_cursor[f"session_{i}"] = 5
+    channel._mark_session_cursor("session_3", 9)
+    channel._mark_panel_cursor("p1", 1234)
+    await channel._save_session_cursors()
+
+    lines = [json.loads(line) for line in channel._cursor_journal_path.read_text().splitlines()]
+    assert lines == [
+        {"kind": "panel", "id": "p1", "cursor": 1234},
+        {"kind": "session", "id": "session_3", "cursor": 9},
+    ]
+    await channel._save_session_cursors()  # Nothing changed: nothing written
+    assert len(channel._cursor_journal_path.read_text().splitlines()) == 2
+
+    reloaded = _channel(tmp_path)
+    await reloaded._load_session_cursors()
+    assert reloaded._session_cursor == {"session_3": 9}
+    assert reloaded._panel_cursor == {"p1": 1234}
+    if channel._cursor_save_task:
+        channel._cursor_save_task.cancel()
+
+
+@pytest.mark.asyncio
+async def test_cursor_journal_is_compacted_into_the_snapshot(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("nanobot.channels.mochat.CURSOR_JOURNAL_COMPACT_MIN", 4)
+    channel = _channel(tmp_path)
+    for cursor in range(1, 8):
+        channel._mark_session_cursor("session_a", cursor)
+        await channel._save_session_cursors()
+    if channel._cursor_save_task:
+        channel._cursor_save_task.cancel()
+
+    snapshot = json.loads(channel._cursor_path.read_text())
+    assert snapshot["cursors"] == {"session_a": 5}
+    reloaded = _channel(tmp_path)
+    await reloaded._load_session_cursors()
+    assert reloaded._session_cursor == {"session_a": 7}
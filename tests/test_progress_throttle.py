@@ -0,0 +1,110 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from nanobot.agent.progress import ProgressThrottle
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.telegram import TelegramChannel
+from nanobot.config.schema import TelegramConfig
+
+
+@pytest.mark.asyncio
+async def test_burst_of_updates_becomes_two_publishes() -> None:
+    published: list[tuple[str, str]] = []
+
+    async def publish(status: str, latest: str) -> None:
+        published.append((status, latest))
+
+    throttle = ProgressThrottle(publish, interval=0.1)
+    for i in range(10):
+        await throttle.update(f"step {i}")
+    assert published == [("step 0", "step 0")]  # The first goes out at once
+
+    await asyncio.sleep(0.15)
+    throttle.close()
+    assert len(published) == 2
+    status, latest = published[1]
+    assert status.splitlines() == [f"step {i}" for i in range(2, 10)]  # Latest MAX_LINES lines
+    assert latest.splitlines() == [f"step {i}" for i in range(1, 10)]
+
+
+@pytest.mark.asyncio
+async def test_close_drops_the_pending_update() -> None:
+    published: list[str] = []
+
+    async def publish(status: str, latest: str) -> None:
+        published.append(latest)
+
+    throttle = ProgressThrottle(publish, interval=0.05)
+    await throttle.update("a")
+    await throttle.update("b")
+    throttle.close()
+    await asyncio.sleep(0.1)
+    assert published == ["a"]
+
+
+class EditingBot:
+    def __init__(self):
+        self.sent: list[str] = []
+        self.edits: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> SimpleNamespace:
+        self.sent.append(text)
+        return SimpleNamespace(message_id=len(self.sent))
+
+    async def edit_message_text(self, text: str, chat_id: int, message_id: int) -> None:
+        self.edits.append((message_id, text))
+
+    async def send_chat_action(self, **kwargs) -> None:
+        pass
+
+
+def _progress(content: str, progress_id: str = "turn1") -> OutboundMessage:
+    return OutboundMessage(
+        channel="telegram", chat_id="42", content=content,
+        metadata={"_progress": True, "_progress_id": progress_id, "_progress_latest": content.splitlines()[-1]},
+    )
+
+
+@pytest.mark.asyncio
+async def test_telegram_edits_one_status_message_per_turn() -> None:
+    channel = TelegramChannel(TelegramConfig(enabled=True, token="t"), MessageBus())
+    bot = EditingBot()
+    channel._app = SimpleNamespace(bot=bot)
+
+    await channel.send_progress(_progress("read_file(\"a\")"))
+    await channel.send_progress(_progress("read_file(\"a\")\nexec(\"ls\")"))
+    await channel.send(OutboundMessage(channel="telegram", chat_id="42", content="done", metadata={"_progress_id": "turn1"}))
+    await channel.send_progress(_progress("web_search(\"x\")", progress_id="turn2"))
+
+    assert bot.sent == ["read_file(\"a\")", "done", "web_search(\"x\")"]
+    assert bot.edits == [(1, "read_file(\"a\")\nexec(\"ls\")")]
+    assert list(channel._status_messages) == ["turn2"]
+    channel._app = None
+    await channel.stop()
+
+
+@pytest.mark.asyncio
+async def test_channels_without_edits_get_only_new_lines() -> None:
+    from nanobot.channels.base import BaseChannel
+
+    class PlainChannel(BaseChannel):
+        name = "plain"
+
+        def __init__(self):
+            super().__init__(None, MessageBus())
+            self.sent: list[str] = []
+
+        async def start(self) -> None: ...
+
+        async def stop(self) -> None: ...
+
+        async def send(self, msg: OutboundMessage) -> None:
+            self.sent.append(msg.content)
+
+    channel = PlainChannel()
+    await channel.send_progress(_progress("a"))
+    await channel.send_progress(_progress("a\nb"))
+    assert channel.sent == ["a", "b"]
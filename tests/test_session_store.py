@@ -0,0 +1,93 @@
+from pathlib import Path
+
+import pytest
+
+from nanobot.session.bench import run_benchmark, sample_messages
+from nanobot.session.manager import Session, SessionManager
+from nanobot.session.packed import MsgpackSessionStore, decode_records, encode_record
+
+
+def _session(key: str, count: int) -> Session:
+    session = Session(key=key)
+    for i in range(count):
+        session.add_message("user", f"msg{i}")
+    return session
+
+
+def test_records_roundtrip_and_compress_large_bodies() -> None:
+    small, large = sample_messages(10)[0], sample_messages(10)[9]
+    assert decode_records(encode_record(small) + encode_record(large)) == [small, large]
+    assert len(encode_record(large)) < len(encode_record(large, compress=False)) / 2
+
+
+@pytest.mark.parametrize("engine", ["jsonl", "msgpack"])
+def test_engines_load_tail_and_page_in(tmp_path, engine) -> None:
+    manager = SessionManager(Path(tmp_path), tail_messages=10, engine=engine)
+    manager.save(_session("test:a", 50))
+    manager.invalidate("test:a")
+
+    session = manager.get_or_create("test:a")
+    session.add_message("user", "msg50")
+    manager.save(session)
+    manager.invalidate("test:a")
+
+    session = manager.get_or_create("test:a")
+    assert session.total_messages == 51
+    assert [m["content"] for m in session.messages] == [f"msg{i}" for i in range(41, 51)]
+    assert [m["content"] for m in manager.read_messages(session, 3, 6)] == ["msg3", "msg4", "msg5"]
+    assert [s["key"] for s in manager.list_sessions()] == ["test:a"]
+
+
+def test_jsonl_sessions_migrate_on_first_access(tmp_path) -> None:
+    SessionManager(Path(tmp_path)).save(_session("test:old", 5))
+
+    manager = SessionManager(Path(tmp_path), engine="msgpack")
+    assert [s["key"] for s in manager.list_sessions()] == ["test:old"]
+    session = manager.get_or_create("test:old")
+
+    assert [m["content"] for m in session.messages] == [f"msg{i}" for i in range(5)]
+    sessions_dir = Path(tmp_path) / "sessions"
+    assert (sessions_dir / "test_old.msgpack").exists()
+    assert (sessions_dir / "test_old.jsonl.migrated").exists()
+    assert not (sessions_dir / "test_old.jsonl").exists()
+
+
+def test_torn_append_is_repaired(tmp_path) -> None:
+    store = MsgpackSessionStore(tmp_path)
+    store.rewrite("test:t", {"messages": 3}, sample_messages(3))
+    with open(store.path("test:t"), "ab") as f:
+        f.write(encode_record({"role": "user", "content": "lost"})[:-2])  # Crash mid-write
+
+    record = store.load("test:t", 10)
+    assert record.total == 3
+    assert store.read("test:t", 0, 10) == sample_messages(3)
+
+
+def test_benchmark_reports_every_engine() -> None:
+    results = run_benchmark(messages=50, tail=10, appends=5)
+    assert [r["engine"] for r in results] == ["jsonl", "msgpack", "sqlite"]
+    assert all(r["disk_bytes"] > 0 for r in results)
+
+
+def test_sqlite_appends_from_two_processes_both_land(tmp_path) -> None:
+    first = SessionManager(Path(tmp_path), engine="sqlite")
+    second = SessionManager(Path(tmp_path), engine="sqlite")  # Stands in for another process
+    a = first.get_or_create("test:shared")
+    b = second.get_or_create("test:shared")
+    a.add_message("user", "from gateway")
+    first.save(a)
+    b.add_message("user", "from cli")
+    second.save(b)
+
+    fresh = SessionManager(Path(tmp_path), engine="sqlite").get_or_create("test:shared")
+    assert [m["content"] for m in fresh.messages] == ["from gateway", "from cli"]
+
+
+def test_sqlite_imports_file_sessions_and_lists_by_update(tmp_path) -> None:
+    SessionManager(Path(tmp_path)).save(_session("test:old", 3))
+    manager = SessionManager(Path(tmp_path), engine="sqlite")
+    manager.save(_session("test:new", 1))
+
+    assert [s["key"] for s in manager.list_sessions()] == ["test:new", "test:old"]
+    assert manager.get_or_create("test:old").total_messages == 3
+    assert (Path(tmp_path) / "sessions" / "test_old.jsonl.migrated").exists()
@@ -0,0 +1,53 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.telegram import TelegramChannel
+from nanobot.config.schema import TelegramConfig
+
+
+class FakeBot:
+    async def send_chat_action(self, **kwargs) -> None:
+        pass
+
+
+def _update(message_id: int, text: str | None = None, voice=None) -> SimpleNamespace:
+    message = SimpleNamespace(
+        message_id=message_id, chat_id=42, chat=SimpleNamespace(type="private"),
+        text=text, caption=None, photo=None, voice=voice, audio=None, document=None,
+    )
+    user = SimpleNamespace(id=42, username="ada", first_name="Ada")
+    return SimpleNamespace(message=message, effective_user=user)
+
+
+@pytest.mark.asyncio
+async def test_text_after_voice_note_keeps_chat_order(monkeypatch) -> None:
+    bus = MessageBus()
+    channel = TelegramChannel(TelegramConfig(enabled=True, token="t"), bus)
+    channel._app = SimpleNamespace(bot=FakeBot())
+
+    async def fake_download(media_file, media_type) -> Path:
+        return Path("/tmp/voice.ogg")
+
+    class SlowStore:
+        async def transcribe(self, path, transcriber) -> str:
+            await asyncio.sleep(0.05)
+            return "hello from voice"
+
+    monkeypatch.setattr(channel, "_download_media", fake_download)
+    monkeypatch.setattr("nanobot.channels.telegram.get_media_store", lambda: SlowStore())
+
+    await channel._on_message(_update(1, voice=SimpleNamespace(mime_type="audio/ogg")), None)
+    await channel._on_message(_update(2, text="and a follow-up"), None)
+
+    first = await asyncio.wait_for(bus.consume_inbound(), 1)
+    second = await asyncio.wait_for(bus.consume_inbound(), 1)
+    channel._app = None  # Nothing to shut down; stop() just cancels typing tasks
+    await channel.stop()
+
+    assert "[transcription: hello from voice]" in first.content
+    assert second.content == "and a follow-up"
+    assert not channel._chat_tail
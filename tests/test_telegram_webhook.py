@@ -0,0 +1,103 @@
+import asyncio
+
+import httpx
+import pytest
+
+from nanobot.bus.queue import MessageBus
+from nanobot.channels.telegram import TelegramChannel
+from nanobot.config.schema import TelegramConfig
+
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 7,
+        "date": 1700000000,
+        "chat": {"id": 42, "type": "private"},
+        "from": {"id": 42, "is_bot": False, "first_name": "Ada"},
+        "text": "hi",
+    },
+}
+
+
+class FakeApp:
+    bot = None
+
+    def __init__(self, delays: dict[str, float] | None = None) -> None:
+        self.processed: list = []
+        self.delays = delays or {}
+
+    async def process_update(self, update) -> None:
+        await asyncio.sleep(self.delays.get(update.message.text, 0))
+        self.processed.append(update)
+
+
+@pytest.fixture
+async def webhook_channel():
+    config = TelegramConfig(
+        enabled=True, token="t", mode="webhook", webhook_host="127.0.0.1",
+        webhook_port=0, webhook_path="/tg", webhook_secret="s3cret",
+    )
+    channel = TelegramChannel(config, MessageBus())
+    channel._app = FakeApp()
+    await channel._serve_webhook()
+    yield channel
+    await channel._webhook_server.stop()
+
+
+async def _post(channel: TelegramChannel, headers: dict[str, str], body=UPDATE) -> httpx.Response:
+    url = f"http://127.0.0.1:{channel._webhook_server.port}/tg"
+    async with httpx.AsyncClient() as client:
+        return await client.post(url, json=body, headers=headers)
+
+
+@pytest.mark.asyncio
+async def test_webhook_processes_update_with_valid_secret(webhook_channel) -> None:
+    resp = await _post(webhook_channel, {"X-Telegram-Bot-Api-Secret-Token": "s3cret"})
+    await asyncio.sleep(0)
+
+    assert resp.status_code == 200
+    assert len(webhook_channel._app.processed) == 1
+    assert webhook_channel._app.processed[0].message.text == "hi"
+
+
+@pytest.mark.asyncio
+async def test_webhook_keeps_order_within_a_chat(webhook_channel) -> None:
+    webhook_channel._app = FakeApp(delays={"slow": 0.1})
+    headers = {"X-Telegram-Bot-Api-Secret-Token": "s3cret"}
+    for update_id, chat_id, text in ((1, 42, "slow"), (2, 42, "fast"), (3, 7, "other")):
+        message = {**UPDATE["message"], "chat": {"id": chat_id, "type": "private"}, "text": text}
+        await _post(webhook_channel, headers, body={"update_id": update_id, "message": message})
+    await asyncio.gather(*webhook_channel._webhook_tasks)
+
+    assert [u.message.text for u in webhook_channel._app.processed] == ["other", "slow", "fast"]
+    assert not webhook_channel._webhook_tails
+
+
+@pytest.mark.asyncio
+async def test_webhook_rejects_bad_secret_and_bad_payload(webhook_channel) -> None:
+    resp = await _post(webhook_channel, {"X-Telegram-Bot-Api-Secret-Token": "wrong"})
+    assert resp.status_code == 403
+
+    resp = await _post(webhook_channel, {"X-Telegram-Bot-Api-Secret-Token": "s3cret"}, body=[1, 2])
+    assert resp.status_code == 400
+    assert webhook_channel._app.processed == []
+
+
+@pytest.mark.asyncio
+async def test_webhook_without_configured_secret_still_requires_one() -> None:
+    config = TelegramConfig(enabled=True, token="t", mode="webhook", webhook_host="127.0.0.1",
+                            webhook_port=0, webhook_path="/tg")
+    channel = TelegramChannel(config, MessageBus())
+    channel._app = FakeApp()
+    await channel._serve_webhook()
+    try:
+        assert (await _post(channel, {})).status_code == 403
+        resp = await _post(channel, {"X-Telegram-Bot-Api-Secret-Token": channel._webhook_secret})
+        assert resp.status_code == 200
+    finally:
+        await channel._webhook_server.stop()
+
+
+def test_unknown_mode_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        TelegramConfig(mode="webhok")
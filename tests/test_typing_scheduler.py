@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+
+from nanobot.channels.typing_scheduler import TypingScheduler
+
+
+@pytest.mark.asyncio
+async def test_many_chats_share_one_paced_task() -> None:
+    calls: list[tuple[float, str]] = []
+
+    async def send(chat_id: str) -> None:
+        calls.append((time.monotonic(), chat_id))
+
+    typing = TypingScheduler("test", send, interval=10.0, rate=100.0, batch=10)
+    start = time.monotonic()
+    for i in range(30):
+        typing.start(f"chat{i}")
+    await asyncio.sleep(0.5)
+    await typing.close()
+
+    assert sorted(chat for _, chat in calls) == sorted(f"chat{i}" for i in range(30))
+    # Three batches of ten, each waiting for the previous to fit 100 calls/s
+    assert calls[-1][0] - start >= 0.19
+
+
+@pytest.mark.asyncio
+async def test_active_chat_is_refreshed_until_stopped() -> None:
+    calls: list[str] = []
+
+    async def send(chat_id: str) -> None:
+        calls.append(chat_id)
+
+    typing = TypingScheduler("test", send, interval=0.05, rate=1000.0)
+    typing.start("a")
+    await asyncio.sleep(0.18)
+    typing.stop("a")
+    refreshed = len(calls)
+    await asyncio.sleep(0.1)
+    await typing.close()
+
+    assert 3 <= refreshed <= 5
+    assert len(calls) == refreshed
+
+
+@pytest.mark.asyncio
+async def test_failed_or_expired_chat_stops() -> None:
+    calls: list[str] = []
+
+    async def send(chat_id: str) -> None:
+        calls.append(chat_id)
+        if chat_id == "gone":
+            raise RuntimeError("chat not found")
+
+    typing = TypingScheduler("test", send, interval=0.02, rate=1000.0, max_age=0.1)
+    typing.start("gone")
+    typing.start("stale")
+    await asyncio.sleep(0.2)
+
+    assert calls.count("gone") == 1
+    assert not typing.is_active("gone") and not typing.is_active("stale")
+    assert typing._task.done()
+    await typing.close()
@@ -0,0 +1,101 @@
+import json
+import time
+
+import pytest
+
+from nanobot.agent.loop import AgentLoop
+from nanobot.agent.usage import UsageLedger, origin_for_session
+from nanobot.bus.queue import MessageBus
+from nanobot.providers.base import LLMProvider, LLMResponse, ToolCallRequest
+
+
+class LoopingProvider(LLMProvider):
+    """Always asks for another tool call, like a runaway loop."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls = 0
+
+    async def chat(self, messages, tools=None, model=None, max_tokens=4096, temperature=0.7) -> LLMResponse:
+        self.calls += 1
+        return LLMResponse(
+            content=None,
+            tool_calls=[ToolCallRequest(id=f"c{self.calls}", name="list_dir", arguments={"path": "."})],
+            usage={"prompt_tokens": 400, "completion_tokens": 100, "total_tokens": 500},
+        )
+
+    def get_default_model(self) -> str:
+        return "fake-model"
+
+
+def test_origin_for_session() -> None:
+    assert origin_for_session("heartbeat") == "heartbeat"
+    assert origin_for_session("cron:abc123") == "cron"
+    assert origin_for_session("telegram:42") == "user"
+
+
+def test_record_and_report(tmp_path) -> None:
+    ledger = UsageLedger(tmp_path)
+    ledger.record("telegram:1", "gpt", "user", {"prompt_tokens": 100, "completion_tokens": 20, "cached_tokens": 60})
+    ledger.record("telegram:1", "gpt", "consolidation", {"prompt_tokens": 50, "completion_tokens": 5})
+    ledger.record("cron:x", "cheap", "cron", {"prompt_tokens": 10, "completion_tokens": 1})
+    ledger.record("cron:x", "cheap", "cron", {})  # No usage reported: ignored
+
+    by_session = ledger.report("session")
+    assert by_session["telegram:1"].calls == 2
+    assert by_session["telegram:1"].total == 175
+    assert by_session["telegram:1"].cached == 60
+    assert ledger.report("origin")["cron"].prompt == 10
+    assert set(ledger.report("model")) == {"gpt", "cheap"}
+    assert ledger.session_tokens_today("telegram:1") == 175
+
+
+def test_compact_moves_old_days_into_rollups(tmp_path) -> None:
+    ledger = UsageLedger(tmp_path)
+    old = {"t": time.time() - 3 * 86400, "s": "a:b|c", "m": "gpt", "o": "user", "p": 7, "c": 3, "k": 0}
+    ledger.ledger_file.write_text(json.dumps(old) + "\n")
+    ledger.record("a:b|c", "gpt", "user", {"prompt_tokens": 1, "completion_tokens": 1})
+
+    ledger.compact()
+
+    assert len(ledger.ledger_file.read_text().splitlines()) == 1
+    assert ledger.report("session")["a:b|c"].total == 12
+    assert ledger.report("session", days=1)["a:b|c"].total == 2
+
+
+@pytest.mark.asyncio
+async def test_session_budget_stops_runaway_tool_loop(tmp_path) -> None:
+    provider = LoopingProvider()
+    agent = AgentLoop(
+        bus=MessageBus(), provider=provider, workspace=tmp_path,
+        max_iterations=20, session_token_budget=1200,
+    )
+
+    reply = await agent.process_direct("loop forever", session_key="cli:budget")
+
+    assert provider.calls == 3
+    assert "token budget" in reply
+    assert agent.usage.report("origin")["user"].calls == 3
+
+
+def test_busy_day_does_not_compact_on_every_call(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("nanobot.agent.usage.COMPACT_THRESHOLD_BYTES", 2000)
+    ledger = UsageLedger(tmp_path)
+    ledger._compact_at = 2000
+    compactions = 0
+    original = ledger.compact
+
+    def counting_compact() -> None:
+        nonlocal compactions
+        compactions += 1
+        original()
+
+    monkeypatch.setattr(ledger, "compact", counting_compact)
+    old = {"t": time.time() - 2 * 86400, "s": "x", "m": "gpt", "o": "user", "p": 1, "c": 1, "k": 0}
+    ledger.ledger_file.write_text(json.dumps(old) + "\n")
+
+    for _ in range(200):
+        ledger.record("telegram:1", "gpt", "user", {"prompt_tokens": 1, "completion_tokens": 1})
+
+    assert compactions == 1  # Only the call that found yesterday's line
+    assert ledger.report("session")["x"].total == 2
@@ -0,0 +1,76 @@
+import json
+from functools import partial
+
+import httpx
+import pytest
+
+from nanobot.agent.tools import web
+from nanobot.agent.tools.web import WebFetchTool
+from nanobot.utils import html_extract
+from nanobot.utils.html_extract import html_to_markdown, html_to_text
+
+ARTICLE = """<!doctype html><html><head><title>Release notes</title><style>p {color: red}</style></head>
+<body><article><h2>What&apos;s new</h2>
+<p>Faster   startup and a <a href="https://example.com/docs">new
+guide</a>.</p><script>alert(1)</script>
+<ul><li>First <b>item</b></li><li>Second</li></ul>
+<p>Line one<br>Line two</p></article></body></html>"""
+
+
+def test_html_to_markdown_single_pass() -> None:
+    md = html_to_markdown(ARTICLE)
+
+    assert md == (
+        "## What's new\n\n"
+        "Faster startup and a [new guide](https://example.com/docs).\n\n"
+        "- First item\n- Second\n\n"
+        "Line one\nLine two"
+    )
+    assert "alert" not in md and "color" not in md
+
+
+def test_html_to_text_drops_markup() -> None:
+    text = html_to_text(ARTICLE)
+
+    assert "[new guide]" not in text and "new guide" in text
+    assert "##" not in text and "- First" not in text
+
+
+def _client(monkeypatch, handler) -> None:
+    transport = httpx.MockTransport(handler)
+    monkeypatch.setattr(web.httpx, "AsyncClient", partial(httpx.AsyncClient, transport=transport))
+
+
+@pytest.mark.asyncio
+async def test_fetch_extracts_html_off_loop(monkeypatch) -> None:
+    _client(monkeypatch, lambda request: httpx.Response(200, html=ARTICLE * 20))
+    try:
+        result = json.loads(await WebFetchTool().execute("https://example.com/news"))
+    finally:
+        html_extract.shutdown()
+
+    assert result["extractor"] == "readability"
+    assert "[new guide](https://example.com/docs)" in result["text"]
+    assert result["extractMs"] >= 0 and not result["truncated"]
+
+
+@pytest.mark.asyncio
+async def test_fetch_stops_at_byte_cap(monkeypatch) -> None:
+    body = b"x" * 10_000
+    _client(monkeypatch, lambda request: httpx.Response(200, content=body, headers={"content-type": "text/plain"}))
+
+    result = json.loads(await WebFetchTool(max_bytes=4096).execute("https://example.com/big.txt"))
+
+    assert result["bytes"] == 4096 and result["length"] == 4096
+    assert result["truncated"] is True
+
+
+@pytest.mark.asyncio
+async def test_fetch_rejects_binary(monkeypatch) -> None:
+    _client(monkeypatch, lambda request: httpx.Response(200, content=b"\x89PNG", headers={"content-type": "image/png"}))
+    result = json.loads(await WebFetchTool().execute("https://example.com/a.png"))
+    assert result["error"] == "Unsupported content type: image/png"
+
+    _client(monkeypatch, lambda request: httpx.Response(200, content=b"\x00\x01\x02"))
+    result = json.loads(await WebFetchTool().execute("https://example.com/blob"))
+    assert result["error"] == "Binary content"
@@ -0,0 +1,213 @@
+import asyncio
+import json
+
+import msgpack
+import pytest
+import websockets
+
+from nanobot.bus.events import OutboundMessage
+from nanobot.bus.queue import MessageBus
+from nanobot.channels import media as media_module
+from nanobot.channels.media import MediaStore
+from nanobot.channels.whatsapp import WhatsAppChannel
+from nanobot.config.schema import WhatsAppConfig
+
+
+class FakeBridge:
+    """Speaks bridge protocol v2 (or v1 with `version=1`) and records what it receives."""
+
+    def __init__(self, version: int = 2, fail_first: set[str] | None = None, silent: bool = False):
+        self.version = version
+        self.fail_first = set(fail_first or ())
+        self.silent = silent  # Never ack
+        self.frames: list[dict] = []
+        self.binary_frames = 0
+        self.delivered: list[str] = []
+        self.ws = None
+
+    async def handler(self, ws) -> None:
+        self.ws = ws
+        binary = False
+        async for raw in ws:
+            self.binary_frames += isinstance(raw, bytes)
+            frame = msgpack.unpackb(raw, raw=False) if isinstance(raw, bytes) else json.loads(raw)
+            self.frames.append(frame)
+            if frame["type"] == "hello":
+                if self.version < 2:
+                    await ws.send(json.dumps({"type": "sent", "to": None}))
+                    continue
+                binary = "msgpack" in frame["encodings"]
+                await ws.send(json.dumps({
+                    "type": "hello", "version": 2, "encoding": "msgpack" if binary else "json", "maxBatch": 50,
+                }))
+                continue
+            items = frame["items"] if frame["type"] == "batch" else [frame]
+            for item in items:
+                if self.silent:
+                    continue
+                if item.get("id") is None:
+                    self.delivered.append(item["text"])
+                    continue
+                if item["text"] in self.fail_first:
+                    self.fail_first.discard(item["text"])
+                    ack = {"type": "ack", "id": item["id"], "ok": False, "error": "Not connected", "retry": True}
+                else:
+                    if item["text"] not in self.delivered:
+                        self.delivered.append(item["text"])
+                    ack = {"type": "ack", "id": item["id"], "ok": True}
+                await ws.send(msgpack.packb(ack) if binary else json.dumps(ack))
+
+
+async def _connect(bridge: FakeBridge, **config) -> tuple[WhatsAppChannel, asyncio.Task, object]:
+    server = await websockets.serve(bridge.handler, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    channel = WhatsAppChannel(WhatsAppConfig(bridge_url=f"ws://127.0.0.1:{port}", **config), MessageBus())
+    task = asyncio.create_task(channel.start())
+    for _ in range(200):
+        if channel._connected:
+            break
+        await asyncio.sleep(0.01)
+    return channel, task, server
+
+
+async def _close(channel: WhatsAppChannel, task: asyncio.Task, server) -> None:
+    await channel.stop()
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    server.close()
+    await server.wait_closed()
+
+
+async def _settle(channel: WhatsAppChannel, timeout: float = 3.0) -> None:
+    for _ in range(int(timeout / 0.01)):
+        if not channel._pending:
+            return
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_sends_are_batched_acked_and_binary() -> None:
+    bridge = FakeBridge()
+    channel, task, server = await _connect(bridge)
+    assert channel._protocol == 2 and channel._binary
+
+    for i in range(10):
+        await channel.send(OutboundMessage(channel="whatsapp", chat_id="123@s.whatsapp.net", content=f"m{i}"))
+    await _settle(channel)
+    await _close(channel, task, server)
+
+    assert bridge.delivered == [f"m{i}" for i in range(10)]
+    sends = [f for f in bridge.frames if f["type"] != "hello"]
+    assert len(sends) < 10  # Queued together, written together
+    assert bridge.binary_frames == len(sends)
+    assert not channel._pending
+
+
+@pytest.mark.asyncio
+async def test_retryable_failure_is_resent() -> None:
+    bridge = FakeBridge(fail_first={"flaky"})
+    channel, task, server = await _connect(bridge, binary_frames=False)
+    assert channel._protocol == 2 and not channel._binary
+
+    await channel.send(OutboundMessage(channel="whatsapp", chat_id="1@s.whatsapp.net", content="flaky"))
+    await _settle(channel, timeout=5)
+    await _close(channel, task, server)
+
+    assert bridge.delivered == ["flaky"]
+    attempts = [f for f in bridge.frames if f.get("text") == "flaky"]
+    assert len(attempts) == 2 and attempts[0]["id"] == attempts[1]["id"]
+
+
+@pytest.mark.asyncio
+async def test_in_flight_window_applies_backpressure() -> None:
+    bridge = FakeBridge(silent=True)
+    channel, task, server = await _connect(bridge, max_in_flight=3, ack_timeout_seconds=60)
+
+    for i in range(3):
+        await channel.send(OutboundMessage(channel="whatsapp", chat_id="1@s.whatsapp.net", content=f"m{i}"))
+    fourth = asyncio.create_task(
+        channel.send(OutboundMessage(channel="whatsapp", chat_id="1@s.whatsapp.net", content="m3"))
+    )
+    await asyncio.sleep(0.1)
+    assert not fourth.done()
+
+    first_id = next(iter(channel._pending))
+    channel._on_ack({"id": first_id, "ok": True})
+    await asyncio.wait_for(fourth, 1)
+    await _close(channel, task, server)
+
+
+@pytest.mark.asyncio
+async def test_v1_bridge_gets_plain_send_frames() -> None:
+    bridge = FakeBridge(version=1)
+    channel, task, server = await _connect(bridge)
+    assert channel._protocol == 1
+
+    await channel.send(OutboundMessage(channel="whatsapp", chat_id="1@s.whatsapp.net", content="hi"))
+    await asyncio.sleep(0.05)
+    await _close(channel, task, server)
+
+    assert bridge.frames[-1] == {"type": "send", "to": "1@s.whatsapp.net", "text": "hi"}
+    assert not channel._pending
+
+
+@pytest.mark.asyncio
+async def test_voice_note_is_stored_and_transcribed(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(media_module, "_default_store", MediaStore(tmp_path))
+    channel = WhatsAppChannel(WhatsAppConfig(), MessageBus())
+    channel._binary = True
+
+    class FakeTranscriber:
+        async def transcribe(self, path):
+            assert path.read_bytes() == b"OggS-voice"
+            return "call me back"
+
+    channel._transcriber = FakeTranscriber()
+    frame = msgpack.packb({
+        "type": "message", "id": "ABC", "sender": "42@s.whatsapp.net", "pn": "", "content": "[Voice Message]",
+        "timestamp": 1, "isGroup": False,
+        "media": {"kind": "audio", "mime": "audio/ogg; codecs=opus", "data": b"OggS-voice"},
+    }, use_bin_type=True)
+    await channel._handle_bridge_message(frame)
+    inbound = await asyncio.wait_for(channel.bus.consume_inbound(), 2)
+
+    assert inbound.content == "[transcription: call me back]"
+    assert inbound.media and inbound.media[0].endswith(".ogg")
+
+
+@pytest.mark.asyncio
+async def test_full_window_gives_up_instead_of_blocking() -> None:
+    bridge = FakeBridge(silent=True)
+    channel, task, server = await _connect(bridge, max_in_flight=1, ack_timeout_seconds=0.2)
+
+    await channel.send(OutboundMessage(channel="whatsapp", chat_id="1@s.whatsapp.net", content="m0"))
+    await asyncio.wait_for(
+        channel.send(OutboundMessage(channel="whatsapp", chat_id="1@s.whatsapp.net", content="m1")), 1,
+    )
+    await _close(channel, task, server)
+
+    assert [item["text"] for item in (p.item for p in channel._pending.values())] == ["m0"]
+
+
+@pytest.mark.asyncio
+async def test_text_after_media_waits_for_it(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(media_module, "_default_store", MediaStore(tmp_path))
+    channel = WhatsAppChannel(WhatsAppConfig(), MessageBus())
+
+    class SlowTranscriber:
+        async def transcribe(self, path):
+            await asyncio.sleep(0.05)
+            return "voice"
+
+    channel._transcriber = SlowTranscriber()
+    base = {"type": "message", "sender": "42@s.whatsapp.net", "pn": "", "timestamp": 1, "isGroup": False}
+    await channel._handle_bridge_message(json.dumps({
+        **base, "id": "A", "content": "[Voice Message]",
+        "media": {"kind": "audio", "mime": "audio/ogg", "data": "T2dnUw=="},
+    }))
+    await channel._handle_bridge_message(json.dumps({**base, "id": "B", "content": "and this"}))
+    first = await asyncio.wait_for(channel.bus.consume_inbound(), 2)
+    second = await asyncio.wait_for(channel.bus.consume_inbound(), 2)
+
+    assert first.content == "[transcription: voice]"
+    assert second.content == "and this"